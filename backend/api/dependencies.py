@@ -0,0 +1,32 @@
+from typing import Annotated
+
+from core.async_security import get_session_user
+from fastapi import Depends, HTTPException, Request
+
+
+async def get_current_session(request: Request) -> dict | None:
+    """
+    Session for the request's session_token cookie, or None.
+    Resolved at most once per request and cached on request.state, so
+    handlers and helpers can call it repeatedly without extra Redis lookups.
+    """
+    if hasattr(request.state, "session"):
+        return request.state.session
+
+    session_token = request.cookies.get("session_token")
+    session = await get_session_user(session_token) if session_token else None
+    request.state.session = session
+    return session
+
+
+CurrentSession = Annotated[dict | None, Depends(get_current_session)]
+
+
+async def require_session(session: CurrentSession) -> dict:
+    """Same as get_current_session, but rejects anonymous requests with 401"""
+    if not session:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    return session
+
+
+RequiredSession = Annotated[dict, Depends(require_session)]
@@ -1,14 +1,17 @@
 import json
 from contextlib import suppress
+from typing import Literal
 
-from core.cache import get_redis_client
-from core.db import (
+from api.dependencies import CurrentSession, RequiredSession, get_current_session
+from core.async_cache import get_redis_client
+from core.async_db import (
     apply_to_posting,
     check_user_application_exists,
+    check_user_availability,
     create_posting_in_db,
-    create_user,
     delete_posting_from_db,
     delete_user_from_db,
+    find_registration_conflict,
     get_all_postings,
     get_application_details,
     get_applications_by_posting,
@@ -19,24 +22,30 @@ from core.db import (
     get_posting_with_public_stats,
     get_postings_by_user,
     get_public_postings,
-    get_user_by_email,
     get_user_by_id,
-    get_user_by_username,
     get_user_posting_stats,
-    track_posting_view,
+    register_user,
     update_application_status,
     update_posting_in_db,
     update_user_in_db,
 )
+from core.async_security import (
+    list_sessions,
+    login_user,
+    logout_all_sessions,
+    logout_user,
+)
 from core.logger import logger
-from core.security import get_session_user, hash_password, login_user, logout_user
+from core.passwords import hash_password
+from core.rate_limit import check_rate_limit
 from core.telemetry import (
     record_application_submitted,
     record_login_attempt,
     record_posting_created,
     record_user_registration,
 )
-from core.utility import json_serializer
+from core.utility import client_ip, json_serializer
+from core.view_buffer import track_posting_view
 from fastapi import APIRouter, Form, HTTPException, Request
 from fastapi.responses import JSONResponse, RedirectResponse, Response
 from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
@@ -58,6 +67,7 @@ async def metrics():
 
 @api_router.post("/users")
 async def create_user_account(
+    request: Request,
     name: str = Form(...),
     surname: str = Form(...),
     username: str = Form(...),
@@ -65,6 +75,10 @@ async def create_user_account(
     password: str = Form(...),
 ):
     try:
+        await check_rate_limit(
+            "register", ip=client_ip(request), email=email, username=username
+        )
+
         # Check if username and email are the same
         if username.lower() == email.lower():
             logger.info(
@@ -75,28 +89,26 @@ async def create_user_account(
                 url="/register.html?error=username_email_same", status_code=303
             )
 
-        # Check if email already exists
-        if get_user_by_email(email):
-            logger.info(f"Registration failed for {email}: Email already in use")
-            record_user_registration("error")
-            return RedirectResponse(
-                url="/register.html?error=email_taken", status_code=303
+        # Skip bcrypt for an email or username that is already taken
+        conflict = await find_registration_conflict(email, username)
+        if conflict is None:
+            hashed_password = await hash_password(password)
+            result = await register_user(
+                name, surname, username, email, hashed_password=hashed_password
             )
+            # A concurrent registration may still have won the race
+            conflict = result.get("error")
 
-        # Check if username already exists
-        if get_user_by_username(username):
-            logger.info(f"Registration failed for {username}: Username already taken")
+        if conflict:
+            logger.info(f"Registration failed for {email} / {username}: {conflict}")
             record_user_registration("error")
             return RedirectResponse(
-                url="/register.html?error=username_taken", status_code=303
+                url=f"/register.html?error={conflict}", status_code=303
             )
 
-        user_id = create_user(
-            name, surname, username, email, hashed_password=hash_password(password)
-        )
-
+        user_id = result["user_id"]
         user_data = {"id": user_id, "name": name, "email": email}
-        get_redis_client().set(f"user:{user_id}", json.dumps(user_data))
+        await get_redis_client().set(f"user:{user_id}", json.dumps(user_data))
         logger.info(f"Account created successfully for user: {email}")
         record_user_registration("success")
         return RedirectResponse(
@@ -112,16 +124,27 @@ async def create_user_account(
         )
 
 
+@api_router.get("/users/availability")
+async def user_availability(
+    request: Request, username: str | None = None, email: str | None = None
+):
+    """Availability of a username and/or email, for validation while typing"""
+    if not username and not email:
+        raise HTTPException(status_code=400, detail="username or email is required")
+    await check_rate_limit("availability", ip=client_ip(request))
+    return await check_user_availability(username=username, email=email)
+
+
 @api_router.get("/users/{user_id}")
 async def get_user(user_id: int):
     cache = get_redis_client()
-    cached = cache.get(f"user:{user_id}")
+    cached = await cache.get(f"user:{user_id}")
     if cached:
         return json.loads(cached)
 
-    user = get_user_by_id(user_id)
+    user = await get_user_by_id(user_id)
     if user:
-        cache.set(f"user:{user_id}", json.dumps(user, default=json_serializer))
+        await cache.set(f"user:{user_id}", json.dumps(user, default=json_serializer))
         return user
     else:
         raise HTTPException(status_code=404, detail="User not found")
@@ -135,7 +158,7 @@ async def update_user(
     username: str = Form(None),
     email: str = Form(None),
 ):
-    success = update_user_in_db(user_id, name, surname, username, email)
+    success = await update_user_in_db(user_id, name, surname, username, email)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
     return JSONResponse(content={"message": "User updated successfully"})
@@ -143,27 +166,25 @@ async def update_user(
 
 @api_router.delete("/users/{user_id}")
 async def delete_user(user_id: int):
-    success = delete_user_from_db(user_id)
+    success = await delete_user_from_db(user_id)
     if not success:
         raise HTTPException(status_code=404, detail="User not found")
+    await logout_all_sessions(user_id)
     return JSONResponse(content={"message": "User deleted successfully"})
 
 
 @api_router.post("/postings")
 async def create_posting(
-    request: Request,
+    session_data: CurrentSession,
     title: str = Form(...),
     post_description: str = Form(...),
     category: str = Form(...),
 ):
-    session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
-
     if not session_data:
         return RedirectResponse(url="/login.html?error=auth_required", status_code=303)
 
     user_id = session_data["user_id"]
-    create_posting_in_db(title, post_description, category, user_id)
+    await create_posting_in_db(title, post_description, category, user_id)
     record_posting_created()
     return RedirectResponse(
         url="/my-postings.html?success=posting_created", status_code=303
@@ -172,30 +193,27 @@ async def create_posting(
 
 @api_router.post("/postings/update")
 async def update_posting(
-    request: Request,
+    session_data: CurrentSession,
     posting_id: int = Form(...),
     title: str = Form(...),
     category: str = Form(...),
     post_description: str = Form(...),
     status: str = Form(...),
 ):
-    session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
-
     if not session_data:
         return RedirectResponse(url="/login.html?error=auth_required", status_code=303)
 
     try:
         # Check if user owns this posting before updating
         user_id = session_data["user_id"]
-        posting = get_posting_by_id(posting_id)
+        posting = await get_posting_by_id(posting_id)
 
         if not posting or posting["user_id"] != user_id:
             return RedirectResponse(
                 url="/my-postings.html?error=access_denied", status_code=303
             )
 
-        success = update_posting_in_db(
+        success = await update_posting_in_db(
             posting_id, title, category, post_description, status
         )
         if not success:
@@ -213,16 +231,10 @@ async def update_posting(
 
 
 @api_router.get("/posting/{posting_id}/manage")
-async def get_posting_for_edit(posting_id: int, request: Request):
+async def get_posting_for_edit(posting_id: int, session_data: RequiredSession):
     """Get posting data for editing (API endpoint)"""
-    session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
-
-    if not session_data:
-        raise HTTPException(status_code=401, detail="Authentication required")
-
     user_id = session_data["user_id"]
-    posting = get_posting_by_id(posting_id)
+    posting = await get_posting_by_id(posting_id)
 
     if not posting:
         raise HTTPException(status_code=404, detail="Posting not found")
@@ -246,18 +258,12 @@ async def get_posting_for_edit(posting_id: int, request: Request):
 
 
 @api_router.delete("/postings/{posting_id}")
-async def delete_posting(posting_id: int, request: Request):
+async def delete_posting(posting_id: int, session_data: RequiredSession):
     """Delete a posting (owner only)"""
-    session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
-
-    if not session_data:
-        raise HTTPException(status_code=401, detail="Authentication required")
-
     user_id = session_data["user_id"]
 
     # Verify user owns this posting
-    posting = get_posting_by_id(posting_id)
+    posting = await get_posting_by_id(posting_id)
     if not posting:
         raise HTTPException(status_code=404, detail="Posting not found")
 
@@ -267,7 +273,7 @@ async def delete_posting(posting_id: int, request: Request):
             detail="Access denied - you can only delete your own postings",
         )
 
-    success = delete_posting_from_db(posting_id)
+    success = await delete_posting_from_db(posting_id)
     if not success:
         raise HTTPException(status_code=500, detail="Failed to delete posting")
 
@@ -276,14 +282,14 @@ async def delete_posting(posting_id: int, request: Request):
 
 @api_router.get("/postings")
 async def api_get_all_postings():
-    return get_all_postings()
+    return await get_all_postings()
 
 
 @api_router.get("/postings/public")
 async def get_public_postings_endpoint():
     """Get all active postings with limited public information"""
     try:
-        postings = get_public_postings()
+        postings = await get_public_postings()
         return postings
     except Exception as e:
         logger.error(f"Error fetching public postings: {e}")
@@ -291,17 +297,11 @@ async def get_public_postings_endpoint():
 
 
 @api_router.get("/postings/my-postings")
-async def get_my_postings(request: Request):
+async def get_my_postings(session_data: RequiredSession):
     """Get current user's postings with pre-rendered HTML"""
-    session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
-
-    if not session_data:
-        raise HTTPException(status_code=401, detail="Authentication required")
-
     user_id = session_data["user_id"]
     try:
-        postings = get_postings_by_user(user_id)
+        postings = await get_postings_by_user(user_id)
 
         # Add formatted data for each posting - data processing only
         for posting in postings:
@@ -322,7 +322,7 @@ async def get_my_postings(request: Request):
 
 @api_router.get("/postings/by_user/{user_id}")
 async def api_get_postings_by_user(user_id: int):
-    return get_postings_by_user(user_id)
+    return await get_postings_by_user(user_id)
 
 
 @api_router.get("/postings/{posting_identifier}")
@@ -330,10 +330,10 @@ async def api_get_posting(posting_identifier: str):
     # Try to parse as integer first (for backward compatibility)
     try:
         posting_id = int(posting_identifier)
-        posting = get_posting_by_id(posting_id)
+        posting = await get_posting_by_id(posting_id)
     except ValueError:
         # If not an integer, treat as hash
-        posting = get_posting_by_hash(posting_identifier)
+        posting = await get_posting_by_hash(posting_identifier)
 
     if not posting:
         raise HTTPException(status_code=404, detail="Posting not found")
@@ -343,6 +343,7 @@ async def api_get_posting(posting_identifier: str):
 @api_router.post("/applications")
 async def apply(
     request: Request,
+    session_data: CurrentSession,
     posting_id: int = Form(...),
     message: str = Form(None),
     cover_letter: str = Form(None),
@@ -351,20 +352,18 @@ async def apply(
         f"Application received for posting {posting_id}, message: {message[:50] if message else 'None'}"
     )
 
-    session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
-
     if not session_data:
         logger.warning(f"Unauthenticated application attempt for posting {posting_id}")
         return RedirectResponse(url="/login.html?error=auth_required", status_code=303)
 
     user_id = session_data["user_id"]
+    await check_rate_limit("apply", ip=client_ip(request), user=user_id)
 
     try:
-        result = apply_to_posting(user_id, posting_id, message, cover_letter)
+        result = await apply_to_posting(user_id, posting_id, message, cover_letter)
 
         # Get posting hash for proper redirect
-        posting = get_posting_by_id(posting_id)
+        posting = await get_posting_by_id(posting_id)
         if not posting:
             return RedirectResponse(
                 url="/my-postings.html?error=posting_not_found", status_code=303
@@ -399,31 +398,34 @@ async def apply(
 
 @api_router.get("/applications/by_user/{user_id}")
 async def api_get_applications_by_user(user_id: int):
-    return get_applications_by_user(user_id)
+    return await get_applications_by_user(user_id)
 
 
 @api_router.get("/applications/by_posting/{posting_id}")
 async def api_get_applications_by_posting(posting_id: int):
-    return get_applications_by_posting(posting_id)
+    return await get_applications_by_posting(posting_id)
 
 
 @api_router.get("/postings/view/{posting_hash}")
-async def view_posting(posting_hash: str, request: Request):
+async def view_posting(
+    posting_hash: str,
+    request: Request,
+    session_data: CurrentSession,
+):
     """View a posting and track the view - return comprehensive data"""
     session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
 
     # Get posting by hash first (fallback to treating as ID for compatibility)
     posting = None
     with suppress(Exception):
         # Try hash lookup first
-        posting = get_posting_by_hash(posting_hash)
+        posting = await get_posting_by_hash(posting_hash)
 
     if not posting:
         # Fallback to ID lookup for existing functionality
         try:
             posting_id = int(posting_hash)
-            posting = get_posting_by_id(posting_id)
+            posting = await get_posting_by_id(posting_id)
         except ValueError:
             pass
 
@@ -431,14 +433,16 @@ async def view_posting(posting_hash: str, request: Request):
         raise HTTPException(status_code=404, detail="Posting not found")
 
     user_id = session_data["user_id"] if session_data else None
-    ip_address = request.client.host if request.client else None
+    ip_address = client_ip(request)
     user_agent = request.headers.get("user-agent")
 
     # Track the view using posting ID
-    track_posting_view(posting["id"], user_id, ip_address, user_agent, session_token)
+    await track_posting_view(
+        posting["id"], user_id, ip_address, user_agent, session_token
+    )
 
     # Get posting with public stats
-    posting_with_stats = get_posting_with_public_stats(posting["id"])
+    posting_with_stats = await get_posting_with_public_stats(posting["id"])
     if not posting_with_stats:
         posting_with_stats = posting
 
@@ -451,7 +455,7 @@ async def view_posting(posting_hash: str, request: Request):
     if is_authenticated:
         is_owner = posting_with_stats["user_id"] == session_data["user_id"]
         if not is_owner:
-            has_applied = check_user_application_exists(
+            has_applied = await check_user_application_exists(
                 session_data["user_id"], posting_with_stats["id"]
             )
             can_apply = not has_applied
@@ -468,16 +472,17 @@ async def view_posting(posting_hash: str, request: Request):
 
 
 @api_router.get("/postings/{posting_id}/analytics")
-async def get_posting_analytics_endpoint(posting_id: int, request: Request):
-    """Get comprehensive analytics for a posting (owner only)"""
-    session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
-
-    if not session_data:
-        raise HTTPException(status_code=401, detail="Authentication required")
-
+async def get_posting_analytics_endpoint(
+    posting_id: int,
+    session_data: RequiredSession,
+    granularity: Literal["daily", "hourly"] = "daily",
+):
+    """
+    Get comprehensive analytics for a posting (owner only).
+    ?granularity=hourly adds the last 48 hours by hour.
+    """
     user_id = session_data["user_id"]
-    analytics = get_posting_analytics(posting_id, user_id)
+    analytics = await get_posting_analytics(posting_id, user_id, granularity)
 
     if not analytics:
         raise HTTPException(
@@ -488,42 +493,31 @@ async def get_posting_analytics_endpoint(posting_id: int, request: Request):
 
 
 @api_router.get("/dashboard/stats")
-async def get_dashboard_stats(request: Request):
-    """Get dashboard statistics for current user"""
-    session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
-
-    if not session_data:
-        raise HTTPException(status_code=401, detail="Authentication required")
-
+async def get_dashboard_stats(
+    session_data: RequiredSession, granularity: Literal["daily", "hourly"] = "daily"
+):
+    """
+    Get dashboard statistics for current user.
+    ?granularity=hourly adds the last 48 hours by hour.
+    """
     user_id = session_data["user_id"]
-    return get_user_posting_stats(user_id)
+    return await get_user_posting_stats(user_id, granularity)
 
 
 @api_router.get("/applications/my-applications")
-async def get_my_applications(request: Request):
+async def get_my_applications(session_data: RequiredSession):
     """Get current user's applications"""
-    session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
-
-    if not session_data:
-        raise HTTPException(status_code=401, detail="Authentication required")
-
     user_id = session_data["user_id"]
-    return get_applications_by_user(user_id)
+    return await get_applications_by_user(user_id)
 
 
 @api_router.get("/applications/{application_id}")
-async def get_application_details_endpoint(application_id: int, request: Request):
+async def get_application_details_endpoint(
+    application_id: int, session_data: RequiredSession
+):
     """Get application details (for owner or applicant)"""
-    session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
-
-    if not session_data:
-        raise HTTPException(status_code=401, detail="Authentication required")
-
     user_id = session_data["user_id"]
-    application = get_application_details(application_id, user_id)
+    application = await get_application_details(application_id, user_id)
 
     if not application:
         raise HTTPException(
@@ -536,21 +530,15 @@ async def get_application_details_endpoint(application_id: int, request: Request
 @api_router.post("/applications/{application_id}/review")
 async def review_application(
     application_id: int,
-    request: Request,
+    session_data: RequiredSession,
     status: str = Form(...),
     reviewer_notes: str = Form(None),
 ):
     """Review an application (posting owner only)"""
-    session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
-
-    if not session_data:
-        raise HTTPException(status_code=401, detail="Authentication required")
-
     user_id = session_data["user_id"]
 
     # Verify that the user owns the posting for this application
-    application = get_application_details(application_id, user_id)
+    application = await get_application_details(application_id, user_id)
     if not application or application["posting_owner_id"] != user_id:
         raise HTTPException(status_code=403, detail="Access denied")
 
@@ -559,7 +547,7 @@ async def review_application(
     if status not in valid_statuses:
         raise HTTPException(status_code=400, detail="Invalid status")
 
-    success = update_application_status(application_id, status, reviewer_notes)
+    success = await update_application_status(application_id, status, reviewer_notes)
     if not success:
         raise HTTPException(status_code=404, detail="Application not found")
 
@@ -568,13 +556,11 @@ async def review_application(
 
 # HTML Page Routes with Server-Side Logic
 @api_router.get("/data-view")
-async def data_view_page(request: Request):
+async def data_view_page(session_data: CurrentSession):
     """Serve data view page with server-side rendered postings"""
-    session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
 
     # Get all public postings
-    postings = get_public_postings()
+    postings = await get_public_postings()
 
     # Mark which postings belong to current user
     current_user_id = session_data["user_id"] if session_data else None
@@ -590,21 +576,24 @@ async def data_view_page(request: Request):
 
 
 @api_router.get("/posting/{posting_id}")
-async def view_posting_page(posting_id: int, request: Request):
+async def view_posting_page(
+    posting_id: int,
+    request: Request,
+    session_data: CurrentSession,
+):
     """Serve individual posting view page"""
     session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
 
     # Track the view and get posting details
     user_id = session_data["user_id"] if session_data else None
-    ip_address = request.client.host if request.client else None
+    ip_address = client_ip(request)
     user_agent = request.headers.get("user-agent")
 
     # Track the view
-    track_posting_view(posting_id, user_id, ip_address, user_agent, session_token)
+    await track_posting_view(posting_id, user_id, ip_address, user_agent, session_token)
 
     # Get posting with stats
-    posting = get_posting_with_public_stats(posting_id)
+    posting = await get_posting_with_public_stats(posting_id)
     if not posting:
         raise HTTPException(status_code=404, detail="Posting not found")
 
@@ -615,24 +604,29 @@ async def view_posting_page(posting_id: int, request: Request):
 
 
 @api_router.get("/posting/{posting_hash}/page")
-async def posting_detail_page(posting_hash: str, request: Request):
+async def posting_detail_page(
+    posting_hash: str,
+    request: Request,
+    session_data: CurrentSession,
+):
     """Return posting data as JSON for frontend to render"""
     session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
 
     # Get posting by hash
-    posting = get_posting_by_hash(posting_hash)
+    posting = await get_posting_by_hash(posting_hash)
     if not posting:
         raise HTTPException(status_code=404, detail="Posting not found")
 
     # Track the view
     user_id = session_data["user_id"] if session_data else None
-    ip_address = request.client.host if request.client else None
+    ip_address = client_ip(request)
     user_agent = request.headers.get("user-agent")
-    track_posting_view(posting["id"], user_id, ip_address, user_agent, session_token)
+    await track_posting_view(
+        posting["id"], user_id, ip_address, user_agent, session_token
+    )
 
     # Get updated posting with stats
-    posting_with_stats = get_posting_with_public_stats(posting["id"])
+    posting_with_stats = await get_posting_with_public_stats(posting["id"])
     if not posting_with_stats:
         posting_with_stats = posting
 
@@ -661,13 +655,11 @@ async def posting_detail_static():
 
 
 @api_router.get("/postings-data")
-async def get_postings_data(request: Request):
+async def get_postings_data(session_data: CurrentSession):
     """API endpoint to get postings with user context"""
-    session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
 
     # Get all public postings
-    postings = get_public_postings()
+    postings = await get_public_postings()
 
     # Add user context to each posting - business logic only
     current_user_id = session_data["user_id"] if session_data else None
@@ -700,14 +692,15 @@ async def contact_form(
 @api_router.post("/login")
 async def login(request: Request, email: str = Form(...), password: str = Form(...)):
     try:
+        await check_rate_limit("login", ip=client_ip(request), email=email)
+
         # Check if user is already logged in
-        session_token = request.cookies.get("session_token")
-        if session_token and get_session_user(session_token):
+        if await get_current_session(request):
             logger.info("User already logged in, redirecting to data view")
             return RedirectResponse(url="/data-view.html", status_code=303)
 
         logger.info(f"Login attempt: {email}")
-        result = login_user(email, password)
+        result = await login_user(email, password)
         if result is None:
             logger.info(f"Login failed for {email}: Invalid credentials")
             record_login_attempt("failure")
@@ -739,18 +732,34 @@ async def login(request: Request, email: str = Form(...), password: str = Form(.
 async def logout(request: Request):
     session_token = request.cookies.get("session_token")
     logger.info(f"Logout attempt with session token: {session_token}")
-    logout_user(session_token)
+    await logout_user(session_token)
 
     response = RedirectResponse(url="/index.html?success=logged_out", status_code=303)
     response.delete_cookie("session_token")
     return response
 
 
-@api_router.get("/auth/status")
-async def auth_status(request: Request):
-    session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
+@api_router.post("/logout/all")
+async def logout_everywhere(session_data: RequiredSession):
+    user_id = session_data["user_id"]
+    revoked = await logout_all_sessions(user_id)
+    logger.info(f"Logged out user {user_id} from {revoked} sessions")
+
+    response = RedirectResponse(url="/index.html?success=logged_out", status_code=303)
+    response.delete_cookie("session_token")
+    return response
+
+
+@api_router.get("/sessions")
+async def get_my_sessions(request: Request, session_data: RequiredSession):
+    sessions = await list_sessions(
+        session_data["user_id"], request.cookies.get("session_token")
+    )
+    return {"sessions": sessions}
+
 
+@api_router.get("/auth/status")
+async def auth_status(session_data: CurrentSession):
     if session_data:
         return JSONResponse(content={"authenticated": True, "user": session_data})
     else:
@@ -758,24 +767,18 @@ async def auth_status(request: Request):
 
 
 @api_router.get("/profile/data")
-async def get_profile_data(request: Request):
+async def get_profile_data(session_data: RequiredSession):
     """Get complete profile data with stats and activity"""
-    session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
-
-    if not session_data:
-        raise HTTPException(status_code=401, detail="Authentication required")
-
     user_id = session_data["user_id"]
 
     # Get user details
-    user = get_user_by_id(user_id)
+    user = await get_user_by_id(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Get user postings and applications for stats
-    postings = get_postings_by_user(user_id)
-    applications = get_applications_by_user(user_id)
+    postings = await get_postings_by_user(user_id)
+    applications = await get_applications_by_user(user_id)
 
     # Calculate stats - business logic only
     total_postings = len(postings) if postings else 0
@@ -798,10 +801,7 @@ async def get_profile_data(request: Request):
 
 
 @api_router.get("/auth/buttons")
-async def auth_buttons(request: Request):
-    session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
-
+async def auth_buttons(session_data: CurrentSession):
     if session_data:
         return JSONResponse(
             content={
@@ -827,10 +827,7 @@ async def auth_buttons(request: Request):
 
 
 @api_router.get("/navigation")
-async def get_navigation(request: Request):
-    session_token = request.cookies.get("session_token")
-    session_data = get_session_user(session_token)
-
+async def get_navigation(session_data: CurrentSession):
     if session_data:
         # Authenticated user navigation
         nav_items = [
@@ -872,41 +869,36 @@ async def get_navigation(request: Request):
 
 # Authentication-aware redirects
 @router.get("/")
-async def root(request: Request):
-    session_token = request.cookies.get("session_token")
-    if session_token and get_session_user(session_token):
+async def root(session_data: CurrentSession):
+    if session_data:
         return RedirectResponse(url="/data-view.html", status_code=302)
     return RedirectResponse(url="/index.html", status_code=302)
 
 
 @router.get("/login")
-async def login_redirect(request: Request):
-    session_token = request.cookies.get("session_token")
-    if session_token and get_session_user(session_token):
+async def login_redirect(session_data: CurrentSession):
+    if session_data:
         return RedirectResponse(url="/data-view.html", status_code=302)
     return RedirectResponse(url="/login.html", status_code=302)
 
 
 @router.get("/register")
-async def register_redirect(request: Request):
-    session_token = request.cookies.get("session_token")
-    if session_token and get_session_user(session_token):
+async def register_redirect(session_data: CurrentSession):
+    if session_data:
         return RedirectResponse(url="/data-view.html", status_code=302)
     return RedirectResponse(url="/register.html", status_code=302)
 
 
 @router.get("/data-view")
-async def data_view_redirect(request: Request):
-    session_token = request.cookies.get("session_token")
-    if not session_token or not get_session_user(session_token):
+async def data_view_redirect(session_data: CurrentSession):
+    if not session_data:
         return RedirectResponse(url="/login.html", status_code=302)
     return RedirectResponse(url="/data-view.html", status_code=302)
 
 
 @router.get("/profile")
-async def profile_redirect(request: Request):
-    session_token = request.cookies.get("session_token")
-    if not session_token or not get_session_user(session_token):
+async def profile_redirect(session_data: CurrentSession):
+    if not session_data:
         return RedirectResponse(url="/login.html", status_code=302)
     return RedirectResponse(url="/profile.html", status_code=302)
 
@@ -0,0 +1,49 @@
+import redis.asyncio as redis
+
+from .config import REDIS_CONFIG, REDIS_POOL_CONFIG
+from .telemetry import register_pool_stats, unregister_pool_stats
+
+# Async counterpart of core.cache for the request path. The pool is bound to
+# the event loop it was created on, so it is opened from the app lifespan.
+_client: redis.Redis | None = None
+
+
+def _pool_stats() -> dict:
+    if _client is None:
+        return {}
+    pool = _client.connection_pool
+    return {
+        "in_use": len(pool._in_use_connections),
+        "idle": len(pool._available_connections),
+    }
+
+
+def init_redis_client() -> redis.Redis:
+    global _client
+    if _client is None:
+        pool = redis.ConnectionPool(
+            host=REDIS_CONFIG["host"],
+            port=REDIS_CONFIG["port"],
+            password=REDIS_CONFIG.get("password"),
+            db=REDIS_CONFIG["db"],
+            max_connections=REDIS_POOL_CONFIG["max_connections"],
+            socket_timeout=REDIS_POOL_CONFIG["socket_timeout"],
+            socket_connect_timeout=REDIS_POOL_CONFIG["socket_connect_timeout"],
+            health_check_interval=REDIS_POOL_CONFIG["health_check_interval"],
+            retry_on_timeout=REDIS_POOL_CONFIG["retry_on_timeout"],
+        )
+        _client = redis.Redis(connection_pool=pool)
+        register_pool_stats("redis_async", _pool_stats)
+    return _client
+
+
+async def close_redis_client():
+    global _client
+    if _client is not None:
+        unregister_pool_stats("redis_async")
+        await _client.aclose(close_connection_pool=True)
+        _client = None
+
+
+def get_redis_client() -> redis.Redis:
+    return init_redis_client()
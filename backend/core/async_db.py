@@ -0,0 +1,631 @@
+import time
+import weakref
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+
+import psycopg
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+from redis.exceptions import RedisError
+
+from . import queries
+from .async_cache import get_redis_client
+from .config import POSTGRES_CONFIG, POSTGRES_POOL_CONFIG
+from .logger import logger
+from .telemetry import (
+    record_pool_wait,
+    record_user_filter_lookup,
+    register_pool_stats,
+    unregister_pool_stats,
+)
+from .unique_views import (
+    hll_key,
+    merge_live_unique_views,
+    queue_unique_view,
+    viewer_id,
+)
+from .user_filter import FILTER_KEY, filter_item, filter_items, insert_command
+from .utility import POSTING_HASH_ATTEMPTS, generate_posting_hash
+from .view_encoding import (
+    cached_user_agent_ids,
+    normalize_user_agent,
+    remember_user_agent_ids,
+    session_hash,
+)
+
+# Async counterpart of core.db for the request path. Same functions, same SQL
+# (core.queries), backed by psycopg 3 and its own pool opened in the lifespan.
+_pool: AsyncConnectionPool | None = None
+
+# When each pooled connection was last returned, so checkouts only pay for a
+# ping when the connection sat idle longer than the health-check interval
+_returned_at: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _connection_kwargs() -> dict:
+    return {
+        "host": POSTGRES_CONFIG["host"],
+        "dbname": POSTGRES_CONFIG["dbname"],
+        "user": POSTGRES_CONFIG["user"],
+        "password": POSTGRES_CONFIG["password"],
+        "port": POSTGRES_CONFIG["port"],
+        "row_factory": dict_row,
+    }
+
+
+async def _mark_returned(conn: psycopg.AsyncConnection):
+    _returned_at[conn] = time.monotonic()
+
+
+async def _check_connection(conn: psycopg.AsyncConnection):
+    returned_at = _returned_at.get(conn)
+    interval = POSTGRES_POOL_CONFIG["health_check_interval"]
+    if returned_at is not None and time.monotonic() - returned_at < interval:
+        return
+    await AsyncConnectionPool.check_connection(conn)
+
+
+def _pool_stats() -> dict:
+    if _pool is None:
+        return {}
+    stats = _pool.get_stats()
+    return {
+        "in_use": stats["pool_size"] - stats["pool_available"],
+        "idle": stats["pool_available"],
+    }
+
+
+async def init_db_pool() -> AsyncConnectionPool:
+    global _pool
+    if _pool is None:
+        _pool = AsyncConnectionPool(
+            kwargs=_connection_kwargs(),
+            min_size=POSTGRES_POOL_CONFIG["min_size"],
+            max_size=POSTGRES_POOL_CONFIG["max_size"],
+            timeout=POSTGRES_POOL_CONFIG["acquire_timeout"],
+            check=_check_connection,
+            reset=_mark_returned,
+            name="postgres_async",
+            open=False,
+        )
+        await _pool.open()
+        register_pool_stats("postgres_async", _pool_stats)
+    return _pool
+
+
+async def close_db_pool():
+    global _pool
+    if _pool is not None:
+        unregister_pool_stats("postgres_async")
+        await _pool.close()
+        _pool = None
+
+
+@asynccontextmanager
+async def get_db_connection():
+    if _pool is not None:
+        start = time.monotonic()
+        async with _pool.connection() as conn:
+            record_pool_wait("postgres_async", time.monotonic() - start)
+            yield conn
+        return
+
+    conn = await psycopg.AsyncConnection.connect(**_connection_kwargs())
+    try:
+        yield conn
+    finally:
+        await conn.close()
+
+
+async def get_user_by_email(email: str):
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.SELECT_USER_BY_EMAIL, (email,))
+        return await cursor.fetchone()
+
+
+async def get_user_by_username(username: str):
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.SELECT_USER_BY_USERNAME, (username,))
+        return await cursor.fetchone()
+
+
+async def check_user_availability(
+    username: str | None = None, email: str | None = None
+) -> dict:
+    """
+    {"username": bool, "email": bool} for the values given, True meaning
+    available. Values the user filter rules out never reach Postgres.
+    """
+    fields = {
+        field: value
+        for field, value in (("username", username), ("email", email))
+        if value
+    }
+    if not fields:
+        return {}
+
+    items = [filter_item(field, value) for field, value in fields.items()]
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.exists(FILTER_KEY)
+        pipe.execute_command("BF.MEXISTS", FILTER_KEY, *items)
+        filter_exists, maybe_taken = await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"User filter unavailable, checking the database: {e}")
+        filter_exists = False
+    if filter_exists:
+        results = ["maybe" if maybe else "negative" for maybe in maybe_taken]
+    else:
+        # Not built yet (or Redis is down): only the database can answer
+        results = ["unavailable"] * len(items)
+
+    lookups = {"username": get_user_by_username, "email": get_user_by_email}
+    availability = {}
+    for (field, value), result in zip(fields.items(), results, strict=True):
+        record_user_filter_lookup(result)
+        availability[field] = (
+            result == "negative" or await lookups[field](value) is None
+        )
+    return availability
+
+
+async def _add_to_user_filter(username: str | None = None, email: str | None = None):
+    items = filter_items(username, email)
+    if not items:
+        return
+    try:
+        await get_redis_client().execute_command(*insert_command(items))
+    except RedisError as e:
+        # Missing until the first rebuild, which will include these values
+        logger.warning(f"Could not add user to the user filter: {e}")
+
+
+async def create_user(
+    name: str, surname: str, username: str, email: str, hashed_password: str
+):
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(
+            queries.INSERT_USER,
+            (name, surname, username, email, "regular", hashed_password),
+        )
+        user = await cursor.fetchone()
+        await conn.commit()
+        await _add_to_user_filter(username, email)
+        return user["id"]
+
+
+async def find_registration_conflict(email: str, username: str) -> str | None:
+    """
+    Cheap pre-check before hashing a password: "email_taken",
+    "username_taken" or None. Not authoritative, register_user is.
+    """
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.SELECT_USER_CONFLICTS, (email, username))
+        row = await cursor.fetchone()
+        if row["email_taken"]:
+            return "email_taken"
+        if row["username_taken"]:
+            return "username_taken"
+        return None
+
+
+async def register_user(
+    name: str, surname: str, username: str, email: str, hashed_password: str
+) -> dict:
+    """
+    Insert a new user in one statement. A concurrent registration with the
+    same email or username is reported from the violated unique constraint.
+    """
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        try:
+            await cursor.execute(
+                queries.INSERT_USER,
+                (name, surname, username, email, "regular", hashed_password),
+            )
+        except psycopg.errors.UniqueViolation as e:
+            error = queries.USER_UNIQUE_VIOLATIONS.get(e.diag.constraint_name)
+            if error is None:
+                raise
+            return {"success": False, "error": error}
+        user = await cursor.fetchone()
+        await conn.commit()
+        await _add_to_user_filter(username, email)
+        return {"success": True, "user_id": user["id"]}
+
+
+async def get_user_by_id(user_id: int):
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.SELECT_USER_BY_ID, (user_id,))
+        return await cursor.fetchone()
+
+
+async def update_user_in_db(
+    user_id: int,
+    name: str | None = None,
+    surname: str | None = None,
+    username: str | None = None,
+    email: str | None = None,
+) -> bool:
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.SELECT_USER_ID, (user_id,))
+        if not await cursor.fetchone():
+            return False
+
+        if name:
+            await cursor.execute(queries.UPDATE_USER_NAME, (name, user_id))
+        if surname:
+            await cursor.execute(queries.UPDATE_USER_SURNAME, (surname, user_id))
+        if username:
+            await cursor.execute(queries.UPDATE_USER_USERNAME, (username, user_id))
+        if email:
+            await cursor.execute(queries.UPDATE_USER_EMAIL, (email, user_id))
+        await conn.commit()
+        await get_redis_client().delete(f"user:{user_id}")
+        # Old names stay in the filter; that only costs a database lookup
+        await _add_to_user_filter(username, email)
+        return True
+
+
+async def update_user_password(user_id: int, hashed_password: str) -> bool:
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.UPDATE_USER_PASSWORD, (hashed_password, user_id))
+        if cursor.rowcount == 0:
+            return False
+        await conn.commit()
+        await get_redis_client().delete(f"user:{user_id}")
+        return True
+
+
+async def delete_user_from_db(user_id: int) -> bool:
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.DELETE_USER, (user_id,))
+        if cursor.rowcount == 0:
+            return False
+        await conn.commit()
+        await get_redis_client().delete(f"user:{user_id}")
+        return True
+
+
+async def create_posting_in_db(
+    title: str, post_description: str, category: str, user_id: int
+) -> str:
+    """
+    Create a posting and return its hash. The hash is drawn at random and a
+    collision is retried within the same transaction, so a posting costs one
+    connection and normally one statement.
+    """
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        for _ in range(POSTING_HASH_ATTEMPTS):
+            await cursor.execute(
+                queries.INSERT_POSTING,
+                (title, post_description, category, user_id, generate_posting_hash()),
+            )
+            row = await cursor.fetchone()
+            if row is not None:
+                await conn.commit()
+                return row["hash"]  # posting hash
+    raise ValueError("Insert failed: no unique posting hash could be generated.")
+
+
+async def update_posting_in_db(
+    posting_id: int,
+    title: str | None = None,
+    category: str | None = None,
+    post_description: str | None = None,
+    status: str | None = None,
+) -> bool:
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.SELECT_POSTING_ID, (posting_id,))
+        if not await cursor.fetchone():
+            return False
+
+        if title:
+            await cursor.execute(queries.UPDATE_POSTING_TITLE, (title, posting_id))
+        if category:
+            await cursor.execute(
+                queries.UPDATE_POSTING_CATEGORY, (category, posting_id)
+            )
+        if post_description:
+            await cursor.execute(
+                queries.UPDATE_POSTING_DESCRIPTION, (post_description, posting_id)
+            )
+        if status:
+            await cursor.execute(queries.UPDATE_POSTING_STATUS, (status, posting_id))
+        await cursor.execute(
+            queries.UPDATE_POSTING_UPDATED_AT, (datetime.now(UTC), posting_id)
+        )
+
+        await conn.commit()
+        await get_redis_client().delete(f"posting id:{posting_id}")
+        return True
+
+
+async def delete_posting_from_db(posting_id: int) -> bool:
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.DELETE_POSTING, (posting_id,))
+        if cursor.rowcount == 0:
+            return False
+        await conn.commit()
+        await get_redis_client().delete(f"posting id:{posting_id}")
+        return True
+
+
+async def get_all_postings():
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.SELECT_ALL_POSTINGS)
+        return await cursor.fetchall()
+
+
+async def get_posting_by_id(posting_id):
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.SELECT_POSTING_BY_ID, (posting_id,))
+        return await cursor.fetchone()
+
+
+async def get_posting_by_hash(posting_hash: str):
+    """Get posting by hash instead of ID"""
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.SELECT_POSTING_BY_HASH, (posting_hash,))
+        return await cursor.fetchone()
+
+
+async def get_postings_by_user(user_id):
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.SELECT_POSTINGS_BY_USER, (user_id,))
+        return await cursor.fetchall()
+
+
+async def apply_to_posting(
+    user_id: int,
+    posting_id: int,
+    message: str | None = None,
+    cover_letter: str | None = None,
+) -> dict:
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        # Check if posting exists and get the posting owner
+        await cursor.execute(queries.SELECT_POSTING_OWNER, (posting_id,))
+        posting_data = await cursor.fetchone()
+        if not posting_data:
+            return {"success": False, "error": "posting_not_found"}
+
+        # Prevent posting creators from applying to their own posts
+        if posting_data["user_id"] == user_id:
+            return {"success": False, "error": "cannot_apply_own_posting"}
+
+        # check if applied already
+        await cursor.execute(queries.SELECT_APPLICATION_EXISTS, (user_id, posting_id))
+
+        if await cursor.fetchone():
+            return {"success": False, "error": "already_applied"}
+
+        await cursor.execute(
+            queries.INSERT_APPLICATION, (user_id, posting_id, message, cover_letter)
+        )
+        # Lost the race to a concurrent application
+        if not await cursor.fetchone():
+            return {"success": False, "error": "already_applied"}
+
+        await conn.commit()
+        return {"success": True}
+
+
+async def get_applications_by_user(user_id):
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.SELECT_APPLICATIONS_BY_USER, (user_id,))
+        return await cursor.fetchall()
+
+
+async def check_user_application_exists(user_id: int, posting_id: int) -> bool:
+    """Check if a user has already applied to a specific posting"""
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.SELECT_APPLICATION_EXISTS, (user_id, posting_id))
+        return await cursor.fetchone() is not None
+
+
+async def get_applications_by_posting(posting_id):
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.SELECT_APPLICATIONS_BY_POSTING, (posting_id,))
+        return await cursor.fetchall()
+
+
+# Analytics and View Tracking Functions
+
+
+async def claim_unique_view(
+    posting_id: int, user_id: int | None = None, session_id: str | None = None
+) -> bool | None:
+    """
+    Whether this is the viewer's first view of the posting in 24 hours,
+    decided in Redis (see core.unique_views). None when Redis is unavailable.
+    """
+    viewer = viewer_id(user_id, session_id)
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        queue_unique_view(pipe, posting_id, viewer, datetime.now(UTC).date())
+        results = await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Unique view markers unavailable, checking the database: {e}")
+        return None
+    return viewer is None or bool(results[0])
+
+
+async def _user_agent_ids(conn, cursor, user_agents: list) -> list[int | None]:
+    """
+    user_agents ids of the user agents (None for none), adding the missing
+    ones in one round trip, committed on their own
+    """
+    user_agents = [normalize_user_agent(user_agent) for user_agent in user_agents]
+    ids, missing = cached_user_agent_ids(user_agents)
+    # A second pass picks up user agents another replica added meanwhile
+    for _ in range(2):
+        if not missing:
+            break
+        await cursor.execute(queries.UPSERT_USER_AGENTS, (missing,))
+        rows = await cursor.fetchall()
+        await conn.commit()
+        ids.update(remember_user_agent_ids(rows))
+        missing = [user_agent for user_agent in missing if user_agent not in ids]
+    return [ids.get(user_agent) for user_agent in user_agents]
+
+
+async def track_posting_view(
+    posting_id: int,
+    user_id: int | None = None,
+    ip_address: str | None = None,
+    user_agent: str | None = None,
+    session_id: str | None = None,
+) -> bool:
+    """Track a view of a posting and determine if it's unique"""
+    is_unique = await claim_unique_view(posting_id, user_id, session_id)
+    session = session_hash(session_id)
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        [user_agent_id] = await _user_agent_ids(conn, cursor, [user_agent])
+        # Without Redis, check for a view by the same user/session in 24 hours
+        if is_unique is None:
+            is_unique = True
+            if user_id:
+                await cursor.execute(
+                    queries.SELECT_RECENT_VIEW_BY_USER, (posting_id, user_id)
+                )
+                is_unique = await cursor.fetchone() is None
+            elif session:
+                await cursor.execute(
+                    queries.SELECT_RECENT_VIEW_BY_SESSION, (posting_id, session)
+                )
+                is_unique = await cursor.fetchone() is None
+
+        # Record the view
+        await cursor.execute(
+            queries.INSERT_POSTING_VIEW,
+            (posting_id, user_id, ip_address, user_agent_id, session, is_unique),
+        )
+
+        await conn.commit()
+        return is_unique
+
+
+async def record_posting_views(views: list) -> None:
+    """
+    Write a batch of buffered views (see core.view_buffer), each a
+    (posting_id, user_id, ip_address, user_agent, session_hash, viewed_at,
+    is_unique) tuple
+    """
+    if not views:
+        return
+    columns = [list(column) for column in zip(*views, strict=True)]
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        columns[3] = await _user_agent_ids(conn, cursor, columns[3])
+        await cursor.execute(queries.INSERT_POSTING_VIEWS_BATCH, columns)
+        await conn.commit()
+
+
+async def get_posting_analytics(
+    posting_id: int, user_id: int, granularity: str = "daily"
+) -> dict:
+    """
+    Get comprehensive analytics for a posting (only for posting owner).
+    granularity="hourly" adds hourly metrics for the last 48 hours.
+    """
+    hourly_metrics = None
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.SELECT_POSTING_ANALYTICS, (posting_id, user_id))
+        row = await cursor.fetchone()
+        if row is not None and granularity == "hourly":
+            await cursor.execute(
+                queries.SELECT_POSTING_HOURLY_METRICS, (posting_id,) * 3
+            )
+            hourly_metrics = (await cursor.fetchone())["metrics"]
+    if row is None:
+        return {}
+
+    daily_metrics = row.pop("daily_metrics")
+    application_status = row.pop("application_status")
+    analytics = {
+        "posting_id": posting_id,
+        "stats": row,
+        "daily_metrics": daily_metrics,
+        "application_status": application_status,
+    }
+    if hourly_metrics is not None:
+        analytics["hourly_metrics"] = hourly_metrics
+
+    # Floor today's unique views at the live HyperLogLog count
+    today = datetime.now(UTC).date()
+    try:
+        live_count = await get_redis_client().pfcount(hll_key(posting_id, today))
+    except RedisError as e:
+        logger.warning(f"Live unique view count unavailable: {e}")
+    else:
+        merge_live_unique_views(analytics, today, live_count)
+    return analytics
+
+
+async def get_user_posting_stats(user_id: int, granularity: str = "daily") -> dict:
+    """
+    Get overview statistics for all user's postings. granularity="hourly"
+    adds activity per hour for the last 48 hours.
+    """
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        # Get overview stats
+        await cursor.execute(queries.SELECT_USER_POSTING_OVERVIEW, (user_id,))
+        overview = await cursor.fetchone()
+
+        # Get top performing postings
+        await cursor.execute(queries.SELECT_USER_TOP_POSTINGS, (user_id,))
+        top_postings = await cursor.fetchall()
+
+        # Get recent activity (last 7 days)
+        await cursor.execute(queries.SELECT_USER_RECENT_ACTIVITY, (user_id,) * 3)
+        recent_activity = await cursor.fetchall()
+
+        stats = {
+            "overview": overview,
+            "top_postings": top_postings,
+            "recent_activity": recent_activity,
+        }
+
+        if granularity == "hourly":
+            await cursor.execute(queries.SELECT_USER_HOURLY_ACTIVITY, (user_id,) * 3)
+            stats["hourly_activity"] = await cursor.fetchall()
+        return stats
+
+
+async def get_posting_with_public_stats(posting_id: int) -> dict:
+    """Get posting with limited public statistics"""
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.SELECT_POSTING_WITH_PUBLIC_STATS, (posting_id,))
+        posting = await cursor.fetchone()
+    if posting is not None:
+        posting["views"] += posting.pop("pending_views")
+    return posting
+
+
+async def update_application_status(
+    application_id: int, status: str, reviewer_notes: str | None = None
+) -> bool:
+    """Update application status (for posting owners)"""
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(
+            queries.UPDATE_APPLICATION_STATUS, (status, reviewer_notes, application_id)
+        )
+
+        if cursor.rowcount > 0:
+            await conn.commit()
+            return True
+        return False
+
+
+async def get_application_details(application_id: int, user_id: int) -> dict:
+    """Get application details (for posting owner or applicant)"""
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(
+            queries.SELECT_APPLICATION_DETAILS, (application_id, user_id, user_id)
+        )
+        return await cursor.fetchone()
+
+
+async def get_public_postings():
+    """Get all active postings with limited public information"""
+    async with get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(queries.SELECT_PUBLIC_POSTINGS)
+        return await cursor.fetchall()
@@ -0,0 +1,245 @@
+import asyncio
+import secrets
+import time
+from datetime import UTC, datetime
+
+from .async_cache import get_redis_client
+from .async_db import get_user_by_email, update_user_password
+from .config import SESSION_CONFIG
+from .logger import logger
+from .passwords import hash_password, verify_password
+from .security import index_member, needs_rehash
+from .session_cache import (
+    INVALIDATION_CHANNEL,
+    USER_INVALIDATION_PREFIX,
+    cached_session,
+    forget_all_sessions,
+    forget_session,
+    forget_user_sessions,
+    remember_session,
+)
+from .session_store import (
+    LOGOUT_ALL_SCRIPT,
+    SESSION_TTL_SECONDS,
+    decode_legacy_session,
+    decode_session,
+    describe_sessions,
+    encode_session,
+    index_session,
+    legacy_session_key,
+    session_key,
+    user_sessions_key,
+)
+from .signed_sessions import (
+    REVOKED_KEY,
+    decode_token,
+    is_signed_mode,
+    issue_session,
+    revocation_message,
+    revocations,
+    revoke_locally,
+)
+
+# Async counterparts of the session functions in core.security, awaited by the
+# endpoints so a slow Redis only stalls the request that is waiting on it.
+# Session format and keys (core.session_store) are identical, so both
+# variants share sessions.
+
+
+async def create_session(user_id: int) -> str:
+    pipe = get_redis_client().pipeline()
+    if is_signed_mode():
+        session_token, token_id, expires_at = issue_session(user_id)
+        index_session(pipe, user_id, token_id, expires_at)
+    else:
+        session_token = secrets.token_urlsafe(32)
+        key = session_key(session_token)
+        created_at = datetime.now(UTC)
+        pipe.setex(key, SESSION_TTL_SECONDS, encode_session(user_id, created_at))
+        index_session(
+            pipe, user_id, key, int(created_at.timestamp()) + SESSION_TTL_SECONDS
+        )
+    await pipe.execute()
+    return session_token
+
+
+async def get_session_user(session_token: str) -> dict | None:
+    if not session_token:
+        return None
+    if is_signed_mode():
+        return await _get_signed_session(session_token)
+
+    key = session_key(session_token)
+    cached = cached_session(key)
+    if cached is not None:
+        return cached
+
+    redis = get_redis_client()
+    raw = await redis.get(key)
+    # Fall back to sessions created before the compact format
+    decoded = (
+        decode_session(raw) if raw else await _get_legacy_session(redis, session_token)
+    )
+    if decoded is None:
+        return None
+
+    session, expires_at = decoded
+    remember_session(key, session, expires_at)
+    return session
+
+
+async def _get_legacy_session(
+    redis, session_token: str
+) -> tuple[dict, datetime] | None:
+    legacy_key = legacy_session_key(session_token)
+    raw = await redis.get(legacy_key)
+    decoded = decode_legacy_session(raw) if raw else None
+    if decoded is None:
+        return None
+    if datetime.now(UTC) > decoded[1]:
+        await redis.delete(legacy_key)
+        return None
+    return decoded
+
+
+async def _get_signed_session(session_token: str) -> dict | None:
+    decoded = decode_token(session_token)
+    if decoded is None:
+        return None
+    session, token_id, _ = decoded
+    if revocations.needs_refresh():
+        revocations.replace(
+            await get_redis_client().zrangebyscore(
+                REVOKED_KEY, time.time(), "+inf", withscores=True
+            )
+        )
+    if revocations.is_revoked(token_id):
+        return None
+    return session
+
+
+async def _revoke_signed_session(session_token: str) -> bool:
+    decoded = decode_token(session_token)
+    if decoded is None:
+        return False
+    session, token_id, expires_at = decoded
+    revocations.add(token_id, expires_at)
+
+    pipe = get_redis_client().pipeline()
+    pipe.zadd(REVOKED_KEY, {token_id: expires_at})
+    pipe.zrem(user_sessions_key(session["user_id"]), token_id)
+    # Entries past their token's expiry are no longer needed
+    pipe.zremrangebyscore(REVOKED_KEY, "-inf", time.time())
+    pipe.expire(REVOKED_KEY, SESSION_TTL_SECONDS)
+    pipe.publish(INVALIDATION_CHANNEL, revocation_message(token_id, expires_at))
+    added = (await pipe.execute())[0]
+    return bool(added)
+
+
+async def login_user(email: str, password: str) -> dict | None:
+    user = await get_user_by_email(email)
+    if user and await verify_password(password, user["hashed_password"]):
+        if needs_rehash(user["hashed_password"]):
+            await _rehash_password(user["id"], password)
+        session_token = await create_session(user["id"])
+        return {
+            "user_id": user["id"],
+            "email": user["email"],
+            "session_token": session_token,
+        }
+    return None
+
+
+async def _rehash_password(user_id: int, password: str):
+    # Only now is the plain password at hand to move it to the new cost. The
+    # login itself already succeeded, so a failure here is retried next time.
+    try:
+        await update_user_password(user_id, await hash_password(password))
+    except Exception as e:
+        logger.warning(f"Password rehash for user {user_id} failed: {e}")
+
+
+async def logout_user(session_token: str) -> bool:
+    if not session_token:
+        return False
+    if is_signed_mode():
+        return await _revoke_signed_session(session_token)
+
+    redis = get_redis_client()
+    key = session_key(session_token)
+    forget_session(key)
+    raw = await redis.get(key)
+    decoded = decode_session(raw) if raw else None
+
+    pipe = redis.pipeline()
+    pipe.delete(key, legacy_session_key(session_token))
+    if decoded is not None:
+        pipe.zrem(user_sessions_key(decoded[0]["user_id"]), key)
+    if (await pipe.execute())[0]:
+        # Other replicas may still hold the session in their local cache
+        await redis.publish(INVALIDATION_CHANNEL, key)
+        return True
+    return False
+
+
+async def logout_all_sessions(user_id: int) -> int:
+    """Revoke every indexed session of a user. Returns how many were live."""
+    redis = get_redis_client()
+    logout_all = redis.register_script(LOGOUT_ALL_SCRIPT)
+    revoked = await logout_all(
+        keys=[user_sessions_key(user_id), REVOKED_KEY],
+        args=[SESSION_CONFIG["mode"], time.time(), SESSION_TTL_SECONDS],
+    )
+    forget_user_sessions(user_id)
+    if is_signed_mode():
+        revocations.mark_stale()
+    await redis.publish(INVALIDATION_CHANNEL, f"{USER_INVALIDATION_PREFIX}{user_id}")
+    return revoked
+
+
+async def list_sessions(user_id: int, current_token: str | None = None) -> list[dict]:
+    entries = await get_redis_client().zrangebyscore(
+        user_sessions_key(user_id), time.time(), "+inf", withscores=True
+    )
+    current = index_member(current_token) if current_token else None
+    return describe_sessions(entries, current)
+
+
+async def listen_for_session_invalidations():
+    """
+    Apply logouts from any replica to the local session cache and, in signed
+    mode, the revocation mirror. Runs for the app's lifetime. After a Redis
+    error it resubscribes and drops the local state, since invalidations may
+    have been missed meanwhile.
+    """
+    while True:
+        try:
+            async with get_redis_client().pubsub() as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                while True:
+                    # Short polls instead of a blocking read, which would trip
+                    # the client's socket_timeout on a quiet channel
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if message is not None:
+                        _apply_invalidation(message["data"])
+        except Exception as e:
+            logger.warning(f"Session invalidation listener failed, resubscribing: {e}")
+            forget_all_sessions()
+            revocations.mark_stale()
+            await asyncio.sleep(1)
+
+
+def _apply_invalidation(data: bytes):
+    if data.startswith(USER_INVALIDATION_PREFIX.encode()):
+        forget_user_sessions(int(data.removeprefix(USER_INVALIDATION_PREFIX.encode())))
+        if is_signed_mode():
+            # The revoked token ids are only in Redis, so reload the mirror
+            revocations.mark_stale()
+        return
+
+    if is_signed_mode():
+        revoke_locally(data.decode())
+    else:
+        forget_session(data)
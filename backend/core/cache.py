@@ -1,12 +1,51 @@
 import redis
 
-from .config import REDIS_CONFIG
+from .config import REDIS_CONFIG, REDIS_POOL_CONFIG
+from .telemetry import register_pool_stats, unregister_pool_stats
 
+# One client (and so one connection pool) per process. redis.Redis is
+# thread-safe, so threads can share it.
+_client: redis.Redis | None = None
 
-def get_redis_client():
-    return redis.Redis(
-        host=REDIS_CONFIG["host"],
-        port=REDIS_CONFIG["port"],
-        password=REDIS_CONFIG.get("password"),
-        db=REDIS_CONFIG["db"],
-    )
+
+def _pool_stats() -> dict:
+    if _client is None:
+        return {}
+    pool = _client.connection_pool
+    # redis-py has no public accessor for these, they are stable across 4.x-8.x
+    return {
+        "in_use": len(pool._in_use_connections),
+        "idle": len(pool._available_connections),
+    }
+
+
+def init_redis_client() -> redis.Redis:
+    global _client
+    if _client is None:
+        pool = redis.ConnectionPool(
+            host=REDIS_CONFIG["host"],
+            port=REDIS_CONFIG["port"],
+            password=REDIS_CONFIG.get("password"),
+            db=REDIS_CONFIG["db"],
+            max_connections=REDIS_POOL_CONFIG["max_connections"],
+            socket_timeout=REDIS_POOL_CONFIG["socket_timeout"],
+            socket_connect_timeout=REDIS_POOL_CONFIG["socket_connect_timeout"],
+            health_check_interval=REDIS_POOL_CONFIG["health_check_interval"],
+            retry_on_timeout=REDIS_POOL_CONFIG["retry_on_timeout"],
+        )
+        _client = redis.Redis(connection_pool=pool)
+        register_pool_stats("redis", _pool_stats)
+    return _client
+
+
+def close_redis_client():
+    global _client
+    if _client is not None:
+        unregister_pool_stats("redis")
+        _client.close()
+        _client.connection_pool.disconnect()
+        _client = None
+
+
+def get_redis_client() -> redis.Redis:
+    return init_redis_client()
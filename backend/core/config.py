@@ -7,6 +7,14 @@ REDIS_CONFIG = {
     "db": int(os.getenv("REDIS_DB", 0)),
 }
 
+REDIS_POOL_CONFIG: dict = {
+    "max_connections": int(os.getenv("REDIS_POOL_MAX_CONNECTIONS", 50)),
+    "socket_timeout": float(os.getenv("REDIS_SOCKET_TIMEOUT", 5)),
+    "socket_connect_timeout": float(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", 2)),
+    "health_check_interval": int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30)),
+    "retry_on_timeout": os.getenv("REDIS_RETRY_ON_TIMEOUT", "true").lower() == "true",
+}
+
 POSTGRES_CONFIG = {
     "dbname": os.getenv("POSTGRES_DB"),
     "user": os.getenv("POSTGRES_USER"),
@@ -14,3 +22,106 @@ POSTGRES_CONFIG = {
     "host": os.getenv("POSTGRES_HOST", "localhost"),
     "port": int(os.getenv("POSTGRES_PORT", 5432)),
 }
+
+POSTGRES_POOL_CONFIG: dict = {
+    "min_size": int(os.getenv("POSTGRES_POOL_MIN_SIZE", 1)),
+    "max_size": int(os.getenv("POSTGRES_POOL_MAX_SIZE", 10)),
+    "acquire_timeout": float(os.getenv("POSTGRES_POOL_ACQUIRE_TIMEOUT", 5)),
+    "health_check_interval": float(
+        os.getenv("POSTGRES_POOL_HEALTH_CHECK_INTERVAL", 30)
+    ),
+}
+
+PASSWORD_HASH_CONFIG = {
+    "rounds": int(os.getenv("BCRYPT_ROUNDS", 12)),
+    "max_workers": int(os.getenv("PASSWORD_HASH_MAX_WORKERS", 2)),
+    "max_backlog": int(os.getenv("PASSWORD_HASH_MAX_BACKLOG", 32)),
+}
+
+USER_FILTER_CONFIG = {
+    "capacity": int(os.getenv("USER_FILTER_CAPACITY", 1000000)),
+    "error_rate": float(os.getenv("USER_FILTER_ERROR_RATE", 0.001)),
+}
+
+# Requests arrive through nginx or the ingress. X-Forwarded-For is believed
+# only for hops from these networks (comma-separated CIDRs), so per-IP limits
+# and view tracking see the client rather than the proxy.
+PROXY_CONFIG: dict = {
+    "trusted": [
+        network.strip()
+        for network in os.getenv(
+            "TRUSTED_PROXIES",
+            "127.0.0.0/8,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16",
+        ).split(",")
+        if network.strip()
+    ],
+}
+
+# Limits are "<requests>/<seconds>", per route and per identity scope
+RATE_LIMIT_CONFIG: dict = {
+    "enabled": os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true",
+    "routes": {
+        "login": {
+            "ip": os.getenv("RATE_LIMIT_LOGIN_PER_IP", "20/60"),
+            "email": os.getenv("RATE_LIMIT_LOGIN_PER_EMAIL", "5/60"),
+        },
+        "register": {
+            "ip": os.getenv("RATE_LIMIT_REGISTER_PER_IP", "10/3600"),
+            "email": os.getenv("RATE_LIMIT_REGISTER_PER_EMAIL", "3/3600"),
+            "username": os.getenv("RATE_LIMIT_REGISTER_PER_USERNAME", "3/3600"),
+        },
+        "availability": {
+            "ip": os.getenv("RATE_LIMIT_AVAILABILITY_PER_IP", "60/60"),
+        },
+        "apply": {
+            "ip": os.getenv("RATE_LIMIT_APPLY_PER_IP", "30/60"),
+            "user": os.getenv("RATE_LIMIT_APPLY_PER_USER", "10/60"),
+        },
+    },
+}
+
+SESSION_CACHE_CONFIG: dict = {
+    "enabled": os.getenv("SESSION_CACHE_ENABLED", "false").lower() == "true",
+    "ttl": float(os.getenv("SESSION_CACHE_TTL", 5)),
+    "max_size": int(os.getenv("SESSION_CACHE_MAX_SIZE", 10000)),
+}
+
+SESSION_CONFIG: dict = {
+    "mode": os.getenv("SESSION_MODE", "redis"),  # "redis" | "signed"
+    "secret": os.getenv("SESSION_SECRET"),
+    "revocation_refresh": float(os.getenv("SESSION_REVOCATION_REFRESH", 5)),
+}
+
+# "buffered" writes posting views behind the request in batches; up to
+# flush_interval seconds of views are lost if a replica dies. "sync" writes
+# each view before the page is returned.
+VIEW_TRACKING_CONFIG: dict = {
+    "mode": os.getenv("VIEW_TRACKING_MODE", "buffered"),  # "buffered" | "sync"
+    "flush_interval": float(os.getenv("VIEW_FLUSH_INTERVAL", 1)),
+    "batch_size": int(os.getenv("VIEW_FLUSH_BATCH_SIZE", 500)),
+    "max_size": int(os.getenv("VIEW_BUFFER_MAX_SIZE", 10000)),
+}
+
+# `python worker.py` rolls views and applications up into posting_metrics(_hourly)
+# every interval seconds. Each pass recomputes from lookback seconds before the
+# watermark, for events that commit late, and covers at most max_window
+# seconds past it when catching up. lookback must stay under the two days
+# migration 0005 backfilled.
+ANALYTICS_ROLLUP_CONFIG: dict = {
+    "interval": float(os.getenv("ROLLUP_INTERVAL", 60)),
+    "lookback": float(os.getenv("ROLLUP_LOOKBACK", 7200)),
+    "max_window": float(os.getenv("ROLLUP_MAX_WINDOW", 21600)),
+    "hourly_retention_days": int(os.getenv("ROLLUP_HOURLY_RETENTION_DAYS", 7)),
+}
+
+USER_AGENT_CACHE_CONFIG: dict = {
+    "max_size": int(os.getenv("USER_AGENT_CACHE_SIZE", 10000)),
+}
+
+RETENTION_CONFIG: dict = {
+    "view_partition_premake_days": int(os.getenv("VIEW_PARTITION_PREMAKE_DAYS", 3)),
+    "view_retention_days": int(os.getenv("VIEW_RETENTION_DAYS", 90)),
+    # "drop" or "detach" (keep expired partitions as plain tables)
+    "view_expired_partitions": os.getenv("VIEW_EXPIRED_PARTITIONS", "drop"),
+    "daily_metrics_retention_days": int(os.getenv("DAILY_METRICS_RETENTION_DAYS", 180)),
+}
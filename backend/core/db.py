@@ -1,18 +1,43 @@
-import secrets
-import string
 from contextlib import contextmanager
 from datetime import UTC, datetime
 
 import psycopg2
+import psycopg2.errors
 import psycopg2.extras
+from redis.exceptions import RedisError
 
+from . import queries
 from .cache import get_redis_client
-from .config import POSTGRES_CONFIG
-
-
-@contextmanager
-def get_db_connection():
-    conn = psycopg2.connect(
+from .config import POSTGRES_CONFIG, POSTGRES_POOL_CONFIG
+from .logger import logger
+from .pool import ConnectionPool
+from .telemetry import (
+    record_user_filter_lookup,
+    register_pool_stats,
+    unregister_pool_stats,
+)
+from .unique_views import (
+    hll_key,
+    merge_live_unique_views,
+    queue_unique_view,
+    viewer_id,
+)
+from .user_filter import FILTER_KEY, filter_item, filter_items, insert_command
+from .utility import POSTING_HASH_ATTEMPTS, generate_posting_hash
+from .view_encoding import (
+    cached_user_agent_ids,
+    normalize_user_agent,
+    remember_user_agent_ids,
+    session_hash,
+)
+
+# Process-wide pool, created by the FastAPI lifespan. Scripts and tests that
+# never call init_db_pool() fall back to one connection per call.
+_pool: ConnectionPool | None = None
+
+
+def _connect():
+    return psycopg2.connect(
         host=POSTGRES_CONFIG["host"],
         dbname=POSTGRES_CONFIG["dbname"],
         user=POSTGRES_CONFIG["user"],
@@ -20,56 +45,155 @@ def get_db_connection():
         port=POSTGRES_CONFIG["port"],
         cursor_factory=psycopg2.extras.RealDictCursor,
     )
+
+
+def init_db_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool(_connect, name="postgres", **POSTGRES_POOL_CONFIG)
+        register_pool_stats("postgres", _pool.stats)
+    return _pool
+
+
+def close_db_pool():
+    global _pool
+    if _pool is not None:
+        unregister_pool_stats("postgres")
+        _pool.close()
+        _pool = None
+
+
+@contextmanager
+def get_db_connection():
+    if _pool is not None:
+        with _pool.connection() as conn:
+            yield conn
+        return
+
+    conn = _connect()
     try:
         yield conn
     finally:
         conn.close()
 
 
-def generate_unique_hash(length: int = 12) -> str:
-    """Generate a unique hash for posting URLs"""
-    alphabet = string.ascii_lowercase + string.digits
-    while True:
-        hash_value = "".join(secrets.choice(alphabet) for _ in range(length))
-        # Check if hash already exists
-        with get_db_connection() as conn, conn.cursor() as cursor:
-            cursor.execute("SELECT 1 FROM postings WHERE hash = %s", (hash_value,))
-            if cursor.fetchone() is None:
-                return hash_value
-
-
 def get_user_by_email(email: str):
     with get_db_connection() as conn, conn.cursor() as cursor:
-        cursor.execute("SELECT * FROM users WHERE email = %s", (email,))
+        cursor.execute(queries.SELECT_USER_BY_EMAIL, (email,))
         return cursor.fetchone()
 
 
 def get_user_by_username(username: str):
     with get_db_connection() as conn, conn.cursor() as cursor:
-        cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+        cursor.execute(queries.SELECT_USER_BY_USERNAME, (username,))
         return cursor.fetchone()
 
 
+def check_user_availability(
+    username: str | None = None, email: str | None = None
+) -> dict:
+    """
+    {"username": bool, "email": bool} for the values given, True meaning
+    available. Values the user filter rules out never reach Postgres.
+    """
+    fields = {
+        field: value
+        for field, value in (("username", username), ("email", email))
+        if value
+    }
+    if not fields:
+        return {}
+
+    items = [filter_item(field, value) for field, value in fields.items()]
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.exists(FILTER_KEY)
+        pipe.execute_command("BF.MEXISTS", FILTER_KEY, *items)
+        filter_exists, maybe_taken = pipe.execute()
+    except RedisError as e:
+        logger.warning(f"User filter unavailable, checking the database: {e}")
+        filter_exists = False
+    if filter_exists:
+        results = ["maybe" if maybe else "negative" for maybe in maybe_taken]
+    else:
+        # Not built yet (or Redis is down): only the database can answer
+        results = ["unavailable"] * len(items)
+
+    lookups = {"username": get_user_by_username, "email": get_user_by_email}
+    availability = {}
+    for (field, value), result in zip(fields.items(), results, strict=True):
+        record_user_filter_lookup(result)
+        availability[field] = result == "negative" or lookups[field](value) is None
+    return availability
+
+
+def _add_to_user_filter(username: str | None = None, email: str | None = None):
+    items = filter_items(username, email)
+    if not items:
+        return
+    try:
+        get_redis_client().execute_command(*insert_command(items))
+    except RedisError as e:
+        # Missing until the first rebuild, which will include these values
+        logger.warning(f"Could not add user to the user filter: {e}")
+
+
 def create_user(
     name: str, surname: str, username: str, email: str, hashed_password: str
 ):
     with get_db_connection() as conn, conn.cursor() as cursor:
         cursor.execute(
-            """
-            INSERT INTO users (name, surname, username, email, user_type, hashed_password)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            RETURNING id
-        """,
+            queries.INSERT_USER,
             (name, surname, username, email, "regular", hashed_password),
         )
         user = cursor.fetchone()
         conn.commit()
+        _add_to_user_filter(username, email)
         return user["id"]
 
 
+def find_registration_conflict(email: str, username: str) -> str | None:
+    """
+    Cheap pre-check before hashing a password: "email_taken",
+    "username_taken" or None. Not authoritative, register_user is.
+    """
+    with get_db_connection() as conn, conn.cursor() as cursor:
+        cursor.execute(queries.SELECT_USER_CONFLICTS, (email, username))
+        row = cursor.fetchone()
+        if row["email_taken"]:
+            return "email_taken"
+        if row["username_taken"]:
+            return "username_taken"
+        return None
+
+
+def register_user(
+    name: str, surname: str, username: str, email: str, hashed_password: str
+) -> dict:
+    """
+    Insert a new user in one statement. A concurrent registration with the
+    same email or username is reported from the violated unique constraint.
+    """
+    with get_db_connection() as conn, conn.cursor() as cursor:
+        try:
+            cursor.execute(
+                queries.INSERT_USER,
+                (name, surname, username, email, "regular", hashed_password),
+            )
+        except psycopg2.errors.UniqueViolation as e:
+            error = queries.USER_UNIQUE_VIOLATIONS.get(e.diag.constraint_name)
+            if error is None:
+                raise
+            return {"success": False, "error": error}
+        user = cursor.fetchone()
+        conn.commit()
+        _add_to_user_filter(username, email)
+        return {"success": True, "user_id": user["id"]}
+
+
 def get_user_by_id(user_id: int):
     with get_db_connection() as conn, conn.cursor() as cursor:
-        cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
+        cursor.execute(queries.SELECT_USER_BY_ID, (user_id,))
         return cursor.fetchone()
 
 
@@ -81,24 +205,30 @@ def update_user_in_db(
     email: str | None = None,
 ) -> bool:
     with get_db_connection() as conn, conn.cursor() as cursor:
-        cursor.execute("SELECT id FROM users WHERE id = %s", (user_id,))
+        cursor.execute(queries.SELECT_USER_ID, (user_id,))
         if not cursor.fetchone():
             return False
 
         if name:
-            cursor.execute("UPDATE users SET name = %s WHERE id = %s", (name, user_id))
+            cursor.execute(queries.UPDATE_USER_NAME, (name, user_id))
         if surname:
-            cursor.execute(
-                "UPDATE users SET surname = %s WHERE id = %s", (surname, user_id)
-            )
+            cursor.execute(queries.UPDATE_USER_SURNAME, (surname, user_id))
         if username:
-            cursor.execute(
-                "UPDATE users SET username = %s WHERE id = %s", (username, user_id)
-            )
+            cursor.execute(queries.UPDATE_USER_USERNAME, (username, user_id))
         if email:
-            cursor.execute(
-                "UPDATE users SET email = %s WHERE id = %s", (email, user_id)
-            )
+            cursor.execute(queries.UPDATE_USER_EMAIL, (email, user_id))
+        conn.commit()
+        get_redis_client().delete(f"user:{user_id}")
+        # Old names stay in the filter; that only costs a database lookup
+        _add_to_user_filter(username, email)
+        return True
+
+
+def update_user_password(user_id: int, hashed_password: str) -> bool:
+    with get_db_connection() as conn, conn.cursor() as cursor:
+        cursor.execute(queries.UPDATE_USER_PASSWORD, (hashed_password, user_id))
+        if cursor.rowcount == 0:
+            return False
         conn.commit()
         get_redis_client().delete(f"user:{user_id}")
         return True
@@ -106,7 +236,7 @@ def update_user_in_db(
 
 def delete_user_from_db(user_id: int) -> bool:
     with get_db_connection() as conn, conn.cursor() as cursor:
-        cursor.execute("DELETE FROM users WHERE id = %s", (user_id,))
+        cursor.execute(queries.DELETE_USER, (user_id,))
         if cursor.rowcount == 0:
             return False
         conn.commit()
@@ -117,21 +247,22 @@ def delete_user_from_db(user_id: int) -> bool:
 def create_posting_in_db(
     title: str, post_description: str, category: str, user_id: int
 ) -> str:
-    """Create a posting and return its hash"""
-    hash_value = generate_unique_hash()
+    """
+    Create a posting and return its hash. The hash is drawn at random and a
+    collision is retried within the same transaction, so a posting costs one
+    connection and normally one statement.
+    """
     with get_db_connection() as conn, conn.cursor() as cursor:
-        cursor.execute(
-            """
-            INSERT INTO postings (title, post_description, category, user_id, hash)
-            VALUES (%s, %s, %s, %s, %s) RETURNING hash
-            """,
-            (title, post_description, category, user_id, hash_value),
-        )
-        row = cursor.fetchone()
-        if row is None:
-            raise ValueError("Insert failed: no hash returned from insert statement.")
-        conn.commit()
-        return row["hash"]  # posting hash
+        for _ in range(POSTING_HASH_ATTEMPTS):
+            cursor.execute(
+                queries.INSERT_POSTING,
+                (title, post_description, category, user_id, generate_posting_hash()),
+            )
+            row = cursor.fetchone()
+            if row is not None:
+                conn.commit()
+                return row["hash"]  # posting hash
+    raise ValueError("Insert failed: no unique posting hash could be generated.")
 
 
 def update_posting_in_db(
@@ -142,31 +273,22 @@ def update_posting_in_db(
     status: str | None = None,
 ) -> bool:
     with get_db_connection() as conn, conn.cursor() as cursor:
-        cursor.execute("SELECT id FROM postings WHERE id = %s", (posting_id,))
+        cursor.execute(queries.SELECT_POSTING_ID, (posting_id,))
         if not cursor.fetchone():
             return False
 
         if title:
-            cursor.execute(
-                "UPDATE postings SET title = %s WHERE id = %s", (title, posting_id)
-            )
+            cursor.execute(queries.UPDATE_POSTING_TITLE, (title, posting_id))
         if category:
-            cursor.execute(
-                "UPDATE postings SET category = %s WHERE id = %s",
-                (category, posting_id),
-            )
+            cursor.execute(queries.UPDATE_POSTING_CATEGORY, (category, posting_id))
         if post_description:
             cursor.execute(
-                "UPDATE postings SET post_description = %s WHERE id = %s",
-                (post_description, posting_id),
+                queries.UPDATE_POSTING_DESCRIPTION, (post_description, posting_id)
             )
         if status:
-            cursor.execute(
-                "UPDATE postings SET status = %s WHERE id = %s", (status, posting_id)
-            )
+            cursor.execute(queries.UPDATE_POSTING_STATUS, (status, posting_id))
         cursor.execute(
-            "UPDATE postings SET updated_at = %s WHERE id = %s",
-            (datetime.now(UTC), posting_id),
+            queries.UPDATE_POSTING_UPDATED_AT, (datetime.now(UTC), posting_id)
         )
 
         conn.commit()
@@ -176,7 +298,7 @@ def update_posting_in_db(
 
 def delete_posting_from_db(posting_id: int) -> bool:
     with get_db_connection() as conn, conn.cursor() as cursor:
-        cursor.execute("DELETE FROM postings WHERE id = %s", (posting_id,))
+        cursor.execute(queries.DELETE_POSTING, (posting_id,))
         if cursor.rowcount == 0:
             return False
         conn.commit()
@@ -186,47 +308,26 @@ def delete_posting_from_db(posting_id: int) -> bool:
 
 def get_all_postings():
     with get_db_connection() as conn, conn.cursor() as cursor:
-        cursor.execute("SELECT * FROM postings ORDER BY id DESC")
+        cursor.execute(queries.SELECT_ALL_POSTINGS)
         return cursor.fetchall()
 
 
 def get_posting_by_id(posting_id):
     with get_db_connection() as conn, conn.cursor() as cursor:
-        cursor.execute("SELECT * FROM postings WHERE id = %s", (posting_id,))
+        cursor.execute(queries.SELECT_POSTING_BY_ID, (posting_id,))
         return cursor.fetchone()
 
 
 def get_posting_by_hash(posting_hash: str):
     """Get posting by hash instead of ID"""
     with get_db_connection() as conn, conn.cursor() as cursor:
-        cursor.execute("SELECT * FROM postings WHERE hash = %s", (posting_hash,))
+        cursor.execute(queries.SELECT_POSTING_BY_HASH, (posting_hash,))
         return cursor.fetchone()
 
 
 def get_postings_by_user(user_id):
     with get_db_connection() as conn, conn.cursor() as cursor:
-        cursor.execute(
-            """
-            SELECT 
-                p.id,
-                p.user_id,
-                p.hash,
-                p.title,
-                p.post_description,
-                p.category,
-                p.views,
-                p.created_at,
-                p.updated_at,
-                p.status,
-                COUNT(DISTINCT a.id) as application_count
-            FROM postings p
-            LEFT JOIN applications a ON p.id = a.posting_id
-            WHERE p.user_id = %s
-            GROUP BY p.id
-            ORDER BY p.created_at DESC
-        """,
-            (user_id,),
-        )
+        cursor.execute(queries.SELECT_POSTINGS_BY_USER, (user_id,))
         return cursor.fetchall()
 
 
@@ -238,7 +339,7 @@ def apply_to_posting(
 ) -> dict:
     with get_db_connection() as conn, conn.cursor() as cursor:
         # Check if posting exists and get the posting owner
-        cursor.execute("SELECT id, user_id FROM postings WHERE id = %s", (posting_id,))
+        cursor.execute(queries.SELECT_POSTING_OWNER, (posting_id,))
         posting_data = cursor.fetchone()
         if not posting_data:
             return {"success": False, "error": "posting_not_found"}
@@ -248,32 +349,17 @@ def apply_to_posting(
             return {"success": False, "error": "cannot_apply_own_posting"}
 
         # check if applied already
-        cursor.execute(
-            "SELECT 1 FROM applications WHERE user_id = %s AND posting_id = %s",
-            (user_id, posting_id),
-        )
+        cursor.execute(queries.SELECT_APPLICATION_EXISTS, (user_id, posting_id))
 
         if cursor.fetchone():
             return {"success": False, "error": "already_applied"}
 
         cursor.execute(
-            "INSERT INTO applications (user_id, posting_id, message, cover_letter) VALUES (%s, %s, %s, %s)",
-            (user_id, posting_id, message, cover_letter),
-        )
-
-        # Update daily metrics for applications
-        today = datetime.now(UTC).date()
-        cursor.execute(
-            """
-            INSERT INTO posting_metrics (posting_id, date, applications_count)
-            VALUES (%s, %s, 1)
-            ON CONFLICT (posting_id, date) 
-            DO UPDATE SET 
-                applications_count = posting_metrics.applications_count + 1,
-                updated_at = NOW()
-        """,
-            (posting_id, today),
+            queries.INSERT_APPLICATION, (user_id, posting_id, message, cover_letter)
         )
+        # Lost the race to a concurrent application
+        if not cursor.fetchone():
+            return {"success": False, "error": "already_applied"}
 
         conn.commit()
         return {"success": True}
@@ -281,54 +367,63 @@ def apply_to_posting(
 
 def get_applications_by_user(user_id):
     with get_db_connection() as conn, conn.cursor() as cursor:
-        cursor.execute(
-            """
-            SELECT 
-                applications.*,
-                postings.title,
-                postings.post_description,
-                postings.category,
-                postings.created_at as posting_created_at,
-                postings.hash as posting_hash,
-                users.name as posting_creator_name
-            FROM applications 
-            JOIN postings ON applications.posting_id = postings.id 
-            JOIN users ON postings.user_id = users.id
-            WHERE applications.user_id = %s
-            ORDER BY applications.applied_at DESC
-        """,
-            (user_id,),
-        )
+        cursor.execute(queries.SELECT_APPLICATIONS_BY_USER, (user_id,))
         return cursor.fetchall()
 
 
 def check_user_application_exists(user_id: int, posting_id: int) -> bool:
     """Check if a user has already applied to a specific posting"""
     with get_db_connection() as conn, conn.cursor() as cursor:
-        cursor.execute(
-            "SELECT 1 FROM applications WHERE user_id = %s AND posting_id = %s",
-            (user_id, posting_id),
-        )
+        cursor.execute(queries.SELECT_APPLICATION_EXISTS, (user_id, posting_id))
         return cursor.fetchone() is not None
 
 
 def get_applications_by_posting(posting_id):
     with get_db_connection() as conn, conn.cursor() as cursor:
-        cursor.execute(
-            """
-            SELECT applications.*, users.name, users.email 
-            FROM applications 
-            JOIN users ON applications.user_id = users.id 
-            WHERE applications.posting_id = %s
-        """,
-            (posting_id,),
-        )
+        cursor.execute(queries.SELECT_APPLICATIONS_BY_POSTING, (posting_id,))
         return cursor.fetchall()
 
 
 # Analytics and View Tracking Functions
 
 
+def claim_unique_view(
+    posting_id: int, user_id: int | None = None, session_id: str | None = None
+) -> bool | None:
+    """
+    Whether this is the viewer's first view of the posting in 24 hours,
+    decided in Redis (see core.unique_views). None when Redis is unavailable.
+    """
+    viewer = viewer_id(user_id, session_id)
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        queue_unique_view(pipe, posting_id, viewer, datetime.now(UTC).date())
+        results = pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Unique view markers unavailable, checking the database: {e}")
+        return None
+    return viewer is None or bool(results[0])
+
+
+def _user_agent_ids(conn, cursor, user_agents: list) -> list[int | None]:
+    """
+    user_agents ids of the user agents (None for none), adding the missing
+    ones in one round trip, committed on their own
+    """
+    user_agents = [normalize_user_agent(user_agent) for user_agent in user_agents]
+    ids, missing = cached_user_agent_ids(user_agents)
+    # A second pass picks up user agents another replica added meanwhile
+    for _ in range(2):
+        if not missing:
+            break
+        cursor.execute(queries.UPSERT_USER_AGENTS, (missing,))
+        rows = cursor.fetchall()
+        conn.commit()
+        ids.update(remember_user_agent_ids(rows))
+        missing = [user_agent for user_agent in missing if user_agent not in ids]
+    return [ids.get(user_agent) for user_agent in user_agents]
+
+
 def track_posting_view(
     posting_id: int,
     user_id: int | None = None,
@@ -337,211 +432,126 @@ def track_posting_view(
     session_id: str | None = None,
 ) -> bool:
     """Track a view of a posting and determine if it's unique"""
+    is_unique = claim_unique_view(posting_id, user_id, session_id)
+    session = session_hash(session_id)
     with get_db_connection() as conn, conn.cursor() as cursor:
-        # Check if this is a unique view (same user/session within 24 hours)
-        is_unique = True
-        if user_id:
-            cursor.execute(
-                """
-                SELECT 1 FROM posting_views 
-                WHERE posting_id = %s AND user_id = %s 
-                AND viewed_at > NOW() - INTERVAL '24 hours'
-            """,
-                (posting_id, user_id),
-            )
-            is_unique = cursor.fetchone() is None
-        elif session_id:
-            cursor.execute(
-                """
-                SELECT 1 FROM posting_views 
-                WHERE posting_id = %s AND session_id = %s 
-                AND viewed_at > NOW() - INTERVAL '24 hours'
-            """,
-                (posting_id, session_id),
-            )
-            is_unique = cursor.fetchone() is None
+        [user_agent_id] = _user_agent_ids(conn, cursor, [user_agent])
+        # Without Redis, check for a view by the same user/session in 24 hours
+        if is_unique is None:
+            is_unique = True
+            if user_id:
+                cursor.execute(
+                    queries.SELECT_RECENT_VIEW_BY_USER, (posting_id, user_id)
+                )
+                is_unique = cursor.fetchone() is None
+            elif session:
+                cursor.execute(
+                    queries.SELECT_RECENT_VIEW_BY_SESSION, (posting_id, session)
+                )
+                is_unique = cursor.fetchone() is None
 
         # Record the view
         cursor.execute(
-            """
-            INSERT INTO posting_views (posting_id, user_id, ip_address, user_agent, session_id, is_unique_view)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """,
-            (posting_id, user_id, ip_address, user_agent, session_id, is_unique),
-        )
-
-        # Update posting view count
-        cursor.execute(
-            """
-            UPDATE postings SET views = views + 1 WHERE id = %s
-        """,
-            (posting_id,),
-        )
-
-        # Update daily metrics
-        today = datetime.now(UTC).date()
-        cursor.execute(
-            """
-            INSERT INTO posting_metrics (posting_id, date, views_count, unique_views_count)
-            VALUES (%s, %s, 1, %s)
-            ON CONFLICT (posting_id, date) 
-            DO UPDATE SET 
-                views_count = posting_metrics.views_count + 1,
-                unique_views_count = posting_metrics.unique_views_count + %s,
-                updated_at = NOW()
-        """,
-            (posting_id, today, 1 if is_unique else 0, 1 if is_unique else 0),
+            queries.INSERT_POSTING_VIEW,
+            (posting_id, user_id, ip_address, user_agent_id, session, is_unique),
         )
 
         conn.commit()
         return is_unique
 
 
-def get_posting_analytics(posting_id: int, user_id: int) -> dict:
-    """Get comprehensive analytics for a posting (only for posting owner)"""
+def record_posting_views(views: list) -> None:
+    """
+    Write a batch of buffered views (see core.view_buffer), each a
+    (posting_id, user_id, ip_address, user_agent, session_hash, viewed_at,
+    is_unique) tuple
+    """
+    if not views:
+        return
+    columns = [list(column) for column in zip(*views, strict=True)]
     with get_db_connection() as conn, conn.cursor() as cursor:
-        # Verify ownership
-        cursor.execute("SELECT user_id FROM postings WHERE id = %s", (posting_id,))
-        posting = cursor.fetchone()
-        if not posting or posting["user_id"] != user_id:
-            return {}
-
-        # Get basic posting stats
-        cursor.execute(
-            """
-            SELECT 
-                p.views,
-                p.created_at,
-                p.status,
-                COUNT(DISTINCT a.id) as application_count,
-                COUNT(DISTINCT pv.id) as total_views,
-                COUNT(DISTINCT CASE WHEN pv.is_unique_view THEN pv.id END) as unique_views
-            FROM postings p
-            LEFT JOIN applications a ON p.id = a.posting_id
-            LEFT JOIN posting_views pv ON p.id = pv.posting_id
-            WHERE p.id = %s
-            GROUP BY p.id, p.views, p.created_at, p.status
-        """,
-            (posting_id,),
-        )
-        stats = cursor.fetchone()
-
-        # Get daily metrics for the last 30 days
-        cursor.execute(
-            """
-            SELECT date, views_count, unique_views_count, applications_count
-            FROM posting_metrics
-            WHERE posting_id = %s AND date >= CURRENT_DATE - INTERVAL '30 days'
-            ORDER BY date DESC
-        """,
-            (posting_id,),
-        )
-        daily_metrics = cursor.fetchall()
-
-        # Get application status breakdown
-        cursor.execute(
-            """
-            SELECT status, COUNT(*) as count
-            FROM applications
-            WHERE posting_id = %s
-            GROUP BY status
-        """,
-            (posting_id,),
-        )
-        application_status = cursor.fetchall()
-
-        return {
-            "posting_id": posting_id,
-            "stats": stats,
-            "daily_metrics": daily_metrics,
-            "application_status": application_status,
-        }
+        columns[3] = _user_agent_ids(conn, cursor, columns[3])
+        cursor.execute(queries.INSERT_POSTING_VIEWS_BATCH, columns)
+        conn.commit()
 
 
-def get_user_posting_stats(user_id: int) -> dict:
-    """Get overview statistics for all user's postings"""
+def get_posting_analytics(
+    posting_id: int, user_id: int, granularity: str = "daily"
+) -> dict:
+    """
+    Get comprehensive analytics for a posting (only for posting owner).
+    granularity="hourly" adds hourly metrics for the last 48 hours.
+    """
+    hourly_metrics = None
+    with get_db_connection() as conn, conn.cursor() as cursor:
+        cursor.execute(queries.SELECT_POSTING_ANALYTICS, (posting_id, user_id))
+        row = cursor.fetchone()
+        if row is not None and granularity == "hourly":
+            cursor.execute(queries.SELECT_POSTING_HOURLY_METRICS, (posting_id,) * 3)
+            hourly_metrics = (cursor.fetchone())["metrics"]
+    if row is None:
+        return {}
+
+    daily_metrics = row.pop("daily_metrics")
+    application_status = row.pop("application_status")
+    analytics = {
+        "posting_id": posting_id,
+        "stats": row,
+        "daily_metrics": daily_metrics,
+        "application_status": application_status,
+    }
+    if hourly_metrics is not None:
+        analytics["hourly_metrics"] = hourly_metrics
+
+    # Floor today's unique views at the live HyperLogLog count
+    today = datetime.now(UTC).date()
+    try:
+        live_count = get_redis_client().pfcount(hll_key(posting_id, today))
+    except RedisError as e:
+        logger.warning(f"Live unique view count unavailable: {e}")
+    else:
+        merge_live_unique_views(analytics, today, live_count)
+    return analytics
+
+
+def get_user_posting_stats(user_id: int, granularity: str = "daily") -> dict:
+    """
+    Get overview statistics for all user's postings. granularity="hourly"
+    adds activity per hour for the last 48 hours.
+    """
     with get_db_connection() as conn, conn.cursor() as cursor:
         # Get overview stats
-        cursor.execute(
-            """
-            SELECT 
-                COUNT(DISTINCT p.id) as total_postings,
-                COUNT(DISTINCT CASE WHEN p.status = 'active' THEN p.id END) as active_postings,
-                SUM(p.views) as total_views,
-                COUNT(DISTINCT a.id) as total_applications,
-                AVG(p.views) as avg_views_per_posting
-            FROM postings p
-            LEFT JOIN applications a ON p.id = a.posting_id
-            WHERE p.user_id = %s
-        """,
-            (user_id,),
-        )
+        cursor.execute(queries.SELECT_USER_POSTING_OVERVIEW, (user_id,))
         overview = cursor.fetchone()
 
         # Get top performing postings
-        cursor.execute(
-            """
-            SELECT 
-                p.id,
-                p.title,
-                p.views,
-                p.created_at,
-                COUNT(DISTINCT a.id) as application_count
-            FROM postings p
-            LEFT JOIN applications a ON p.id = a.posting_id
-            WHERE p.user_id = %s
-            GROUP BY p.id, p.title, p.views, p.created_at
-            ORDER BY p.views DESC
-            LIMIT 5
-        """,
-            (user_id,),
-        )
+        cursor.execute(queries.SELECT_USER_TOP_POSTINGS, (user_id,))
         top_postings = cursor.fetchall()
 
         # Get recent activity (last 7 days)
-        cursor.execute(
-            """
-            SELECT 
-                date,
-                SUM(views_count) as daily_views,
-                SUM(unique_views_count) as daily_unique_views,
-                SUM(applications_count) as daily_applications
-            FROM posting_metrics pm
-            JOIN postings p ON pm.posting_id = p.id
-            WHERE p.user_id = %s AND date >= CURRENT_DATE - INTERVAL '7 days'
-            GROUP BY date
-            ORDER BY date DESC
-        """,
-            (user_id,),
-        )
+        cursor.execute(queries.SELECT_USER_RECENT_ACTIVITY, (user_id,) * 3)
         recent_activity = cursor.fetchall()
 
-        return {
+        stats = {
             "overview": overview,
             "top_postings": top_postings,
             "recent_activity": recent_activity,
         }
 
+        if granularity == "hourly":
+            cursor.execute(queries.SELECT_USER_HOURLY_ACTIVITY, (user_id,) * 3)
+            stats["hourly_activity"] = cursor.fetchall()
+        return stats
+
 
 def get_posting_with_public_stats(posting_id: int) -> dict:
     """Get posting with limited public statistics"""
     with get_db_connection() as conn, conn.cursor() as cursor:
-        cursor.execute(
-            """
-            SELECT 
-                p.*,
-                u.name as creator_name,
-                u.username as creator_username,
-                COUNT(DISTINCT a.id) as application_count
-            FROM postings p
-            JOIN users u ON p.user_id = u.id
-            LEFT JOIN applications a ON p.id = a.posting_id
-            WHERE p.id = %s
-            GROUP BY p.id, u.name, u.username
-        """,
-            (posting_id,),
-        )
-        return cursor.fetchone()
+        cursor.execute(queries.SELECT_POSTING_WITH_PUBLIC_STATS, (posting_id,))
+        posting = cursor.fetchone()
+    if posting is not None:
+        posting["views"] += posting.pop("pending_views")
+    return posting
 
 
 def update_application_status(
@@ -550,12 +560,7 @@ def update_application_status(
     """Update application status (for posting owners)"""
     with get_db_connection() as conn, conn.cursor() as cursor:
         cursor.execute(
-            """
-            UPDATE applications 
-            SET status = %s, reviewer_notes = %s, reviewed_at = NOW()
-            WHERE id = %s
-        """,
-            (status, reviewer_notes, application_id),
+            queries.UPDATE_APPLICATION_STATUS, (status, reviewer_notes, application_id)
         )
 
         if cursor.rowcount > 0:
@@ -568,19 +573,7 @@ def get_application_details(application_id: int, user_id: int) -> dict:
     """Get application details (for posting owner or applicant)"""
     with get_db_connection() as conn, conn.cursor() as cursor:
         cursor.execute(
-            """
-            SELECT 
-                a.*,
-                u.name as applicant_name,
-                u.email as applicant_email,
-                p.title as posting_title,
-                p.user_id as posting_owner_id
-            FROM applications a
-            JOIN users u ON a.user_id = u.id
-            JOIN postings p ON a.posting_id = p.id
-            WHERE a.id = %s AND (a.user_id = %s OR p.user_id = %s)
-        """,
-            (application_id, user_id, user_id),
+            queries.SELECT_APPLICATION_DETAILS, (application_id, user_id, user_id)
         )
         return cursor.fetchone()
 
@@ -588,25 +581,5 @@ def get_application_details(application_id: int, user_id: int) -> dict:
 def get_public_postings():
     """Get all active postings with limited public information"""
     with get_db_connection() as conn, conn.cursor() as cursor:
-        cursor.execute("""
-            SELECT 
-                p.id,
-                p.user_id,
-                p.hash,
-                p.title,
-                p.post_description,
-                p.category,
-                p.views,
-                p.created_at,
-                p.status,
-                u.name as creator_name,
-                u.username as creator_username,
-                COUNT(DISTINCT a.id) as application_count
-            FROM postings p
-            JOIN users u ON p.user_id = u.id
-            LEFT JOIN applications a ON p.id = a.posting_id
-            WHERE p.status = 'open'
-            GROUP BY p.id, p.user_id, u.name, u.username
-            ORDER BY p.created_at DESC
-        """)
+        cursor.execute(queries.SELECT_PUBLIC_POSTINGS)
         return cursor.fetchall()
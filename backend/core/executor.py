@@ -0,0 +1,102 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from .telemetry import (
+    record_executor_queue_change,
+    record_executor_rejection,
+    record_executor_run,
+    record_executor_wait,
+)
+
+
+class ExecutorOverloadedError(HTTPException):
+    """Raised when the blocking-call backlog is full and new work is shed"""
+
+    def __init__(self, call_site: str):
+        super().__init__(
+            status_code=503,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+        self.call_site = call_site
+
+
+class BoundedExecutor:
+    """
+    Size-limited thread pool for blocking calls made from async endpoints.
+
+    At most `max_workers` calls run at once and up to `max_backlog` more may
+    wait for a free worker. Anything beyond that is rejected immediately with
+    ExecutorOverloadedError, so overload turns into fast 503s instead of an
+    ever-growing queue of requests that all end up timing out.
+    """
+
+    def __init__(
+        self, max_workers: int = 16, max_backlog: int = 64, name: str = "blocking"
+    ):
+        if max_workers < 1 or max_backlog < 0:
+            raise ValueError("Executor needs max_workers >= 1 and max_backlog >= 0")
+
+        self.name = name
+        self.max_workers = max_workers
+        self.max_backlog = max_backlog
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self._lock = threading.Lock()
+        self._outstanding = 0  # submitted and not finished yet
+        self._running = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._running,
+                "queued": self._outstanding - self._running,
+            }
+
+    async def run(self, call_site: str, fn: Callable, *args, **kwargs):
+        with self._lock:
+            if self._outstanding >= self.max_workers + self.max_backlog:
+                record_executor_rejection(call_site)
+                raise ExecutorOverloadedError(call_site)
+            self._outstanding += 1
+
+        record_executor_queue_change(call_site, 1)
+        submitted_at = time.monotonic()
+        # Carry the caller's context (e.g. the active trace span) into the worker
+        context = contextvars.copy_context()
+        future = self._pool.submit(
+            context.run, self._call, call_site, submitted_at, fn, args, kwargs
+        )
+        future.add_done_callback(lambda f: self._finished(call_site, f))
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _call(self, call_site: str, submitted_at: float, fn: Callable, args, kwargs):
+        started_at = time.monotonic()
+        with self._lock:
+            self._running += 1
+        record_executor_queue_change(call_site, -1)
+        record_executor_wait(call_site, started_at - submitted_at)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            record_executor_run(call_site, time.monotonic() - started_at)
+            with self._lock:
+                self._running -= 1
+
+    def _finished(self, call_site: str, future: Future):
+        with self._lock:
+            self._outstanding -= 1
+        if future.cancelled():
+            # Cancelled before a worker picked it up, so _call never ran
+            record_executor_queue_change(call_site, -1)
@@ -0,0 +1,110 @@
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+# Versioned schema migrations, the single source of truth for the database
+# schema. Each migration is a backend/migrations/NNNN_name.sql file applied
+# once, in version order, inside its own transaction; applied versions are
+# recorded in schema_migrations. Run with `python manage.py migrate`.
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+
+_FILENAME = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+# Held for the whole run so replicas starting together apply each migration once
+MIGRATION_LOCK_ID = 7_246_001
+
+CREATE_MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+    )
+"""
+
+SELECT_APPLIED_MIGRATIONS = "SELECT version, applied_at FROM schema_migrations"
+
+INSERT_MIGRATION = "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)"
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: Path
+
+    @property
+    def sql(self) -> str:
+        return self.path.read_text(encoding="utf-8")
+
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    migrations: dict = {}
+    for path in sorted(directory.glob("*.sql")):
+        match = _FILENAME.match(path.name)
+        if match is None:
+            raise ValueError(f"Migration file name must be NNNN_name.sql: {path.name}")
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"Duplicate migration version {version}: {path.name}")
+        migrations[version] = Migration(version, match.group(2), path)
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def _applied(cursor) -> dict:
+    """version -> applied_at"""
+    cursor.execute(CREATE_MIGRATIONS_TABLE)
+    cursor.execute(SELECT_APPLIED_MIGRATIONS)
+    return {row["version"]: row["applied_at"] for row in cursor.fetchall()}
+
+
+def migration_status(conn, migrations: list[Migration] | None = None) -> list[dict]:
+    if migrations is None:
+        migrations = load_migrations()
+    with conn.cursor() as cursor:
+        applied = _applied(cursor)
+    conn.commit()
+    return [
+        {
+            "version": migration.version,
+            "name": migration.name,
+            "applied_at": applied.get(migration.version),
+        }
+        for migration in migrations
+    ]
+
+
+def apply_migrations(
+    conn, migrations: list[Migration] | None = None, target: int | None = None
+) -> list[Migration]:
+    """
+    Apply pending migrations up to and including `target` (all by default).
+    Returns the migrations that were applied by this call.
+    """
+    if migrations is None:
+        migrations = load_migrations()
+
+    done = []
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+        try:
+            applied = _applied(cursor)
+            conn.commit()
+            for migration in migrations:
+                if migration.version in applied:
+                    continue
+                if target is not None and migration.version > target:
+                    break
+                try:
+                    cursor.execute(migration.sql)
+                    cursor.execute(
+                        INSERT_MIGRATION, (migration.version, migration.name)
+                    )
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                done.append(migration)
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+            conn.commit()
+    return done
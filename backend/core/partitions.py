@@ -0,0 +1,165 @@
+import re
+from datetime import date, datetime, time, timedelta
+from typing import NamedTuple
+
+# Daily range partitions of posting_views (migration 0006). The partition of
+# a day is posting_views_pYYYYMMDD and holds [day, day + 1) in the database's
+# time zone, like viewed_at. Views outside every partition go to
+# posting_views_default. `python manage.py maintain-view-partitions` keeps
+# partitions a few days ahead and drops (or detaches) the expired ones.
+
+DEFAULT_PARTITION = "posting_views_default"
+
+# Uniqueness checks look back 24 hours, and rollup passes a few hours past that
+MIN_RETENTION_DAYS = 2
+
+SELECT_PARTITIONS = """
+    SELECT c.relname as name, pg_get_expr(c.relpartbound, c.oid) as bound
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'posting_views'::regclass
+"""
+
+SELECT_TODAY = "SELECT CURRENT_DATE as today"
+
+# Partition DDL locks posting_views; fail rather than queue every view write
+# behind a long query, and leave it to the next run
+SET_LOCK_TIMEOUT = "SET LOCAL lock_timeout = '5s'"
+
+CREATE_PARTITION = (
+    "CREATE TABLE {name} PARTITION OF posting_views FOR VALUES FROM (%s) TO (%s)"
+)
+
+# Views of a day that landed in the default partition before the day's own
+# partition existed; it can't be created while they are there
+STASH_STRAYS = """
+    CREATE TEMP TABLE posting_views_strays ON COMMIT DROP AS
+    SELECT * FROM posting_views_default WHERE viewed_at >= %s AND viewed_at < %s
+"""
+
+DELETE_STRAYS = (
+    "DELETE FROM posting_views_default WHERE viewed_at >= %s AND viewed_at < %s"
+)
+
+RESTORE_STRAYS = "INSERT INTO posting_views SELECT * FROM posting_views_strays"
+
+DROP_PARTITION = "DROP TABLE {name}"
+
+DETACH_PARTITION = "ALTER TABLE posting_views DETACH PARTITION {name}"
+
+DELETE_EXPIRED_STRAYS = "DELETE FROM posting_views_default WHERE viewed_at < %s"
+
+_BOUNDS = re.compile(r"FROM \((MINVALUE|'[^']+')\) TO \((MAXVALUE|'[^']+')\)")
+
+
+class Partition(NamedTuple):
+    name: str
+    start: datetime | None  # None when unbounded
+    end: datetime | None
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        return (self.start is None or self.start < end) and (
+            self.end is None or self.end > start
+        )
+
+
+def partition_name(day: date) -> str:
+    return f"posting_views_p{day:%Y%m%d}"
+
+
+def _bound(value: str) -> datetime | None:
+    if value in ("MINVALUE", "MAXVALUE"):
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def list_partitions(cursor) -> list[Partition]:
+    """Range partitions of posting_views, oldest first (not the default one)"""
+    cursor.execute(SELECT_PARTITIONS)
+    partitions = []
+    for row in cursor.fetchall():
+        match = _BOUNDS.search(row["bound"])
+        if match is not None:
+            partitions.append(
+                Partition(row["name"], _bound(match.group(1)), _bound(match.group(2)))
+            )
+    return sorted(partitions, key=lambda partition: partition.start or datetime.min)
+
+
+def create_partitions(conn, first: date, last: date) -> list[str]:
+    """
+    Create the missing daily partitions from `first` to `last`, one
+    transaction each, skipping days an existing partition already covers.
+    Returns the partitions created.
+    """
+    with conn.cursor() as cursor:
+        partitions = list_partitions(cursor)
+    conn.commit()
+
+    created = []
+    day = first
+    while day <= last:
+        start = datetime.combine(day, time())
+        end = start + timedelta(days=1)
+        if not any(partition.overlaps(start, end) for partition in partitions):
+            name = partition_name(day)
+            with conn.cursor() as cursor:
+                cursor.execute(SET_LOCK_TIMEOUT)
+                cursor.execute(STASH_STRAYS, (start, end))
+                cursor.execute(DELETE_STRAYS, (start, end))
+                cursor.execute(CREATE_PARTITION.format(name=name), (start, end))
+                cursor.execute(RESTORE_STRAYS)
+            conn.commit()
+            created.append(name)
+        day += timedelta(days=1)
+    return created
+
+
+def expire_partitions(conn, cutoff: date, detach: bool = False) -> list[str]:
+    """
+    Drop, or detach and keep as plain tables, the partitions holding only
+    views from before `cutoff`, and delete such views from the default
+    partition. Returns the partitions dropped or detached.
+    """
+    cutoff_at = datetime.combine(cutoff, time())
+    with conn.cursor() as cursor:
+        expired = [
+            partition.name
+            for partition in list_partitions(cursor)
+            if partition.end is not None and partition.end <= cutoff_at
+        ]
+    conn.commit()
+
+    statement = DETACH_PARTITION if detach else DROP_PARTITION
+    for name in expired:
+        with conn.cursor() as cursor:
+            cursor.execute(SET_LOCK_TIMEOUT)
+            cursor.execute(statement.format(name=name))
+        conn.commit()
+
+    with conn.cursor() as cursor:
+        cursor.execute(DELETE_EXPIRED_STRAYS, (cutoff_at,))
+    conn.commit()
+    return expired
+
+
+def maintain_view_partitions(
+    conn, premake_days: int, retention_days: int, detach: bool = False
+) -> tuple[list[str], list[str]]:
+    """
+    Create partitions from today to `premake_days` ahead and expire those
+    older than `retention_days`. Returns the partitions created and expired.
+    """
+    if retention_days < MIN_RETENTION_DAYS:
+        raise ValueError(
+            f"View retention must be at least {MIN_RETENTION_DAYS} days, "
+            f"got {retention_days}"
+        )
+    with conn.cursor() as cursor:
+        cursor.execute(SELECT_TODAY)
+        today = cursor.fetchone()["today"]
+    conn.commit()
+
+    created = create_partitions(conn, today, today + timedelta(days=premake_days))
+    expired = expire_partitions(conn, today - timedelta(days=retention_days), detach)
+    return created, expired
@@ -0,0 +1,42 @@
+from .config import PASSWORD_HASH_CONFIG
+from .executor import BoundedExecutor
+from .security import hash_password as _hash_password
+from .security import verify_password as _verify_password
+
+# bcrypt is deliberately CPU bound, so it gets its own small pool sized to the
+# cores the pod actually has. A burst of logins then queues here, and past the
+# backlog is shed with a 503, instead of blocking the event loop. bcrypt
+# releases the GIL while hashing, so threads use the cores just like worker
+# processes would.
+
+_executor: BoundedExecutor | None = None
+
+
+def init_password_executor() -> BoundedExecutor:
+    global _executor
+    if _executor is None:
+        _executor = BoundedExecutor(
+            max_workers=PASSWORD_HASH_CONFIG["max_workers"],
+            max_backlog=PASSWORD_HASH_CONFIG["max_backlog"],
+            name="bcrypt",
+        )
+    return _executor
+
+
+def shutdown_password_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+async def hash_password(password: str) -> str:
+    return await init_password_executor().run(
+        "passwords.hash", _hash_password, password
+    )
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await init_password_executor().run(
+        "passwords.verify", _verify_password, password, hashed
+    )
@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from contextlib import contextmanager, suppress
+
+from .logger import logger
+from .telemetry import record_pool_wait
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be checked out within the acquire timeout"""
+
+
+class PoolClosedError(Exception):
+    """Raised when a connection is requested from a pool that was closed"""
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections.
+
+    Idle connections are reused LIFO so the warmest ones stay in rotation.
+    A connection that sat idle for longer than `health_check_interval` seconds
+    is pinged before being handed out, and replaced if the ping fails.
+    Any open transaction is rolled back when a connection is returned.
+    """
+
+    def __init__(
+        self,
+        connect: Callable,
+        min_size: int = 1,
+        max_size: int = 10,
+        acquire_timeout: float = 5.0,
+        health_check_interval: float = 30.0,
+        name: str = "postgres",
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool size must satisfy 0 <= min_size <= max_size")
+
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+
+        self._connect = connect
+        self._idle: deque = deque()  # (connection, idle_since)
+        self._in_use = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        for _ in range(min_size):
+            try:
+                self._idle.append((connect(), time.monotonic()))
+            except Exception as e:
+                # The database may come up after the backend, connections
+                # are then opened on demand instead
+                logger.warning(f"Could not pre-open {name} pool connection: {e}")
+                break
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"in_use": self._in_use, "idle": len(self._idle)}
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def acquire(self):
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        conn = None
+        idle_since = 0.0
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolClosedError(f"Pool {self.name} is closed")
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                    break
+                if self._in_use + len(self._idle) < self.max_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"Timed out after {self.acquire_timeout}s waiting for a "
+                        f"{self.name} connection"
+                    )
+                self._cond.wait(remaining)
+            self._in_use += 1
+
+        # Connecting and pinging happen outside the lock so slow network
+        # calls never block other threads from returning connections
+        try:
+            if conn is not None and not self._is_healthy(conn, idle_since):
+                self._discard(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        record_pool_wait(self.name, time.monotonic() - start)
+        return conn
+
+    def release(self, conn):
+        reusable = not conn.closed
+        if reusable:
+            try:
+                conn.rollback()
+            except Exception:
+                reusable = False
+
+        with self._cond:
+            self._in_use -= 1
+            if reusable and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._cond.notify()
+
+        if conn is not None:
+            self._discard(conn)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def _is_healthy(self, conn, idle_since: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - idle_since < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding broken {self.name} pool connection: {e}")
+            return False
+
+    @staticmethod
+    def _discard(conn):
+        with suppress(Exception):
+            conn.close()
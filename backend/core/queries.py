@@ -0,0 +1,775 @@
+"""
+SQL statements shared by the sync (core.db) and async (core.async_db)
+data-access modules, so both always run exactly the same queries.
+"""
+
+# Users
+
+SELECT_USER_BY_EMAIL = "SELECT * FROM users WHERE email = %s"
+
+SELECT_USER_BY_USERNAME = "SELECT * FROM users WHERE username = %s"
+
+SELECT_USER_BY_ID = "SELECT * FROM users WHERE id = %s"
+
+SELECT_USER_ID = "SELECT id FROM users WHERE id = %s"
+
+SELECT_USER_CONFLICTS = """
+    SELECT
+        EXISTS (SELECT 1 FROM users WHERE email = %s) AS email_taken,
+        EXISTS (SELECT 1 FROM users WHERE username = %s) AS username_taken
+"""
+
+INSERT_USER = """
+    INSERT INTO users (name, surname, username, email, user_type, hashed_password)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    RETURNING id
+"""
+
+SELECT_USER_NAMES = "SELECT username, email FROM users"
+
+# Registrations committing while the user filter is rebuilt may be missing
+# from its snapshot; they are re-added from this cutoff, with a safety margin
+SELECT_USER_FILTER_CUTOFF = "SELECT LOCALTIMESTAMP - INTERVAL '1 minute' AS cutoff"
+
+SELECT_USER_NAMES_SINCE = "SELECT username, email FROM users WHERE created_at >= %s"
+
+# Unique constraints on users (Postgres default names) -> registration error
+USER_UNIQUE_VIOLATIONS: dict = {
+    "users_email_key": "email_taken",
+    "users_username_key": "username_taken",
+}
+
+UPDATE_USER_NAME = "UPDATE users SET name = %s WHERE id = %s"
+
+UPDATE_USER_SURNAME = "UPDATE users SET surname = %s WHERE id = %s"
+
+UPDATE_USER_USERNAME = "UPDATE users SET username = %s WHERE id = %s"
+
+UPDATE_USER_EMAIL = "UPDATE users SET email = %s WHERE id = %s"
+
+# The query text, not a password (bandit B105)
+UPDATE_USER_PASSWORD = "UPDATE users SET hashed_password = %s WHERE id = %s"  # nosec B105
+
+DELETE_USER = "DELETE FROM users WHERE id = %s"
+
+# Postings
+
+# A hash collision inserts nothing and returns no row instead of raising, so
+# the caller can retry with a new hash without aborting its transaction
+INSERT_POSTING = """
+    INSERT INTO postings (title, post_description, category, user_id, hash)
+    VALUES (%s, %s, %s, %s, %s)
+    ON CONFLICT (hash) DO NOTHING
+    RETURNING hash
+"""
+
+SELECT_POSTING_ID = "SELECT id FROM postings WHERE id = %s"
+
+UPDATE_POSTING_TITLE = "UPDATE postings SET title = %s WHERE id = %s"
+
+UPDATE_POSTING_CATEGORY = "UPDATE postings SET category = %s WHERE id = %s"
+
+UPDATE_POSTING_DESCRIPTION = "UPDATE postings SET post_description = %s WHERE id = %s"
+
+UPDATE_POSTING_STATUS = "UPDATE postings SET status = %s WHERE id = %s"
+
+UPDATE_POSTING_UPDATED_AT = "UPDATE postings SET updated_at = %s WHERE id = %s"
+
+DELETE_POSTING = "DELETE FROM postings WHERE id = %s"
+
+SELECT_ALL_POSTINGS = "SELECT * FROM postings ORDER BY id DESC"
+
+SELECT_POSTING_BY_ID = "SELECT * FROM postings WHERE id = %s"
+
+SELECT_POSTING_BY_HASH = "SELECT * FROM postings WHERE hash = %s"
+
+SELECT_POSTINGS_BY_USER = """
+    SELECT
+        p.id,
+        p.user_id,
+        p.hash,
+        p.title,
+        p.post_description,
+        p.category,
+        p.views,
+        p.created_at,
+        p.updated_at,
+        p.status,
+        p.application_count
+    FROM postings p
+    WHERE p.user_id = %s
+    ORDER BY p.created_at DESC
+"""
+
+# pending_views: views since the rollup watermark, not in p.views yet
+SELECT_POSTING_WITH_PUBLIC_STATS = """
+    SELECT
+        p.*,
+        u.name as creator_name,
+        u.username as creator_username,
+        pending.views as pending_views
+    FROM postings p
+    JOIN users u ON p.user_id = u.id
+    CROSS JOIN LATERAL (
+        SELECT COUNT(*)::int as views
+        FROM posting_views
+        WHERE posting_id = p.id
+          AND viewed_at >= (
+              SELECT watermark FROM rollup_watermarks WHERE name = 'posting_metrics'
+          )
+    ) pending
+    WHERE p.id = %s
+"""
+
+SELECT_PUBLIC_POSTINGS = """
+    SELECT
+        p.id,
+        p.user_id,
+        p.hash,
+        p.title,
+        p.post_description,
+        p.category,
+        p.views,
+        p.created_at,
+        p.status,
+        u.name as creator_name,
+        u.username as creator_username,
+        p.application_count
+    FROM postings p
+    JOIN users u ON p.user_id = u.id
+    WHERE p.status = 'open'
+    ORDER BY p.created_at DESC
+"""
+
+# Applications
+
+SELECT_POSTING_OWNER = "SELECT id, user_id FROM postings WHERE id = %s"
+
+SELECT_APPLICATION_EXISTS = (
+    "SELECT 1 FROM applications WHERE user_id = %s AND posting_id = %s"
+)
+
+# No row back when a concurrent request applied first (idx_applications_user_posting)
+INSERT_APPLICATION = """
+    INSERT INTO applications (user_id, posting_id, message, cover_letter)
+    VALUES (%s, %s, %s, %s)
+    ON CONFLICT (user_id, posting_id) DO NOTHING
+    RETURNING id
+"""
+
+SELECT_APPLICATIONS_BY_USER = """
+    SELECT
+        applications.*,
+        postings.title,
+        postings.post_description,
+        postings.category,
+        postings.created_at as posting_created_at,
+        postings.hash as posting_hash,
+        users.name as posting_creator_name
+    FROM applications
+    JOIN postings ON applications.posting_id = postings.id
+    JOIN users ON postings.user_id = users.id
+    WHERE applications.user_id = %s
+    ORDER BY applications.applied_at DESC
+"""
+
+SELECT_APPLICATIONS_BY_POSTING = """
+    SELECT applications.*, users.name, users.email
+    FROM applications
+    JOIN users ON applications.user_id = users.id
+    WHERE applications.posting_id = %s
+"""
+
+# Recompute the application counters on postings and repair any that drifted.
+# Run with applications locked against writes (see manage.py).
+RECONCILE_APPLICATION_COUNTS = """
+    UPDATE postings p SET
+        application_count = actual.total,
+        applications_pending = actual.pending,
+        applications_reviewed = actual.reviewed,
+        applications_accepted = actual.accepted,
+        applications_rejected = actual.rejected
+    FROM (
+        SELECT
+            p.id,
+            COUNT(a.id) as total,
+            COUNT(a.id) FILTER (WHERE a.status = 'pending') as pending,
+            COUNT(a.id) FILTER (WHERE a.status = 'reviewed') as reviewed,
+            COUNT(a.id) FILTER (WHERE a.status = 'accepted') as accepted,
+            COUNT(a.id) FILTER (WHERE a.status = 'rejected') as rejected
+        FROM postings p
+        LEFT JOIN applications a ON a.posting_id = p.id
+        GROUP BY p.id
+    ) actual
+    WHERE p.id = actual.id
+      AND (
+          p.application_count, p.applications_pending, p.applications_reviewed,
+          p.applications_accepted, p.applications_rejected
+      ) IS DISTINCT FROM (
+          actual.total, actual.pending, actual.reviewed,
+          actual.accepted, actual.rejected
+      )
+    RETURNING p.id
+"""
+
+UPDATE_APPLICATION_STATUS = """
+    UPDATE applications
+    SET status = %s, reviewer_notes = %s, reviewed_at = NOW()
+    WHERE id = %s
+"""
+
+SELECT_APPLICATION_DETAILS = """
+    SELECT
+        a.*,
+        u.name as applicant_name,
+        u.email as applicant_email,
+        p.title as posting_title,
+        p.user_id as posting_owner_id
+    FROM applications a
+    JOIN users u ON a.user_id = u.id
+    JOIN postings p ON a.posting_id = p.id
+    WHERE a.id = %s AND (a.user_id = %s OR p.user_id = %s)
+"""
+
+# View tracking
+
+SELECT_RECENT_VIEW_BY_USER = """
+    SELECT 1 FROM posting_views
+    WHERE posting_id = %s AND user_id = %s
+    AND viewed_at > NOW() - INTERVAL '24 hours'
+"""
+
+SELECT_RECENT_VIEW_BY_SESSION = """
+    SELECT 1 FROM posting_views
+    WHERE posting_id = %s AND session_hash = %s
+    AND viewed_at > NOW() - INTERVAL '24 hours'
+"""
+
+INSERT_POSTING_VIEW = """
+    INSERT INTO posting_views (posting_id, user_id, ip_address, user_agent_id, session_hash, is_unique_view)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+# Parameters: an array of distinct user agents. Returns the id of each,
+# adding the ones user_agents doesn't have yet. One added concurrently by
+# another replica since the statement started is not returned; look it up
+# again.
+UPSERT_USER_AGENTS = """
+    WITH wanted AS (
+        SELECT DISTINCT unnest(%s::text[]) as user_agent
+    ),
+    existing AS (
+        SELECT a.id, a.user_agent
+        FROM user_agents a
+        JOIN wanted w ON w.user_agent = a.user_agent
+    ),
+    added AS (
+        INSERT INTO user_agents (user_agent)
+        SELECT user_agent FROM wanted
+        WHERE user_agent NOT IN (SELECT user_agent FROM existing)
+        ORDER BY user_agent
+        ON CONFLICT (user_agent) DO NOTHING
+        RETURNING id, user_agent
+    )
+    SELECT id, user_agent FROM existing
+    UNION ALL
+    SELECT id, user_agent FROM added
+"""
+
+# A batch of buffered views (one array per column, in view order) in one
+# round trip. Uniqueness normally comes decided from Redis; views queued while
+# Redis was down (is_unique NULL) get the 24h check here instead. Views of postings deleted since are dropped, as are
+# references to deleted users. User agents come as user_agents ids and
+# sessions as hashes (core.view_encoding).
+INSERT_POSTING_VIEWS_BATCH = """
+    WITH batch AS (
+        SELECT
+            b.posting_id,
+            u.id as user_id,
+            b.ip_address,
+            b.user_agent_id,
+            b.session_hash,
+            b.viewed_at,
+            b.is_unique,
+            b.n
+        FROM unnest(
+            %s::int[], %s::int[], %s::inet[], %s::int[], %s::bigint[],
+            %s::timestamptz[], %s::bool[]
+        ) WITH ORDINALITY AS b(
+            posting_id, user_id, ip_address, user_agent_id, session_hash, viewed_at,
+            is_unique, n
+        )
+        JOIN postings p ON p.id = b.posting_id
+        LEFT JOIN users u ON u.id = b.user_id
+    ),
+    marked AS (
+        SELECT
+            b.posting_id,
+            b.user_id,
+            b.ip_address,
+            b.user_agent_id,
+            b.session_hash,
+            b.viewed_at,
+            b.n,
+            CASE
+                WHEN b.is_unique IS NOT NULL THEN b.is_unique
+                WHEN b.user_id IS NOT NULL THEN
+                    row_number() OVER (
+                        PARTITION BY b.posting_id, b.user_id ORDER BY b.n
+                    ) = 1
+                    AND NOT EXISTS (
+                        SELECT 1 FROM posting_views pv
+                        WHERE pv.posting_id = b.posting_id
+                          AND pv.user_id = b.user_id
+                          AND pv.viewed_at > b.viewed_at - INTERVAL '24 hours'
+                    )
+                WHEN b.session_hash IS NOT NULL THEN
+                    row_number() OVER (
+                        PARTITION BY b.posting_id, b.session_hash ORDER BY b.n
+                    ) = 1
+                    AND NOT EXISTS (
+                        SELECT 1 FROM posting_views pv
+                        WHERE pv.posting_id = b.posting_id
+                          AND pv.session_hash = b.session_hash
+                          AND pv.viewed_at > b.viewed_at - INTERVAL '24 hours'
+                    )
+                ELSE TRUE
+            END as is_unique
+        FROM batch b
+    )
+    INSERT INTO posting_views (
+        posting_id, user_id, ip_address, user_agent_id, session_hash, viewed_at,
+        is_unique_view
+    )
+    SELECT
+        posting_id, user_id, ip_address, user_agent_id, session_hash, viewed_at,
+        is_unique
+    FROM marked
+    ORDER BY n
+"""
+
+# Rollups (worker.py, migration 0005)
+
+# Locks the watermark row, so concurrent workers take turns
+SELECT_ROLLUP_WATERMARK = """
+    SELECT watermark, LOCALTIMESTAMP as now
+    FROM rollup_watermarks
+    WHERE name = %s
+    FOR UPDATE
+"""
+
+# Recomputes every posting's hourly buckets in [start, end) from the raw
+# views and applications, stores the ones that changed and adds their view
+# difference to postings.views. Replacing rather than adding makes a rerun of
+# the same window a no-op. Parameters: start, end. Returns the posting days
+# whose daily metrics need refreshing.
+ROLLUP_HOURLY_METRICS = """
+    WITH bounds AS (
+        SELECT %s::timestamp as window_start, %s::timestamp as window_end
+    ),
+    events AS (
+        SELECT
+            posting_id,
+            date_trunc('hour', viewed_at) as hour,
+            1 as views,
+            CASE WHEN is_unique_view THEN 1 ELSE 0 END as unique_views,
+            0 as applications
+        FROM posting_views
+        WHERE viewed_at >= (SELECT window_start FROM bounds)
+          AND viewed_at < (SELECT window_end FROM bounds)
+        UNION ALL
+        SELECT posting_id, date_trunc('hour', applied_at), 0, 0, 1
+        FROM applications
+        WHERE applied_at >= (SELECT window_start FROM bounds)
+          AND applied_at < (SELECT window_end FROM bounds)
+    ),
+    fresh AS (
+        SELECT
+            e.posting_id,
+            e.hour,
+            SUM(e.views)::int as views_count,
+            SUM(e.unique_views)::int as unique_views_count,
+            SUM(e.applications)::int as applications_count
+        FROM events e
+        JOIN postings p ON p.id = e.posting_id
+        GROUP BY e.posting_id, e.hour
+    ),
+    changed AS (
+        SELECT
+            f.posting_id,
+            f.hour,
+            f.views_count,
+            f.unique_views_count,
+            f.applications_count,
+            f.views_count - COALESCE(h.views_count, 0) as views_delta
+        FROM fresh f
+        LEFT JOIN posting_metrics_hourly h
+            ON h.posting_id = f.posting_id
+            AND h.hour = f.hour
+            AND h.hour >= (SELECT window_start FROM bounds)
+        WHERE (h.views_count, h.unique_views_count, h.applications_count)
+            IS DISTINCT FROM
+            (f.views_count, f.unique_views_count, f.applications_count)
+    ),
+    upserted AS (
+        INSERT INTO posting_metrics_hourly (
+            posting_id, hour, views_count, unique_views_count, applications_count
+        )
+        SELECT
+            posting_id, hour, views_count, unique_views_count, applications_count
+        FROM changed
+        ON CONFLICT (posting_id, hour)
+        DO UPDATE SET
+            views_count = EXCLUDED.views_count,
+            unique_views_count = EXCLUDED.unique_views_count,
+            applications_count = EXCLUDED.applications_count
+    ),
+    totals AS (
+        UPDATE postings p SET views = p.views + t.views
+        FROM (
+            SELECT posting_id, SUM(views_delta) as views
+            FROM changed
+            GROUP BY posting_id
+        ) t
+        WHERE p.id = t.posting_id AND t.views <> 0
+    )
+    SELECT DISTINCT posting_id, hour::date as date FROM changed
+"""
+
+# Daily metrics of the given posting days (arrays of posting ids and dates)
+# from their hourly buckets. Only ever raises the stored counts, so expired
+# hourly buckets never lower a day.
+ROLLUP_DAILY_METRICS = """
+    INSERT INTO posting_metrics (
+        posting_id, date, views_count, unique_views_count, applications_count
+    )
+    SELECT
+        d.posting_id,
+        d.date,
+        SUM(h.views_count),
+        SUM(h.unique_views_count),
+        SUM(h.applications_count)
+    FROM unnest(%s::int[], %s::date[]) AS d(posting_id, date)
+    JOIN posting_metrics_hourly h
+        ON h.posting_id = d.posting_id
+        AND h.hour >= d.date
+        AND h.hour < d.date + 1
+    GROUP BY d.posting_id, d.date
+    ON CONFLICT (posting_id, date)
+    DO UPDATE SET
+        views_count = GREATEST(posting_metrics.views_count, EXCLUDED.views_count),
+        unique_views_count =
+            GREATEST(posting_metrics.unique_views_count, EXCLUDED.unique_views_count),
+        applications_count =
+            GREATEST(posting_metrics.applications_count, EXCLUDED.applications_count),
+        updated_at = NOW()
+"""
+
+DELETE_EXPIRED_HOURLY_METRICS = "DELETE FROM posting_metrics_hourly WHERE hour < %s"
+
+UPDATE_ROLLUP_WATERMARK = """
+    UPDATE rollup_watermarks SET watermark = %s, updated_at = NOW() WHERE name = %s
+"""
+
+SELECT_OLDEST_DAILY_METRICS = """
+    SELECT MIN(date) as oldest, CURRENT_DATE as today FROM posting_metrics
+"""
+
+# Parameters: first day of the month, first day of the next month. Folds the
+# month's daily rows into posting_metrics_monthly; counts add up, so a month
+# downsampled in parts ends up the same.
+DOWNSAMPLE_DAILY_METRICS = """
+    WITH expired AS (
+        DELETE FROM posting_metrics
+        WHERE date >= %s AND date < %s
+        RETURNING posting_id, date, views_count, unique_views_count, applications_count
+    ),
+    monthly AS (
+        INSERT INTO posting_metrics_monthly (
+            posting_id, month, views_count, unique_views_count, applications_count
+        )
+        SELECT
+            posting_id,
+            date_trunc('month', date)::date,
+            COALESCE(SUM(views_count), 0),
+            COALESCE(SUM(unique_views_count), 0),
+            COALESCE(SUM(applications_count), 0)
+        FROM expired
+        WHERE posting_id IS NOT NULL
+        GROUP BY 1, 2
+        ON CONFLICT (posting_id, month)
+        DO UPDATE SET
+            views_count = posting_metrics_monthly.views_count + EXCLUDED.views_count,
+            unique_views_count =
+                posting_metrics_monthly.unique_views_count + EXCLUDED.unique_views_count,
+            applications_count =
+                posting_metrics_monthly.applications_count + EXCLUDED.applications_count
+        RETURNING 1
+    )
+    SELECT
+        (SELECT COUNT(*) FROM expired) as days,
+        (SELECT COUNT(*) FROM monthly) as months
+"""
+
+# Analytics
+
+# The analytics reads combine the rollups (postings.views, posting_metrics,
+# posting_metrics_hourly) with the raw events since the rollup watermark,
+# which the worker keeps within a minute or so of now.
+
+# Owner dashboard in one round trip; no row unless user_id owns the posting.
+# Application figures come from the counters on postings (migration 0003).
+# View totals are summed from the daily and monthly rollups, so the cost grows
+# with the posting's age in days (months once downsampled), not with its view
+# count.
+SELECT_POSTING_ANALYTICS = """
+    WITH since AS (
+        SELECT watermark FROM rollup_watermarks WHERE name = 'posting_metrics'
+    )
+    SELECT
+        p.views + pending.views as views,
+        p.created_at,
+        p.status,
+        p.application_count,
+        totals.total_views + pending.views as total_views,
+        totals.unique_views + pending.unique_views as unique_views,
+        COALESCE(daily.metrics, '[]'::json) as daily_metrics,
+        COALESCE(statuses.breakdown, '[]'::json) as application_status
+    FROM postings p
+    CROSS JOIN LATERAL (
+        SELECT
+            COALESCE(SUM(views_count), 0) as total_views,
+            COALESCE(SUM(unique_views_count), 0) as unique_views
+        FROM (
+            SELECT views_count, unique_views_count
+            FROM posting_metrics
+            WHERE posting_id = p.id
+            UNION ALL
+            SELECT views_count, unique_views_count
+            FROM posting_metrics_monthly
+            WHERE posting_id = p.id
+        ) stored
+    ) totals
+    CROSS JOIN LATERAL (
+        SELECT
+            COUNT(*)::int as views,
+            COUNT(*) FILTER (WHERE is_unique_view)::int as unique_views
+        FROM posting_views
+        WHERE posting_id = p.id AND viewed_at >= (SELECT watermark FROM since)
+    ) pending
+    CROSS JOIN LATERAL (
+        SELECT json_agg(
+            json_build_object(
+                'date', date,
+                'views_count', views_count,
+                'unique_views_count', unique_views_count,
+                'applications_count', applications_count
+            )
+            ORDER BY date DESC
+        ) as metrics
+        FROM (
+            SELECT
+                date,
+                SUM(views_count) as views_count,
+                SUM(unique_views_count) as unique_views_count,
+                SUM(applications_count) as applications_count
+            FROM (
+                SELECT date, views_count, unique_views_count, applications_count
+                FROM posting_metrics
+                WHERE posting_id = p.id
+                  AND date >= CURRENT_DATE - INTERVAL '30 days'
+                UNION ALL
+                SELECT
+                    viewed_at::date,
+                    1,
+                    CASE WHEN is_unique_view THEN 1 ELSE 0 END,
+                    0
+                FROM posting_views
+                WHERE posting_id = p.id AND viewed_at >= (SELECT watermark FROM since)
+                UNION ALL
+                SELECT applied_at::date, 0, 0, 1
+                FROM applications
+                WHERE posting_id = p.id AND applied_at >= (SELECT watermark FROM since)
+            ) day_rows
+            GROUP BY date
+        ) by_day
+    ) daily
+    CROSS JOIN LATERAL (
+        SELECT json_agg(json_build_object('status', status, 'count', count)) as breakdown
+        FROM (
+            VALUES
+                ('pending', p.applications_pending),
+                ('reviewed', p.applications_reviewed),
+                ('accepted', p.applications_accepted),
+                ('rejected', p.applications_rejected)
+        ) as by_status (status, count)
+        WHERE count > 0
+    ) statuses
+    WHERE p.id = %s AND p.user_id = %s
+"""
+
+# The last 48 hours of a posting, newest first, as JSON like daily_metrics.
+# Parameters: posting_id three times.
+SELECT_POSTING_HOURLY_METRICS = """
+    WITH since AS (
+        SELECT watermark FROM rollup_watermarks WHERE name = 'posting_metrics'
+    )
+    SELECT COALESCE(
+        json_agg(
+            json_build_object(
+                'hour', hour,
+                'views_count', views_count,
+                'unique_views_count', unique_views_count,
+                'applications_count', applications_count
+            )
+            ORDER BY hour DESC
+        ),
+        '[]'::json
+    ) as metrics
+    FROM (
+        SELECT
+            hour,
+            SUM(views_count) as views_count,
+            SUM(unique_views_count) as unique_views_count,
+            SUM(applications_count) as applications_count
+        FROM (
+            SELECT hour, views_count, unique_views_count, applications_count
+            FROM posting_metrics_hourly
+            WHERE posting_id = %s
+              AND hour >= date_trunc('hour', LOCALTIMESTAMP) - INTERVAL '47 hours'
+            UNION ALL
+            SELECT
+                date_trunc('hour', viewed_at),
+                1,
+                CASE WHEN is_unique_view THEN 1 ELSE 0 END,
+                0
+            FROM posting_views
+            WHERE posting_id = %s AND viewed_at >= (SELECT watermark FROM since)
+            UNION ALL
+            SELECT date_trunc('hour', applied_at), 0, 0, 1
+            FROM applications
+            WHERE posting_id = %s AND applied_at >= (SELECT watermark FROM since)
+        ) hour_rows
+        GROUP BY hour
+    ) by_hour
+"""
+
+SELECT_USER_POSTING_OVERVIEW = """
+    WITH since AS (
+        SELECT watermark FROM rollup_watermarks WHERE name = 'posting_metrics'
+    )
+    SELECT
+        COUNT(*) as total_postings,
+        COUNT(*) FILTER (WHERE p.status = 'active') as active_postings,
+        SUM(p.views + pending.views) as total_views,
+        COALESCE(SUM(p.application_count), 0) as total_applications,
+        AVG(p.views + pending.views) as avg_views_per_posting
+    FROM postings p
+    CROSS JOIN LATERAL (
+        SELECT COUNT(*)::int as views
+        FROM posting_views
+        WHERE posting_id = p.id AND viewed_at >= (SELECT watermark FROM since)
+    ) pending
+    WHERE p.user_id = %s
+"""
+
+SELECT_USER_TOP_POSTINGS = """
+    WITH since AS (
+        SELECT watermark FROM rollup_watermarks WHERE name = 'posting_metrics'
+    )
+    SELECT
+        p.id,
+        p.title,
+        p.views + pending.views as views,
+        p.created_at,
+        p.application_count
+    FROM postings p
+    CROSS JOIN LATERAL (
+        SELECT COUNT(*)::int as views
+        FROM posting_views
+        WHERE posting_id = p.id AND viewed_at >= (SELECT watermark FROM since)
+    ) pending
+    WHERE p.user_id = %s
+    ORDER BY p.views + pending.views DESC
+    LIMIT 5
+"""
+
+# Pending views are looked up by the user's posting ids as one array, so
+# each posting_views partition is searched once rather than once per posting.
+# Parameters: user_id three times
+SELECT_USER_RECENT_ACTIVITY = """
+    WITH since AS (
+        SELECT watermark FROM rollup_watermarks WHERE name = 'posting_metrics'
+    )
+    SELECT
+        date,
+        SUM(views_count) as daily_views,
+        SUM(unique_views_count) as daily_unique_views,
+        SUM(applications_count) as daily_applications
+    FROM (
+        SELECT
+            pm.date,
+            pm.views_count,
+            pm.unique_views_count,
+            pm.applications_count
+        FROM posting_metrics pm
+        JOIN postings p ON pm.posting_id = p.id
+        WHERE p.user_id = %s AND pm.date >= CURRENT_DATE - INTERVAL '7 days'
+        UNION ALL
+        SELECT
+            pv.viewed_at::date,
+            1,
+            CASE WHEN pv.is_unique_view THEN 1 ELSE 0 END,
+            0
+        FROM posting_views pv
+        WHERE pv.posting_id = ANY(ARRAY(SELECT id FROM postings WHERE user_id = %s))
+          AND pv.viewed_at >= (SELECT watermark FROM since)
+        UNION ALL
+        SELECT a.applied_at::date, 0, 0, 1
+        FROM applications a
+        JOIN postings p ON a.posting_id = p.id
+        WHERE p.user_id = %s AND a.applied_at >= (SELECT watermark FROM since)
+    ) activity
+    GROUP BY date
+    ORDER BY date DESC
+"""
+
+# The last 48 hours across the user's postings, pending views looked up as in
+# SELECT_USER_RECENT_ACTIVITY. Parameters: user_id three times
+SELECT_USER_HOURLY_ACTIVITY = """
+    WITH since AS (
+        SELECT watermark FROM rollup_watermarks WHERE name = 'posting_metrics'
+    )
+    SELECT
+        hour,
+        SUM(views_count) as hourly_views,
+        SUM(unique_views_count) as hourly_unique_views,
+        SUM(applications_count) as hourly_applications
+    FROM (
+        SELECT
+            h.hour,
+            h.views_count,
+            h.unique_views_count,
+            h.applications_count
+        FROM posting_metrics_hourly h
+        JOIN postings p ON h.posting_id = p.id
+        WHERE p.user_id = %s
+          AND h.hour >= date_trunc('hour', LOCALTIMESTAMP) - INTERVAL '47 hours'
+        UNION ALL
+        SELECT
+            date_trunc('hour', pv.viewed_at),
+            1,
+            CASE WHEN pv.is_unique_view THEN 1 ELSE 0 END,
+            0
+        FROM posting_views pv
+        WHERE pv.posting_id = ANY(ARRAY(SELECT id FROM postings WHERE user_id = %s))
+          AND pv.viewed_at >= (SELECT watermark FROM since)
+        UNION ALL
+        SELECT date_trunc('hour', a.applied_at), 0, 0, 1
+        FROM applications a
+        JOIN postings p ON a.posting_id = p.id
+        WHERE p.user_id = %s AND a.applied_at >= (SELECT watermark FROM since)
+    ) activity
+    GROUP BY hour
+    ORDER BY hour DESC
+"""
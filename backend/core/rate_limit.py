@@ -0,0 +1,111 @@
+import hashlib
+import math
+import secrets
+import time
+
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+
+from .async_cache import get_redis_client
+from .config import RATE_LIMIT_CONFIG
+from .logger import logger
+from .telemetry import record_rate_limit_decision
+
+# Sliding-window limits for endpoints that trigger expensive work (bcrypt,
+# inserts). Each limited identity (client IP, email, user id, ...) has a sorted
+# set of its request timestamps; the check for all identities of a request,
+# and recording it, is one script call and so one Redis round trip. A request
+# that is throttled on any identity is not recorded on the others.
+#
+# KEYS: one sorted set per identity
+# ARGV[1]: now (ms), ARGV[2]: member for this request,
+# then per key i: ARGV[1 + 2i] limit, ARGV[2 + 2i] window (ms)
+# Returns 0 if allowed, else milliseconds until the request would be allowed.
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[1 + 2 * i])
+    local window = tonumber(ARGV[2 + 2 * i])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    if redis.call('ZCARD', key) >= limit then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        retry_after = math.max(retry_after, tonumber(oldest[2]) + window - now)
+    end
+end
+if retry_after > 0 then
+    return retry_after
+end
+for i, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, ARGV[2])
+    redis.call('PEXPIRE', key, ARGV[2 + 2 * i])
+end
+return 0
+"""
+
+
+class RateLimitExceededError(HTTPException):
+    """Raised when a caller exceeded a route's rate limit"""
+
+    def __init__(self, route: str, retry_after: int):
+        super().__init__(
+            status_code=429,
+            detail="Too many requests, please retry later",
+            headers={"Retry-After": str(retry_after)},
+        )
+        self.route = route
+
+
+def parse_limit(spec: str) -> tuple[int, int]:
+    """Parse "<requests>/<seconds>" into (limit, window in ms), "5/60" -> (5, 60000)"""
+    requests, seconds = spec.split("/")
+    limit, window = int(requests), int(float(seconds) * 1000)
+    if limit < 1 or window < 1:
+        raise ValueError(f"Invalid rate limit {spec!r}")
+    return limit, window
+
+
+def _key(route: str, scope: str, value) -> str:
+    # Hashed so emails and addresses are not readable from a Redis dump
+    digest = hashlib.blake2b(
+        str(value).lower().encode("utf-8"), digest_size=12
+    ).hexdigest()
+    return f"rl:{route}:{scope}:{digest}"
+
+
+async def check_rate_limit(route: str, **identities):
+    """
+    Count a request against the limits RATE_LIMIT_CONFIG sets for `route`,
+    one per identity scope, e.g. check_rate_limit("login", ip=..., email=...).
+    Raises RateLimitExceededError if any is exhausted. Identities that are None
+    or have no configured limit are skipped. If Redis is unavailable the
+    request is allowed, so the limiter never takes the endpoints down with it.
+    """
+    if not RATE_LIMIT_CONFIG["enabled"]:
+        return
+
+    limits = RATE_LIMIT_CONFIG["routes"][route]
+    now_ms = int(time.time() * 1000)
+    keys: list[str] = []
+    args: list = [now_ms, f"{now_ms}:{secrets.token_hex(4)}"]
+    for scope, value in identities.items():
+        if value is None or scope not in limits:
+            continue
+        keys.append(_key(route, scope, value))
+        args.extend(parse_limit(limits[scope]))
+    if not keys:
+        return
+
+    redis = get_redis_client()
+    try:
+        retry_after_ms = await redis.register_script(SLIDING_WINDOW_SCRIPT)(
+            keys=keys, args=args
+        )
+    except RedisError as e:
+        logger.warning(f"Rate limiter unavailable, allowing {route} request: {e}")
+        return
+
+    if retry_after_ms:
+        record_rate_limit_decision(route, "throttled")
+        raise RateLimitExceededError(route, math.ceil(retry_after_ms / 1000))
+    record_rate_limit_decision(route, "allowed")
@@ -0,0 +1,103 @@
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+
+from . import queries
+
+# Analytics rollups. The request path only appends posting_views and
+# applications rows; roll_up() aggregates them into posting_metrics_hourly,
+# posting_metrics and postings.views (migration 0005). rollup_watermarks holds
+# how far that got: reads add the raw events at or after the watermark.
+#
+# Each pass recomputes whole hours from `lookback` before the watermark and
+# replaces the buckets that changed, so a rerun is a no-op and views committed
+# after their viewed_at (buffered writes, long transactions) are still counted
+# as long as they land within the lookback.
+#
+# downsample_daily_metrics() then folds daily rows older than the retention
+# into posting_metrics_monthly (migration 0006), a whole month at a time.
+
+ROLLUP_NAME = "posting_metrics"
+
+# Daily analytics show the last 30 days
+MIN_DAILY_RETENTION_DAYS = 31
+
+
+class RollupResult(NamedTuple):
+    start: datetime
+    watermark: datetime
+    posting_days: int
+    caught_up: bool
+
+
+def _floor_hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def roll_up(
+    conn, lookback: timedelta, max_window: timedelta, retention: timedelta
+) -> RollupResult:
+    """
+    One rollup pass in one transaction: recompute the hours from the
+    watermark minus `lookback` up to now (at most `max_window` past the
+    watermark), refresh the daily metrics of the posting days that changed,
+    drop hourly buckets older than `retention` and advance the watermark.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(queries.SELECT_ROLLUP_WATERMARK, (ROLLUP_NAME,))
+        row = cursor.fetchone()
+        start = _floor_hour(row["watermark"] - lookback)
+        end = min(row["now"], row["watermark"] + max_window)
+
+        cursor.execute(queries.ROLLUP_HOURLY_METRICS, (start, end))
+        changed = cursor.fetchall()
+        if changed:
+            cursor.execute(
+                queries.ROLLUP_DAILY_METRICS,
+                (
+                    [day["posting_id"] for day in changed],
+                    [day["date"] for day in changed],
+                ),
+            )
+
+        cursor.execute(queries.DELETE_EXPIRED_HOURLY_METRICS, (row["now"] - retention,))
+        cursor.execute(queries.UPDATE_ROLLUP_WATERMARK, (end, ROLLUP_NAME))
+    conn.commit()
+    return RollupResult(start, end, len(changed), end == row["now"])
+
+
+def _next_month(month: date) -> date:
+    return (month + timedelta(days=31)).replace(day=1)
+
+
+def downsample_daily_metrics(conn, retention_days: int) -> tuple[int, int]:
+    """
+    Fold the daily metrics of the whole months before `retention_days` ago
+    into monthly ones, one transaction per month. Returns the daily rows
+    folded and the monthly rows written.
+    """
+    if retention_days < MIN_DAILY_RETENTION_DAYS:
+        raise ValueError(
+            f"Daily metrics retention must be at least {MIN_DAILY_RETENTION_DAYS} "
+            f"days, got {retention_days}"
+        )
+    with conn.cursor() as cursor:
+        cursor.execute(queries.SELECT_OLDEST_DAILY_METRICS)
+        row = cursor.fetchone()
+    conn.commit()
+    if row["oldest"] is None:
+        return 0, 0
+
+    cutoff = (row["today"] - timedelta(days=retention_days)).replace(day=1)
+    days = months = 0
+    month = row["oldest"].replace(day=1)
+    while month < cutoff:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                queries.DOWNSAMPLE_DAILY_METRICS, (month, _next_month(month))
+            )
+            folded = cursor.fetchone()
+        conn.commit()
+        days += folded["days"]
+        months += folded["months"]
+        month = _next_month(month)
+    return days, months
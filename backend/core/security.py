@@ -1,16 +1,45 @@
-import json
 import re
 import secrets
-from datetime import UTC, datetime, timedelta
+import time
+from datetime import UTC, datetime
 
 import bcrypt
 
 from .cache import get_redis_client
-from .db import get_user_by_email
+from .config import PASSWORD_HASH_CONFIG, SESSION_CONFIG
+from .db import get_user_by_email, update_user_password
+from .session_cache import (
+    INVALIDATION_CHANNEL,
+    USER_INVALIDATION_PREFIX,
+    cached_session,
+    forget_session,
+    forget_user_sessions,
+    remember_session,
+)
+from .session_store import (
+    LOGOUT_ALL_SCRIPT,
+    SESSION_TTL_SECONDS,
+    decode_legacy_session,
+    decode_session,
+    describe_sessions,
+    encode_session,
+    index_session,
+    legacy_session_key,
+    session_key,
+    user_sessions_key,
+)
+from .signed_sessions import (
+    REVOKED_KEY,
+    decode_token,
+    is_signed_mode,
+    issue_session,
+    revocation_message,
+    revocations,
+)
 
 
 def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=PASSWORD_HASH_CONFIG["rounds"])
     return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
 
@@ -18,6 +47,15 @@ def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
 
 
+def needs_rehash(hashed: str) -> bool:
+    """True if a bcrypt hash ("$2b$<cost>$...") was made with another cost"""
+    try:
+        cost = int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return False
+    return cost != PASSWORD_HASH_CONFIG["rounds"]
+
+
 def is_password_valid(password: str) -> bool:
     if len(password) < 6:
         return False
@@ -29,41 +67,105 @@ def is_password_valid(password: str) -> bool:
 
 
 def create_session(user_id: int) -> str:
-    session_token = secrets.token_urlsafe(32)
-    redis = get_redis_client()
-    now = datetime.now(UTC)
-    session_data = {
-        "user_id": user_id,
-        "created_at": now.isoformat(),
-        "expires_at": (now + timedelta(days=7)).isoformat(),
-    }
-    redis.setex(f"session:{session_token}", 604800, json.dumps(session_data))
+    pipe = get_redis_client().pipeline()
+    if is_signed_mode():
+        session_token, token_id, expires_at = issue_session(user_id)
+        index_session(pipe, user_id, token_id, expires_at)
+    else:
+        session_token = secrets.token_urlsafe(32)
+        key = session_key(session_token)
+        created_at = datetime.now(UTC)
+        pipe.setex(key, SESSION_TTL_SECONDS, encode_session(user_id, created_at))
+        index_session(
+            pipe, user_id, key, int(created_at.timestamp()) + SESSION_TTL_SECONDS
+        )
+    pipe.execute()
     return session_token
 
 
+def index_member(session_token: str) -> bytes | None:
+    """The per-user index entry of a session token"""
+    if is_signed_mode():
+        decoded = decode_token(session_token)
+        return decoded[1].encode() if decoded else None
+    return session_key(session_token)
+
+
 def get_session_user(session_token: str) -> dict | None:
     if not session_token:
         return None
+    if is_signed_mode():
+        return _get_signed_session(session_token)
+
+    key = session_key(session_token)
+    cached = cached_session(key)
+    if cached is not None:
+        return cached
 
     redis = get_redis_client()
-    session_data = redis.get(f"session:{session_token}")
-    if not session_data:
+    raw = redis.get(key)
+    # Fall back to sessions created before the compact format
+    decoded = decode_session(raw) if raw else _get_legacy_session(redis, session_token)
+    if decoded is None:
         return None
 
-    try:
-        session = json.loads(session_data)
-        expires_at = datetime.fromisoformat(session["expires_at"])
-        if datetime.now(UTC) > expires_at:
-            redis.delete(f"session:{session_token}")
-            return None
-        return session
-    except (json.JSONDecodeError, KeyError, ValueError):
+    session, expires_at = decoded
+    remember_session(key, session, expires_at)
+    return session
+
+
+def _get_legacy_session(redis, session_token: str) -> tuple[dict, datetime] | None:
+    legacy_key = legacy_session_key(session_token)
+    raw = redis.get(legacy_key)
+    decoded = decode_legacy_session(raw) if raw else None
+    if decoded is None:
+        return None
+    if datetime.now(UTC) > decoded[1]:
+        redis.delete(legacy_key)
         return None
+    return decoded
+
+
+def _get_signed_session(session_token: str) -> dict | None:
+    decoded = decode_token(session_token)
+    if decoded is None:
+        return None
+    session, token_id, _ = decoded
+    if revocations.needs_refresh():
+        revocations.replace(
+            get_redis_client().zrangebyscore(
+                REVOKED_KEY, time.time(), "+inf", withscores=True
+            )
+        )
+    if revocations.is_revoked(token_id):
+        return None
+    return session
+
+
+def _revoke_signed_session(session_token: str) -> bool:
+    decoded = decode_token(session_token)
+    if decoded is None:
+        return False
+    session, token_id, expires_at = decoded
+    revocations.add(token_id, expires_at)
+
+    pipe = get_redis_client().pipeline()
+    pipe.zadd(REVOKED_KEY, {token_id: expires_at})
+    pipe.zrem(user_sessions_key(session["user_id"]), token_id)
+    # Entries past their token's expiry are no longer needed
+    pipe.zremrangebyscore(REVOKED_KEY, "-inf", time.time())
+    pipe.expire(REVOKED_KEY, SESSION_TTL_SECONDS)
+    pipe.publish(INVALIDATION_CHANNEL, revocation_message(token_id, expires_at))
+    added = pipe.execute()[0]
+    return bool(added)
 
 
 def login_user(email: str, password: str) -> dict | None:
     user = get_user_by_email(email)
-    if user and bcrypt.checkpw(password.encode(), user["hashed_password"].encode()):
+    if user and verify_password(password, user["hashed_password"]):
+        if needs_rehash(user["hashed_password"]):
+            # Only now is the plain password at hand to move it to the new cost
+            update_user_password(user["id"], hash_password(password))
         session_token = create_session(user["id"])
         return {
             "user_id": user["id"],
@@ -76,10 +178,44 @@ def login_user(email: str, password: str) -> dict | None:
 def logout_user(session_token: str) -> bool:
     if not session_token:
         return False
+    if is_signed_mode():
+        return _revoke_signed_session(session_token)
 
     redis = get_redis_client()
-    session_key = f"session:{session_token}"
-    if redis.exists(session_key):
-        redis.delete(session_key)
+    key = session_key(session_token)
+    forget_session(key)
+    raw = redis.get(key)
+    decoded = decode_session(raw) if raw else None
+
+    pipe = redis.pipeline()
+    pipe.delete(key, legacy_session_key(session_token))
+    if decoded is not None:
+        pipe.zrem(user_sessions_key(decoded[0]["user_id"]), key)
+    if pipe.execute()[0]:
+        # Other replicas may still hold the session in their local cache
+        redis.publish(INVALIDATION_CHANNEL, key)
         return True
     return False
+
+
+def logout_all_sessions(user_id: int) -> int:
+    """Revoke every indexed session of a user. Returns how many were live."""
+    redis = get_redis_client()
+    logout_all = redis.register_script(LOGOUT_ALL_SCRIPT)
+    revoked = logout_all(
+        keys=[user_sessions_key(user_id), REVOKED_KEY],
+        args=[SESSION_CONFIG["mode"], time.time(), SESSION_TTL_SECONDS],
+    )
+    forget_user_sessions(user_id)
+    if is_signed_mode():
+        revocations.mark_stale()
+    redis.publish(INVALIDATION_CHANNEL, f"{USER_INVALIDATION_PREFIX}{user_id}")
+    return revoked
+
+
+def list_sessions(user_id: int, current_token: str | None = None) -> list[dict]:
+    entries = get_redis_client().zrangebyscore(
+        user_sessions_key(user_id), time.time(), "+inf", withscores=True
+    )
+    current = index_member(current_token) if current_token else None
+    return describe_sessions(entries, current)
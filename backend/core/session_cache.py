@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import UTC, datetime
+
+from .config import SESSION_CACHE_CONFIG
+from .telemetry import record_session_cache_lookup
+
+# Redis pub/sub channel carrying the session keys (core.session_store's
+# session_key, never the token) to evict on every replica, the revocation
+# messages of signed mode, or "user:<user_id>" when all sessions of a user
+# were revoked at once
+INVALIDATION_CHANNEL = "session:invalidate"
+USER_INVALIDATION_PREFIX = "user:"
+
+
+class SessionCache:
+    """
+    Bounded LRU of recently validated sessions by session key, shared by
+    core.security and core.async_security. Entries live for at most `ttl`
+    seconds and never past the session's own expiry, so a revoked session is
+    honoured within `ttl` even if its invalidation message is lost.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 5.0):
+        if max_size < 1 or ttl <= 0:
+            raise ValueError("Session cache needs max_size >= 1 and ttl > 0")
+
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()  # key -> (session, deadline)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: bytes) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            session, deadline = entry
+            if time.monotonic() >= deadline:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return session
+
+    def put(self, key: bytes, session: dict, expires_at: datetime):
+        lifetime = min(self.ttl, (expires_at - datetime.now(UTC)).total_seconds())
+        if lifetime <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (session, time.monotonic() + lifetime)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, key: bytes):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def evict_user(self, user_id: int):
+        with self._lock:
+            stale = [
+                key
+                for key, (session, _) in self._entries.items()
+                if session["user_id"] == user_id
+            ]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_cache: SessionCache | None = (
+    SessionCache(
+        max_size=SESSION_CACHE_CONFIG["max_size"],
+        ttl=SESSION_CACHE_CONFIG["ttl"],
+    )
+    if SESSION_CACHE_CONFIG["enabled"]
+    else None
+)
+
+
+def is_enabled() -> bool:
+    return _cache is not None
+
+
+def cached_session(key: bytes) -> dict | None:
+    if _cache is None:
+        return None
+    session = _cache.get(key)
+    record_session_cache_lookup("hit" if session is not None else "miss")
+    return session
+
+
+def remember_session(key: bytes, session: dict, expires_at: datetime):
+    if _cache is not None:
+        _cache.put(key, session, expires_at)
+
+
+def forget_session(key: bytes):
+    if _cache is not None:
+        _cache.evict(key)
+
+
+def forget_user_sessions(user_id: int):
+    if _cache is not None:
+        _cache.evict_user(user_id)
+
+
+def forget_all_sessions():
+    if _cache is not None:
+        _cache.clear()
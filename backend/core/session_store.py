@@ -0,0 +1,118 @@
+import hashlib
+import json
+import struct
+import time
+from datetime import UTC, datetime, timedelta
+
+# Compact Redis encoding for SESSION_MODE=redis sessions.
+#
+# Key:   b"s:" + 16-byte BLAKE2b digest of the token (18 bytes, fixed length,
+#        and a Redis dump no longer contains usable tokens)
+# Value: 12 bytes, big-endian user_id (u64) + created_at (u32 unix seconds)
+#
+# Expiry lives only in the key TTL; expires_at is derived from created_at.
+# Sessions written before this format ("session:<token>" -> JSON) are still
+# read until they expire, so the legacy path can be dropped a TTL after deploy.
+#
+# Per-user index: "user_sessions:<user_id>" is a sorted set of that user's live
+# sessions (the session key, or the token id in signed mode) scored by expiry,
+# so listing or revoking every session of a user never has to SCAN. Expired
+# members are trimmed whenever a session is added, and the set itself expires
+# with the user's newest session. Legacy sessions are not indexed.
+
+SESSION_TTL_SECONDS = 604800  # 7 days
+
+_PAYLOAD = struct.Struct(">QI")
+
+
+def session_key(session_token: str) -> bytes:
+    digest = hashlib.blake2b(session_token.encode("utf-8"), digest_size=16).digest()
+    return b"s:" + digest
+
+
+def legacy_session_key(session_token: str) -> str:
+    return f"session:{session_token}"
+
+
+def user_sessions_key(user_id: int) -> str:
+    return f"user_sessions:{user_id}"
+
+
+def index_session(pipe, user_id: int, member, expires_at: float):
+    """Queue the index update for a new session on a MULTI pipeline"""
+    index_key = user_sessions_key(user_id)
+    pipe.zadd(index_key, {member: expires_at})
+    pipe.zremrangebyscore(index_key, "-inf", time.time())
+    pipe.expire(index_key, SESSION_TTL_SECONDS)
+
+
+# Drops every live session in the index in one atomic step, so a login racing
+# with "logout everywhere" either lands before it (and is revoked) or after it.
+# KEYS[1]: per-user index, KEYS[2]: revoked-token set (signed mode)
+# ARGV[1]: session mode, ARGV[2]: now, ARGV[3]: revoked-token set TTL
+LOGOUT_ALL_SCRIPT = """
+local entries = redis.call('ZRANGEBYSCORE', KEYS[1], ARGV[2], '+inf', 'WITHSCORES')
+for i = 1, #entries, 2 do
+    if ARGV[1] == 'signed' then
+        redis.call('ZADD', KEYS[2], entries[i + 1], entries[i])
+    else
+        redis.call('DEL', entries[i])
+    end
+end
+if ARGV[1] == 'signed' and #entries > 0 then
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+end
+redis.call('DEL', KEYS[1])
+return #entries / 2
+"""
+
+
+def session_id(member: bytes) -> str:
+    """Public id of an index member; never the token itself"""
+    if len(member) == 18 and member.startswith(b"s:"):
+        return member[2:].hex()
+    return member.decode()
+
+
+def describe_sessions(entries, current_member) -> list[dict]:
+    """entries: (member, expires_at) pairs as read from the per-user index"""
+    sessions = []
+    for member, score in entries:
+        expires_at = datetime.fromtimestamp(score, UTC)
+        created_at = expires_at - timedelta(seconds=SESSION_TTL_SECONDS)
+        sessions.append(
+            {
+                "id": session_id(member),
+                "created_at": created_at.isoformat(),
+                "expires_at": expires_at.isoformat(),
+                "current": member == current_member,
+            }
+        )
+    return sessions
+
+
+def encode_session(user_id: int, created_at: datetime) -> bytes:
+    return _PAYLOAD.pack(user_id, int(created_at.timestamp()))
+
+
+def decode_session(raw) -> tuple[dict, datetime] | None:
+    """Returns (session, expires_at) or None if the payload is not a session"""
+    if len(raw) != _PAYLOAD.size:
+        return None
+    user_id, created_at_ts = _PAYLOAD.unpack(raw)
+    created_at = datetime.fromtimestamp(created_at_ts, UTC)
+    expires_at = created_at + timedelta(seconds=SESSION_TTL_SECONDS)
+    session = {
+        "user_id": user_id,
+        "created_at": created_at.isoformat(),
+        "expires_at": expires_at.isoformat(),
+    }
+    return session, expires_at
+
+
+def decode_legacy_session(raw) -> tuple[dict, datetime] | None:
+    try:
+        session = json.loads(raw)
+        return session, datetime.fromisoformat(session["expires_at"])
+    except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return None
@@ -0,0 +1,139 @@
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from datetime import UTC, datetime
+
+from .config import SESSION_CONFIG
+from .session_store import SESSION_TTL_SECONDS
+
+# Stateless session tokens for SESSION_MODE=signed. The token carries the user
+# id and expiry and is verified with an HMAC, so a lookup is CPU only. Redis
+# keeps just the ids of revoked, not yet expired tokens in a sorted set scored
+# by expiry; every process mirrors that set and refreshes it periodically.
+#
+# Token: "<user_id>.<issued_at>.<expires_at>.<token_id>.<signature>"
+
+REVOKED_KEY = "session:revoked"
+
+
+def _secret() -> bytes:
+    secret = SESSION_CONFIG["secret"]
+    if not secret:
+        raise RuntimeError("SESSION_SECRET must be set when SESSION_MODE=signed")
+    return secret.encode("utf-8")
+
+
+def _sign(payload: str) -> str:
+    digest = hmac.new(_secret(), payload.encode("utf-8"), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
+
+
+def issue_token(user_id: int) -> str:
+    return issue_session(user_id)[0]
+
+
+def issue_session(user_id: int) -> tuple[str, str, int]:
+    """Returns (token, token_id, expires_at) for a new session"""
+    issued_at = int(time.time())
+    expires_at = issued_at + SESSION_TTL_SECONDS
+    token_id = secrets.token_urlsafe(12)
+    payload = f"{user_id}.{issued_at}.{expires_at}.{token_id}"
+    return f"{payload}.{_sign(payload)}", token_id, expires_at
+
+
+def decode_token(session_token: str) -> tuple[dict, str, int] | None:
+    """
+    Verify signature and expiry. Returns (session, token_id, expires_at), with
+    session shaped like the Redis-mode session, or None for any invalid token.
+    Revocation is not checked here.
+    """
+    parts = session_token.split(".")
+    if len(parts) != 5:
+        return None
+
+    user_id, issued_at, expires_at, token_id, signature = parts
+    payload = f"{user_id}.{issued_at}.{expires_at}.{token_id}"
+    if not hmac.compare_digest(signature.encode(), _sign(payload).encode()):
+        return None
+
+    try:
+        user_id_value = int(user_id)
+        issued_at_value = int(issued_at)
+        expires_at_value = int(expires_at)
+    except ValueError:
+        return None
+    if time.time() >= expires_at_value:
+        return None
+
+    session = {
+        "user_id": user_id_value,
+        "created_at": datetime.fromtimestamp(issued_at_value, UTC).isoformat(),
+        "expires_at": datetime.fromtimestamp(expires_at_value, UTC).isoformat(),
+    }
+    return session, token_id, expires_at_value
+
+
+class RevocationList:
+    """
+    Local mirror of the revoked-token set. Entries drop out once the token
+    they revoke has expired, so the set only ever covers live tokens.
+    """
+
+    def __init__(self, refresh_interval: float = 5.0):
+        self.refresh_interval = refresh_interval
+        self._revoked: dict = {}  # token_id -> expires_at
+        self._refreshed_at: float | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def add(self, token_id: str, expires_at: int):
+        with self._lock:
+            self._revoked[token_id] = expires_at
+
+    def is_revoked(self, token_id: str) -> bool:
+        return token_id in self._revoked
+
+    def needs_refresh(self) -> bool:
+        return (
+            self._refreshed_at is None
+            or time.monotonic() - self._refreshed_at >= self.refresh_interval
+        )
+
+    def mark_stale(self):
+        self._refreshed_at = None
+
+    def replace(self, entries):
+        """entries: (token_id, expires_at) pairs as read from REVOKED_KEY"""
+        now = time.time()
+        revoked = {
+            token_id.decode() if isinstance(token_id, bytes) else token_id: int(score)
+            for token_id, score in entries
+            if score > now
+        }
+        with self._lock:
+            self._revoked = revoked
+            self._refreshed_at = time.monotonic()
+
+
+revocations = RevocationList(refresh_interval=SESSION_CONFIG["revocation_refresh"])
+
+
+def is_signed_mode() -> bool:
+    return SESSION_CONFIG["mode"] == "signed"
+
+
+def revocation_message(token_id: str, expires_at: int) -> str:
+    """What a revocation publishes to other replicas: never the token itself"""
+    return f"{token_id}:{expires_at}"
+
+
+def revoke_locally(message: str):
+    """Apply a revocation_message() published by another replica to the local mirror"""
+    token_id, _, expires_at = message.rpartition(":")
+    if token_id and expires_at.isdigit():
+        revocations.add(token_id, int(expires_at))
@@ -6,8 +6,10 @@ from opentelemetry import metrics, trace
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
 from opentelemetry.exporter.prometheus import PrometheusMetricReader
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from opentelemetry.instrumentation.psycopg import PsycopgInstrumentor
 from opentelemetry.instrumentation.psycopg2 import Psycopg2Instrumentor
 from opentelemetry.instrumentation.redis import RedisInstrumentor
+from opentelemetry.metrics import CallbackOptions, Observation
 from opentelemetry.sdk.metrics import MeterProvider
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
@@ -27,6 +29,33 @@ login_attempts_total = None
 postings_created_total = None
 applications_submitted_total = None
 
+# Connection pool metrics
+pool_wait_duration = None
+pool_connections = None
+_pool_stats_providers: dict = {}
+
+# Blocking-call executor metrics
+executor_queue_depth = None
+executor_wait_duration = None
+executor_run_duration = None
+executor_rejections_total = None
+
+# In-process session cache metrics
+session_cache_lookups_total = None
+
+# Rate limiter metrics
+rate_limit_requests_total = None
+
+# Username/email availability filter metrics
+user_filter_lookups_total = None
+
+# Write-behind view buffer metrics
+view_buffer_depth = None
+view_flush_size = None
+view_flush_lag = None
+view_flushes_total = None
+view_buffer_overflows_total = None
+
 
 class HTTPMetricsMiddleware(BaseHTTPMiddleware):
     """Middleware to collect HTTP metrics"""
@@ -236,6 +265,215 @@ def record_application_submitted(result: str):
         applications_submitted_total.add(1, {"result": result})
 
 
+def register_pool_stats(pool_name: str, stats_provider):
+    """stats_provider: callable returning a {state: count} dict, e.g. in_use/idle"""
+    _pool_stats_providers[pool_name] = stats_provider
+
+
+def unregister_pool_stats(pool_name: str):
+    _pool_stats_providers.pop(pool_name, None)
+
+
+def _observe_pool_connections(options: CallbackOptions):
+    for pool_name, stats_provider in list(_pool_stats_providers.items()):
+        for state, count in stats_provider().items():
+            yield Observation(count, {"pool": pool_name, "state": state})
+
+
+def init_pool_metrics():
+    """Initialize connection pool metrics after meter provider is set up"""
+    global pool_wait_duration, pool_connections
+
+    pool_meter = metrics.get_meter(__name__)
+
+    pool_wait_duration = pool_meter.create_histogram(
+        name="pool_acquire_wait_seconds",
+        description="Time spent waiting to check a connection out of a pool",
+        unit="s",
+    )
+
+    pool_connections = pool_meter.create_observable_gauge(
+        name="pool_connections",
+        callbacks=[_observe_pool_connections],
+        description="Pooled connections by pool and state (in_use, idle)",
+        unit="1",
+    )
+
+
+def record_pool_wait(pool_name: str, seconds: float):
+    if pool_wait_duration:
+        pool_wait_duration.record(seconds, {"pool": pool_name})
+
+
+def init_executor_metrics():
+    """Initialize blocking-call executor metrics after meter provider is set up"""
+    global \
+        executor_queue_depth, \
+        executor_wait_duration, \
+        executor_run_duration, \
+        executor_rejections_total
+
+    executor_meter = metrics.get_meter(__name__)
+
+    executor_queue_depth = executor_meter.create_up_down_counter(
+        name="blocking_executor_queue_depth",
+        description="Blocking calls waiting for a free executor worker",
+        unit="1",
+    )
+
+    executor_wait_duration = executor_meter.create_histogram(
+        name="blocking_executor_wait_seconds",
+        description="Time a blocking call spent queued before a worker picked it up",
+        unit="s",
+    )
+
+    executor_run_duration = executor_meter.create_histogram(
+        name="blocking_executor_run_seconds",
+        description="Time a blocking call spent running on an executor worker",
+        unit="s",
+    )
+
+    executor_rejections_total = executor_meter.create_counter(
+        name="blocking_executor_rejections_total",
+        description="Blocking calls rejected with 503 because the backlog was full",
+        unit="1",
+    )
+
+
+def record_executor_queue_change(call_site: str, delta: int):
+    if executor_queue_depth:
+        executor_queue_depth.add(delta, {"call_site": call_site})
+
+
+def record_executor_wait(call_site: str, seconds: float):
+    if executor_wait_duration:
+        executor_wait_duration.record(seconds, {"call_site": call_site})
+
+
+def record_executor_run(call_site: str, seconds: float):
+    if executor_run_duration:
+        executor_run_duration.record(seconds, {"call_site": call_site})
+
+
+def record_executor_rejection(call_site: str):
+    if executor_rejections_total:
+        executor_rejections_total.add(1, {"call_site": call_site})
+
+
+def init_session_cache_metrics():
+    """Initialize session cache metrics after meter provider is set up"""
+    global session_cache_lookups_total
+
+    session_cache_lookups_total = metrics.get_meter(__name__).create_counter(
+        name="session_cache_lookups_total",
+        description="In-process session cache lookups by result (hit, miss)",
+        unit="1",
+    )
+
+
+def record_session_cache_lookup(result: str):
+    """result: 'hit' | 'miss'"""
+    if session_cache_lookups_total:
+        session_cache_lookups_total.add(1, {"result": result})
+
+
+def init_rate_limit_metrics():
+    """Initialize rate limiter metrics after meter provider is set up"""
+    global rate_limit_requests_total
+
+    rate_limit_requests_total = metrics.get_meter(__name__).create_counter(
+        name="rate_limit_requests_total",
+        description="Rate-limited requests by route and result (allowed, throttled)",
+        unit="1",
+    )
+
+
+def record_rate_limit_decision(route: str, result: str):
+    """result: 'allowed' | 'throttled'"""
+    if rate_limit_requests_total:
+        rate_limit_requests_total.add(1, {"route": route, "result": result})
+
+
+def init_user_filter_metrics():
+    """Initialize user filter metrics after meter provider is set up"""
+    global user_filter_lookups_total
+
+    user_filter_lookups_total = metrics.get_meter(__name__).create_counter(
+        name="user_filter_lookups_total",
+        description="Availability lookups by filter result (negative, maybe, unavailable)",
+        unit="1",
+    )
+
+
+def record_user_filter_lookup(result: str):
+    """result: 'negative' | 'maybe' | 'unavailable'"""
+    if user_filter_lookups_total:
+        user_filter_lookups_total.add(1, {"result": result})
+
+
+def init_view_buffer_metrics():
+    """Initialize view buffer metrics after meter provider is set up"""
+    global \
+        view_buffer_depth, \
+        view_flush_size, \
+        view_flush_lag, \
+        view_flushes_total, \
+        view_buffer_overflows_total
+
+    view_meter = metrics.get_meter(__name__)
+
+    view_buffer_depth = view_meter.create_up_down_counter(
+        name="view_buffer_depth",
+        description="Posting views queued in process, waiting to be flushed",
+        unit="1",
+    )
+
+    view_flush_size = view_meter.create_histogram(
+        name="view_flush_size",
+        description="Posting views written per flush",
+        unit="1",
+    )
+
+    view_flush_lag = view_meter.create_histogram(
+        name="view_flush_lag_seconds",
+        description="Age of the oldest view in a batch when the batch was flushed",
+        unit="s",
+    )
+
+    view_flushes_total = view_meter.create_counter(
+        name="view_flushes_total",
+        description="View buffer flushes by result (success, error)",
+        unit="1",
+    )
+
+    view_buffer_overflows_total = view_meter.create_counter(
+        name="view_buffer_overflows_total",
+        description="Views written synchronously because the buffer was full",
+        unit="1",
+    )
+
+
+def record_view_buffer_change(delta: int):
+    if view_buffer_depth:
+        view_buffer_depth.add(delta, {})
+
+
+def record_view_flush(size: int, lag_seconds: float, result: str):
+    """result: 'success' | 'error'"""
+    if view_flushes_total:
+        view_flushes_total.add(1, {"result": result})
+    if result == "success":
+        if view_flush_size:
+            view_flush_size.record(size, {})
+        if view_flush_lag:
+            view_flush_lag.record(lag_seconds, {})
+
+
+def record_view_buffer_overflow():
+    if view_buffer_overflows_total:
+        view_buffer_overflows_total.add(1, {})
+
+
 def instrument_app(app):
     """
     Auto-instrument FastAPI app and database connections.
@@ -244,11 +482,19 @@ def instrument_app(app):
     # Auto instrument FastAPI, traces all HTTP requests
     FastAPIInstrumentor.instrument_app(app)
 
-    # Auto instrument database connections
+    # Auto instrument database connections (psycopg2 for core.db,
+    # psycopg 3 for core.async_db)
     Psycopg2Instrumentor().instrument()
+    PsycopgInstrumentor().instrument()
     RedisInstrumentor().instrument()
 
     init_http_metrics()
+    init_pool_metrics()
+    init_executor_metrics()
+    init_session_cache_metrics()
+    init_rate_limit_metrics()
+    init_user_filter_metrics()
+    init_view_buffer_metrics()
     app.add_middleware(HTTPMetricsMiddleware)
 
     print(
@@ -0,0 +1,66 @@
+import secrets
+from datetime import date
+
+from .view_encoding import session_hash
+
+# Unique-viewer tracking in Redis instead of scanning posting_views for the
+# viewer's last 24 hours. The viewer is the user, or the session for anonymous
+# visitors; views with neither count as unique, as they always have. Sessions
+# go by session_hash(), as in posting_views, so no token ends up in Redis.
+#
+# - A view is unique when SET NX on unique_view:<posting>:<viewer> succeeds.
+#   The marker expires after 24 hours, so the window is exact.
+# - Every viewer is also PFADDed to a HyperLogLog per posting and UTC day.
+#
+# The stored unique_views_count comes only from the rollup of posting_views'
+# is_unique_view flags; analytics adds the views since the watermark. The
+# HyperLogLog is never persisted: posting analytics merges today's live count
+# on read, and only where it is higher.
+
+MARKER_TTL = 24 * 60 * 60
+
+# Outlives its UTC day, the only one analytics reads
+HLL_TTL = 25 * 60 * 60
+
+
+def viewer_id(user_id: int | None, session_id: str | None) -> str | None:
+    if user_id:
+        return f"user:{user_id}"
+    if session_id:
+        return f"session:{session_hash(session_id)}"
+    return None
+
+
+def marker_key(posting_id: int, viewer: str) -> str:
+    return f"unique_view:{posting_id}:{viewer}"
+
+
+def hll_key(posting_id: int, day: date) -> str:
+    return f"unique_viewers:{day.isoformat()}:{posting_id}"
+
+
+def queue_unique_view(pipe, posting_id: int, viewer: str | None, day: date):
+    """
+    Queue one view on a Redis pipeline. When `viewer` is given, the first
+    result is truthy if the view is unique.
+    """
+    if viewer is not None:
+        pipe.set(marker_key(posting_id, viewer), 1, nx=True, ex=MARKER_TTL)
+    # A viewer without identity is a distinct member every time
+    pipe.pfadd(hll_key(posting_id, day), viewer or f"anonymous:{secrets.token_hex(8)}")
+    pipe.expire(hll_key(posting_id, day), HLL_TTL)
+
+
+def merge_live_unique_views(analytics: dict, day: date, live_count: int):
+    """
+    Raise `day`'s unique views in get_posting_analytics output to the live
+    HyperLogLog count. The stored and pending views already count the day, so
+    the live count is a floor, never added on top
+    """
+    for metric in analytics["daily_metrics"]:
+        if metric["date"] == day.isoformat():
+            missing = live_count - metric["unique_views_count"]
+            if missing > 0:
+                metric["unique_views_count"] = live_count
+                analytics["stats"]["unique_views"] += missing
+            return
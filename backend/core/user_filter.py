@@ -0,0 +1,67 @@
+import secrets
+from collections.abc import Iterable
+
+# Bloom filter over every registered username and email (Redis 8 / RedisBloom
+# BF.* commands), so the signup form can check availability while the user
+# types. A "no" from the filter is definite and costs no database work; a
+# "maybe" falls through to an indexed lookup. Values are normalised (trimmed,
+# lower-cased) so the filter over-approximates the case-sensitive columns and
+# never produces a false "no".
+#
+# The filter is built by `python manage.py rebuild-user-filter` and kept
+# current as users are created or renamed. Writes use NOCREATE so a missing
+# filter is never recreated with default sizing; until it is rebuilt every
+# lookup simply goes to the database.
+
+FILTER_KEY = "users:names"
+
+
+def filter_item(field: str, value: str) -> str:
+    """field: 'username' | 'email'"""
+    return f"{field}:{value.strip().lower()}"
+
+
+def filter_items(username: str | None = None, email: str | None = None) -> list:
+    items = []
+    if username:
+        items.append(filter_item("username", username))
+    if email:
+        items.append(filter_item("email", email))
+    return items
+
+
+def insert_command(items: list) -> tuple:
+    """BF.INSERT arguments adding items to an existing filter only"""
+    return ("BF.INSERT", FILTER_KEY, "NOCREATE", "ITEMS", *items)
+
+
+def rebuild_user_filter(
+    redis,
+    rows: Iterable,
+    capacity: int,
+    error_rate: float,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Build a fresh filter from (username, email) rows into a temporary key and
+    swap it in atomically with RENAME, so lookups never see a partial filter.
+    Returns the number of users added.
+    """
+    temp_key = f"{FILTER_KEY}:rebuild:{secrets.token_hex(4)}"
+    redis.execute_command("BF.RESERVE", temp_key, error_rate, capacity)
+    try:
+        added = 0
+        batch: list = []
+        for username, email in rows:
+            batch.extend(filter_items(username, email))
+            added += 1
+            if len(batch) >= batch_size:
+                redis.execute_command("BF.MADD", temp_key, *batch)
+                batch = []
+        if batch:
+            redis.execute_command("BF.MADD", temp_key, *batch)
+        redis.rename(temp_key, FILTER_KEY)
+    except BaseException:
+        redis.delete(temp_key)
+        raise
+    return added
@@ -1,7 +1,67 @@
+import ipaddress
+import secrets
+import string
 from datetime import datetime
 
+from fastapi import Request
+
+from .config import PROXY_CONFIG
+
+_TRUSTED_PROXIES = [
+    ipaddress.ip_network(network, strict=False) for network in PROXY_CONFIG["trusted"]
+]
+
 
 def json_serializer(obj):
     if isinstance(obj, datetime):
         return obj.isoformat()
     raise TypeError(f"Type {type(obj)} not serializable")
+
+
+def _trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in _TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str | None:
+    """
+    The address of the client. Behind trusted proxies it is the nearest
+    X-Forwarded-For hop that is not one of them: each proxy appends the peer
+    it saw, so anything further left may be forged by the client.
+    """
+    peer = request.client.host if request.client else None
+    if peer is None or not _trusted_proxy(peer):
+        return peer
+
+    forwarded = request.headers.get("x-forwarded-for") or request.headers.get(
+        "x-real-ip", ""
+    )
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _trusted_proxy(hop):
+            try:
+                return str(ipaddress.ip_address(hop))
+            except ValueError:
+                # Not an address, so a proxy did not write it
+                return peer
+        peer = hop
+    return peer
+
+
+POSTING_HASH_ALPHABET = string.ascii_lowercase + string.digits
+
+# 36^12 possible hashes, so even a single retry is vanishingly rare
+POSTING_HASH_ATTEMPTS = 5
+
+
+def generate_posting_hash(length: int = 12) -> str:
+    """Random URL-safe posting identifier; uniqueness is enforced on insert"""
+    value = secrets.randbelow(len(POSTING_HASH_ALPHABET) ** length)
+    chars = []
+    for _ in range(length):
+        value, index = divmod(value, len(POSTING_HASH_ALPHABET))
+        chars.append(POSTING_HASH_ALPHABET[index])
+    return "".join(chars)
@@ -0,0 +1,188 @@
+import asyncio
+import ipaddress
+from collections import deque
+from contextlib import suppress
+from datetime import UTC, datetime
+from typing import NamedTuple
+
+from . import async_db
+from .config import VIEW_TRACKING_CONFIG
+from .logger import logger
+from .telemetry import (
+    record_view_buffer_change,
+    record_view_buffer_overflow,
+    record_view_flush,
+)
+from .view_encoding import session_hash
+
+# Write-behind posting view tracking. With VIEW_TRACKING_MODE=buffered a page
+# view only appends to an in-process queue, and a background task writes the
+# queue to Postgres in batches (async_db.record_posting_views). Views still
+# queued when a replica is killed are lost: at most flush_interval seconds'
+# worth, since shutdown drains the queue. VIEW_TRACKING_MODE=sync writes every
+# view before the page is returned.
+
+
+class PostingView(NamedTuple):
+    posting_id: int
+    user_id: int | None
+    ip_address: str | None
+    user_agent: str | None
+    session_hash: int | None  # the token itself is not kept (core.view_encoding)
+    viewed_at: datetime
+    is_unique: bool | None  # None: Redis was down, decided when flushed
+
+
+class ViewBuffer:
+    """
+    Bounded queue of posting views flushed every `flush_interval` seconds, or
+    as soon as `batch_size` views are waiting. A failed batch goes back to the
+    front of the queue and is retried on the next flush. When `max_size` views
+    are queued, offer() refuses new ones so the caller can write them itself.
+    """
+
+    def __init__(
+        self, max_size: int = 10000, batch_size: int = 500, flush_interval: float = 1.0
+    ):
+        if max_size < 1 or batch_size < 1 or flush_interval <= 0:
+            raise ValueError(
+                "View buffer needs max_size >= 1, batch_size >= 1 and flush_interval > 0"
+            )
+
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._views: deque = deque()
+        self._batch_ready = asyncio.Event()
+        self._closing = False
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._views)
+
+    def offer(self, view: PostingView) -> bool:
+        if len(self._views) >= self.max_size:
+            record_view_buffer_overflow()
+            return False
+        self._views.append(view)
+        record_view_buffer_change(1)
+        if len(self._views) >= self.batch_size:
+            self._batch_ready.set()
+        return True
+
+    async def flush(self) -> int:
+        """Write the oldest batch; returns the number of views written"""
+        if not self._views:
+            return 0
+        batch = [
+            self._views.popleft() for _ in range(min(self.batch_size, len(self._views)))
+        ]
+        lag = (datetime.now(UTC) - batch[0].viewed_at).total_seconds()
+        try:
+            await async_db.record_posting_views(batch)
+        except BaseException:
+            self._views.extendleft(reversed(batch))
+            record_view_flush(len(batch), lag, "error")
+            raise
+        record_view_buffer_change(-len(batch))
+        record_view_flush(len(batch), lag, "success")
+        return len(batch)
+
+    async def flush_all(self):
+        """Write everything queued so far, stopping at the first failed batch"""
+        try:
+            while self._views:
+                await self.flush()
+        except Exception as e:
+            logger.warning(
+                f"Flushing posting views failed, {len(self._views)} queued: {e}"
+            )
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop the flush task and drain the queue"""
+        self._closing = True
+        self._batch_ready.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush_all()
+
+    async def _run(self):
+        while not self._closing:
+            with suppress(TimeoutError):
+                await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+            self._batch_ready.clear()
+            await self.flush_all()
+
+
+_buffer: ViewBuffer | None = None
+
+
+def is_buffered() -> bool:
+    return VIEW_TRACKING_CONFIG["mode"] == "buffered"
+
+
+def init_view_buffer() -> ViewBuffer | None:
+    """Start the flush task; call from the running event loop"""
+    global _buffer
+    if _buffer is None and is_buffered():
+        _buffer = ViewBuffer(
+            max_size=VIEW_TRACKING_CONFIG["max_size"],
+            batch_size=VIEW_TRACKING_CONFIG["batch_size"],
+            flush_interval=VIEW_TRACKING_CONFIG["flush_interval"],
+        )
+        _buffer.start()
+    return _buffer
+
+
+async def close_view_buffer():
+    global _buffer
+    if _buffer is not None:
+        buffer, _buffer = _buffer, None
+        await buffer.close()
+
+
+def _inet(ip_address: str | None) -> str | None:
+    """A batch is one statement, so one unparsable address must not fail it"""
+    if ip_address is None:
+        return None
+    try:
+        return str(ipaddress.ip_address(ip_address))
+    except ValueError:
+        return None
+
+
+async def track_posting_view(
+    posting_id: int,
+    user_id: int | None = None,
+    ip_address: str | None = None,
+    user_agent: str | None = None,
+    session_id: str | None = None,
+) -> bool | None:
+    """
+    Track a view of a posting, through the buffer when it is enabled. Returns
+    whether the view is unique, or None if Redis could not tell and the view
+    was buffered (it is then decided when flushed).
+    """
+    buffer = _buffer
+    if buffer is None:
+        return await async_db.track_posting_view(
+            posting_id, user_id, ip_address, user_agent, session_id
+        )
+
+    view = PostingView(
+        posting_id,
+        user_id,
+        _inet(ip_address),
+        user_agent,
+        session_hash(session_id),
+        datetime.now(UTC),
+        await async_db.claim_unique_view(posting_id, user_id, session_id),
+    )
+    if not buffer.offer(view):
+        # Full: write this view now, the uniqueness marker is already claimed
+        await async_db.record_posting_views([view])
+    return view.is_unique
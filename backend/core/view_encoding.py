@@ -0,0 +1,99 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from .config import USER_AGENT_CACHE_CONFIG
+
+# Compact encodings of posting_views columns (migration 0007). User agents are
+# dictionary-encoded: each distinct one is a user_agents row and views store
+# its id. core.db and core.async_db resolve the ids of a whole batch in one
+# round trip and cache them here, per process; user_agents rows never change
+# or go away, so a cached id is never stale. Session tokens are stored as
+# session_hash().
+
+# Longer user agents are cut to this many characters, as in migration 0007
+USER_AGENT_MAX_LENGTH = 512
+
+
+class UserAgentCache:
+    """Bounded LRU of user agent -> user_agents.id"""
+
+    def __init__(self, max_size: int = 10000):
+        if max_size < 1:
+            raise ValueError("User agent cache needs max_size >= 1")
+
+        self.max_size = max_size
+        self._ids: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def get(self, user_agent: str) -> int | None:
+        with self._lock:
+            agent_id = self._ids.get(user_agent)
+            if agent_id is not None:
+                self._ids.move_to_end(user_agent)
+            return agent_id
+
+    def put(self, user_agent: str, agent_id: int):
+        with self._lock:
+            self._ids[user_agent] = agent_id
+            self._ids.move_to_end(user_agent)
+            while len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+
+_cache = UserAgentCache(max_size=USER_AGENT_CACHE_CONFIG["max_size"])
+
+
+def normalize_user_agent(user_agent: str | None) -> str | None:
+    """The user agent as stored in user_agents; None when there is none"""
+    if not user_agent:
+        return None
+    return user_agent[:USER_AGENT_MAX_LENGTH]
+
+
+def cached_user_agent_ids(user_agents: list) -> tuple[dict, list[str]]:
+    """
+    Ids of the normalized user agents found in the cache, and the distinct
+    ones that still need resolving
+    """
+    known: dict = {}
+    missing: set = set()
+    for user_agent in user_agents:
+        if user_agent is None or user_agent in known or user_agent in missing:
+            continue
+        agent_id = _cache.get(user_agent)
+        if agent_id is None:
+            missing.add(user_agent)
+        else:
+            known[user_agent] = agent_id
+    return known, sorted(missing)
+
+
+def remember_user_agent_ids(rows: list) -> dict:
+    """Cache resolved (id, user_agent) rows; returns them as a dict"""
+    resolved = {row["user_agent"]: row["id"] for row in rows}
+    for user_agent, agent_id in resolved.items():
+        _cache.put(user_agent, agent_id)
+    return resolved
+
+
+def forget_user_agent_ids():
+    _cache.clear()
+
+
+def session_hash(session_id: str | None) -> int | None:
+    """
+    First 8 bytes of the session token's SHA-256 as a signed BIGINT. Tells
+    sessions apart for the 24h uniqueness check without storing the token.
+    """
+    if not session_id:
+        return None
+    digest = hashlib.sha256(session_id.encode()).digest()
+    return int.from_bytes(digest[:8], "big", signed=True)
@@ -1,10 +1,48 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from api import endpoints
+from core import (
+    async_cache,
+    async_db,
+    cache,
+    db,
+    session_cache,
+    signed_sessions,
+    view_buffer,
+)
+from core.async_security import listen_for_session_invalidations
+from core.passwords import init_password_executor, shutdown_password_executor
 from core.telemetry import configure_telemetry, instrument_app
 from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
-app = FastAPI(title="FastAPI App", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_password_executor()
+    async_cache.init_redis_client()
+    db.init_db_pool()
+    await async_db.init_db_pool()
+    view_buffer.init_view_buffer()
+    invalidation_listener = None
+    if session_cache.is_enabled() or signed_sessions.is_signed_mode():
+        invalidation_listener = asyncio.create_task(listen_for_session_invalidations())
+    yield
+    if invalidation_listener is not None:
+        invalidation_listener.cancel()
+        with suppress(asyncio.CancelledError):
+            await invalidation_listener
+    await view_buffer.close_view_buffer()
+    await async_db.close_db_pool()
+    db.close_db_pool()
+    await async_cache.close_redis_client()
+    cache.close_redis_client()
+    shutdown_password_executor()
+
+
+app = FastAPI(title="FastAPI App", version="1.0.0", lifespan=lifespan)
 
 # Initialize OpenTelemetry first
 configure_telemetry("fastapi-backend")
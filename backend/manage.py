@@ -0,0 +1,198 @@
+"""
+Maintenance commands. Run from backend/ with the backend's environment:
+
+    python manage.py migrate
+    python manage.py migrate-status
+    python manage.py rebuild-user-filter
+    python manage.py reconcile-application-counts
+    python manage.py maintain-view-partitions
+    python manage.py downsample-metrics
+"""
+
+import argparse
+
+from core import db, migrations, queries
+from core.cache import get_redis_client
+from core.config import RETENTION_CONFIG, USER_FILTER_CONFIG
+from core.partitions import maintain_view_partitions
+from core.rollups import downsample_daily_metrics
+from core.user_filter import filter_items, insert_command, rebuild_user_filter
+
+
+def migrate_command(args) -> int:
+    with db.get_db_connection() as conn:
+        applied = migrations.apply_migrations(conn, target=args.to)
+    for migration in applied:
+        print(f"Applied {migration.version:04d}_{migration.name}")
+    if not applied:
+        print("No migrations to apply")
+    return 0
+
+
+def migrate_status_command(args) -> int:
+    with db.get_db_connection() as conn:
+        status = migrations.migration_status(conn)
+    pending = 0
+    for row in status:
+        if row["applied_at"] is None:
+            pending += 1
+            state = "pending"
+        else:
+            state = f"applied {row['applied_at']:%Y-%m-%d %H:%M:%S}"
+        print(f"{row['version']:04d}_{row['name']:<40} {state}")
+    # Non-zero while migrations are pending, so deploy scripts can check it
+    return 1 if pending else 0
+
+
+def rebuild_user_filter_command(args) -> int:
+    redis = get_redis_client()
+    with db.get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(queries.SELECT_USER_FILTER_CUTOFF)
+            cutoff = cursor.fetchone()["cutoff"]
+
+        # Server-side cursor, so the users table is streamed in batches
+        with conn.cursor(name="user_filter_rebuild") as cursor:
+            cursor.itersize = args.batch_size
+            cursor.execute(queries.SELECT_USER_NAMES)
+            added = rebuild_user_filter(
+                redis,
+                ((row["username"], row["email"]) for row in cursor),
+                capacity=args.capacity,
+                error_rate=args.error_rate,
+                batch_size=args.batch_size,
+            )
+
+        with conn.cursor() as cursor:
+            cursor.execute(queries.SELECT_USER_NAMES_SINCE, (cutoff,))
+            recent = [
+                item
+                for row in cursor.fetchall()
+                for item in filter_items(row["username"], row["email"])
+            ]
+    if recent:
+        redis.execute_command(*insert_command(recent))
+
+    print(f"User filter rebuilt with {added} users")
+    return 0
+
+
+def reconcile_application_counts_command(args) -> int:
+    with db.get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            # Block application writes (reads continue) so no trigger update
+            # lands between counting and repairing
+            cursor.execute("LOCK TABLE applications IN SHARE MODE")
+            cursor.execute(queries.RECONCILE_APPLICATION_COUNTS)
+            repaired = [row["id"] for row in cursor.fetchall()]
+        if args.dry_run:
+            conn.rollback()
+        else:
+            conn.commit()
+
+    action = "would repair" if args.dry_run else "repaired"
+    print(f"Application counts {action} on {len(repaired)} postings")
+    if repaired:
+        print("Posting ids: " + ", ".join(map(str, sorted(repaired))))
+    return 0
+
+
+def maintain_view_partitions_command(args) -> int:
+    with db.get_db_connection() as conn:
+        created, expired = maintain_view_partitions(
+            conn, args.premake_days, args.retention_days, detach=args.detach
+        )
+
+    action = "detached" if args.detach else "dropped"
+    print(f"View partitions: {len(created)} created, {len(expired)} {action}")
+    for name in created:
+        print(f"Created {name}")
+    for name in expired:
+        print(f"{action.capitalize()} {name}")
+    return 0
+
+
+def downsample_metrics_command(args) -> int:
+    with db.get_db_connection() as conn:
+        days, months = downsample_daily_metrics(conn, args.retention_days)
+    print(f"Daily metrics downsampled: {days} posting days into {months} months")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Backend maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = commands.add_parser("migrate", help="Apply pending schema migrations")
+    migrate.add_argument(
+        "--to", type=int, help="stop after this migration version (default: all)"
+    )
+    migrate.set_defaults(handler=migrate_command)
+
+    status = commands.add_parser(
+        "migrate-status", help="List schema migrations and whether they are applied"
+    )
+    status.set_defaults(handler=migrate_status_command)
+
+    rebuild = commands.add_parser(
+        "rebuild-user-filter",
+        help="Rebuild the username/email availability filter from the users table",
+    )
+    rebuild.add_argument("--capacity", type=int, default=USER_FILTER_CONFIG["capacity"])
+    rebuild.add_argument(
+        "--error-rate", type=float, default=USER_FILTER_CONFIG["error_rate"]
+    )
+    rebuild.add_argument("--batch-size", type=int, default=1000)
+    rebuild.set_defaults(handler=rebuild_user_filter_command)
+
+    reconcile = commands.add_parser(
+        "reconcile-application-counts",
+        help="Recompute the application counters on postings and repair drift",
+    )
+    reconcile.add_argument(
+        "--dry-run", action="store_true", help="report drift without repairing it"
+    )
+    reconcile.set_defaults(handler=reconcile_application_counts_command)
+
+    partitions = commands.add_parser(
+        "maintain-view-partitions",
+        help="Create upcoming posting_views partitions and expire old ones",
+    )
+    partitions.add_argument(
+        "--premake-days",
+        type=int,
+        default=RETENTION_CONFIG["view_partition_premake_days"],
+        help="days ahead of today to create partitions for",
+    )
+    partitions.add_argument(
+        "--retention-days",
+        type=int,
+        default=RETENTION_CONFIG["view_retention_days"],
+        help="days of views to keep",
+    )
+    partitions.add_argument(
+        "--detach",
+        action="store_true",
+        default=RETENTION_CONFIG["view_expired_partitions"] == "detach",
+        help="detach expired partitions and keep them as tables instead of dropping",
+    )
+    partitions.set_defaults(handler=maintain_view_partitions_command)
+
+    downsample = commands.add_parser(
+        "downsample-metrics",
+        help="Fold daily posting_metrics past the retention into monthly rows",
+    )
+    downsample.add_argument(
+        "--retention-days",
+        type=int,
+        default=RETENTION_CONFIG["daily_metrics_retention_days"],
+        help="days of daily metrics to keep",
+    )
+    downsample.set_defaults(handler=downsample_metrics_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,69 @@
+-- Baseline schema. Written with IF NOT EXISTS so it also adopts databases
+-- created by the old init scripts: the full postgres/init.sql schema and the
+-- reduced k8s one, which lacked postings.hash, the review columns on
+-- applications and the view/metrics tables.
+
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    surname TEXT NOT NULL,
+    username TEXT NOT NULL UNIQUE,
+    email TEXT NOT NULL UNIQUE,
+    user_type TEXT NOT NULL,
+    hashed_password TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS postings (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    title TEXT NOT NULL,
+    post_description TEXT NOT NULL,
+    category TEXT NOT NULL,
+    hash TEXT UNIQUE,
+    views INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP,
+    status VARCHAR(50) DEFAULT 'active'
+);
+
+ALTER TABLE postings ADD COLUMN IF NOT EXISTS hash TEXT UNIQUE;
+
+CREATE TABLE IF NOT EXISTS applications (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    posting_id INTEGER REFERENCES postings(id) ON DELETE CASCADE,
+    message TEXT,
+    cover_letter TEXT,
+    applied_at TIMESTAMP DEFAULT NOW(),
+    status VARCHAR(50) DEFAULT 'pending',
+    reviewed_at TIMESTAMP,
+    reviewer_notes TEXT
+);
+
+ALTER TABLE applications
+    ADD COLUMN IF NOT EXISTS cover_letter TEXT,
+    ADD COLUMN IF NOT EXISTS reviewed_at TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS reviewer_notes TEXT;
+
+CREATE TABLE IF NOT EXISTS posting_views (
+    id SERIAL PRIMARY KEY,
+    posting_id INTEGER REFERENCES postings(id) ON DELETE CASCADE,
+    user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    ip_address INET,
+    user_agent TEXT,
+    viewed_at TIMESTAMP DEFAULT NOW(),
+    session_id TEXT,
+    is_unique_view BOOLEAN DEFAULT TRUE
+);
+
+CREATE TABLE IF NOT EXISTS posting_metrics (
+    id SERIAL PRIMARY KEY,
+    posting_id INTEGER REFERENCES postings(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    views_count INTEGER DEFAULT 0,
+    unique_views_count INTEGER DEFAULT 0,
+    applications_count INTEGER DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    UNIQUE(posting_id, date)
+);
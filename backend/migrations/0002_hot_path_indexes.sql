@@ -0,0 +1,39 @@
+-- Indexes for the predicates core/db.py actually runs, replacing the old
+-- single-column ones.
+
+-- 24h view de-duplication: SELECT_RECENT_VIEW_BY_USER / _BY_SESSION
+CREATE INDEX IF NOT EXISTS idx_posting_views_posting_user_viewed
+    ON posting_views (posting_id, user_id, viewed_at);
+CREATE INDEX IF NOT EXISTS idx_posting_views_posting_session_viewed
+    ON posting_views (posting_id, session_id, viewed_at);
+
+-- Keeps ON DELETE SET NULL from scanning posting_views when a user is deleted
+CREATE INDEX IF NOT EXISTS idx_posting_views_user_id ON posting_views (user_id);
+
+-- "My postings", newest first: SELECT_POSTINGS_BY_USER
+CREATE INDEX IF NOT EXISTS idx_postings_user_created
+    ON postings (user_id, created_at);
+
+-- Public listing, newest first: SELECT_PUBLIC_POSTINGS
+CREATE INDEX IF NOT EXISTS idx_postings_open_created
+    ON postings (created_at) WHERE status = 'open';
+
+-- One application per user and posting. The endpoint checks this before
+-- inserting, but two concurrent requests could both pass the check; keep the
+-- earliest application of any such pair.
+DELETE FROM applications a
+USING applications earlier
+WHERE a.user_id = earlier.user_id
+  AND a.posting_id = earlier.posting_id
+  AND a.id > earlier.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_applications_user_posting
+    ON applications (user_id, posting_id);
+
+CREATE INDEX IF NOT EXISTS idx_applications_posting_id ON applications (posting_id);
+
+-- Covered by the indexes above or by a unique constraint
+DROP INDEX IF EXISTS idx_posting_views_posting_id;
+DROP INDEX IF EXISTS idx_posting_views_viewed_at;
+DROP INDEX IF EXISTS idx_applications_user_id;
+DROP INDEX IF EXISTS idx_posting_metrics_posting_date;
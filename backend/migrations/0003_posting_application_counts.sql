@@ -0,0 +1,70 @@
+-- Application counters on postings, so listings and dashboards read a column
+-- instead of joining and counting applications on every request. Triggers on
+-- applications keep them exact for every write path, including cascaded
+-- deletes; `python manage.py reconcile-application-counts` repairs drift.
+
+ALTER TABLE postings
+    ADD COLUMN application_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN applications_pending INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN applications_reviewed INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN applications_accepted INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN applications_rejected INTEGER NOT NULL DEFAULT 0;
+
+CREATE FUNCTION bump_application_counts(p_posting_id INTEGER, p_status TEXT, delta INTEGER)
+RETURNS void AS $$
+    UPDATE postings SET
+        application_count = application_count + delta,
+        applications_pending = applications_pending
+            + CASE WHEN p_status = 'pending' THEN delta ELSE 0 END,
+        applications_reviewed = applications_reviewed
+            + CASE WHEN p_status = 'reviewed' THEN delta ELSE 0 END,
+        applications_accepted = applications_accepted
+            + CASE WHEN p_status = 'accepted' THEN delta ELSE 0 END,
+        applications_rejected = applications_rejected
+            + CASE WHEN p_status = 'rejected' THEN delta ELSE 0 END
+    WHERE id = p_posting_id;
+$$ LANGUAGE sql;
+
+CREATE FUNCTION track_application_counts() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM bump_application_counts(OLD.posting_id, OLD.status, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM bump_application_counts(NEW.posting_id, NEW.status, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER applications_count_insert_delete
+    AFTER INSERT OR DELETE ON applications
+    FOR EACH ROW EXECUTE FUNCTION track_application_counts();
+
+CREATE TRIGGER applications_count_update
+    AFTER UPDATE OF status, posting_id ON applications
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status
+          OR OLD.posting_id IS DISTINCT FROM NEW.posting_id)
+    EXECUTE FUNCTION track_application_counts();
+
+-- Backfill. CREATE TRIGGER keeps applications locked against writes until
+-- this migration commits, so no application is missed or counted twice.
+UPDATE postings p SET
+    application_count = c.total,
+    applications_pending = c.pending,
+    applications_reviewed = c.reviewed,
+    applications_accepted = c.accepted,
+    applications_rejected = c.rejected
+FROM (
+    SELECT
+        posting_id,
+        COUNT(*) AS total,
+        COUNT(*) FILTER (WHERE status = 'pending') AS pending,
+        COUNT(*) FILTER (WHERE status = 'reviewed') AS reviewed,
+        COUNT(*) FILTER (WHERE status = 'accepted') AS accepted,
+        COUNT(*) FILTER (WHERE status = 'rejected') AS rejected
+    FROM applications
+    GROUP BY posting_id
+) c
+WHERE p.id = c.posting_id;
@@ -0,0 +1,25 @@
+-- Sharded view counters. A view used to run UPDATE postings SET views =
+-- views + 1 and an upsert on the posting's posting_metrics row for the day,
+-- so concurrent viewers of one posting queued on those two row locks. Views
+-- now add to one of N shard rows per posting and day, picked at random, and
+-- `python manage.py fold-view-counters` moves the shard totals into
+-- postings.views and posting_metrics. Reads add the shards not folded yet.
+--
+-- Only the counters change on update, never the key, so updates are HOT and
+-- the dead versions are pruned within the page; the low fillfactor leaves
+-- room for them.
+
+CREATE TABLE view_counter_shards (
+    posting_id INTEGER NOT NULL REFERENCES postings(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    shard SMALLINT NOT NULL,
+    views INTEGER NOT NULL DEFAULT 0,
+    unique_views INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (posting_id, date, shard)
+) WITH (fillfactor = 50);
+
+-- Keep the table small: autovacuum after the fold rather than at 20% dead
+ALTER TABLE view_counter_shards SET (
+    autovacuum_vacuum_scale_factor = 0,
+    autovacuum_vacuum_threshold = 1000
+);
@@ -0,0 +1,79 @@
+-- Analytics rollups. Views and applications are only appended on the request
+-- path; `python worker.py` aggregates them into posting_metrics_hourly,
+-- posting_metrics (daily) and postings.views behind a watermark. Reads add
+-- the raw events at or after the watermark, which is at most one worker
+-- interval behind.
+
+-- Fold what is left on the view counter shards (migration 0004) before
+-- dropping them; the rollup supersedes them
+UPDATE postings p SET views = p.views + s.views
+FROM (
+    SELECT posting_id, SUM(views) as views FROM view_counter_shards GROUP BY posting_id
+) s
+WHERE p.id = s.posting_id;
+
+INSERT INTO posting_metrics (posting_id, date, views_count, unique_views_count)
+SELECT posting_id, date, SUM(views), SUM(unique_views)
+FROM view_counter_shards
+GROUP BY posting_id, date
+ON CONFLICT (posting_id, date)
+DO UPDATE SET
+    views_count = posting_metrics.views_count + EXCLUDED.views_count,
+    unique_views_count = posting_metrics.unique_views_count + EXCLUDED.unique_views_count,
+    updated_at = NOW();
+
+DROP TABLE view_counter_shards;
+
+-- Hours and dates are in the database's time zone, like viewed_at and
+-- applied_at
+CREATE TABLE posting_metrics_hourly (
+    posting_id INTEGER NOT NULL REFERENCES postings(id) ON DELETE CASCADE,
+    hour TIMESTAMP NOT NULL,
+    views_count INTEGER NOT NULL DEFAULT 0,
+    unique_views_count INTEGER NOT NULL DEFAULT 0,
+    applications_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (posting_id, hour)
+);
+
+-- Retention deletes by hour; rows arrive roughly in hour order
+CREATE INDEX idx_posting_metrics_hourly_hour ON posting_metrics_hourly USING brin (hour);
+
+-- Everything before the watermark has been rolled up
+CREATE TABLE rollup_watermarks (
+    name TEXT PRIMARY KEY,
+    watermark TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- The worker scans time windows of the raw events, which are appended in
+-- time order; reads count a posting's views since the watermark
+CREATE INDEX idx_posting_views_viewed_at ON posting_views USING brin (viewed_at);
+CREATE INDEX idx_applications_applied_at ON applications USING brin (applied_at);
+CREATE INDEX idx_posting_views_posting_viewed ON posting_views (posting_id, viewed_at);
+
+-- Backfill the hours the worker recomputes and hourly reads show, and start
+-- the watermark here. postings.views and posting_metrics already count these
+-- events, so the worker only adds what it sees change from now on.
+INSERT INTO posting_metrics_hourly (
+    posting_id, hour, views_count, unique_views_count, applications_count
+)
+SELECT posting_id, hour, SUM(views), SUM(unique_views), SUM(applications)
+FROM (
+    SELECT
+        posting_id,
+        date_trunc('hour', viewed_at) as hour,
+        1 as views,
+        CASE WHEN is_unique_view THEN 1 ELSE 0 END as unique_views,
+        0 as applications
+    FROM posting_views
+    WHERE viewed_at >= CURRENT_DATE - 2 AND viewed_at < LOCALTIMESTAMP
+      AND posting_id IS NOT NULL
+    UNION ALL
+    SELECT posting_id, date_trunc('hour', applied_at), 0, 0, 1
+    FROM applications
+    WHERE applied_at >= CURRENT_DATE - 2 AND applied_at < LOCALTIMESTAMP
+      AND posting_id IS NOT NULL
+) events
+GROUP BY posting_id, hour;
+
+INSERT INTO rollup_watermarks (name, watermark) VALUES ('posting_metrics', LOCALTIMESTAMP);
@@ -0,0 +1,97 @@
+-- Daily range partitions for posting_views. Uniqueness checks, rollup passes
+-- and analytics reads all filter on viewed_at, so they only touch the
+-- partitions of the days they ask for, and expired views go by dropping whole
+-- partitions rather than by DELETE and vacuum. `python manage.py
+-- maintain-view-partitions` creates the days ahead and drops (or detaches)
+-- expired ones (core.partitions). Views outside every partition land in
+-- posting_views_default instead of failing.
+--
+-- The existing table is attached, without copying, as the partition for
+-- everything up to the end of today, or dropped if it is empty.
+
+ALTER TABLE posting_views RENAME TO posting_views_legacy;
+ALTER INDEX idx_posting_views_posting_user_viewed RENAME TO idx_posting_views_legacy_posting_user_viewed;
+ALTER INDEX idx_posting_views_posting_session_viewed RENAME TO idx_posting_views_legacy_posting_session_viewed;
+ALTER INDEX idx_posting_views_user_id RENAME TO idx_posting_views_legacy_user_id;
+ALTER INDEX idx_posting_views_viewed_at RENAME TO idx_posting_views_legacy_viewed_at;
+ALTER INDEX idx_posting_views_posting_viewed RENAME TO idx_posting_views_legacy_posting_viewed;
+
+-- A range partition cannot hold a NULL key, and the application never
+-- writes one; such rows could not be placed in a day or rolled up either
+DELETE FROM posting_views_legacy WHERE viewed_at IS NULL;
+ALTER TABLE posting_views_legacy ALTER COLUMN viewed_at SET NOT NULL;
+
+-- The primary key of a partition has to include the partition key
+ALTER TABLE posting_views_legacy
+    DROP CONSTRAINT posting_views_pkey,
+    ADD CONSTRAINT posting_views_legacy_pkey PRIMARY KEY (id, viewed_at);
+
+-- Same columns as before
+CREATE TABLE posting_views (
+    id INTEGER NOT NULL DEFAULT nextval('posting_views_id_seq'),
+    posting_id INTEGER REFERENCES postings(id) ON DELETE CASCADE,
+    user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    ip_address INET,
+    user_agent TEXT,
+    viewed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    session_id TEXT,
+    is_unique_view BOOLEAN DEFAULT TRUE,
+    PRIMARY KEY (id, viewed_at)
+) PARTITION BY RANGE (viewed_at);
+
+-- The ids outlive the legacy partition
+ALTER SEQUENCE posting_views_id_seq OWNED BY posting_views.id;
+
+-- The indexes of 0002 and 0005, on every partition. Attaching the legacy
+-- table adopts its matching indexes instead of building new ones.
+CREATE INDEX idx_posting_views_posting_user_viewed ON posting_views (posting_id, user_id, viewed_at);
+CREATE INDEX idx_posting_views_posting_session_viewed ON posting_views (posting_id, session_id, viewed_at);
+CREATE INDEX idx_posting_views_user_id ON posting_views (user_id);
+CREATE INDEX idx_posting_views_viewed_at ON posting_views USING brin (viewed_at);
+CREATE INDEX idx_posting_views_posting_viewed ON posting_views (posting_id, viewed_at);
+
+DO $$
+DECLARE
+    bound TIMESTAMP;
+    day DATE;
+BEGIN
+    IF EXISTS (SELECT 1 FROM posting_views_legacy) THEN
+        SELECT GREATEST(CURRENT_DATE + 1, date_trunc('day', max(viewed_at)) + INTERVAL '1 day')
+        INTO bound
+        FROM posting_views_legacy;
+        EXECUTE format(
+            'ALTER TABLE posting_views ATTACH PARTITION posting_views_legacy'
+            ' FOR VALUES FROM (MINVALUE) TO (%L)',
+            bound
+        );
+    ELSE
+        DROP TABLE posting_views_legacy;
+        bound := CURRENT_DATE;
+    END IF;
+
+    -- Three days ahead, as maintain-view-partitions keeps it by default
+    FOR day IN SELECT generate_series(bound, CURRENT_DATE + 3, INTERVAL '1 day')::date LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF posting_views FOR VALUES FROM (%L) TO (%L)',
+            'posting_views_p' || to_char(day, 'YYYYMMDD'),
+            day::timestamp,
+            (day + 1)::timestamp
+        );
+    END LOOP;
+END $$;
+
+CREATE TABLE posting_views_default PARTITION OF posting_views DEFAULT;
+
+-- Daily posting_metrics older than the retention are folded into months by
+-- `python manage.py downsample-metrics` (core.rollups)
+CREATE TABLE posting_metrics_monthly (
+    posting_id INTEGER NOT NULL REFERENCES postings(id) ON DELETE CASCADE,
+    month DATE NOT NULL,
+    views_count INTEGER NOT NULL DEFAULT 0,
+    unique_views_count INTEGER NOT NULL DEFAULT 0,
+    applications_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (posting_id, month)
+);
+
+-- Downsampling finds and deletes the oldest daily rows by date
+CREATE INDEX idx_posting_metrics_date ON posting_metrics (date);
@@ -0,0 +1,37 @@
+-- Compact posting_views rows. The user agent, mostly one of a few hundred
+-- browser strings, moves to a dictionary table and each view keeps its id;
+-- the application resolves and caches the ids (core.view_encoding). The
+-- session token becomes the first 8 bytes of its SHA-256 as a BIGINT, enough
+-- to tell sessions apart for the 24h uniqueness check without storing live
+-- tokens. ip_address is already INET.
+--
+-- Changing the column types rewrites every partition once, under an
+-- exclusive lock on posting_views.
+
+-- Longer user agents are cut (core.view_encoding.USER_AGENT_MAX_LENGTH) so
+-- they fit in the unique index. Rows are never deleted, so views reference
+-- them without a foreign key check on every insert.
+CREATE TABLE user_agents (
+    id SERIAL PRIMARY KEY,
+    user_agent TEXT NOT NULL UNIQUE
+);
+
+INSERT INTO user_agents (user_agent)
+SELECT DISTINCT left(user_agent, 512)
+FROM posting_views
+WHERE user_agent IS NOT NULL AND user_agent <> ''
+ORDER BY 1;
+
+CREATE FUNCTION pg_temp.user_agent_id(agent TEXT) RETURNS INTEGER
+LANGUAGE sql STABLE
+AS $$ SELECT id FROM user_agents WHERE user_agent = left(agent, 512) $$;
+
+-- Same hash as core.view_encoding.session_hash()
+ALTER TABLE posting_views
+    ALTER COLUMN user_agent TYPE INTEGER USING pg_temp.user_agent_id(user_agent),
+    ALTER COLUMN session_id TYPE BIGINT USING (
+        'x' || encode(substr(sha256(convert_to(NULLIF(session_id, ''), 'UTF8')), 1, 8), 'hex')
+    )::bit(64)::bigint;
+
+ALTER TABLE posting_views RENAME COLUMN user_agent TO user_agent_id;
+ALTER TABLE posting_views RENAME COLUMN session_id TO session_hash;
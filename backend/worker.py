@@ -0,0 +1,77 @@
+"""
+Analytics rollup worker. Run from backend/ with the backend's environment:
+
+    python worker.py            # roll up every ROLLUP_INTERVAL seconds
+    python worker.py --once     # catch up once and exit
+
+Aggregates posting_views and applications into posting_metrics_hourly,
+posting_metrics and postings.views behind a watermark (core.rollups).
+Passes are idempotent and replicas take turns on the watermark row, so a
+restart or a second replica is harmless.
+"""
+
+import argparse
+import signal
+import threading
+from datetime import timedelta
+
+from core import db
+from core.config import ANALYTICS_ROLLUP_CONFIG
+from core.logger import logger
+from core.rollups import roll_up
+
+
+def catch_up() -> int:
+    """Run rollup passes until the watermark reaches now; returns the passes run"""
+    passes = 0
+    while True:
+        with db.get_db_connection() as conn:
+            result = roll_up(
+                conn,
+                lookback=timedelta(seconds=ANALYTICS_ROLLUP_CONFIG["lookback"]),
+                max_window=timedelta(seconds=ANALYTICS_ROLLUP_CONFIG["max_window"]),
+                retention=timedelta(
+                    days=ANALYTICS_ROLLUP_CONFIG["hourly_retention_days"]
+                ),
+            )
+        passes += 1
+        logger.info(
+            f"Rolled up {result.start:%Y-%m-%d %H:%M} to {result.watermark:%Y-%m-%d %H:%M:%S}:"
+            f" {result.posting_days} posting days changed"
+        )
+        if result.caught_up:
+            return passes
+
+
+def main(argv=None, stop: threading.Event | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Analytics rollup worker")
+    parser.add_argument(
+        "--once", action="store_true", help="catch up once and exit (for cron)"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=ANALYTICS_ROLLUP_CONFIG["interval"],
+        help="seconds between passes",
+    )
+    args = parser.parse_args(argv)
+
+    if args.once:
+        catch_up()
+        return 0
+
+    if stop is None:
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    while not stop.is_set():
+        try:
+            catch_up()
+        except Exception as e:
+            # The next pass recomputes the same window, so nothing is lost
+            logger.error(f"Analytics rollup failed: {e}")
+        stop.wait(args.interval)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,186 @@
+"""
+Posting analytics latency as a posting's view count grows.
+
+The previous implementation ran four queries and LEFT JOINed applications and
+posting_views onto the posting before COUNT(DISTINCT ...), so its cost grew
+with applications x views. get_posting_analytics is now one pre-aggregated
+query. Runs against the Postgres configured through the POSTGRES_* variables
+(same as the backend) on throwaway rows that are removed afterwards:
+
+    python benchmarks/bench_analytics.py --views 1000 10000 100000 200000
+"""
+
+import argparse
+import os
+import secrets
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from core import db, queries  # noqa: E402
+
+LEGACY_STATS = """
+    SELECT
+        p.views,
+        p.created_at,
+        p.status,
+        COUNT(DISTINCT a.id) as application_count,
+        COUNT(DISTINCT pv.id) as total_views,
+        COUNT(DISTINCT CASE WHEN pv.is_unique_view THEN pv.id END) as unique_views
+    FROM postings p
+    LEFT JOIN applications a ON p.id = a.posting_id
+    LEFT JOIN posting_views pv ON p.id = pv.posting_id
+    WHERE p.id = %s
+    GROUP BY p.id, p.views, p.created_at, p.status
+"""
+
+LEGACY_DAILY_METRICS = """
+    SELECT date, views_count, unique_views_count, applications_count
+    FROM posting_metrics
+    WHERE posting_id = %s AND date >= CURRENT_DATE - INTERVAL '30 days'
+    ORDER BY date DESC
+"""
+
+LEGACY_APPLICATION_STATUS = """
+    SELECT status, COUNT(*) as count
+    FROM applications
+    WHERE posting_id = %s
+    GROUP BY status
+"""
+
+
+def legacy_posting_analytics(posting_id: int, user_id: int) -> dict:
+    """The old four-query implementation, kept here as the baseline"""
+    with db.get_db_connection() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT user_id FROM postings WHERE id = %s", (posting_id,))
+        posting = cursor.fetchone()
+        if not posting or posting["user_id"] != user_id:
+            return {}
+        cursor.execute(LEGACY_STATS, (posting_id,))
+        stats = cursor.fetchone()
+        cursor.execute(LEGACY_DAILY_METRICS, (posting_id,))
+        daily_metrics = cursor.fetchall()
+        cursor.execute(LEGACY_APPLICATION_STATUS, (posting_id,))
+        application_status = cursor.fetchall()
+        return {
+            "posting_id": posting_id,
+            "stats": stats,
+            "daily_metrics": daily_metrics,
+            "application_status": application_status,
+        }
+
+
+def create_fixture(cursor, applications: int) -> tuple[int, int, list]:
+    """A posting owner, one posting and `applications` applicants"""
+    suffix = secrets.token_hex(4)
+    cursor.execute(
+        """
+        INSERT INTO users (name, surname, username, email, user_type, hashed_password)
+        SELECT 'Bench', 'User', %s || '_' || i, %s || '_' || i || '@example.com',
+               'regular', 'x'
+        FROM generate_series(0, %s) AS i
+        RETURNING id
+        """,
+        (f"bench_{suffix}", f"bench_{suffix}", applications),
+    )
+    owner_id, *applicant_ids = [row["id"] for row in cursor.fetchall()]
+    cursor.execute(
+        queries.INSERT_POSTING,
+        ("Bench posting", "Benchmark", "bench", owner_id, f"bench{suffix}"),
+    )
+    cursor.execute("SELECT id FROM postings WHERE hash = %s", (f"bench{suffix}",))
+    posting_id = cursor.fetchone()["id"]
+    cursor.execute(
+        """
+        INSERT INTO applications (user_id, posting_id, status)
+        SELECT user_id, %s, (ARRAY['pending', 'accepted', 'rejected'])[1 + i %% 3]
+        FROM unnest(%s::int[]) WITH ORDINALITY AS t(user_id, i)
+        """,
+        (posting_id, applicant_ids),
+    )
+    return owner_id, posting_id, [owner_id, *applicant_ids]
+
+
+def add_views(cursor, posting_id: int, count: int):
+    """Record `count` views spread over 90 days, as track_posting_view would"""
+    cursor.execute(
+        """
+        WITH new_views AS (
+            INSERT INTO posting_views (posting_id, session_hash, viewed_at, is_unique_view)
+            SELECT %s, ('x' || substr(md5(i::text), 1, 16))::bit(64)::bigint,
+                   NOW() - random() * INTERVAL '90 days',
+                   random() < 0.7
+            FROM generate_series(1, %s) AS i
+            RETURNING viewed_at, is_unique_view
+        )
+        INSERT INTO posting_metrics (posting_id, date, views_count, unique_views_count)
+        SELECT %s, viewed_at::date, COUNT(*), COUNT(*) FILTER (WHERE is_unique_view)
+        FROM new_views
+        GROUP BY viewed_at::date
+        ON CONFLICT (posting_id, date) DO UPDATE SET
+            views_count = posting_metrics.views_count + EXCLUDED.views_count,
+            unique_views_count =
+                posting_metrics.unique_views_count + EXCLUDED.unique_views_count
+        """,
+        (posting_id, count, posting_id),
+    )
+    cursor.execute(
+        "UPDATE postings SET views = views + %s WHERE id = %s", (count, posting_id)
+    )
+    cursor.execute("ANALYZE posting_views")
+
+
+def timed(fn, posting_id: int, owner_id: int, iterations: int) -> float:
+    fn(posting_id, owner_id)  # warm up
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        assert fn(posting_id, owner_id)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--views", type=int, nargs="+", default=[1000, 10000, 100000, 200000]
+    )
+    parser.add_argument("--applications", type=int, default=500)
+    parser.add_argument("-n", "--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    db.init_db_pool()
+    with db.get_db_connection() as conn, conn.cursor() as cursor:
+        owner_id, posting_id, user_ids = create_fixture(cursor, args.applications)
+        conn.commit()
+
+    try:
+        total = 0
+        for views in sorted(args.views):
+            with db.get_db_connection() as conn, conn.cursor() as cursor:
+                add_views(cursor, posting_id, views - total)
+                conn.commit()
+            total = views
+
+            legacy = timed(
+                legacy_posting_analytics, posting_id, owner_id, args.iterations
+            )
+            current = timed(
+                db.get_posting_analytics, posting_id, owner_id, args.iterations
+            )
+            print(
+                f"views={views:<8} applications={args.applications:<5} "
+                f"legacy={legacy * 1e3:9.2f}ms current={current * 1e3:7.2f}ms"
+            )
+    finally:
+        with db.get_db_connection() as conn, conn.cursor() as cursor:
+            # Cascades to the posting, its applications, views and metrics
+            cursor.execute("DELETE FROM users WHERE id = ANY(%s)", (user_ids,))
+            conn.commit()
+        db.close_db_pool()
+
+
+if __name__ == "__main__":
+    main()
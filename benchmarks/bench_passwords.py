@@ -0,0 +1,77 @@
+"""
+Password verification throughput at each bcrypt cost factor.
+
+A login costs one bcrypt verification, so logins/s per core is the inverse of
+the verify time on a single thread. The pooled run pushes verifications
+through the backend's password pool to show how far that scales on this host:
+
+    python benchmarks/bench_passwords.py --costs 10 11 12 13 --workers 2
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from core import passwords, security  # noqa: E402
+from core.config import PASSWORD_HASH_CONFIG  # noqa: E402
+
+
+async def verify_pooled(password: str, hashed: str, iterations: int) -> float:
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(passwords.verify_password(password, hashed) for _ in range(iterations))
+    )
+    assert all(results)
+    return time.perf_counter() - start
+
+
+def bench(cost: int, iterations: int, workers: int):
+    password = "Bench1!password"
+    pooled_iterations = iterations * workers
+    settings = {
+        "rounds": cost,
+        "max_workers": workers,
+        "max_backlog": pooled_iterations,
+    }
+    with patch.dict(PASSWORD_HASH_CONFIG, settings):
+        hashed = security.hash_password(password)
+
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            assert security.verify_password(password, hashed)
+            timings.append(time.perf_counter() - start)
+
+        pooled = asyncio.run(verify_pooled(password, hashed, pooled_iterations))
+        passwords.shutdown_password_executor()
+
+    print(
+        f"cost={cost:<3} n={iterations:<4} "
+        f"verify={statistics.fmean(timings) * 1e3:8.1f}ms "
+        f"logins/s/core={1 / statistics.fmean(timings):8.1f} "
+        f"pooled({workers} workers)={pooled_iterations / pooled:8.1f}/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--costs", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    parser.add_argument(
+        "--workers", type=int, default=PASSWORD_HASH_CONFIG["max_workers"]
+    )
+    args = parser.parse_args()
+
+    print(f"cpu_count={os.cpu_count()}")
+    for cost in args.costs:
+        bench(cost, args.iterations, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Posting creation throughput: pre-checked hashes vs insert-and-retry.
+
+The previous scheme opened a connection to check each candidate hash and a
+second one to insert; create_posting_in_db now inserts directly and retries on
+a hash collision inside one transaction. Runs against the Postgres configured
+through the POSTGRES_* variables (same as the backend), with a throwaway user
+whose postings are removed afterwards:
+
+    python benchmarks/bench_postings.py -n 2000 --pool
+"""
+
+import argparse
+import os
+import secrets
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from core import db, queries  # noqa: E402
+from core.utility import generate_posting_hash  # noqa: E402
+
+
+def create_posting_prechecked(title, post_description, category, user_id) -> str:
+    """The old two-step scheme, kept here as the baseline"""
+    while True:
+        hash_value = generate_posting_hash()
+        with db.get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM postings WHERE hash = %s", (hash_value,))
+            if cursor.fetchone() is None:
+                break
+    with db.get_db_connection() as conn, conn.cursor() as cursor:
+        cursor.execute(
+            queries.INSERT_POSTING,
+            (title, post_description, category, user_id, hash_value),
+        )
+        conn.commit()
+    return hash_value
+
+
+def bench(label: str, create, user_id: int, iterations: int):
+    start = time.perf_counter()
+    for i in range(iterations):
+        create(f"Bench posting {i}", "Benchmark posting", "bench", user_id)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<12} n={iterations:<6} "
+        f"mean={elapsed / iterations * 1e3:7.2f}ms "
+        f"postings/s={iterations / elapsed:8.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", "--iterations", type=int, default=1000)
+    parser.add_argument(
+        "--pool", action="store_true", help="use the backend connection pool"
+    )
+    args = parser.parse_args()
+
+    if args.pool:
+        db.init_db_pool()
+    suffix = secrets.token_hex(4)
+    with db.get_db_connection() as conn, conn.cursor() as cursor:
+        cursor.execute(
+            queries.INSERT_USER,
+            (
+                "Bench",
+                "User",
+                f"bench_{suffix}",
+                f"bench_{suffix}@example.com",
+                "regular",
+                "x",
+            ),
+        )
+        user_id = cursor.fetchone()["id"]
+        conn.commit()
+
+    try:
+        bench("prechecked", create_posting_prechecked, user_id, args.iterations)
+        bench("insert-retry", db.create_posting_in_db, user_id, args.iterations)
+    finally:
+        with db.get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(queries.DELETE_USER, (user_id,))  # cascades to postings
+            conn.commit()
+        db.close_db_pool()
+
+
+if __name__ == "__main__":
+    main()
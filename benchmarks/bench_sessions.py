@@ -0,0 +1,65 @@
+"""
+Session validation cost: Redis-backed sessions vs signed tokens.
+
+Runs get_session_user against the Redis configured through REDIS_HOST /
+REDIS_PORT / REDIS_PASSWORD / REDIS_DB (same variables as the backend):
+
+    SESSION_SECRET=bench python benchmarks/bench_sessions.py -n 20000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from core import security, signed_sessions  # noqa: E402
+from core.cache import get_redis_client  # noqa: E402
+
+
+def bench(label: str, mode: str, iterations: int, sessions: int):
+    with patch.dict(signed_sessions.SESSION_CONFIG, {"mode": mode}):
+        tokens = [security.create_session(user_id) for user_id in range(sessions)]
+        for token in tokens:  # warm up connections and the revocation mirror
+            security.get_session_user(token)
+
+        timings = []
+        for i in range(iterations):
+            token = tokens[i % sessions]
+            start = time.perf_counter()
+            session = security.get_session_user(token)
+            timings.append(time.perf_counter() - start)
+            assert session is not None
+
+        for token in tokens:
+            security.logout_user(token)
+
+    timings.sort()
+    print(
+        f"{label:<8} n={iterations:<7} "
+        f"mean={statistics.fmean(timings) * 1e6:8.1f}us "
+        f"p50={timings[len(timings) // 2] * 1e6:8.1f}us "
+        f"p99={timings[int(len(timings) * 0.99)] * 1e6:8.1f}us "
+        f"ops/s={iterations / sum(timings):10.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", "--iterations", type=int, default=10000)
+    parser.add_argument("--sessions", type=int, default=100)
+    args = parser.parse_args()
+
+    if not signed_sessions.SESSION_CONFIG["secret"]:
+        parser.error("SESSION_SECRET must be set to benchmark signed sessions")
+
+    get_redis_client().ping()
+    bench("redis", "redis", args.iterations, args.sessions)
+    bench("signed", "signed", args.iterations, args.sessions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+View counting under contention: one counter row vs append-only views.
+
+Every view used to run UPDATE postings SET views = views + 1 and an upsert on
+the posting's posting_metrics row for the day, so concurrent viewers of one
+popular posting queued on those two row locks. Views are now only appended
+to posting_views and `python worker.py` rolls them up. Each worker thread
+records views of the same posting, one transaction per view as in
+VIEW_TRACKING_MODE=sync. Runs against the Postgres configured through the
+POSTGRES_* variables (same as the backend), migrated to 0005, with a
+throwaway user and posting that are removed afterwards:
+
+    python benchmarks/bench_view_counters.py --workers 8 32 64 -n 200
+"""
+
+import argparse
+import os
+import secrets
+import statistics
+import sys
+import threading
+import time
+from datetime import UTC, datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import worker  # noqa: E402
+from core import db, queries  # noqa: E402
+from core.config import POSTGRES_POOL_CONFIG  # noqa: E402
+
+# The previous per-view counter writes, kept here as the baseline
+LEGACY_INCREMENT_POSTING_VIEWS = "UPDATE postings SET views = views + 1 WHERE id = %s"
+
+LEGACY_UPSERT_DAILY_VIEWS = """
+    INSERT INTO posting_metrics (posting_id, date, views_count, unique_views_count)
+    VALUES (%s, %s, 1, %s)
+    ON CONFLICT (posting_id, date)
+    DO UPDATE SET
+        views_count = posting_metrics.views_count + 1,
+        unique_views_count = posting_metrics.unique_views_count + %s,
+        updated_at = NOW()
+"""
+
+
+def legacy_count(cursor, posting_id: int):
+    cursor.execute(LEGACY_INCREMENT_POSTING_VIEWS, (posting_id,))
+    cursor.execute(
+        LEGACY_UPSERT_DAILY_VIEWS, (posting_id, datetime.now(UTC).date(), 1, 1)
+    )
+
+
+def append_view(cursor, posting_id: int):
+    cursor.execute(
+        queries.INSERT_POSTING_VIEW, (posting_id, None, None, None, None, True)
+    )
+
+
+def create_fixture() -> tuple[int, int]:
+    suffix = secrets.token_hex(4)
+    with db.get_db_connection() as conn, conn.cursor() as cursor:
+        cursor.execute(
+            queries.INSERT_USER,
+            (
+                "Bench",
+                "User",
+                f"bench_{suffix}",
+                f"bench_{suffix}@example.com",
+                "regular",
+                "x",
+            ),
+        )
+        user_id = cursor.fetchone()["id"]
+        cursor.execute(
+            queries.INSERT_POSTING,
+            ("Bench posting", "Benchmark", "bench", user_id, f"bench{suffix}"),
+        )
+        cursor.execute("SELECT id FROM postings WHERE hash = %s", (f"bench{suffix}",))
+        posting_id = cursor.fetchone()["id"]
+        conn.commit()
+    return user_id, posting_id
+
+
+def bench(label: str, count, posting_id: int, workers: int, views: int):
+    timings: list[float] = []
+    lock = threading.Lock()
+    start_line = threading.Barrier(workers + 1)
+
+    def viewer():
+        own = []
+        start_line.wait()
+        for _ in range(views):
+            begin = time.perf_counter()
+            with db.get_db_connection() as conn, conn.cursor() as cursor:
+                count(cursor, posting_id)
+                conn.commit()
+            own.append(time.perf_counter() - begin)
+        with lock:
+            timings.extend(own)
+
+    threads = [threading.Thread(target=viewer) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    start_line.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<12} workers={workers:<4} "
+        f"view p50={statistics.median(timings) * 1e3:7.2f}ms "
+        f"p99={statistics.quantiles(timings, n=100)[98] * 1e3:7.2f}ms "
+        f"views/s={len(timings) / elapsed:8.0f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[8, 32, 64])
+    parser.add_argument("-n", "--views", type=int, default=200, help="per worker")
+    args = parser.parse_args()
+
+    POSTGRES_POOL_CONFIG["max_size"] = max(args.workers)
+    db.init_db_pool()
+    user_id, posting_id = create_fixture()
+    try:
+        for workers in args.workers:
+            bench("single row", legacy_count, posting_id, workers, args.views)
+            bench("append only", append_view, posting_id, workers, args.views)
+
+        worker.catch_up()
+        with db.get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT views FROM postings WHERE id = %s", (posting_id,))
+            counted = cursor.fetchone()["views"]
+        # Both variants counted every view once, the appended ones by the rollup
+        assert counted == 2 * args.views * sum(args.workers), counted
+    finally:
+        with db.get_db_connection() as conn, conn.cursor() as cursor:
+            # Cascades to the posting, its views and its metrics
+            cursor.execute(queries.DELETE_USER, (user_id,))
+            conn.commit()
+        db.close_db_pool()
+
+
+if __name__ == "__main__":
+    main()
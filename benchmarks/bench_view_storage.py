@@ -0,0 +1,181 @@
+"""
+posting_views row size and insert throughput, before and after 0007.
+
+Each view used to carry its user agent and session token as text. Migration
+0007 stores the user agent as a user_agents id, resolved in one round trip
+per batch and cached per process, and the session as an 8-byte hash
+(core.view_encoding). The same views, generated with a realistic mix of a
+few hundred user agents and reused sessions, are written in batches to a
+scratch table with each layout and the indexes of posting_views; the
+compact one includes resolving the user agents. Sessions are hashed before
+the timer, as the request does when it queues the view (about 2us each).
+Runs against the Postgres configured through the POSTGRES_* variables
+(same as the backend), migrated to 0007; the scratch tables and the bench
+user agents are removed afterwards:
+
+    python benchmarks/bench_view_storage.py -n 200000 --batch-size 500
+"""
+
+import argparse
+import os
+import random
+import secrets
+import sys
+import time
+from datetime import UTC, datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from core import db  # noqa: E402
+from core.view_encoding import session_hash  # noqa: E402
+
+INDEXES = """
+    CREATE INDEX ON {table} (posting_id, user_id, viewed_at);
+    CREATE INDEX ON {table} (posting_id, {session}, viewed_at);
+    CREATE INDEX ON {table} (user_id);
+    CREATE INDEX ON {table} USING brin (viewed_at);
+    CREATE INDEX ON {table} (posting_id, viewed_at);
+"""
+
+LAYOUTS = {
+    # Up to 0006, kept here as the baseline
+    "text": (
+        """
+        CREATE TABLE bench_views_text (
+            id SERIAL PRIMARY KEY,
+            posting_id INTEGER,
+            user_id INTEGER,
+            ip_address INET,
+            user_agent TEXT,
+            viewed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            session_id TEXT,
+            is_unique_view BOOLEAN DEFAULT TRUE
+        );
+        """
+        + INDEXES.format(table="bench_views_text", session="session_id"),
+        """
+        INSERT INTO bench_views_text
+            (posting_id, user_id, ip_address, user_agent, session_id, viewed_at, is_unique_view)
+        SELECT * FROM unnest(
+            %s::int[], %s::int[], %s::inet[], %s::text[], %s::text[],
+            %s::timestamptz[], %s::bool[]
+        )
+        """,
+    ),
+    "compact": (
+        """
+        CREATE TABLE bench_views_compact (
+            id SERIAL PRIMARY KEY,
+            posting_id INTEGER,
+            user_id INTEGER,
+            ip_address INET,
+            user_agent_id INTEGER,
+            viewed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            session_hash BIGINT,
+            is_unique_view BOOLEAN DEFAULT TRUE
+        );
+        """
+        + INDEXES.format(table="bench_views_compact", session="session_hash"),
+        """
+        INSERT INTO bench_views_compact
+            (posting_id, user_id, ip_address, user_agent_id, session_hash, viewed_at, is_unique_view)
+        SELECT * FROM unnest(
+            %s::int[], %s::int[], %s::inet[], %s::int[], %s::bigint[],
+            %s::timestamptz[], %s::bool[]
+        )
+        """,
+    ),
+}
+
+SIZES = """
+    SELECT pg_relation_size(%(table)s) as heap,
+           pg_indexes_size(%(table)s) as indexes,
+           pg_total_relation_size(%(table)s) as total
+"""
+
+
+def generate_views(count: int, user_agents: int, sessions: int, tag: str) -> list:
+    """(posting_id, user_id, ip_address, user_agent, session_id, viewed_at, is_unique)"""
+    rng = random.Random(42)
+    agents = [
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+        f" (KHTML, like Gecko) Chrome/{100 + i % 30}.0.{i}.0 Safari/537.36 {tag}"
+        for i in range(user_agents)
+    ]
+    tokens = [secrets.token_urlsafe(32) for _ in range(sessions)]
+    now = datetime.now(UTC)
+    return [
+        (
+            rng.randint(1, 1000),
+            rng.randint(1, 50000) if rng.random() < 0.5 else None,
+            f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            agents[min(int(rng.expovariate(0.05)), user_agents - 1)],  # a few dominate
+            rng.choice(tokens),
+            now,
+            rng.random() < 0.7,
+        )
+        for _ in range(count)
+    ]
+
+
+def write(layout: str, views: list, batch_size: int) -> float:
+    """Seconds to write `views` in batches, one transaction each"""
+    insert = LAYOUTS[layout][1]
+    start = time.perf_counter()
+    for offset in range(0, len(views), batch_size):
+        columns = [
+            list(c) for c in zip(*views[offset : offset + batch_size], strict=True)
+        ]
+        with db.get_db_connection() as conn, conn.cursor() as cursor:
+            if layout == "compact":
+                columns[3] = db._user_agent_ids(conn, cursor, columns[3])
+            cursor.execute(insert, columns)
+            conn.commit()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", "--views", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--user-agents", type=int, default=300)
+    parser.add_argument("--sessions", type=int, default=20000)
+    args = parser.parse_args()
+
+    tag = f"bench-{secrets.token_hex(4)}"
+    views = generate_views(args.views, args.user_agents, args.sessions, tag)
+    hashed = [(*view[:4], session_hash(view[4]), *view[5:]) for view in views]
+
+    db.init_db_pool()
+    try:
+        with db.get_db_connection() as conn, conn.cursor() as cursor:
+            for create, _ in LAYOUTS.values():
+                cursor.execute(create)
+            conn.commit()
+
+        for layout in LAYOUTS:
+            elapsed = write(
+                layout, hashed if layout == "compact" else views, args.batch_size
+            )
+            with db.get_db_connection() as conn, conn.cursor() as cursor:
+                cursor.execute(SIZES, {"table": f"bench_views_{layout}"})
+                sizes = cursor.fetchone()
+            per_row = {name: size / args.views for name, size in sizes.items()}
+            print(
+                f"{layout:<8} n={args.views:<7} "
+                f"heap={per_row['heap']:6.1f}B/row indexes={per_row['indexes']:6.1f}B/row "
+                f"total={sizes['total'] / 2**20:7.1f}MiB "
+                f"inserts/s={args.views / elapsed:8.0f}"
+            )
+    finally:
+        with db.get_db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS bench_views_text, bench_views_compact")
+            cursor.execute(
+                "DELETE FROM user_agents WHERE user_agent LIKE %s", (f"%{tag}",)
+            )
+            conn.commit()
+        db.close_db_pool()
+
+
+if __name__ == "__main__":
+    main()
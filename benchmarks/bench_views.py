@@ -0,0 +1,97 @@
+"""
+Posting view tracking: a write per view vs the write-behind buffer.
+
+track_posting_view used to run the uniqueness check and three writes before
+the page was returned. With VIEW_TRACKING_MODE=buffered the request only
+queues the view and a background task writes batches. Runs against the
+Postgres configured through the POSTGRES_* variables (same as the backend),
+with a throwaway user and posting that are removed afterwards:
+
+    python benchmarks/bench_views.py -n 5000 --sessions 500
+"""
+
+import argparse
+import asyncio
+import os
+import secrets
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from core import async_db, queries, view_buffer  # noqa: E402
+
+
+async def create_fixture() -> tuple[int, int]:
+    suffix = secrets.token_hex(4)
+    async with async_db.get_db_connection() as conn, conn.cursor() as cursor:
+        await cursor.execute(
+            queries.INSERT_USER,
+            (
+                "Bench",
+                "User",
+                f"bench_{suffix}",
+                f"bench_{suffix}@example.com",
+                "regular",
+                "x",
+            ),
+        )
+        user_id = (await cursor.fetchone())["id"]
+        await cursor.execute(
+            queries.INSERT_POSTING,
+            ("Bench posting", "Benchmark", "bench", user_id, f"bench{suffix}"),
+        )
+        await cursor.execute(
+            "SELECT id FROM postings WHERE hash = %s", (f"bench{suffix}",)
+        )
+        posting_id = (await cursor.fetchone())["id"]
+        await conn.commit()
+    return user_id, posting_id
+
+
+async def bench(label: str, posting_id: int, iterations: int, sessions: int):
+    timings = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        begin = time.perf_counter()
+        await view_buffer.track_posting_view(
+            posting_id, None, "10.0.0.1", "bench", f"session-{i % sessions}"
+        )
+        timings.append(time.perf_counter() - begin)
+    await view_buffer.close_view_buffer()  # waits until everything is written
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<9} n={iterations:<6} "
+        f"request p50={statistics.median(timings) * 1e3:6.3f}ms "
+        f"p99={statistics.quantiles(timings, n=100)[98] * 1e3:6.3f}ms "
+        f"views written/s={iterations / elapsed:8.0f}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", "--iterations", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=500)
+    args = parser.parse_args()
+
+    await async_db.init_db_pool()
+    user_id, posting_id = await create_fixture()
+    try:
+        view_buffer.VIEW_TRACKING_CONFIG["mode"] = "sync"
+        view_buffer.init_view_buffer()
+        await bench("sync", posting_id, args.iterations, args.sessions)
+
+        view_buffer.VIEW_TRACKING_CONFIG["mode"] = "buffered"
+        view_buffer.init_view_buffer()
+        await bench("buffered", posting_id, args.iterations, args.sessions)
+    finally:
+        async with async_db.get_db_connection() as conn, conn.cursor() as cursor:
+            # Cascades to the posting and its views and metrics
+            await cursor.execute(queries.DELETE_USER, (user_id,))
+            await conn.commit()
+        await async_db.close_db_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
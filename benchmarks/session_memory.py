@@ -0,0 +1,87 @@
+"""
+Bytes per session: legacy JSON sessions vs the compact core.session_store format.
+
+Always prints the raw key + value sizes. With --redis it also writes sample
+sessions in both formats to the Redis configured through REDIS_HOST /
+REDIS_PORT / REDIS_PASSWORD / REDIS_DB, reads MEMORY USAGE for each key and
+deletes them again:
+
+    python benchmarks/session_memory.py --redis -n 1000
+"""
+
+import argparse
+import json
+import os
+import secrets
+import statistics
+import sys
+from datetime import UTC, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from core.cache import get_redis_client  # noqa: E402
+from core.session_store import (  # noqa: E402
+    SESSION_TTL_SECONDS,
+    encode_session,
+    legacy_session_key,
+    session_key,
+)
+
+REDIS_MEMORY_LIMIT = 128 * 1024 * 1024  # k8s/redis/redis-deployment.yaml
+
+
+def legacy_entry(session_token: str, user_id: int) -> tuple[bytes, bytes]:
+    now = datetime.now(UTC)
+    value = json.dumps(
+        {
+            "user_id": user_id,
+            "created_at": now.isoformat(),
+            "expires_at": (now + timedelta(seconds=SESSION_TTL_SECONDS)).isoformat(),
+        }
+    )
+    return legacy_session_key(session_token).encode(), value.encode()
+
+
+def compact_entry(session_token: str, user_id: int) -> tuple[bytes, bytes]:
+    return session_key(session_token), encode_session(user_id, datetime.now(UTC))
+
+
+def measure(redis, make_entry, count: int) -> float:
+    keys = []
+    try:
+        for user_id in range(count):
+            key, value = make_entry(secrets.token_urlsafe(32), 1_000_000 + user_id)
+            redis.setex(key, 60, value)
+            keys.append(key)
+        return statistics.fmean(redis.memory_usage(key) for key in keys)
+    finally:
+        if keys:
+            redis.delete(*keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", "--sessions", type=int, default=1000)
+    parser.add_argument("--redis", action="store_true", help="measure MEMORY USAGE")
+    args = parser.parse_args()
+
+    formats = {"legacy": legacy_entry, "compact": compact_entry}
+    token = secrets.token_urlsafe(32)
+    for name, make_entry in formats.items():
+        key, value = make_entry(token, 1_000_000)
+        print(
+            f"{name:<8} key={len(key):3d}B value={len(value):3d}B total={len(key) + len(value):3d}B"
+        )
+
+    if args.redis:
+        redis = get_redis_client()
+        for name, make_entry in formats.items():
+            per_session = measure(redis, make_entry, args.sessions)
+            print(
+                f"{name:<8} MEMORY USAGE={per_session:6.1f}B/session "
+                f"~{REDIS_MEMORY_LIMIT / per_session:,.0f} sessions per 128Mi"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,19 @@
 import json
-from unittest.mock import MagicMock, patch
+import os
+import secrets
+from contextlib import contextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import psycopg2
+import psycopg2.extras
 import pytest
 
+from backend.core.view_encoding import forget_user_agent_ids
+
+# Tests that need a real Postgres use the fixtures below and are skipped unless
+# this is set, e.g. TEST_DATABASE_URL=postgresql://postgres@localhost/postgres
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
 
 @pytest.fixture(autouse=True)
 def temp_db_config(tmp_path, monkeypatch):
@@ -28,6 +39,12 @@ def temp_db_config(tmp_path, monkeypatch):
     return config_file
 
 
+@pytest.fixture(autouse=True)
+def empty_user_agent_cache():
+    """User agent ids are cached per process; every test starts without them"""
+    forget_user_agent_ids()
+
+
 @pytest.fixture
 def mock_cursor():
     cursor = MagicMock()
@@ -58,3 +75,74 @@ def mock_redis():
     mock_redis_client = MagicMock()
     with patch("backend.core.db.get_redis_client", return_value=mock_redis_client):
         yield mock_redis_client
+
+
+@pytest.fixture
+def mock_async_cursor():
+    cursor = MagicMock()
+    cursor.execute = AsyncMock()
+    cursor.fetchone = AsyncMock()
+    cursor.fetchall = AsyncMock()
+    cursor.__aenter__.return_value = cursor
+    cursor.__aexit__.return_value = None
+    return cursor
+
+
+@pytest.fixture
+def mock_async_conn(mock_async_cursor):
+    conn = MagicMock()
+    conn.cursor.return_value = mock_async_cursor
+    conn.commit = AsyncMock()
+    conn.close = AsyncMock()
+    return conn
+
+
+@pytest.fixture
+def patch_psycopg_connect(mock_async_conn):
+    with patch(
+        "backend.core.async_db.psycopg.AsyncConnection.connect",
+        new=AsyncMock(return_value=mock_async_conn),
+    ) as mock_connect:
+        yield mock_connect
+
+
+@pytest.fixture
+def mock_async_db_redis():
+    mock_redis_client = AsyncMock()
+    with patch("backend.core.async_db.get_redis_client", return_value=mock_redis_client):
+        yield mock_redis_client
+
+
+@contextmanager
+def _scratch_schema(prefix: str):
+    """Connection whose search_path is a fresh schema, dropped on exit"""
+    schema = f"{prefix}_{secrets.token_hex(4)}"
+    conn = psycopg2.connect(
+        TEST_DATABASE_URL,
+        cursor_factory=psycopg2.extras.RealDictCursor,
+        options=f"-c search_path={schema}",
+    )
+    with conn.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA {schema}")
+    conn.commit()
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+        conn.close()
+
+
+@pytest.fixture(scope="session")
+def scratch_schema():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    return _scratch_schema
+
+
+@pytest.fixture
+def pg_conn(scratch_schema):
+    with scratch_schema("test") as conn:
+        yield conn
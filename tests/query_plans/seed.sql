@@ -0,0 +1,74 @@
+-- Realistic volumes for the query-plan suite (tests/test_query_plans.py).
+-- Distributions roughly follow production: few open postings, most views
+-- anonymous, sessions reused across postings, events appended in time order.
+-- The last user never applies to anything so inserts of a new application
+-- cannot collide.
+
+-- Same data, and so the same plans and samples, on every run
+SELECT setseed(0.42);
+
+INSERT INTO users (name, surname, username, email, user_type, hashed_password, created_at)
+SELECT 'User', 'Number' || i, 'user' || i, 'user' || i || '@example.com', 'regular',
+       '$2b$12$seedseedseedseedseedseedseedseedseedseedseedseedseedse',
+       NOW() - (random() * INTERVAL '730 days')
+FROM generate_series(1, %(users)s) AS i;
+
+INSERT INTO postings (user_id, title, post_description, category, hash, views, created_at, status)
+SELECT 1 + floor(random() * (%(users)s - 1))::int,
+       'Posting ' || i, repeat('Job description. ', 20),
+       (ARRAY['IT', 'Design', 'Sales', 'Finance', 'Support'])[1 + i %% 5],
+       substr(md5(i::text), 1, 12), 0,
+       NOW() - (random() * INTERVAL '365 days'),
+       CASE WHEN random() < 0.05 THEN 'open' WHEN random() < 0.5 THEN 'active' ELSE 'closed' END
+FROM generate_series(1, %(postings)s) AS i;
+
+INSERT INTO applications (user_id, posting_id, message, applied_at, status)
+SELECT 1 + floor(random() * (%(users)s - 1))::int,
+       1 + floor(random() * %(postings)s)::int,
+       'Hello', NOW() - (random() * INTERVAL '365 days'),
+       (ARRAY['pending', 'accepted', 'rejected'])[1 + i %% 3]
+FROM generate_series(1, %(applications)s) AS i
+ORDER BY 4
+ON CONFLICT DO NOTHING;
+
+-- A few hundred distinct browsers, as in the user agent dictionary
+INSERT INTO user_agents (user_agent)
+SELECT 'Mozilla/5.0 (Build ' || i || ')'
+FROM generate_series(1, 200) AS i;
+
+INSERT INTO posting_views (posting_id, user_id, ip_address, user_agent_id, viewed_at, session_hash, is_unique_view)
+SELECT 1 + floor(random() * %(postings)s)::int,
+       CASE WHEN random() < 0.5 THEN 1 + floor(random() * (%(users)s - 1))::int END,
+       '10.0.0.1', 1 + floor(random() * 200)::int, NOW() - (random() * INTERVAL '90 days'),
+       ('x' || substr(md5((i %% 200000)::text), 1, 16))::bit(64)::bigint, random() < 0.7
+FROM generate_series(1, %(views)s) AS i
+ORDER BY 5;
+
+INSERT INTO posting_metrics (posting_id, date, views_count, unique_views_count, applications_count)
+SELECT p, CURRENT_DATE - d, 10, 7, 1
+FROM generate_series(1, %(postings)s, 10) AS p, generate_series(0, 29) AS d;
+
+-- Older daily metrics downsampled into months, and the month before that
+-- still waiting to be
+INSERT INTO posting_metrics_monthly (posting_id, month, views_count, unique_views_count, applications_count)
+SELECT p, date_trunc('month', CURRENT_DATE - 30) - m * INTERVAL '1 month', 300, 210, 30
+FROM generate_series(1, %(postings)s, 10) AS p, generate_series(2, 13) AS m;
+
+INSERT INTO posting_metrics (posting_id, date, views_count, unique_views_count, applications_count)
+SELECT p, d, 10, 7, 1
+FROM generate_series(1, %(postings)s, 10) AS p,
+     generate_series(
+         date_trunc('month', CURRENT_DATE - 30) - INTERVAL '1 month',
+         date_trunc('month', CURRENT_DATE - 30) - INTERVAL '1 day',
+         INTERVAL '1 day'
+     ) AS d;
+
+-- The rollup worker's state: hourly buckets for the last 48 hours and a
+-- watermark a few minutes behind
+INSERT INTO posting_metrics_hourly (posting_id, hour, views_count, unique_views_count)
+SELECT posting_id, date_trunc('hour', viewed_at), count(*), count(*) FILTER (WHERE is_unique_view)
+FROM posting_views
+WHERE viewed_at >= LOCALTIMESTAMP - INTERVAL '48 hours'
+GROUP BY 1, 2;
+
+UPDATE rollup_watermarks SET watermark = LOCALTIMESTAMP - INTERVAL '5 minutes';
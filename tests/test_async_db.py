@@ -0,0 +1,523 @@
+import asyncio
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import psycopg
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import ResponseError
+
+from backend.core import async_db, queries
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_connection_closed_after_use(patch_psycopg_connect, mock_async_conn):
+    run(async_db.get_user_by_id(1))
+
+    patch_psycopg_connect.assert_awaited_once()
+    assert patch_psycopg_connect.call_args.kwargs["row_factory"] is not None
+    mock_async_conn.close.assert_awaited_once()
+
+
+def test_get_db_connection_uses_pool(mock_async_conn):
+    pool = MagicMock()
+    pool.connection.return_value.__aenter__.return_value = mock_async_conn
+    with patch.object(async_db, "_pool", pool), \
+         patch("backend.core.async_db.psycopg.AsyncConnection.connect") as connect:
+        run(async_db.get_user_by_id(1))
+
+    pool.connection.assert_called_once()
+    connect.assert_not_called()
+
+
+def test_init_and_close_db_pool():
+    pool = MagicMock()
+    pool.open = AsyncMock()
+    pool.close = AsyncMock()
+    pool.get_stats.return_value = {"pool_size": 3, "pool_available": 1}
+    with patch("backend.core.async_db.AsyncConnectionPool", return_value=pool):
+        assert run(async_db.init_db_pool()) is pool
+        assert async_db._pool_stats() == {"in_use": 2, "idle": 1}
+        run(async_db.close_db_pool())
+
+    pool.open.assert_awaited_once()
+    pool.close.assert_awaited_once()
+    assert async_db._pool is None
+    assert async_db._pool_stats() == {}
+
+
+def test_check_connection_skips_recently_returned():
+    conn = MagicMock()
+    with patch("backend.core.async_db.AsyncConnectionPool.check_connection",
+               new=AsyncMock()) as check:
+        run(async_db._check_connection(conn))
+        check.assert_awaited_once_with(conn)
+
+        run(async_db._mark_returned(conn))
+        run(async_db._check_connection(conn))
+        check.assert_awaited_once()
+
+
+def test_create_user(patch_psycopg_connect, mock_async_conn, mock_async_cursor, mock_async_db_redis):
+    mock_async_cursor.fetchone.return_value = {"id": 42}
+    user_id = run(async_db.create_user("John", "Doe", "johndoe", "john@example.com", "hashed_pwd"))
+
+    assert user_id == 42
+    mock_async_cursor.execute.assert_awaited_once_with(
+        queries.INSERT_USER,
+        ("John", "Doe", "johndoe", "john@example.com", "regular", "hashed_pwd"),
+    )
+    mock_async_conn.commit.assert_awaited_once()
+
+
+@pytest.mark.parametrize("func,query,arg", [
+    (async_db.get_user_by_email, queries.SELECT_USER_BY_EMAIL, "john@example.com"),
+    (async_db.get_user_by_username, queries.SELECT_USER_BY_USERNAME, "johndoe"),
+    (async_db.get_user_by_id, queries.SELECT_USER_BY_ID, 1),
+    (async_db.get_posting_by_id, queries.SELECT_POSTING_BY_ID, 1),
+    (async_db.get_posting_by_hash, queries.SELECT_POSTING_BY_HASH, "abc123"),
+])
+def test_fetchone_lookups(patch_psycopg_connect, mock_async_cursor, func, query, arg):
+    expected = {"id": 1}
+    mock_async_cursor.fetchone.return_value = expected
+
+    assert run(func(arg)) == expected
+    mock_async_cursor.execute.assert_awaited_once_with(query, (arg,))
+
+
+def test_get_posting_with_public_stats_adds_pending_views(patch_psycopg_connect, mock_async_cursor):
+    mock_async_cursor.fetchone.return_value = {"id": 1, "views": 100, "pending_views": 7}
+
+    assert run(async_db.get_posting_with_public_stats(1)) == {"id": 1, "views": 107}
+    mock_async_cursor.execute.assert_awaited_once_with(
+        queries.SELECT_POSTING_WITH_PUBLIC_STATS, (1,)
+    )
+
+    mock_async_cursor.fetchone.return_value = None
+    assert run(async_db.get_posting_with_public_stats(2)) is None
+
+
+@pytest.mark.parametrize("func,query,arg", [
+    (async_db.get_postings_by_user, queries.SELECT_POSTINGS_BY_USER, 1),
+    (async_db.get_applications_by_user, queries.SELECT_APPLICATIONS_BY_USER, 1),
+    (async_db.get_applications_by_posting, queries.SELECT_APPLICATIONS_BY_POSTING, 1),
+])
+def test_fetchall_lookups(patch_psycopg_connect, mock_async_cursor, func, query, arg):
+    expected = [{"id": 1}, {"id": 2}]
+    mock_async_cursor.fetchall.return_value = expected
+
+    assert run(func(arg)) == expected
+    mock_async_cursor.execute.assert_awaited_once_with(query, (arg,))
+
+
+def test_get_all_postings(patch_psycopg_connect, mock_async_cursor):
+    mock_async_cursor.fetchall.return_value = [{"id": 1}]
+
+    assert run(async_db.get_all_postings()) == [{"id": 1}]
+    mock_async_cursor.execute.assert_awaited_once_with(queries.SELECT_ALL_POSTINGS)
+
+
+def test_get_public_postings(patch_psycopg_connect, mock_async_cursor):
+    mock_async_cursor.fetchall.return_value = [{"id": 1, "application_count": 3}]
+
+    assert run(async_db.get_public_postings())[0]["application_count"] == 3
+    mock_async_cursor.execute.assert_awaited_once_with(queries.SELECT_PUBLIC_POSTINGS)
+
+
+def test_update_user_in_db_success(patch_psycopg_connect, mock_async_conn, mock_async_cursor, mock_async_db_redis):
+    mock_async_cursor.fetchone.return_value = {"id": 1}
+    result = run(async_db.update_user_in_db(1, name="N", surname="S", username="U", email="e@x.com"))
+
+    assert result is True
+    assert mock_async_cursor.execute.await_count == 5
+    mock_async_conn.commit.assert_awaited_once()
+    mock_async_db_redis.delete.assert_called_once_with("user:1")
+
+
+def test_update_user_in_db_not_found(patch_psycopg_connect, mock_async_conn, mock_async_cursor):
+    mock_async_cursor.fetchone.return_value = None
+
+    assert run(async_db.update_user_in_db(999, name="NoUser")) is False
+    mock_async_conn.commit.assert_not_awaited()
+
+
+def unique_violation(constraint_name: str) -> psycopg.errors.UniqueViolation:
+    class Violation(psycopg.errors.UniqueViolation):
+        diag = SimpleNamespace(constraint_name=constraint_name)
+
+    return Violation("duplicate key value violates unique constraint")
+
+
+def test_register_user(patch_psycopg_connect, mock_async_conn, mock_async_cursor, mock_async_db_redis):
+    mock_async_cursor.fetchone.return_value = {"id": 42}
+    result = run(async_db.register_user("John", "Doe", "johndoe", "john@example.com", "hashed_pwd"))
+
+    assert result == {"success": True, "user_id": 42}
+    mock_async_cursor.execute.assert_awaited_once_with(
+        queries.INSERT_USER,
+        ("John", "Doe", "johndoe", "john@example.com", "regular", "hashed_pwd"),
+    )
+    mock_async_conn.commit.assert_awaited_once()
+    mock_async_db_redis.execute_command.assert_awaited_once()
+
+
+@pytest.mark.parametrize("constraint, error", [
+    ("users_email_key", "email_taken"),
+    ("users_username_key", "username_taken"),
+])
+def test_register_user_reports_conflicting_field(patch_psycopg_connect, mock_async_conn, mock_async_cursor, mock_async_db_redis, constraint, error):
+    mock_async_cursor.execute.side_effect = unique_violation(constraint)
+
+    result = run(async_db.register_user("John", "Doe", "johndoe", "john@example.com", "hashed_pwd"))
+
+    assert result == {"success": False, "error": error}
+    mock_async_conn.commit.assert_not_awaited()
+    mock_async_db_redis.execute_command.assert_not_awaited()
+
+
+def test_register_user_reraises_unknown_violation(patch_psycopg_connect, mock_async_cursor):
+    mock_async_cursor.execute.side_effect = unique_violation("users_pkey")
+    with pytest.raises(psycopg.errors.UniqueViolation):
+        run(async_db.register_user("John", "Doe", "johndoe", "john@example.com", "hashed_pwd"))
+
+
+@pytest.mark.parametrize("row, expected", [
+    ({"email_taken": True, "username_taken": True}, "email_taken"),
+    ({"email_taken": False, "username_taken": True}, "username_taken"),
+    ({"email_taken": False, "username_taken": False}, None),
+])
+def test_find_registration_conflict(patch_psycopg_connect, mock_async_cursor, row, expected):
+    mock_async_cursor.fetchone.return_value = row
+
+    assert run(async_db.find_registration_conflict("a@b.com", "ab")) == expected
+    mock_async_cursor.execute.assert_awaited_once_with(queries.SELECT_USER_CONFLICTS, ("a@b.com", "ab"))
+
+
+def filter_pipeline(redis, *results):
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=list(results))
+    redis.pipeline = MagicMock(return_value=pipe)
+    return pipe
+
+
+def test_availability_negative_skips_database(patch_psycopg_connect, mock_async_db_redis):
+    pipe = filter_pipeline(mock_async_db_redis, 1, [0, 0])
+
+    result = run(async_db.check_user_availability(username="Alice ", email="a@b.com"))
+
+    assert result == {"username": True, "email": True}
+    pipe.execute_command.assert_called_once_with(
+        "BF.MEXISTS", "users:names", "username:alice", "email:a@b.com"
+    )
+    patch_psycopg_connect.assert_not_called()
+
+
+def test_availability_maybe_falls_through_to_lookup(patch_psycopg_connect, mock_async_cursor, mock_async_db_redis):
+    filter_pipeline(mock_async_db_redis, 1, [1, 1])
+    # username really taken, email a false positive
+    mock_async_cursor.fetchone.side_effect = [{"id": 1}, None]
+
+    result = run(async_db.check_user_availability(username="alice", email="a@b.com"))
+
+    assert result == {"username": False, "email": True}
+    assert [c.args[0] for c in mock_async_cursor.execute.await_args_list] == [
+        queries.SELECT_USER_BY_USERNAME, queries.SELECT_USER_BY_EMAIL,
+    ]
+
+
+@pytest.mark.parametrize("execute", [
+    AsyncMock(return_value=[0, [0]]),                        # filter not built yet
+    AsyncMock(side_effect=RedisConnectionError("down")),
+])
+def test_availability_without_filter_asks_database(patch_psycopg_connect, mock_async_cursor, mock_async_db_redis, execute):
+    filter_pipeline(mock_async_db_redis).execute = execute
+    mock_async_cursor.fetchone.return_value = None
+
+    assert run(async_db.check_user_availability(email="a@b.com")) == {"email": True}
+    mock_async_cursor.execute.assert_awaited_once_with(queries.SELECT_USER_BY_EMAIL, ("a@b.com",))
+
+
+def test_availability_needs_a_value(patch_psycopg_connect, mock_async_db_redis):
+    assert run(async_db.check_user_availability()) == {}
+    mock_async_db_redis.pipeline.assert_not_called()
+
+
+def test_user_filter_write_failure_is_not_fatal(patch_psycopg_connect, mock_async_conn, mock_async_cursor, mock_async_db_redis):
+    mock_async_db_redis.execute_command.side_effect = ResponseError("ERR not found")
+    mock_async_cursor.fetchone.return_value = {"id": 1}
+
+    assert run(async_db.update_user_in_db(1, username="renamed")) is True
+    assert mock_async_db_redis.execute_command.await_args.args[-1] == "username:renamed"
+    run(async_db.update_user_in_db(1, name="only-name"))
+    mock_async_db_redis.execute_command.assert_awaited_once()
+
+
+def test_update_user_password(patch_psycopg_connect, mock_async_conn, mock_async_cursor, mock_async_db_redis):
+    mock_async_cursor.rowcount = 1
+    assert run(async_db.update_user_password(1, "$2b$12$new")) is True
+    mock_async_db_redis.delete.assert_called_once_with("user:1")
+
+    mock_async_cursor.rowcount = 0
+    assert run(async_db.update_user_password(999, "$2b$12$new")) is False
+    mock_async_conn.commit.assert_awaited_once()
+
+
+def test_delete_user_from_db(patch_psycopg_connect, mock_async_conn, mock_async_cursor, mock_async_db_redis):
+    mock_async_cursor.rowcount = 1
+    assert run(async_db.delete_user_from_db(1)) is True
+    mock_async_db_redis.delete.assert_called_once_with("user:1")
+
+    mock_async_cursor.rowcount = 0
+    assert run(async_db.delete_user_from_db(999)) is False
+    mock_async_conn.commit.assert_awaited_once()
+
+
+def test_create_posting_in_db_retries_hash_collision(patch_psycopg_connect, mock_async_conn, mock_async_cursor):
+    mock_async_cursor.fetchone.side_effect = [None, {"hash": "fresh"}]
+
+    assert run(async_db.create_posting_in_db("Title", "Desc", "Cat", 1)) == "fresh"
+    assert mock_async_cursor.execute.await_count == 2
+    patch_psycopg_connect.assert_awaited_once()
+    mock_async_conn.commit.assert_awaited_once()
+
+
+@patch("backend.core.async_db.generate_posting_hash")
+def test_create_posting_in_db(mock_generate_hash, patch_psycopg_connect, mock_async_conn, mock_async_cursor):
+    mock_generate_hash.return_value = "abc123hash"
+    mock_async_cursor.fetchone.return_value = {"hash": "abc123hash"}
+
+    assert run(async_db.create_posting_in_db("Title", "Desc", "Cat", 1)) == "abc123hash"
+    mock_async_conn.commit.assert_awaited_once()
+
+
+@patch("backend.core.async_db.generate_posting_hash")
+def test_create_posting_in_db_no_hash_raises(mock_generate_hash, patch_psycopg_connect, mock_async_cursor):
+    mock_generate_hash.return_value = "abc123hash"
+    mock_async_cursor.fetchone.return_value = None
+
+    with pytest.raises(ValueError):
+        run(async_db.create_posting_in_db("Title", "Desc", "Cat", 1))
+
+
+def test_update_posting_in_db(patch_psycopg_connect, mock_async_conn, mock_async_cursor, mock_async_db_redis):
+    mock_async_cursor.fetchone.return_value = {"id": 1}
+    result = run(async_db.update_posting_in_db(1, "T", "C", "D", "open"))
+
+    assert result is True
+    assert mock_async_cursor.execute.await_count == 6
+    mock_async_db_redis.delete.assert_called_once_with("posting id:1")
+
+
+def test_update_posting_in_db_not_found(patch_psycopg_connect, mock_async_conn, mock_async_cursor):
+    mock_async_cursor.fetchone.return_value = None
+
+    assert run(async_db.update_posting_in_db(999, title="T")) is False
+    mock_async_conn.commit.assert_not_awaited()
+
+
+def test_delete_posting_from_db(patch_psycopg_connect, mock_async_conn, mock_async_cursor, mock_async_db_redis):
+    mock_async_cursor.rowcount = 1
+    assert run(async_db.delete_posting_from_db(1)) is True
+    mock_async_db_redis.delete.assert_called_once_with("posting id:1")
+
+    mock_async_cursor.rowcount = 0
+    assert run(async_db.delete_posting_from_db(999)) is False
+
+
+@pytest.mark.parametrize("fetchone,expected", [
+    ([None], {"success": False, "error": "posting_not_found"}),
+    ([{"id": 1, "user_id": 42}], {"success": False, "error": "cannot_apply_own_posting"}),
+    ([{"id": 1, "user_id": 99}, {"id": 5}], {"success": False, "error": "already_applied"}),
+    # Lost the race: a concurrent application landed after the check
+    ([{"id": 1, "user_id": 99}, None, None], {"success": False, "error": "already_applied"}),
+    ([{"id": 1, "user_id": 99}, None, {"id": 5}], {"success": True}),
+])
+def test_apply_to_posting(patch_psycopg_connect, mock_async_conn, mock_async_cursor, fetchone, expected):
+    mock_async_cursor.fetchone.side_effect = fetchone
+
+    assert run(async_db.apply_to_posting(42, 1, "msg", "cover")) == expected
+    if expected["success"]:
+        mock_async_conn.commit.assert_awaited_once()
+    else:
+        mock_async_conn.commit.assert_not_awaited()
+
+
+def test_check_user_application_exists(patch_psycopg_connect, mock_async_cursor):
+    mock_async_cursor.fetchone.return_value = {"?column?": 1}
+    assert run(async_db.check_user_application_exists(42, 1)) is True
+
+    mock_async_cursor.fetchone.return_value = None
+    assert run(async_db.check_user_application_exists(42, 1)) is False
+
+
+@pytest.mark.parametrize("kwargs,previous_view,expected", [
+    ({"user_id": 42}, None, True),
+    ({"user_id": 42}, {"?column?": 1}, False),
+    ({"session_id": "session123"}, None, True),
+])
+def test_track_posting_view_without_redis(patch_psycopg_connect, mock_async_conn, mock_async_cursor, mock_async_db_redis, kwargs, previous_view, expected):
+    filter_pipeline(mock_async_db_redis).execute = AsyncMock(side_effect=RedisConnectionError("down"))
+    mock_async_cursor.fetchone.return_value = previous_view
+
+    assert run(async_db.track_posting_view(1, **kwargs)) is expected
+    assert mock_async_cursor.execute.await_count == 2
+    mock_async_conn.commit.assert_awaited_once()
+
+
+@pytest.mark.parametrize("marker_set,expected", [(True, True), (None, False)])
+def test_track_posting_view_unique_from_redis(patch_psycopg_connect, mock_async_cursor, mock_async_db_redis, marker_set, expected):
+    pipe = filter_pipeline(mock_async_db_redis, marker_set, 1, True, 1, True)
+
+    assert run(async_db.track_posting_view(1, user_id=42)) is expected
+
+    pipe.set.assert_called_once_with("unique_view:1:user:42", 1, nx=True, ex=86400)
+    assert pipe.pfadd.call_args.args[1] == "user:42"
+    # Only the view is appended; the rollup worker counts it
+    mock_async_cursor.execute.assert_awaited_once()
+    assert mock_async_cursor.execute.await_args_list[0].args[1][-1] is expected
+
+
+def test_track_posting_view_anonymous(patch_psycopg_connect, mock_async_cursor, mock_async_db_redis):
+    pipe = filter_pipeline(mock_async_db_redis, 1, True, 1, True)
+
+    assert run(async_db.track_posting_view(1, ip_address="10.0.0.1")) is True
+    pipe.set.assert_not_called()
+    mock_async_cursor.execute.assert_awaited_once()
+
+
+def test_record_posting_views(patch_psycopg_connect, mock_async_conn, mock_async_cursor):
+    run(async_db.record_posting_views([(1, None, None, None, 77, "t1", True)]))
+
+    mock_async_cursor.execute.assert_awaited_once_with(
+        queries.INSERT_POSTING_VIEWS_BATCH,
+        [[1], [None], [None], [None], [77], ["t1"], [True]],
+    )
+    mock_async_conn.commit.assert_awaited_once()
+
+
+def test_record_posting_views_resolves_user_agents(patch_psycopg_connect, mock_async_conn, mock_async_cursor):
+    # "B" is added by another replica between the lookup and the insert
+    mock_async_cursor.fetchall.side_effect = [[{"id": 1, "user_agent": "A"}], [{"id": 2, "user_agent": "B"}]]
+    views = [(1, None, None, "B", None, "t1", True), (1, None, None, "A", None, "t2", True)]
+
+    run(async_db.record_posting_views(views))
+
+    assert [c.args for c in mock_async_cursor.execute.await_args_list] == [
+        (queries.UPSERT_USER_AGENTS, (["A", "B"],)),
+        (queries.UPSERT_USER_AGENTS, (["B"],)),
+        (queries.INSERT_POSTING_VIEWS_BATCH, [[1, 1], [None, None], [None, None], [2, 1], [None, None], ["t1", "t2"], [True, True]]),
+    ]
+    assert mock_async_conn.commit.await_count == 3
+
+    # Both are cached now
+    mock_async_cursor.execute.reset_mock()
+    run(async_db.record_posting_views(views))
+    mock_async_cursor.execute.assert_awaited_once()
+
+
+def test_record_posting_views_empty(patch_psycopg_connect):
+    run(async_db.record_posting_views([]))
+    patch_psycopg_connect.assert_not_awaited()
+
+
+def test_get_posting_analytics_owner(patch_psycopg_connect, mock_async_cursor, mock_async_db_redis):
+    mock_async_cursor.fetchone.return_value = {
+        "views": 100,
+        "daily_metrics": [{"date": "2023-01-01"}],
+        "application_status": [{"status": "pending", "count": 3}],
+    }
+    mock_async_db_redis.pfcount.side_effect = RedisConnectionError("down")
+
+    result = run(async_db.get_posting_analytics(1, 42))
+
+    mock_async_cursor.execute.assert_awaited_once_with(queries.SELECT_POSTING_ANALYTICS, (1, 42))
+    assert result["posting_id"] == 1
+    assert result["stats"] == {"views": 100}
+    assert result["daily_metrics"] == [{"date": "2023-01-01"}]
+    assert result["application_status"] == [{"status": "pending", "count": 3}]
+
+
+def test_get_posting_analytics_merges_live_unique_views(patch_psycopg_connect, mock_async_cursor, mock_async_db_redis):
+    today = datetime.now(UTC).date()
+    mock_async_cursor.fetchone.return_value = {
+        "unique_views": 10,
+        "daily_metrics": [
+            {"date": today.isoformat(), "unique_views_count": 4},
+            {"date": "2023-01-01", "unique_views_count": 6},
+        ],
+        "application_status": [],
+    }
+    mock_async_db_redis.pfcount.return_value = 7
+
+    result = run(async_db.get_posting_analytics(1, 42))
+
+    mock_async_db_redis.pfcount.assert_awaited_once_with(f"unique_viewers:{today}:1")
+    assert result["stats"] == {"unique_views": 13}
+    assert [m["unique_views_count"] for m in result["daily_metrics"]] == [7, 6]
+
+
+def test_get_posting_analytics_not_owner(patch_psycopg_connect, mock_async_cursor):
+    mock_async_cursor.fetchone.return_value = None
+
+    assert run(async_db.get_posting_analytics(1, 42)) == {}
+
+
+def test_get_posting_analytics_hourly(patch_psycopg_connect, mock_async_cursor, mock_async_db_redis):
+    hourly = [{"hour": "2023-01-01T10:00:00", "views_count": 3}]
+    mock_async_cursor.fetchone.side_effect = [
+        {"views": 100, "daily_metrics": [], "application_status": []},
+        {"metrics": hourly},
+    ]
+    mock_async_db_redis.pfcount.return_value = 0
+
+    result = run(async_db.get_posting_analytics(1, 42, granularity="hourly"))
+
+    mock_async_cursor.execute.assert_awaited_with(queries.SELECT_POSTING_HOURLY_METRICS, (1, 1, 1))
+    assert result["hourly_metrics"] == hourly
+
+
+def test_get_user_posting_stats(patch_psycopg_connect, mock_async_cursor):
+    mock_async_cursor.fetchone.return_value = {"total_postings": 5}
+    mock_async_cursor.fetchall.side_effect = [[{"id": 1}], [{"date": "2023-01-01"}]]
+
+    result = run(async_db.get_user_posting_stats(42))
+
+    assert result["overview"]["total_postings"] == 5
+    assert result["top_postings"] == [{"id": 1}]
+    assert result["recent_activity"] == [{"date": "2023-01-01"}]
+    assert "hourly_activity" not in result
+
+
+def test_get_user_posting_stats_hourly(patch_psycopg_connect, mock_async_cursor):
+    mock_async_cursor.fetchone.return_value = {"total_postings": 5}
+    mock_async_cursor.fetchall.side_effect = [[], [], [{"hour": "2023-01-01T10:00:00"}]]
+
+    result = run(async_db.get_user_posting_stats(42, granularity="hourly"))
+
+    mock_async_cursor.execute.assert_awaited_with(queries.SELECT_USER_HOURLY_ACTIVITY, (42, 42, 42))
+    assert result["hourly_activity"] == [{"hour": "2023-01-01T10:00:00"}]
+
+
+def test_update_application_status(patch_psycopg_connect, mock_async_conn, mock_async_cursor):
+    mock_async_cursor.rowcount = 1
+    assert run(async_db.update_application_status(1, "accepted", "Great")) is True
+    mock_async_cursor.execute.assert_awaited_once_with(
+        queries.UPDATE_APPLICATION_STATUS, ("accepted", "Great", 1)
+    )
+
+    mock_async_cursor.rowcount = 0
+    assert run(async_db.update_application_status(999, "accepted")) is False
+    mock_async_conn.commit.assert_awaited_once()
+
+
+def test_get_application_details(patch_psycopg_connect, mock_async_cursor):
+    mock_async_cursor.fetchone.return_value = {"id": 1, "posting_owner_id": 42}
+
+    assert run(async_db.get_application_details(1, 42))["posting_owner_id"] == 42
+    mock_async_cursor.execute.assert_awaited_once_with(
+        queries.SELECT_APPLICATION_DETAILS, (1, 42, 42)
+    )
@@ -0,0 +1,185 @@
+import asyncio
+import json
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, call, patch
+
+import bcrypt
+import pytest
+
+from backend.core import async_cache, async_security
+from backend.core.config import PASSWORD_HASH_CONFIG
+from backend.core.session_store import decode_session, encode_session, session_key
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def mock_redis():
+    mock_redis_client = AsyncMock()
+    # pipeline() and register_script() are synchronous in redis.asyncio
+    pipe = MagicMock()
+    pipe.execute = AsyncMock(return_value=[1])
+    mock_redis_client.pipeline = MagicMock(return_value=pipe)
+    mock_redis_client.register_script = MagicMock(return_value=AsyncMock(return_value=2))
+    with patch("backend.core.async_security.get_redis_client", return_value=mock_redis_client):
+        yield mock_redis_client
+
+
+def legacy_payload(expires_in: timedelta) -> str:
+    now = datetime.now(UTC)
+    return json.dumps({
+        "user_id": 42,
+        "created_at": now.isoformat(),
+        "expires_at": (now + expires_in).isoformat(),
+    })
+
+
+def test_create_session(mock_redis):
+    session_token = run(async_security.create_session(42))
+
+    pipe = mock_redis.pipeline.return_value
+    key, ttl, payload = pipe.setex.call_args.args
+    assert key == session_key(session_token)
+    assert ttl == 604800
+    assert decode_session(payload)[0]["user_id"] == 42
+    assert pipe.zadd.call_args.args[0] == "user_sessions:42"
+    pipe.execute.assert_awaited_once()
+
+
+def test_get_session_user_valid(mock_redis):
+    mock_redis.get.return_value = encode_session(42, datetime.now(UTC))
+
+    assert run(async_security.get_session_user("valid_token"))["user_id"] == 42
+    mock_redis.get.assert_awaited_once_with(session_key("valid_token"))
+
+
+def test_get_session_user_legacy_format(mock_redis):
+    mock_redis.get.side_effect = [None, legacy_payload(timedelta(days=1))]
+
+    assert run(async_security.get_session_user("valid_token"))["user_id"] == 42
+    assert mock_redis.get.await_args.args == ("session:valid_token",)
+
+
+def test_get_session_user_expired(mock_redis):
+    mock_redis.get.side_effect = [None, legacy_payload(timedelta(days=-1))]
+
+    assert run(async_security.get_session_user("expired_token")) is None
+    mock_redis.delete.assert_awaited_once_with("session:expired_token")
+
+
+@pytest.mark.parametrize("stored", [[None, None], [None, "not-json"], [b"short"]])
+def test_get_session_user_missing_or_malformed(mock_redis, stored):
+    mock_redis.get.side_effect = stored
+
+    assert run(async_security.get_session_user("token")) is None
+
+
+def test_get_session_user_no_token(mock_redis):
+    assert run(async_security.get_session_user("")) is None
+    mock_redis.get.assert_not_awaited()
+
+
+def test_login_user_success(mock_redis):
+    hashed = bcrypt.hashpw(b"Secret1!", bcrypt.gensalt(rounds=4)).decode()
+    user = {"id": 7, "email": "a@b.com", "hashed_password": hashed}
+    with patch("backend.core.async_security.get_user_by_email", new=AsyncMock(return_value=user)), \
+         patch("backend.core.async_security.update_user_password") as mock_update, \
+         patch.dict(PASSWORD_HASH_CONFIG, {"rounds": 4}):
+        result = run(async_security.login_user("a@b.com", "Secret1!"))
+
+    assert result["user_id"] == 7
+    assert result["email"] == "a@b.com"
+    mock_redis.pipeline.return_value.execute.assert_awaited_once()
+    mock_update.assert_not_called()
+
+
+def test_login_user_rehashes_outdated_cost(mock_redis):
+    hashed = bcrypt.hashpw(b"Secret1!", bcrypt.gensalt(rounds=4)).decode()
+    user = {"id": 7, "email": "a@b.com", "hashed_password": hashed}
+    with patch("backend.core.async_security.get_user_by_email", new=AsyncMock(return_value=user)), \
+         patch("backend.core.async_security.update_user_password") as mock_update, \
+         patch.dict(PASSWORD_HASH_CONFIG, {"rounds": 5}):
+        assert run(async_security.login_user("a@b.com", "Secret1!"))["user_id"] == 7
+
+    user_id, rehashed = mock_update.await_args.args
+    assert user_id == 7
+    assert rehashed.startswith("$2b$05$")
+    assert bcrypt.checkpw(b"Secret1!", rehashed.encode())
+
+
+def test_login_user_survives_failed_rehash(mock_redis):
+    hashed = bcrypt.hashpw(b"Secret1!", bcrypt.gensalt(rounds=4)).decode()
+    user = {"id": 7, "email": "a@b.com", "hashed_password": hashed}
+    with patch("backend.core.async_security.get_user_by_email", new=AsyncMock(return_value=user)), \
+         patch("backend.core.async_security.update_user_password",
+               side_effect=ConnectionError("db down")), \
+         patch.dict(PASSWORD_HASH_CONFIG, {"rounds": 5}):
+        assert run(async_security.login_user("a@b.com", "Secret1!"))["user_id"] == 7
+
+
+@pytest.mark.parametrize("user", [
+    None,
+    {"id": 7, "email": "a@b.com", "hashed_password": bcrypt.hashpw(b"other", bcrypt.gensalt(rounds=4)).decode()},
+])
+def test_login_user_fail(mock_redis, user):
+    with patch("backend.core.async_security.get_user_by_email", new=AsyncMock(return_value=user)):
+        assert run(async_security.login_user("a@b.com", "Secret1!")) is None
+    mock_redis.pipeline.assert_not_called()
+
+
+@pytest.mark.parametrize("deleted,expected", [(1, True), (0, False)])
+def test_logout_user(mock_redis, deleted, expected):
+    mock_redis.get.return_value = encode_session(42, datetime.now(UTC))
+    pipe = mock_redis.pipeline.return_value
+    pipe.execute.return_value = [deleted, deleted]
+
+    assert run(async_security.logout_user("token")) is expected
+    pipe.delete.assert_called_once_with(session_key("token"), "session:token")
+    pipe.zrem.assert_called_once_with("user_sessions:42", session_key("token"))
+    assert mock_redis.publish.await_args_list == [
+        call("session:invalidate", session_key("token"))
+    ] * deleted
+
+
+def test_logout_user_no_token(mock_redis):
+    assert run(async_security.logout_user(None)) is False
+    mock_redis.pipeline.assert_not_called()
+
+
+def test_logout_all_sessions(mock_redis):
+    assert run(async_security.logout_all_sessions(42)) == 2
+
+    logout_all = mock_redis.register_script.return_value
+    assert logout_all.call_args.kwargs["keys"][0] == "user_sessions:42"
+    mock_redis.publish.assert_awaited_once_with("session:invalidate", "user:42")
+
+
+def test_list_sessions(mock_redis):
+    mock_redis.zrangebyscore.return_value = [(session_key("token"), 4102444800.0)]
+
+    sessions = run(async_security.list_sessions(42, "token"))
+
+    assert sessions == [{
+        "id": session_key("token")[2:].hex(),
+        "created_at": "2099-12-25T00:00:00+00:00",
+        "expires_at": "2100-01-01T00:00:00+00:00",
+        "current": True,
+    }]
+
+
+def test_async_redis_client_shared_and_closed():
+    with patch.object(async_cache, "_client", None):
+        assert async_cache._pool_stats() == {}
+        client = async_cache.get_redis_client()
+        assert async_cache.get_redis_client() is client
+
+        pool = client.connection_pool
+        pool._in_use_connections.add(MagicMock())
+        assert async_cache._pool_stats() == {"in_use": 1, "idle": 0}
+        pool._in_use_connections.clear()
+
+        run(async_cache.close_redis_client())
+        assert async_cache._client is None
+        run(async_cache.close_redis_client())
@@ -1,24 +1,34 @@
+from datetime import date
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
+import psycopg2.errors
 import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import ResponseError
 
-from backend.core import db
+from backend.core import db, queries
+from backend.core.utility import POSTING_HASH_ATTEMPTS
+from backend.core.view_encoding import USER_AGENT_MAX_LENGTH, session_hash
 
 
-def test_create_user(patch_psycopg2_connect, mock_cursor):
+def test_create_user(patch_psycopg2_connect, mock_cursor, mock_redis):
     mock_cursor.fetchone.return_value = {"id": 42}
     user_id = db.create_user("John", "Doe", "johndoe", "john@example.com", "hashed_pwd")
 
     assert user_id == 42
     mock_cursor.execute.assert_called_once_with(
         """
-            INSERT INTO users (name, surname, username, email, user_type, hashed_password)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            RETURNING id
-        """,
+    INSERT INTO users (name, surname, username, email, user_type, hashed_password)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    RETURNING id
+""",
         ("John", "Doe", "johndoe", "john@example.com", "regular", "hashed_pwd")
     )
     patch_psycopg2_connect.return_value.commit.assert_called_once()
+    mock_redis.execute_command.assert_called_once_with(
+        "BF.INSERT", "users:names", "NOCREATE", "ITEMS", "username:johndoe", "email:john@example.com"
+    )
 
 def test_get_user_by_id(patch_psycopg2_connect, mock_cursor):
     expected_user = {"id": 1, "email": "user@example.com"}
@@ -37,6 +47,16 @@ def test_update_user_in_db_success(patch_psycopg2_connect, mock_cursor, mock_red
     assert mock_cursor.execute.call_count >= 3
     patch_psycopg2_connect.return_value.commit.assert_called_once()
     mock_redis.delete.assert_called_once_with("user:1")
+    mock_redis.execute_command.assert_called_once_with(
+        "BF.INSERT", "users:names", "NOCREATE", "ITEMS", "username:newusername", "email:new@example.com"
+    )
+
+
+def test_update_user_name_leaves_user_filter_alone(patch_psycopg2_connect, mock_cursor, mock_redis):
+    mock_cursor.fetchone.return_value = {"id": 1}
+
+    assert db.update_user_in_db(1, name="NewName") is True
+    mock_redis.execute_command.assert_not_called()
 
 
 def test_update_user_in_db_not_found(patch_psycopg2_connect, mock_cursor):
@@ -47,6 +67,90 @@ def test_update_user_in_db_not_found(patch_psycopg2_connect, mock_cursor):
     patch_psycopg2_connect.return_value.commit.assert_not_called()
 
 
+def unique_violation(constraint_name: str) -> psycopg2.errors.UniqueViolation:
+    class Violation(psycopg2.errors.UniqueViolation):
+        diag = SimpleNamespace(constraint_name=constraint_name)
+
+    return Violation("duplicate key value violates unique constraint")
+
+
+def test_register_user(patch_psycopg2_connect, mock_cursor, mock_redis):
+    mock_cursor.fetchone.return_value = {"id": 42}
+    result = db.register_user("John", "Doe", "johndoe", "john@example.com", "hashed_pwd")
+
+    assert result == {"success": True, "user_id": 42}
+    patch_psycopg2_connect.return_value.commit.assert_called_once()
+    mock_redis.execute_command.assert_called_once()
+
+
+@pytest.mark.parametrize("constraint, error", [
+    ("users_email_key", "email_taken"),
+    ("users_username_key", "username_taken"),
+])
+def test_register_user_reports_conflicting_field(patch_psycopg2_connect, mock_cursor, constraint, error):
+    mock_cursor.execute.side_effect = unique_violation(constraint)
+
+    result = db.register_user("John", "Doe", "johndoe", "john@example.com", "hashed_pwd")
+
+    assert result == {"success": False, "error": error}
+    patch_psycopg2_connect.return_value.commit.assert_not_called()
+
+
+def test_register_user_reraises_unknown_violation(patch_psycopg2_connect, mock_cursor):
+    mock_cursor.execute.side_effect = unique_violation("users_pkey")
+    with pytest.raises(psycopg2.errors.UniqueViolation):
+        db.register_user("John", "Doe", "johndoe", "john@example.com", "hashed_pwd")
+
+
+@pytest.mark.parametrize("row, expected", [
+    ({"email_taken": True, "username_taken": False}, "email_taken"),
+    ({"email_taken": False, "username_taken": True}, "username_taken"),
+    ({"email_taken": False, "username_taken": False}, None),
+])
+def test_find_registration_conflict(patch_psycopg2_connect, mock_cursor, row, expected):
+    mock_cursor.fetchone.return_value = row
+    assert db.find_registration_conflict("a@b.com", "ab") == expected
+
+
+def test_availability_negative_skips_database(patch_psycopg2_connect, mock_redis):
+    mock_redis.pipeline.return_value.execute.return_value = [1, [0, 0]]
+
+    assert db.check_user_availability(username="alice", email="a@b.com") == {
+        "username": True, "email": True,
+    }
+    patch_psycopg2_connect.assert_not_called()
+
+
+def test_availability_maybe_or_missing_filter_asks_database(patch_psycopg2_connect, mock_cursor, mock_redis):
+    mock_redis.pipeline.return_value.execute.return_value = [1, [1]]
+    mock_cursor.fetchone.return_value = {"id": 1}
+    assert db.check_user_availability(username="alice") == {"username": False}
+
+    mock_redis.pipeline.return_value.execute.side_effect = RedisConnectionError("down")
+    mock_cursor.fetchone.return_value = None
+    assert db.check_user_availability(email="a@b.com") == {"email": True}
+    assert db.check_user_availability() == {}
+
+
+def test_user_filter_write_failure_is_not_fatal(patch_psycopg2_connect, mock_cursor, mock_redis):
+    mock_redis.execute_command.side_effect = ResponseError("ERR not found")
+    mock_cursor.fetchone.return_value = {"id": 1}
+
+    assert db.update_user_in_db(1, email="new@example.com") is True
+    mock_redis.execute_command.assert_called_once()
+
+
+def test_update_user_password(patch_psycopg2_connect, mock_cursor, mock_redis):
+    mock_cursor.rowcount = 1
+    assert db.update_user_password(1, "$2b$12$new") is True
+    mock_cursor.execute.assert_called_once_with(queries.UPDATE_USER_PASSWORD, ("$2b$12$new", 1))
+    mock_redis.delete.assert_called_once_with("user:1")
+
+    mock_cursor.rowcount = 0
+    assert db.update_user_password(999, "$2b$12$new") is False
+    patch_psycopg2_connect.return_value.commit.assert_called_once()
+
+
 def test_delete_user_from_db_success(patch_psycopg2_connect, mock_cursor, mock_redis):
     mock_cursor.rowcount = 1
     result = db.delete_user_from_db(1)
@@ -65,7 +169,7 @@ def test_delete_user_from_db_fail(patch_psycopg2_connect, mock_cursor):
     patch_psycopg2_connect.return_value.commit.assert_not_called()
 
 
-@patch('backend.core.db.generate_unique_hash')
+@patch('backend.core.db.generate_posting_hash')
 def test_create_posting_in_db_success(mock_generate_hash, patch_psycopg2_connect, mock_cursor):
     mock_generate_hash.return_value = "abc123hash"
     mock_cursor.fetchone.return_value = {"hash": "abc123hash"}
@@ -75,12 +179,25 @@ def test_create_posting_in_db_success(mock_generate_hash, patch_psycopg2_connect
     patch_psycopg2_connect.return_value.commit.assert_called_once()
 
 
-@patch('backend.core.db.generate_unique_hash')
+@patch('backend.core.db.generate_posting_hash')
 def test_create_posting_in_db_no_id_raises(mock_generate_hash, patch_psycopg2_connect, mock_cursor):
     mock_generate_hash.return_value = "abc123hash"
     mock_cursor.fetchone.return_value = None
     with pytest.raises(ValueError):
         db.create_posting_in_db("Title", "Desc", "Cat", 1)
+    assert mock_cursor.execute.call_count == POSTING_HASH_ATTEMPTS
+    patch_psycopg2_connect.return_value.commit.assert_not_called()
+
+
+@patch('backend.core.db.generate_posting_hash')
+def test_create_posting_in_db_retries_hash_collision(mock_generate_hash, patch_psycopg2_connect, mock_cursor):
+    mock_generate_hash.side_effect = ["taken", "fresh"]
+    mock_cursor.fetchone.side_effect = [None, {"hash": "fresh"}]
+
+    assert db.create_posting_in_db("Title", "Desc", "Cat", 1) == "fresh"
+    assert [c.args[1][4] for c in mock_cursor.execute.call_args_list] == ["taken", "fresh"]
+    patch_psycopg2_connect.assert_called_once()
+    patch_psycopg2_connect.return_value.commit.assert_called_once()
 
 def test_update_posting_in_db_success(patch_psycopg2_connect, mock_cursor, mock_redis):
     mock_cursor.fetchone.side_effect = [{"id": 1}, None]
@@ -189,8 +306,9 @@ def test_get_user_by_username_not_found(patch_psycopg2_connect, mock_cursor):
 # Analytics and Enhanced Posting Tests
 
 @patch('backend.core.db.get_db_connection')
-def test_track_posting_view_unique_user(mock_get_db):
-    """Test tracking unique view by user"""
+def test_track_posting_view_unique_user(mock_get_db, mock_redis):
+    """Test tracking unique view by user, checked in the database without Redis"""
+    mock_redis.pipeline.return_value.execute.side_effect = RedisConnectionError("down")
     mock_conn = MagicMock()
     mock_cursor = MagicMock()
     mock_get_db.return_value = mock_conn
@@ -200,16 +318,19 @@ def test_track_posting_view_unique_user(mock_get_db):
     
     # Mock no previous view (unique)
     mock_cursor.fetchone.return_value = None
+    mock_cursor.fetchall.return_value = [{"id": 7, "user_agent": "Test"}]
     
     result = db.track_posting_view(1, user_id=42, ip_address="127.0.0.1", user_agent="Test")
     
     assert result is True
-    assert mock_cursor.execute.call_count == 4  # check unique, insert view, update posting, update metrics
+    assert mock_cursor.execute.call_count == 3  # resolve user agent, check unique, insert view
+    assert mock_cursor.execute.call_args.args[1] == (1, 42, "127.0.0.1", 7, None, True)
 
 
 @patch('backend.core.db.get_db_connection')
-def test_track_posting_view_non_unique_user(mock_get_db):
-    """Test tracking non-unique view by same user"""
+def test_track_posting_view_non_unique_user(mock_get_db, mock_redis):
+    """Test tracking non-unique view by same user, checked in the database without Redis"""
+    mock_redis.pipeline.return_value.execute.side_effect = RedisConnectionError("down")
     mock_conn = MagicMock()
     mock_cursor = MagicMock()
     mock_get_db.return_value = mock_conn
@@ -219,16 +340,18 @@ def test_track_posting_view_non_unique_user(mock_get_db):
     
     # Mock previous view exists (not unique)
     mock_cursor.fetchone.return_value = {"id": 1}
+    mock_cursor.fetchall.return_value = [{"id": 7, "user_agent": "Test"}]
     
     result = db.track_posting_view(1, user_id=42, ip_address="127.0.0.1", user_agent="Test")
     
     assert result is False
-    assert mock_cursor.execute.call_count == 4  # check unique, insert view, update posting, update metrics
+    assert mock_cursor.execute.call_count == 3  # resolve user agent, check unique, insert view
 
 
 @patch('backend.core.db.get_db_connection')
-def test_track_posting_view_session_based(mock_get_db):
-    """Test tracking view by session when no user"""
+def test_track_posting_view_session_based(mock_get_db, mock_redis):
+    """Test tracking view by session when no user, checked in the database without Redis"""
+    mock_redis.pipeline.return_value.execute.side_effect = RedisConnectionError("down")
     mock_conn = MagicMock()
     mock_cursor = MagicMock()
     mock_get_db.return_value = mock_conn
@@ -242,72 +365,81 @@ def test_track_posting_view_session_based(mock_get_db):
     result = db.track_posting_view(1, user_id=None, session_id="session123")
     
     assert result is True
-    assert mock_cursor.execute.call_count == 4
+    assert mock_cursor.execute.call_count == 2
 
 
-@patch('backend.core.db.get_db_connection')
-def test_get_posting_analytics_owner(mock_get_db):
-    """Test getting posting analytics for owner"""
-    mock_conn = MagicMock()
-    mock_cursor = MagicMock()
-    mock_get_db.return_value = mock_conn
-    mock_conn.__enter__.return_value = mock_conn
-    mock_conn.cursor.return_value = mock_cursor
-    mock_cursor.__enter__.return_value = mock_cursor
-    
-    # Mock posting owned by user
-    mock_cursor.fetchone.side_effect = [
-        {"user_id": 42},  # ownership check
-        {"views": 100, "application_count": 5, "total_views": 150, "unique_views": 120}  # stats
-    ]
-    mock_cursor.fetchall.side_effect = [
-        [{"date": "2023-01-01", "views_count": 10, "unique_views_count": 8, "applications_count": 1}],  # daily metrics
-        [{"status": "pending", "count": 3}, {"status": "reviewed", "count": 2}]  # application status
-    ]
-    
+def test_get_posting_analytics_owner(patch_psycopg2_connect, mock_cursor, mock_redis):
+    """Test getting posting analytics for owner in a single query"""
+    mock_redis.pfcount.return_value = 0
+    mock_cursor.fetchone.return_value = {
+        "views": 100,
+        "created_at": "2023-01-01",
+        "status": "open",
+        "application_count": 5,
+        "total_views": 150,
+        "unique_views": 120,
+        "daily_metrics": [{"date": "2023-01-01", "views_count": 10, "unique_views_count": 8, "applications_count": 1}],
+        "application_status": [{"status": "pending", "count": 3}, {"status": "reviewed", "count": 2}],
+    }
+
     result = db.get_posting_analytics(1, 42)
-    
-    assert result is not None
-    assert result["posting_id"] == 1
-    assert "stats" in result
-    assert "daily_metrics" in result
-    assert "application_status" in result
 
+    mock_cursor.execute.assert_called_once_with(queries.SELECT_POSTING_ANALYTICS, (1, 42))
+    assert result == {
+        "posting_id": 1,
+        "stats": {
+            "views": 100,
+            "created_at": "2023-01-01",
+            "status": "open",
+            "application_count": 5,
+            "total_views": 150,
+            "unique_views": 120,
+        },
+        "daily_metrics": [{"date": "2023-01-01", "views_count": 10, "unique_views_count": 8, "applications_count": 1}],
+        "application_status": [{"status": "pending", "count": 3}, {"status": "reviewed", "count": 2}],
+    }
+
+
+def test_get_posting_analytics_live_count_is_optional(patch_psycopg2_connect, mock_cursor, mock_redis):
+    """Without Redis, analytics serves the stored counts"""
+    today = date.today().isoformat()
+    mock_cursor.fetchone.return_value = {
+        "unique_views": 4,
+        "daily_metrics": [{"date": today, "unique_views_count": 4}],
+        "application_status": [],
+    }
+    mock_redis.pfcount.side_effect = RedisConnectionError("down")
 
-@patch('backend.core.db.get_db_connection')
-def test_get_posting_analytics_not_owner(mock_get_db):
-    """Test getting posting analytics for non-owner"""
-    mock_conn = MagicMock()
-    mock_cursor = MagicMock()
-    mock_get_db.return_value = mock_conn
-    mock_conn.__enter__.return_value = mock_conn
-    mock_conn.cursor.return_value = mock_cursor
-    mock_cursor.__enter__.return_value = mock_cursor
-    
-    # Mock posting not owned by user
-    mock_cursor.fetchone.return_value = {"user_id": 123}  # different user
-    
     result = db.get_posting_analytics(1, 42)
-    
-    assert result == {}
 
+    assert result["stats"] == {"unique_views": 4}
+    assert result["daily_metrics"] == [{"date": today, "unique_views_count": 4}]
 
-@patch('backend.core.db.get_db_connection')
-def test_get_posting_analytics_not_found(mock_get_db):
-    """Test getting analytics for non-existent posting"""
-    mock_conn = MagicMock()
-    mock_cursor = MagicMock()
-    mock_get_db.return_value = mock_conn
-    mock_conn.__enter__.return_value = mock_conn
-    mock_conn.cursor.return_value = mock_cursor
-    mock_cursor.__enter__.return_value = mock_cursor
-    
-    # Mock posting not found
+
+def test_get_posting_analytics_not_owner_or_not_found(patch_psycopg2_connect, mock_cursor):
+    """No row comes back unless the user owns the posting"""
     mock_cursor.fetchone.return_value = None
-    
-    result = db.get_posting_analytics(999, 42)
-    
-    assert result == {}
+
+    assert db.get_posting_analytics(999, 42) == {}
+    assert db.get_posting_analytics(999, 42, granularity="hourly") == {}
+    mock_cursor.execute.assert_called_with(queries.SELECT_POSTING_ANALYTICS, (999, 42))
+
+
+def test_get_posting_analytics_hourly(patch_psycopg2_connect, mock_cursor, mock_redis):
+    """Hourly granularity adds the last 48 hours from a second query"""
+    mock_redis.pfcount.return_value = 0
+    hourly = [{"hour": "2023-01-01T10:00:00", "views_count": 3}]
+    mock_cursor.fetchone.side_effect = [
+        {"views": 100, "daily_metrics": [], "application_status": []},
+        {"metrics": hourly},
+    ]
+
+    result = db.get_posting_analytics(1, 42, granularity="hourly")
+
+    assert mock_cursor.execute.call_args_list[1].args == (
+        queries.SELECT_POSTING_HOURLY_METRICS, (1, 1, 1)
+    )
+    assert result["hourly_metrics"] == hourly
 
 
 @patch('backend.core.db.get_db_connection')
@@ -339,6 +471,19 @@ def test_get_user_posting_stats(mock_get_db):
     assert "top_postings" in result
     assert "recent_activity" in result
     assert result["overview"]["total_postings"] == 5
+    assert "hourly_activity" not in result
+    mock_cursor.execute.assert_called_with(queries.SELECT_USER_RECENT_ACTIVITY, (42, 42, 42))
+
+
+def test_get_user_posting_stats_hourly(patch_psycopg2_connect, mock_cursor):
+    mock_cursor.fetchone.return_value = {"total_postings": 5}
+    hourly = [{"hour": "2023-01-01T10:00:00", "hourly_views": 4}]
+    mock_cursor.fetchall.side_effect = [[], [], hourly]
+
+    result = db.get_user_posting_stats(42, granularity="hourly")
+
+    mock_cursor.execute.assert_called_with(queries.SELECT_USER_HOURLY_ACTIVITY, (42, 42, 42))
+    assert result["hourly_activity"] == hourly
 
 
 @patch('backend.core.db.get_db_connection')
@@ -358,7 +503,8 @@ def test_get_posting_with_public_stats(mock_get_db):
         "views": 100,
         "application_count": 5,
         "creator_name": "John Doe",
-        "creator_username": "johndoe"
+        "creator_username": "johndoe",
+        "pending_views": 7
     }
     
     result = db.get_posting_with_public_stats(1)
@@ -366,6 +512,9 @@ def test_get_posting_with_public_stats(mock_get_db):
     assert result is not None
     assert result["title"] == "Test Job"
     assert result["application_count"] == 5
+    # Views since the rollup watermark are included
+    assert result["views"] == 107
+    assert "pending_views" not in result
 
 
 @patch('backend.core.db.get_db_connection')
@@ -497,7 +646,8 @@ def test_get_posting_with_public_stats_active(mock_get_db):
         "status": "active",
         "creator_name": "John Doe",
         "creator_username": "johndoe",
-        "application_count": 8
+        "application_count": 8,
+        "pending_views": 0
     }
     
     result = db.get_posting_with_public_stats(1)
@@ -573,7 +723,7 @@ def test_get_public_postings(mock_get_db):
 # New Enhanced Posting Management Tests
 
 @patch('backend.core.db.get_db_connection')
-@patch('backend.core.db.generate_unique_hash')
+@patch('backend.core.db.generate_posting_hash')
 def test_create_posting_returns_hash(mock_generate_hash, mock_get_db):
     """Test that create_posting_in_db returns hash instead of ID"""
     mock_conn = MagicMock()
@@ -648,7 +798,8 @@ def test_apply_to_posting_with_enhanced_fields(mock_get_db):
     # Mock posting exists and user hasn't applied
     mock_cursor.fetchone.side_effect = [
         {"id": 1, "user_id": 99},  # posting exists, owned by user 99
-        None  # user hasn't applied
+        None,  # user hasn't applied
+        {"id": 5},  # application inserted
     ]
     
     result = db.apply_to_posting(42, 1, "I'm very interested", "Dear hiring manager, I have 5 years experience...")
@@ -681,6 +832,28 @@ def test_apply_to_posting_already_applied_enhanced(mock_get_db):
     mock_conn.commit.assert_not_called()
 
 
+@patch('backend.core.db.get_db_connection')
+def test_apply_to_posting_lost_race(mock_get_db):
+    """A concurrent application lands between the check and the insert"""
+    mock_conn = MagicMock()
+    mock_cursor = MagicMock()
+    mock_get_db.return_value = mock_conn
+    mock_conn.__enter__.return_value = mock_conn
+    mock_conn.cursor.return_value = mock_cursor
+    mock_cursor.__enter__.return_value = mock_cursor
+    
+    mock_cursor.fetchone.side_effect = [
+        {"id": 1, "user_id": 99},  # posting exists, owned by user 99
+        None,  # not applied yet
+        None,  # insert skipped by ON CONFLICT
+    ]
+    
+    result = db.apply_to_posting(42, 1, "I'm interested", "Cover letter")
+    
+    assert result == {"success": False, "error": "already_applied"}
+    mock_conn.commit.assert_not_called()
+
+
 @patch('backend.core.db.get_db_connection')
 def test_apply_to_posting_own_posting_enhanced(mock_get_db):
     """Test user trying to apply to their own posting (enhanced return format)"""
@@ -721,32 +894,68 @@ def test_apply_to_posting_not_found_enhanced(mock_get_db):
     mock_conn.commit.assert_not_called()
 
 
-@patch('backend.core.db.get_db_connection')
-def test_generate_unique_hash(mock_get_db):
-    """Test hash generation creates unique strings"""
-    mock_conn = MagicMock()
-    mock_cursor = MagicMock()
-    mock_get_db.return_value = mock_conn
-    mock_conn.__enter__.return_value = mock_conn
-    mock_conn.cursor.return_value = mock_cursor
-    mock_cursor.__enter__.return_value = mock_cursor
-    
-    # Mock that hash doesn't exist in database
-    mock_cursor.fetchone.return_value = None
-    
-    hash1 = db.generate_unique_hash()
-    hash2 = db.generate_unique_hash()
-    
-    assert isinstance(hash1, str)
-    assert isinstance(hash2, str)
-    assert len(hash1) == 12  # Default length is 12
-    assert len(hash2) == 12
-    assert hash1 != hash2  # Should be unique
+@pytest.mark.parametrize("marker_set,expected", [(True, True), (None, False)])
+def test_track_posting_view_unique_from_redis(patch_psycopg2_connect, mock_cursor, mock_redis, marker_set, expected):
+    pipe = mock_redis.pipeline.return_value
+    pipe.execute.return_value = [marker_set, 1, True, 1, True]
+
+    assert db.track_posting_view(1, session_id="session123") is expected
+
+    # Keyed and counted by the session's hash, never the token itself
+    viewer = f"session:{session_hash('session123')}"
+    pipe.set.assert_called_once_with(f"unique_view:1:{viewer}", 1, nx=True, ex=86400)
+    assert pipe.pfadd.call_args.args[1] == viewer
+    # Only the view is appended; the rollup worker counts it
+    mock_cursor.execute.assert_called_once()
+    assert mock_cursor.execute.call_args_list[0].args[1][-1] is expected
+
+
+def test_record_posting_views_one_statement(patch_psycopg2_connect, mock_conn, mock_cursor):
+    views = [
+        (1, 42, "10.0.0.1", "Browser", None, "t1", True),
+        (2, None, None, None, 77, "t2", None),
+        (3, None, None, "Browser", None, "t3", True),
+    ]
+    mock_cursor.fetchall.return_value = [{"id": 5, "user_agent": "Browser"}]
+
+    db.record_posting_views(views)
+
+    assert [c.args for c in mock_cursor.execute.call_args_list] == [
+        (queries.UPSERT_USER_AGENTS, (["Browser"],)),
+        (
+            queries.INSERT_POSTING_VIEWS_BATCH,
+            [[1, 2, 3], [42, None, None], ["10.0.0.1", None, None], [5, None, 5], [None, 77, None], ["t1", "t2", "t3"], [True, None, True]],
+        ),
+    ]
+    # The new user agent is committed before the batch
+    assert mock_conn.commit.call_count == 2
+
+    # Known user agents are served from the cache
+    mock_cursor.execute.reset_mock()
+    db.record_posting_views(views[:1])
+    mock_cursor.execute.assert_called_once()
+
+
+def test_user_agents_added_concurrently_are_looked_up_again(patch_psycopg2_connect, mock_cursor):
+    long_agent = "A" * USER_AGENT_MAX_LENGTH
+    # "B" is added by another replica between the lookup and the insert
+    mock_cursor.fetchall.side_effect = [[{"id": 1, "user_agent": long_agent}], [{"id": 2, "user_agent": "B"}]]
+
+    db.record_posting_views([(1, None, None, "B", None, "t1", True), (1, None, None, "A" * 600, None, "t2", True)])
+
+    upserts = [c.args[1] for c in mock_cursor.execute.call_args_list if c.args[0] == queries.UPSERT_USER_AGENTS]
+    assert upserts == [([long_agent, "B"],), (["B"],)]
+    assert mock_cursor.execute.call_args.args[1][3] == [2, 1]
+
+
+def test_record_posting_views_empty(patch_psycopg2_connect):
+    db.record_posting_views([])
+    patch_psycopg2_connect.assert_not_called()
 
 
 @patch('backend.core.db.get_db_connection')
 @patch('backend.core.db.datetime')
-def test_track_posting_view_anonymous_user(mock_datetime, mock_get_db):
+def test_track_posting_view_anonymous_user(mock_datetime, mock_get_db, mock_redis):
     """Test tracking view for anonymous user by IP"""
     mock_conn = MagicMock()
     mock_cursor = MagicMock()
@@ -756,7 +965,8 @@ def test_track_posting_view_anonymous_user(mock_datetime, mock_get_db):
     mock_cursor.__enter__.return_value = mock_cursor
     
     # Mock datetime for metrics
-    mock_datetime.now.return_value.date.return_value = "2023-01-01"
+    mock_datetime.now.return_value.date.return_value = date(2023, 1, 1)
+    mock_cursor.fetchall.return_value = [{"id": 3, "user_agent": "Browser"}]
     
     result = db.track_posting_view(1, user_id=None, ip_address="192.168.1.1", user_agent="Browser")
     
@@ -767,10 +977,10 @@ def test_track_posting_view_anonymous_user(mock_datetime, mock_get_db):
                    if call[0][0].strip().startswith('INSERT INTO posting_views')]
     assert len(insert_calls) > 0
     
-    # Check that posting views count was updated
-    update_calls = [call for call in mock_cursor.execute.call_args_list 
-                   if 'UPDATE postings SET views' in call[0][0]]
-    assert len(update_calls) > 0
+    # Counters are left to the rollup worker; the other statement resolves
+    # the user agent
+    assert len(mock_cursor.execute.call_args_list) == len(insert_calls) + 1
+    assert mock_cursor.execute.call_args_list[0].args == (queries.UPSERT_USER_AGENTS, (["Browser"],))
 
 @patch('backend.core.db.get_db_connection')
 def test_get_application_details_with_enhanced_fields(mock_get_db):
@@ -918,8 +1128,10 @@ def test_view_tracking_with_session_data(mock_get_db):
             insert_call = call
             break
     
+    # Recorded as a hash; the token itself is not stored
     assert insert_call is not None
-    assert "session123" in str(insert_call)
+    assert session_hash("session123") in insert_call.args[1]
+    assert "session123" not in str(insert_call)
 
 
 @patch('backend.core.db.get_db_connection')
@@ -1,9 +1,9 @@
 import os
 import sys
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.testclient import TestClient
 
 # backend/ uses bare module names ('from core.* import ...'), so add it to path
@@ -12,6 +12,9 @@ if _BACKEND not in sys.path:
     sys.path.insert(0, _BACKEND)
 
 import api.endpoints as ep  # noqa: E402
+from api.dependencies import CurrentSession, get_current_session  # noqa: E402
+from core.executor import ExecutorOverloadedError  # noqa: E402
+from core.rate_limit import RateLimitExceededError, _key, check_rate_limit  # noqa: E402
 
 _app = FastAPI()
 _app.include_router(ep.router)
@@ -51,15 +54,21 @@ def client():
     return TestClient(_app, raise_server_exceptions=True)
 
 
+@pytest.fixture(autouse=True)
+def rate_limit():
+    with patch("api.endpoints.check_rate_limit") as mock_check:
+        yield mock_check
+
+
 @pytest.fixture
 def no_session():
-    with patch("api.endpoints.get_session_user", return_value=None):
+    with patch("api.dependencies.get_session_user", return_value=None):
         yield
 
 
 @pytest.fixture
 def with_session():
-    with patch("api.endpoints.get_session_user", return_value=MOCK_SESSION):
+    with patch("api.dependencies.get_session_user", return_value=MOCK_SESSION):
         yield
 
 
@@ -126,7 +135,7 @@ def test_navigation_authenticated(client, with_session):
 
 def test_login_success(client):
     mock_result = {"session_token": "tok123"}
-    with patch("api.endpoints.get_session_user", return_value=None), \
+    with patch("api.dependencies.get_session_user", return_value=None), \
          patch("api.endpoints.login_user", return_value=mock_result):
         r = client.post(
             "/api/login",
@@ -139,7 +148,7 @@ def test_login_success(client):
 
 
 def test_login_invalid_credentials(client):
-    with patch("api.endpoints.get_session_user", return_value=None), \
+    with patch("api.dependencies.get_session_user", return_value=None), \
          patch("api.endpoints.login_user", return_value=None):
         r = client.post(
             "/api/login",
@@ -161,6 +170,33 @@ def test_login_already_authenticated(client, with_session):
     assert r.headers["location"] == "/data-view.html"
 
 
+def test_login_overloaded_returns_503(client):
+    with patch("api.dependencies.get_session_user", return_value=None), \
+         patch("api.endpoints.login_user",
+               side_effect=ExecutorOverloadedError("passwords.verify")):
+        r = client.post(
+            "/api/login",
+            data={"email": "user@example.com", "password": "secret"},
+            follow_redirects=False,
+        )
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "1"
+
+
+def test_login_rate_limited_before_bcrypt(client, rate_limit):
+    rate_limit.side_effect = RateLimitExceededError("login", 30)
+    with patch("api.endpoints.login_user") as mock_login:
+        r = client.post(
+            "/api/login",
+            data={"email": "user@example.com", "password": "secret"},
+            follow_redirects=False,
+        )
+    assert r.status_code == 429
+    assert r.headers["retry-after"] == "30"
+    rate_limit.assert_awaited_once_with("login", ip="testclient", email="user@example.com")
+    mock_login.assert_not_called()
+
+
 def test_logout(client, with_session):
     with patch("api.endpoints.logout_user") as mock_logout:
         r = client.post(
@@ -173,10 +209,38 @@ def test_logout(client, with_session):
     mock_logout.assert_called_once_with("tok")
 
 
+def test_logout_everywhere(client, with_session):
+    with patch("api.endpoints.logout_all_sessions", return_value=3) as mock_logout_all:
+        r = client.post(
+            "/api/logout/all",
+            cookies={"session_token": "tok"},
+            follow_redirects=False,
+        )
+    assert r.status_code == 303
+    assert 'session_token=""' in r.headers["set-cookie"]
+    mock_logout_all.assert_awaited_once_with(1)
+
+
+def test_logout_everywhere_requires_session(client, no_session):
+    with patch("api.endpoints.logout_all_sessions") as mock_logout_all:
+        r = client.post("/api/logout/all")
+    assert r.status_code == 401
+    mock_logout_all.assert_not_called()
+
+
+def test_list_my_sessions(client, with_session):
+    sessions = [{"id": "abc", "current": True}]
+    with patch("api.endpoints.list_sessions", return_value=sessions) as mock_list:
+        r = client.get("/api/sessions", cookies={"session_token": "tok"})
+    assert r.status_code == 200
+    assert r.json() == {"sessions": sessions}
+    mock_list.assert_awaited_once_with(1, "tok")
+
+
 # ── Users ────────────────────────────────────────────────────────────────────
 
 def test_get_user_from_cache(client):
-    mock_redis = MagicMock()
+    mock_redis = AsyncMock()
     mock_redis.get.return_value = '{"id": 1, "name": "Test", "email": "t@t.com"}'
     with patch("api.endpoints.get_redis_client", return_value=mock_redis):
         r = client.get("/api/users/1")
@@ -185,7 +249,7 @@ def test_get_user_from_cache(client):
 
 
 def test_get_user_from_db(client):
-    mock_redis = MagicMock()
+    mock_redis = AsyncMock()
     mock_redis.get.return_value = None
     with patch("api.endpoints.get_redis_client", return_value=mock_redis), \
          patch("api.endpoints.get_user_by_id", return_value=MOCK_USER):
@@ -195,7 +259,7 @@ def test_get_user_from_db(client):
 
 
 def test_get_user_not_found(client):
-    mock_redis = MagicMock()
+    mock_redis = AsyncMock()
     mock_redis.get.return_value = None
     with patch("api.endpoints.get_redis_client", return_value=mock_redis), \
          patch("api.endpoints.get_user_by_id", return_value=None):
@@ -217,23 +281,27 @@ def test_update_user_not_found(client):
 
 
 def test_delete_user_success(client):
-    with patch("api.endpoints.delete_user_from_db", return_value=True):
+    with patch("api.endpoints.delete_user_from_db", return_value=True), \
+         patch("api.endpoints.logout_all_sessions") as mock_logout_all:
         r = client.delete("/api/users/1")
     assert r.status_code == 200
     assert r.json()["message"] == "User deleted successfully"
+    mock_logout_all.assert_awaited_once_with(1)
 
 
 def test_delete_user_not_found(client):
-    with patch("api.endpoints.delete_user_from_db", return_value=False):
+    with patch("api.endpoints.delete_user_from_db", return_value=False), \
+         patch("api.endpoints.logout_all_sessions") as mock_logout_all:
         r = client.delete("/api/users/999")
     assert r.status_code == 404
+    mock_logout_all.assert_not_called()
 
 
 def test_create_user_success(client):
-    mock_redis = MagicMock()
-    with patch("api.endpoints.get_user_by_email", return_value=None), \
-         patch("api.endpoints.get_user_by_username", return_value=None), \
-         patch("api.endpoints.create_user", return_value=42), \
+    mock_redis = AsyncMock()
+    with patch("api.endpoints.find_registration_conflict", return_value=None) as mock_check, \
+         patch("api.endpoints.register_user",
+               return_value={"success": True, "user_id": 42}) as mock_register, \
          patch("api.endpoints.hash_password", return_value="hashed"), \
          patch("api.endpoints.get_redis_client", return_value=mock_redis):
         r = client.post(
@@ -246,10 +314,79 @@ def test_create_user_success(client):
         )
     assert r.status_code == 303
     assert "account_created" in r.headers["location"]
+    mock_check.assert_awaited_once_with("new@example.com", "newuser")
+    mock_register.assert_awaited_once_with(
+        "New", "User", "newuser", "new@example.com", hashed_password="hashed"
+    )
+    assert mock_redis.set.await_args.args[0] == "user:42"
+
+
+def test_create_user_rate_limited(client, rate_limit):
+    rate_limit.side_effect = RateLimitExceededError("register", 600)
+    with patch("api.endpoints.find_registration_conflict") as mock_get, \
+         patch("api.endpoints.hash_password") as mock_hash:
+        r = client.post(
+            "/api/users",
+            data={
+                "name": "New", "surname": "User", "username": "newuser",
+                "email": "new@example.com", "password": "pass",
+            },
+            follow_redirects=False,
+        )
+    assert r.status_code == 429
+    rate_limit.assert_awaited_once_with(
+        "register", ip="testclient", email="new@example.com", username="newuser"
+    )
+    mock_get.assert_not_called()
+    mock_hash.assert_not_called()
+
+
+def test_user_availability(client, rate_limit):
+    with patch(
+        "api.endpoints.check_user_availability",
+        return_value={"username": True, "email": False},
+    ) as mock_check:
+        r = client.get("/api/users/availability?username=newuser&email=a@b.com")
+    assert r.status_code == 200
+    assert r.json() == {"username": True, "email": False}
+    mock_check.assert_awaited_once_with(username="newuser", email="a@b.com")
+    rate_limit.assert_awaited_once_with("availability", ip="testclient")
+
+
+def test_clients_behind_one_proxy_get_separate_rate_limits(rate_limit):
+    rate_limit.side_effect = check_rate_limit
+    # nginx and the ingress connect from the cluster network
+    proxied = TestClient(_app, client=("10.0.0.2", 50000))
+    script = AsyncMock(return_value=0)
+    mock_redis = MagicMock()
+    mock_redis.register_script.return_value = script
+
+    with patch("core.rate_limit.get_redis_client", return_value=mock_redis), \
+         patch("api.endpoints.check_user_availability", return_value={"username": True}):
+        for client_address in ("203.0.113.5", "198.51.100.7"):
+            r = proxied.get(
+                "/api/users/availability?username=newuser",
+                headers={"X-Forwarded-For": f"{client_address}, 10.0.0.9"},
+            )
+            assert r.status_code == 200
+
+    assert [call.kwargs["keys"] for call in script.await_args_list] == [
+        [_key("availability", "ip", "203.0.113.5")],
+        [_key("availability", "ip", "198.51.100.7")],
+    ]
+
+
+def test_user_availability_requires_a_value(client, rate_limit):
+    with patch("api.endpoints.check_user_availability") as mock_check:
+        r = client.get("/api/users/availability")
+    assert r.status_code == 400
+    mock_check.assert_not_called()
+    rate_limit.assert_not_called()
 
 
 def test_create_user_email_taken(client):
-    with patch("api.endpoints.get_user_by_email", return_value=MOCK_USER):
+    with patch("api.endpoints.find_registration_conflict", return_value="email_taken"), \
+         patch("api.endpoints.hash_password") as mock_hash:
         r = client.post(
             "/api/users",
             data={
@@ -260,11 +397,12 @@ def test_create_user_email_taken(client):
         )
     assert r.status_code == 303
     assert "email_taken" in r.headers["location"]
+    # Taken names never pay for bcrypt
+    mock_hash.assert_not_called()
 
 
 def test_create_user_username_taken(client):
-    with patch("api.endpoints.get_user_by_email", return_value=None), \
-         patch("api.endpoints.get_user_by_username", return_value=MOCK_USER):
+    with patch("api.endpoints.find_registration_conflict", return_value="username_taken"):
         r = client.post(
             "/api/users",
             data={
@@ -277,6 +415,25 @@ def test_create_user_username_taken(client):
     assert "username_taken" in r.headers["location"]
 
 
+def test_create_user_lost_race_reports_conflicting_field(client):
+    with patch("api.endpoints.find_registration_conflict", return_value=None), \
+         patch("api.endpoints.hash_password", return_value="hashed"), \
+         patch("api.endpoints.register_user",
+               return_value={"success": False, "error": "username_taken"}), \
+         patch("api.endpoints.get_redis_client") as mock_redis:
+        r = client.post(
+            "/api/users",
+            data={
+                "name": "X", "surname": "Y", "username": "taken",
+                "email": "x@example.com", "password": "pass",
+            },
+            follow_redirects=False,
+        )
+    assert r.status_code == 303
+    assert r.headers["location"] == "/register.html?error=username_taken"
+    mock_redis.assert_not_called()
+
+
 def test_create_user_username_equals_email(client):
     r = client.post(
         "/api/users",
@@ -426,6 +583,22 @@ def test_dashboard_stats_authenticated(client, with_session):
     assert r.json()["total_postings"] == 3
 
 
+def test_dashboard_stats_hourly(client, with_session):
+    with patch("api.endpoints.get_user_posting_stats", return_value={}) as stats:
+        r = client.get(
+            "/api/dashboard/stats?granularity=hourly", cookies={"session_token": "tok"}
+        )
+    assert r.status_code == 200
+    stats.assert_called_once_with(1, "hourly")
+
+
+def test_dashboard_stats_invalid_granularity(client, with_session):
+    r = client.get(
+        "/api/dashboard/stats?granularity=minutely", cookies={"session_token": "tok"}
+    )
+    assert r.status_code == 422
+
+
 def test_profile_data_unauthenticated(client, no_session):
     r = client.get("/api/profile/data")
     assert r.status_code == 401
@@ -474,6 +647,20 @@ def test_apply_success(client, with_session):
     assert "application_submitted" in r.headers["location"]
 
 
+def test_apply_rate_limited(client, with_session, rate_limit):
+    rate_limit.side_effect = RateLimitExceededError("apply", 5)
+    with patch("api.endpoints.apply_to_posting") as mock_apply:
+        r = client.post(
+            "/api/applications",
+            data={"posting_id": "1", "message": "Interested"},
+            cookies={"session_token": "tok"},
+            follow_redirects=False,
+        )
+    assert r.status_code == 429
+    rate_limit.assert_awaited_once_with("apply", ip="testclient", user=1)
+    mock_apply.assert_not_called()
+
+
 def test_apply_already_applied(client, with_session):
     apply_result = {"success": False, "error": "already_applied"}
     with patch("api.endpoints.apply_to_posting", return_value=apply_result), \
@@ -759,10 +946,9 @@ def test_get_applications_by_posting(client):
 # ── create_user server error ─────────────────────────────────────────────────
 
 def test_create_user_server_error(client):
-    with patch("api.endpoints.get_user_by_email", return_value=None), \
-         patch("api.endpoints.get_user_by_username", return_value=None), \
+    with patch("api.endpoints.find_registration_conflict", return_value=None), \
          patch("api.endpoints.hash_password", return_value="hashed"), \
-         patch("api.endpoints.create_user", side_effect=RuntimeError("db error")):
+         patch("api.endpoints.register_user", side_effect=RuntimeError("db error")):
         r = client.post(
             "/api/users",
             data={"name": "X", "surname": "Y", "username": "u",
@@ -775,10 +961,9 @@ def test_create_user_server_error(client):
 
 def test_create_user_http_exception_propagates(client):
     from fastapi import HTTPException as FastAPIHTTPException
-    with patch("api.endpoints.get_user_by_email", return_value=None), \
-         patch("api.endpoints.get_user_by_username", return_value=None), \
+    with patch("api.endpoints.find_registration_conflict", return_value=None), \
          patch("api.endpoints.hash_password", return_value="hashed"), \
-         patch("api.endpoints.create_user",
+         patch("api.endpoints.register_user",
                side_effect=FastAPIHTTPException(status_code=409, detail="conflict")):
         r = client.post(
             "/api/users",
@@ -851,6 +1036,19 @@ def test_analytics_success(client, with_session):
     assert r.json()["views"] == 10
 
 
+def test_analytics_hourly(client, with_session):
+    analytics = {"views": 10, "hourly_metrics": []}
+    with patch(
+        "api.endpoints.get_posting_analytics", return_value=analytics
+    ) as get_analytics:
+        r = client.get(
+            "/api/postings/1/analytics?granularity=hourly",
+            cookies={"session_token": "tok"},
+        )
+    assert r.status_code == 200
+    get_analytics.assert_called_once_with(1, 1, "hourly")
+
+
 # ── view_posting (/api/postings/view/{hash}) ─────────────────────────────────
 
 def test_view_posting_by_hash_unauthenticated(client, no_session):
@@ -1038,7 +1236,7 @@ def test_contact_form(client):
 # ── login exception ──────────────────────────────────────────────────────────
 
 def test_login_server_error(client):
-    with patch("api.endpoints.get_session_user", return_value=None), \
+    with patch("api.dependencies.get_session_user", return_value=None), \
          patch("api.endpoints.login_user", side_effect=RuntimeError("db error")):
         r = client.post(
             "/api/login",
@@ -1051,7 +1249,7 @@ def test_login_server_error(client):
 
 def test_login_http_exception_propagates(client):
     from fastapi import HTTPException as FastAPIHTTPException
-    with patch("api.endpoints.get_session_user", return_value=None), \
+    with patch("api.dependencies.get_session_user", return_value=None), \
          patch("api.endpoints.login_user",
                side_effect=FastAPIHTTPException(status_code=429, detail="rate limited")):
         r = client.post(
@@ -1062,10 +1260,57 @@ def test_login_http_exception_propagates(client):
     assert r.status_code == 429
 
 
+# ── dependencies.py ──────────────────────────────────────────────────────────
+
+_session_app = FastAPI()
+
+
+@_session_app.get("/session-twice")
+async def _session_twice(request: Request, session: CurrentSession):
+    again = await get_current_session(request)
+    return {"same": again is session, "session": session}
+
+
+def test_current_session_resolved_once_per_request():
+    with patch("api.dependencies.get_session_user",
+               new=AsyncMock(return_value=MOCK_SESSION)) as lookup:
+        r = TestClient(_session_app).get("/session-twice", cookies={"session_token": "tok"})
+    assert r.json() == {"same": True, "session": MOCK_SESSION}
+    lookup.assert_awaited_once_with("tok")
+
+
+def test_current_session_without_cookie_skips_lookup():
+    with patch("api.dependencies.get_session_user", new=AsyncMock()) as lookup:
+        r = TestClient(_session_app).get("/session-twice")
+    assert r.json() == {"same": True, "session": None}
+    lookup.assert_not_awaited()
+
+
 # ── cache.py ─────────────────────────────────────────────────────────────────
 
 def test_get_redis_client():
-    from core.cache import get_redis_client
-    with patch("core.cache.redis.Redis") as mock_redis_cls:
-        get_redis_client()
+    from core import cache
+    with patch.object(cache, "_client", None), \
+         patch("core.cache.redis.Redis") as mock_redis_cls:
+        first = cache.get_redis_client()
+        second = cache.get_redis_client()
         mock_redis_cls.assert_called_once()
+        assert first is second
+
+
+def test_redis_pool_stats_and_close():
+    from core import cache
+    with patch.object(cache, "_client", None):
+        assert cache._pool_stats() == {}
+        client = cache.init_redis_client()
+        pool = client.connection_pool
+        assert pool.max_connections == cache.REDIS_POOL_CONFIG["max_connections"]
+        assert cache._pool_stats() == {"in_use": 0, "idle": 0}
+
+        pool._in_use_connections.add(MagicMock())
+        pool._available_connections.extend([MagicMock(), MagicMock()])
+        assert cache._pool_stats() == {"in_use": 1, "idle": 2}
+
+        cache.close_redis_client()
+        assert cache._client is None
+        cache.close_redis_client()
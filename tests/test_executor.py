@@ -0,0 +1,98 @@
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.core.executor import BoundedExecutor, ExecutorOverloadedError
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def pool():
+    bounded = BoundedExecutor(max_workers=1, max_backlog=1)
+    yield bounded
+    bounded.shutdown()
+
+
+def test_executor_invalid_sizes():
+    with pytest.raises(ValueError):
+        BoundedExecutor(max_workers=0)
+
+
+def test_run_returns_result_off_the_loop_thread(pool):
+    fn = MagicMock(side_effect=lambda x, y=0: (threading.current_thread().name, x + y))
+
+    thread_name, result = run(pool.run("test.add", fn, 1, y=2))
+
+    assert result == 3
+    assert thread_name.startswith("blocking")
+    assert pool.stats() == {"running": 0, "queued": 0}
+
+
+def test_run_propagates_exceptions(pool):
+    fn = MagicMock(side_effect=RuntimeError("redis down"))
+
+    with pytest.raises(RuntimeError):
+        run(pool.run("test.fail", fn))
+
+    assert pool.stats() == {"running": 0, "queued": 0}
+
+
+def test_run_records_metrics(pool):
+    with patch("backend.core.executor.record_executor_queue_change") as queue, \
+         patch("backend.core.executor.record_executor_wait") as wait, \
+         patch("backend.core.executor.record_executor_run") as ran:
+        run(pool.run("test.noop", lambda: None))
+
+    assert [c.args for c in queue.call_args_list] == [("test.noop", 1), ("test.noop", -1)]
+    assert wait.call_args.args[0] == "test.noop"
+    assert ran.call_args.args[0] == "test.noop"
+
+
+def test_run_rejects_when_backlog_full(pool):
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(pool.run("test.block", release.wait))
+        queued = asyncio.ensure_future(pool.run("test.block", release.wait))
+        await asyncio.sleep(0.05)
+        assert pool.stats() == {"running": 1, "queued": 1}
+
+        with patch("backend.core.executor.record_executor_rejection") as rejected, \
+             pytest.raises(ExecutorOverloadedError) as exc_info:
+            await pool.run("test.shed", release.wait)
+
+        rejected.assert_called_once_with("test.shed")
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.headers == {"Retry-After": "1"}
+
+        release.set()
+        await asyncio.gather(running, queued)
+
+    run(scenario())
+    assert pool.stats() == {"running": 0, "queued": 0}
+
+
+def test_cancelled_queued_call_frees_backlog_slot(pool):
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(pool.run("test.block", release.wait))
+        queued = asyncio.ensure_future(pool.run("test.block", release.wait))
+        await asyncio.sleep(0.05)
+
+        with patch("backend.core.executor.record_executor_queue_change") as queue:
+            queued.cancel()
+            await asyncio.sleep(0.05)
+
+        queue.assert_called_once_with("test.block", -1)
+        assert pool.stats() == {"running": 1, "queued": 0}
+        release.set()
+        await running
+
+    run(scenario())
+
@@ -0,0 +1,570 @@
+import os
+import sys
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import psycopg2.errors
+import pytest
+
+from backend.core import queries
+from backend.core.migrations import (
+    MIGRATION_LOCK_ID,
+    Migration,
+    apply_migrations,
+    load_migrations,
+    migration_status,
+)
+from backend.core.view_encoding import USER_AGENT_MAX_LENGTH, session_hash
+
+# The schema the k8s init script used to create, before migrations existed
+LEGACY_K8S_SCHEMA = """
+    CREATE TABLE users (
+        id SERIAL PRIMARY KEY,
+        name TEXT NOT NULL,
+        surname TEXT NOT NULL,
+        username TEXT NOT NULL UNIQUE,
+        email TEXT NOT NULL UNIQUE,
+        user_type TEXT NOT NULL,
+        hashed_password TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT NOW()
+    );
+    CREATE TABLE postings (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+        title TEXT NOT NULL,
+        post_description TEXT NOT NULL,
+        category TEXT NOT NULL,
+        views INT NOT NULL DEFAULT 0,
+        created_at TIMESTAMP DEFAULT NOW(),
+        updated_at TIMESTAMP,
+        status VARCHAR(50) DEFAULT 'active'
+    );
+    CREATE TABLE applications (
+        id SERIAL PRIMARY KEY,
+        user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+        posting_id INTEGER REFERENCES postings(id) ON DELETE CASCADE,
+        message TEXT,
+        applied_at TIMESTAMP DEFAULT NOW(),
+        status VARCHAR(50) DEFAULT 'pending'
+    );
+"""
+
+
+def _write(directory, name, sql="SELECT 1;"):
+    path = directory / name
+    path.write_text(sql)
+    return path
+
+
+def test_load_migrations_orders_by_version(tmp_path):
+    _write(tmp_path, "0002_second.sql")
+    _write(tmp_path, "0001_first.sql")
+
+    assert [(m.version, m.name) for m in load_migrations(tmp_path)] == [
+        (1, "first"),
+        (2, "second"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "names", [["1_bad.sql"], ["0001_first.sql", "0001_again.sql"]]
+)
+def test_load_migrations_rejects_bad_files(tmp_path, names):
+    for name in names:
+        _write(tmp_path, name)
+    with pytest.raises(ValueError):
+        load_migrations(tmp_path)
+
+
+def test_shipped_migrations_are_contiguous():
+    versions = [m.version for m in load_migrations()]
+    assert versions == list(range(1, len(versions) + 1))
+
+
+def _mock_conn(applied_versions):
+    conn = MagicMock()
+    cursor = conn.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = [
+        {"version": v, "applied_at": datetime(2024, 1, 1)} for v in applied_versions
+    ]
+    return conn, cursor
+
+
+def test_apply_migrations_runs_pending_up_to_target(tmp_path):
+    migrations = [
+        Migration(v, f"m{v}", _write(tmp_path, f"000{v}_m{v}.sql", f"-- {v}"))
+        for v in (1, 2, 3)
+    ]
+    conn, cursor = _mock_conn([1])
+
+    applied = apply_migrations(conn, migrations, target=2)
+
+    assert applied == [migrations[1]]
+    executed = [c.args for c in cursor.execute.call_args_list]
+    assert executed[0] == ("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+    assert ("-- 2",) in executed and ("-- 3",) not in executed
+    assert executed[-1] == ("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+
+
+def test_apply_migrations_rolls_back_failed_migration(tmp_path):
+    migration = Migration(1, "broken", _write(tmp_path, "0001_broken.sql", "BROKEN"))
+    conn, cursor = _mock_conn([])
+
+    def execute(sql, *args):
+        if sql == "BROKEN":
+            raise RuntimeError("syntax error")
+
+    cursor.execute.side_effect = execute
+
+    with pytest.raises(RuntimeError):
+        apply_migrations(conn, [migration])
+
+    conn.rollback.assert_called_once()
+    assert cursor.execute.call_args.args[0] == "SELECT pg_advisory_unlock(%s)"
+
+
+def test_apply_migrations_defaults_to_shipped_migrations():
+    conn, _ = _mock_conn([m.version for m in load_migrations()])
+
+    assert apply_migrations(conn) == []
+
+
+def test_migration_status_marks_pending():
+    conn, _ = _mock_conn([1])
+
+    status = migration_status(conn)
+
+    assert status[0]["applied_at"] == datetime(2024, 1, 1)
+    assert all(row["applied_at"] is None for row in status[1:])
+
+
+# Against Postgres (pg_conn: a scratch schema, see conftest)
+
+
+def _migration(version: int) -> Migration:
+    return next(m for m in load_migrations() if m.version == version)
+
+
+def _columns(conn, table: str) -> set:
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT column_name FROM information_schema.columns"
+            " WHERE table_schema = current_schema() AND table_name = %s",
+            (table,),
+        )
+        return {row["column_name"] for row in cursor.fetchall()}
+
+
+def _indexes(conn) -> dict:
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes"
+            " WHERE schemaname = current_schema()"
+        )
+        return {row["indexname"]: row["indexdef"] for row in cursor.fetchall()}
+
+
+def test_0001_creates_schema_on_empty_database(pg_conn):
+    apply_migrations(pg_conn, [_migration(1)])
+
+    assert "hash" in _columns(pg_conn, "postings")
+    assert {"cover_letter", "reviewed_at", "reviewer_notes"} <= _columns(
+        pg_conn, "applications"
+    )
+    assert _columns(pg_conn, "posting_views")
+    assert _columns(pg_conn, "posting_metrics")
+
+
+def test_0001_upgrades_legacy_k8s_schema(pg_conn):
+    with pg_conn.cursor() as cursor:
+        cursor.execute(LEGACY_K8S_SCHEMA)
+    pg_conn.commit()
+
+    apply_migrations(pg_conn, [_migration(1)])
+
+    assert "hash" in _columns(pg_conn, "postings")
+    assert "reviewer_notes" in _columns(pg_conn, "applications")
+    assert _columns(pg_conn, "posting_views")
+
+
+def test_0002_adds_hot_path_indexes(pg_conn):
+    apply_migrations(pg_conn, [_migration(1)])
+    with pg_conn.cursor() as cursor:
+        # An index from the old init.sql, now redundant
+        cursor.execute("CREATE INDEX idx_applications_user_id ON applications(user_id)")
+        cursor.execute(
+            "INSERT INTO users (name, surname, username, email, user_type, hashed_password)"
+            " VALUES ('a', 'b', 'u', 'e@x', 'regular', 'x') RETURNING id"
+        )
+        user_id = cursor.fetchone()["id"]
+        cursor.execute(
+            "INSERT INTO postings (user_id, title, post_description, category)"
+            " VALUES (%s, 't', 'd', 'c') RETURNING id",
+            (user_id,),
+        )
+        posting_id = cursor.fetchone()["id"]
+        cursor.execute(
+            "INSERT INTO applications (user_id, posting_id, message)"
+            " VALUES (%s, %s, 'first'), (%s, %s, 'duplicate')",
+            (user_id, posting_id, user_id, posting_id),
+        )
+    pg_conn.commit()
+
+    apply_migrations(pg_conn, [_migration(2)])
+
+    indexes = _indexes(pg_conn)
+    assert "(posting_id, user_id, viewed_at)" in indexes[
+        "idx_posting_views_posting_user_viewed"
+    ]
+    assert "(posting_id, session_id, viewed_at)" in indexes[
+        "idx_posting_views_posting_session_viewed"
+    ]
+    assert "(user_id, created_at)" in indexes["idx_postings_user_created"]
+    assert "WHERE" in indexes["idx_postings_open_created"]
+    assert "UNIQUE" in indexes["idx_applications_user_posting"]
+    assert "idx_applications_user_id" not in indexes
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT message FROM applications")
+        assert [row["message"] for row in cursor.fetchall()] == ["first"]
+        with pytest.raises(psycopg2.errors.UniqueViolation):
+            cursor.execute(
+                "INSERT INTO applications (user_id, posting_id) VALUES (%s, %s)",
+                (user_id, posting_id),
+            )
+
+
+
+def test_insert_application_skips_a_concurrent_duplicate(pg_conn):
+    apply_migrations(pg_conn, [_migration(1), _migration(2)])
+    with pg_conn.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO users (name, surname, username, email, user_type, hashed_password)"
+            " VALUES ('a', 'b', 'u', 'e@x', 'regular', 'x') RETURNING id"
+        )
+        user_id = cursor.fetchone()["id"]
+        cursor.execute(
+            "INSERT INTO postings (user_id, title, post_description, category)"
+            " VALUES (%s, 't', 'd', 'c') RETURNING id",
+            (user_id,),
+        )
+        posting_id = cursor.fetchone()["id"]
+
+        params = (user_id, posting_id, "msg", "cover")
+        cursor.execute(queries.INSERT_APPLICATION, params)
+        assert cursor.fetchone()["id"]
+        cursor.execute(queries.INSERT_APPLICATION, params)
+        assert cursor.fetchone() is None
+
+
+COUNTERS = """
+    SELECT application_count, applications_pending, applications_reviewed,
+           applications_accepted, applications_rejected
+    FROM postings WHERE id = %s
+"""
+
+
+def _counters(cursor, posting_id: int) -> tuple:
+    cursor.execute(COUNTERS, (posting_id,))
+    return tuple(cursor.fetchone().values())
+
+
+def test_0003_application_counters_stay_exact(pg_conn):
+    apply_migrations(pg_conn, load_migrations()[:2])
+    with pg_conn.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO users (name, surname, username, email, user_type, hashed_password)"
+            " SELECT 'a', 'b', 'u' || i, 'e' || i || '@x', 'regular', 'x'"
+            " FROM generate_series(1, 4) AS i RETURNING id"
+        )
+        owner, first, second, third = [row["id"] for row in cursor.fetchall()]
+        cursor.execute(
+            "INSERT INTO postings (user_id, title, post_description, category)"
+            " VALUES (%s, 't', 'd', 'c'), (%s, 't2', 'd', 'c') RETURNING id",
+            (owner, owner),
+        )
+        posting, other = [row["id"] for row in cursor.fetchall()]
+        cursor.execute(
+            "INSERT INTO applications (user_id, posting_id, status)"
+            " VALUES (%s, %s, 'pending'), (%s, %s, 'accepted')",
+            (first, posting, second, posting),
+        )
+    pg_conn.commit()
+
+    apply_migrations(pg_conn, [_migration(3)])
+
+    with pg_conn.cursor() as cursor:
+        # Backfilled from existing applications
+        assert _counters(cursor, posting) == (2, 1, 0, 1, 0)
+
+        cursor.execute(
+            "INSERT INTO applications (user_id, posting_id) VALUES (%s, %s) RETURNING id",
+            (third, posting),
+        )
+        application_id = cursor.fetchone()["id"]
+        assert _counters(cursor, posting) == (3, 2, 0, 1, 0)
+
+        cursor.execute(queries.UPDATE_APPLICATION_STATUS, ("rejected", "", application_id))
+        assert _counters(cursor, posting) == (3, 1, 0, 1, 1)
+
+        cursor.execute("UPDATE applications SET posting_id = %s WHERE id = %s", (other, application_id))
+        assert _counters(cursor, posting) == (2, 1, 0, 1, 0)
+        assert _counters(cursor, other) == (1, 0, 0, 0, 1)
+
+        # Deleting an applicant cascades to their applications
+        cursor.execute(queries.DELETE_USER, (first,))
+        assert _counters(cursor, posting) == (1, 0, 0, 1, 0)
+
+        # Deleting the posting itself cascades without tripping the trigger
+        cursor.execute(queries.DELETE_POSTING, (other,))
+
+        cursor.execute("UPDATE postings SET application_count = 7, applications_pending = 3")
+        cursor.execute(queries.RECONCILE_APPLICATION_COUNTS)
+        assert [row["id"] for row in cursor.fetchall()] == [posting]
+        assert _counters(cursor, posting) == (1, 0, 0, 1, 0)
+
+
+def test_0005_folds_shards_and_backfills_hourly_rollups(pg_conn):
+    apply_migrations(pg_conn, load_migrations()[:4])
+    with pg_conn.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO users (name, surname, username, email, user_type, hashed_password)"
+            " VALUES ('a', 'b', 'u', 'e@x', 'regular', 'x') RETURNING id"
+        )
+        user_id = cursor.fetchone()["id"]
+        cursor.execute(
+            "INSERT INTO postings (user_id, title, post_description, category, views)"
+            " VALUES (%s, 't', 'd', 'c', 5) RETURNING id",
+            (user_id,),
+        )
+        posting_id = cursor.fetchone()["id"]
+        cursor.execute(
+            "INSERT INTO view_counter_shards (posting_id, date, shard, views, unique_views)"
+            " VALUES (%s, CURRENT_DATE, 0, 2, 1), (%s, CURRENT_DATE, 1, 1, 1)",
+            (posting_id, posting_id),
+        )
+        cursor.execute(
+            "INSERT INTO posting_views (posting_id, viewed_at, is_unique_view) VALUES"
+            " (%s, date_trunc('hour', LOCALTIMESTAMP) - INTERVAL '1 minute', TRUE),"
+            " (%s, date_trunc('hour', LOCALTIMESTAMP) - INTERVAL '2 minutes', FALSE),"
+            " (%s, LOCALTIMESTAMP - INTERVAL '5 days', TRUE)",
+            (posting_id, posting_id, posting_id),
+        )
+        cursor.execute(
+            "INSERT INTO applications (user_id, posting_id, applied_at)"
+            " VALUES (%s, %s, date_trunc('hour', LOCALTIMESTAMP) - INTERVAL '1 minute')",
+            (user_id, posting_id),
+        )
+    pg_conn.commit()
+
+    apply_migrations(pg_conn, [_migration(5)])
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('view_counter_shards') as shards")
+        assert cursor.fetchone()["shards"] is None
+        cursor.execute("SELECT views FROM postings")
+        assert cursor.fetchone()["views"] == 8
+        cursor.execute("SELECT views_count, unique_views_count FROM posting_metrics")
+        assert tuple(cursor.fetchone().values()) == (3, 2)
+
+        # Only the recent events are backfilled by hour
+        cursor.execute(
+            "SELECT views_count, unique_views_count, applications_count"
+            " FROM posting_metrics_hourly"
+        )
+        assert [tuple(row.values()) for row in cursor.fetchall()] == [(2, 1, 1)]
+        cursor.execute("SELECT name, watermark <= LOCALTIMESTAMP as past FROM rollup_watermarks")
+        assert tuple(cursor.fetchone().values()) == ("posting_metrics", True)
+
+    indexes = _indexes(pg_conn)
+    assert "brin" in indexes["idx_posting_views_viewed_at"]
+    assert "(posting_id, viewed_at)" in indexes["idx_posting_views_posting_viewed"]
+
+
+def _partitions(conn) -> dict:
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) as bound"
+            " FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid"
+            " WHERE i.inhparent = 'posting_views'::regclass"
+        )
+        return {row["relname"]: row["bound"] for row in cursor.fetchall()}
+
+
+def test_0006_partitions_posting_views_around_existing_rows(pg_conn):
+    apply_migrations(pg_conn, load_migrations()[:5])
+    with pg_conn.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO users (name, surname, username, email, user_type, hashed_password)"
+            " VALUES ('a', 'b', 'u', 'e@x', 'regular', 'x') RETURNING id"
+        )
+        user_id = cursor.fetchone()["id"]
+        cursor.execute(queries.INSERT_POSTING, ("t", "d", "c", user_id, "part00000001"))
+        cursor.execute(
+            "INSERT INTO posting_views (posting_id, viewed_at)"
+            " SELECT id, v FROM postings, (VALUES"
+            " (LOCALTIMESTAMP - INTERVAL '40 days'), (LOCALTIMESTAMP), (NULL::timestamp)"
+            ") views(v)"
+        )
+    pg_conn.commit()
+
+    apply_migrations(pg_conn, [_migration(6)])
+
+    partitions = _partitions(pg_conn)
+    # Attached as is, up to the end of today; daily partitions from there
+    assert partitions.pop("posting_views_legacy").startswith(
+        "FOR VALUES FROM (MINVALUE) TO "
+    )
+    assert partitions.pop("posting_views_default") == "DEFAULT"
+    assert len(partitions) == 3
+    with pg_conn.cursor() as cursor:
+        # The view without a time is gone
+        cursor.execute("SELECT count(*) FROM posting_views")
+        assert cursor.fetchone()["count"] == 2
+        # The id sequence carries on and now belongs to the partitioned table
+        cursor.execute(
+            "INSERT INTO posting_views (viewed_at) VALUES (CURRENT_DATE + 2) RETURNING id"
+        )
+        assert cursor.fetchone()["id"] == 4
+        cursor.execute(
+            "SELECT pg_get_serial_sequence('posting_views', 'id') IS NOT NULL as owned"
+        )
+        assert cursor.fetchone()["owned"] is True
+    pg_conn.rollback()
+
+    indexes = _indexes(pg_conn)
+    assert "(posting_id, user_id, viewed_at)" in indexes[
+        "idx_posting_views_posting_user_viewed"
+    ]
+    assert "brin" in indexes["idx_posting_views_viewed_at"]
+    assert "(date)" in indexes["idx_posting_metrics_date"]
+    assert "posting_id" in _columns(pg_conn, "posting_metrics_monthly")
+
+
+def test_0006_replaces_an_empty_posting_views(pg_conn):
+    apply_migrations(pg_conn)
+
+    partitions = _partitions(pg_conn)
+    assert "posting_views_legacy" not in partitions
+    assert partitions.pop("posting_views_default") == "DEFAULT"
+    # Today and three days ahead
+    assert len(partitions) == 4
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT to_char(CURRENT_DATE, 'YYYYMMDD') as today")
+        assert f"posting_views_p{cursor.fetchone()['today']}" in partitions
+
+
+def test_0007_encodes_user_agents_and_sessions(pg_conn):
+    apply_migrations(pg_conn, load_migrations()[:6])
+    with pg_conn.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO posting_views (ip_address, user_agent, session_id)"
+            " VALUES ('10.0.0.1', 'Firefox', 'token'), (NULL, 'Chrome', ''),"
+            " (NULL, 'Firefox', NULL), (NULL, %s, NULL), (NULL, '', NULL)",
+            ("x" * 600,),
+        )
+    pg_conn.commit()
+
+    apply_migrations(pg_conn, [_migration(7)])
+
+    assert {"user_agent_id", "session_hash"} <= _columns(pg_conn, "posting_views")
+    assert not {"user_agent", "session_id"} & _columns(pg_conn, "posting_views")
+    assert "(posting_id, session_hash, viewed_at)" in _indexes(pg_conn)[
+        "idx_posting_views_posting_session_viewed"
+    ]
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT id, user_agent FROM user_agents ORDER BY id")
+        agents = {row["user_agent"]: row["id"] for row in cursor.fetchall()}
+        assert list(agents) == ["Chrome", "Firefox", "x" * USER_AGENT_MAX_LENGTH]
+        cursor.execute(
+            "SELECT host(ip_address) as ip, user_agent_id, session_hash"
+            " FROM posting_views ORDER BY id"
+        )
+        assert [tuple(row.values()) for row in cursor.fetchall()] == [
+            ("10.0.0.1", agents["Firefox"], session_hash("token")),
+            (None, agents["Chrome"], None),
+            (None, agents["Firefox"], None),
+            (None, agents["x" * USER_AGENT_MAX_LENGTH], None),
+            (None, None, None),
+        ]
+
+
+def test_apply_all_is_idempotent_and_recorded(pg_conn):
+    applied = apply_migrations(pg_conn)
+
+    assert applied == load_migrations()
+    assert apply_migrations(pg_conn) == []
+    assert all(row["applied_at"] for row in migration_status(pg_conn))
+
+
+# manage.py commands
+
+
+@pytest.fixture
+def manage_module():
+    backend = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend"))
+    if backend not in sys.path:
+        sys.path.insert(0, backend)
+    import manage
+
+    return manage
+
+
+def test_manage_migrate(manage_module, capsys):
+    applied = [Migration(2, "hot_path_indexes", None)]
+    with (
+        patch("manage.db.get_db_connection") as mock_get_db,
+        patch("manage.migrations.apply_migrations", return_value=applied) as mock_apply,
+    ):
+        assert manage_module.main(["migrate", "--to", "2"]) == 0
+        mock_apply.return_value = []
+        assert manage_module.main(["migrate"]) == 0
+
+    conn = mock_get_db.return_value.__enter__.return_value
+    assert mock_apply.call_args_list[0].args == (conn,)
+    assert mock_apply.call_args_list[0].kwargs == {"target": 2}
+    out = capsys.readouterr().out
+    assert "Applied 0002_hot_path_indexes" in out
+    assert "No migrations to apply" in out
+
+
+def test_manage_migrate_status(manage_module, capsys):
+    status = [
+        {"version": 1, "name": "initial_schema", "applied_at": datetime(2024, 1, 1)},
+        {"version": 2, "name": "hot_path_indexes", "applied_at": None},
+    ]
+    with (
+        patch("manage.db.get_db_connection"),
+        patch("manage.migrations.migration_status", return_value=status),
+    ):
+        assert manage_module.main(["migrate-status"]) == 1
+        status.pop()
+        assert manage_module.main(["migrate-status"]) == 0
+
+    out = capsys.readouterr().out
+    assert "applied 2024-01-01 00:00:00" in out
+    assert "0002_hot_path_indexes" in out and "pending" in out
+
+
+def test_manage_reconcile_application_counts(manage_module, capsys):
+    with patch("manage.db.get_db_connection") as mock_get_db:
+        conn = mock_get_db.return_value.__enter__.return_value
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [{"id": 9}, {"id": 4}]
+
+        assert manage_module.main(["reconcile-application-counts"]) == 0
+        conn.commit.assert_called_once()
+
+        assert manage_module.main(["reconcile-application-counts", "--dry-run"]) == 0
+        conn.rollback.assert_called_once()
+
+        cursor.fetchall.return_value = []
+        assert manage_module.main(["reconcile-application-counts"]) == 0
+
+    cursor.execute.assert_any_call("LOCK TABLE applications IN SHARE MODE")
+    cursor.execute.assert_any_call(queries.RECONCILE_APPLICATION_COUNTS)
+    out = capsys.readouterr().out
+    assert "repaired on 2 postings" in out
+    assert "Posting ids: 4, 9" in out
+    assert "would repair on 2 postings" in out
+    assert "repaired on 0 postings" in out
@@ -0,0 +1,41 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from backend.core import passwords
+from backend.core.config import PASSWORD_HASH_CONFIG
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def fast_hashing():
+    with patch.dict(PASSWORD_HASH_CONFIG, {"rounds": 4, "max_workers": 1}):
+        yield
+    passwords.shutdown_password_executor()
+
+
+def test_hash_and_verify_on_password_pool(fast_hashing):
+    hashed = run(passwords.hash_password("Secret1!"))
+
+    assert hashed.startswith("$2b$04$")
+    assert run(passwords.verify_password("Secret1!", hashed)) is True
+    assert run(passwords.verify_password("wrong", hashed)) is False
+
+
+def test_password_pool_is_its_own_executor(fast_hashing):
+    with patch("backend.core.executor.record_executor_run") as record_run:
+        run(passwords.hash_password("Secret1!"))
+
+    pool = passwords.init_password_executor()
+    assert pool.name == "bcrypt"
+    assert pool.max_workers == 1
+    assert passwords.init_password_executor() is pool
+    assert record_run.call_args.args[0] == "passwords.hash"
+
+    passwords.shutdown_password_executor()
+    assert passwords._executor is None
+    passwords.shutdown_password_executor()
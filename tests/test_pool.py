@@ -0,0 +1,154 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.core import db
+from backend.core.pool import ConnectionPool, PoolClosedError, PoolTimeoutError
+
+
+def make_conn():
+    conn = MagicMock()
+    conn.closed = 0
+    return conn
+
+
+@pytest.fixture
+def connect():
+    return MagicMock(side_effect=lambda: make_conn())
+
+
+def test_pool_prefills_min_size(connect):
+    pool = ConnectionPool(connect, min_size=2, max_size=5)
+
+    assert connect.call_count == 2
+    assert pool.stats() == {"in_use": 0, "idle": 2}
+
+
+def test_pool_prefill_failure_is_tolerated():
+    connect = MagicMock(side_effect=RuntimeError("db not ready"))
+    pool = ConnectionPool(connect, min_size=3, max_size=5)
+
+    assert pool.stats() == {"in_use": 0, "idle": 0}
+
+
+def test_pool_invalid_sizes(connect):
+    with pytest.raises(ValueError):
+        ConnectionPool(connect, min_size=5, max_size=2)
+
+
+def test_pool_reuses_released_connection(connect):
+    pool = ConnectionPool(connect, min_size=0, max_size=2)
+
+    with pool.connection() as first:
+        assert pool.stats() == {"in_use": 1, "idle": 0}
+    with pool.connection() as second:
+        pass
+
+    assert first is second
+    assert connect.call_count == 1
+    first.rollback.assert_called()
+    assert pool.stats() == {"in_use": 0, "idle": 1}
+
+
+def test_pool_acquire_timeout(connect):
+    pool = ConnectionPool(connect, min_size=0, max_size=1, acquire_timeout=0.05)
+    pool.acquire()
+
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+
+
+def test_pool_waiter_gets_released_connection(connect):
+    pool = ConnectionPool(connect, min_size=0, max_size=1, acquire_timeout=2)
+    conn = pool.acquire()
+    acquired = []
+
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    pool.release(conn)
+    waiter.join(timeout=2)
+
+    assert acquired == [conn]
+
+
+def test_pool_replaces_closed_connection(connect):
+    pool = ConnectionPool(connect, min_size=1, max_size=1)
+    stale = pool.acquire()
+    pool.release(stale)
+    stale.closed = 1
+
+    conn = pool.acquire()
+
+    assert conn is not stale
+    stale.close.assert_called_once()
+
+
+def test_pool_health_check_pings_idle_connection(connect):
+    pool = ConnectionPool(connect, min_size=1, max_size=1, health_check_interval=0)
+
+    conn = pool.acquire()
+
+    conn.cursor.return_value.__enter__.return_value.execute.assert_called_once_with(
+        "SELECT 1"
+    )
+
+
+def test_pool_health_check_discards_failed_ping(connect):
+    pool = ConnectionPool(connect, min_size=1, max_size=1, health_check_interval=0)
+    broken = pool._idle[0][0]
+    broken.cursor.side_effect = RuntimeError("server closed the connection")
+
+    conn = pool.acquire()
+
+    assert conn is not broken
+    broken.close.assert_called_once()
+    assert pool.stats() == {"in_use": 1, "idle": 0}
+
+
+def test_pool_connect_failure_frees_slot():
+    connect = MagicMock(side_effect=RuntimeError("refused"))
+    pool = ConnectionPool(connect, min_size=0, max_size=1)
+
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+    assert pool.stats() == {"in_use": 0, "idle": 0}
+
+
+def test_pool_release_discards_connection_failing_rollback(connect):
+    pool = ConnectionPool(connect, min_size=0, max_size=1)
+    conn = pool.acquire()
+    conn.rollback.side_effect = RuntimeError("connection lost")
+
+    pool.release(conn)
+
+    conn.close.assert_called_once()
+    assert pool.stats() == {"in_use": 0, "idle": 0}
+
+
+def test_pool_close(connect):
+    pool = ConnectionPool(connect, min_size=2, max_size=2)
+    idle = [conn for conn, _ in pool._idle]
+
+    pool.close()
+
+    for conn in idle:
+        conn.close.assert_called_once()
+    with pytest.raises(PoolClosedError):
+        pool.acquire()
+
+
+def test_get_db_connection_uses_pool(mock_conn):
+    mock_conn.closed = 0
+    with patch("backend.core.db.psycopg2.connect", return_value=mock_conn) as connect:
+        db.init_db_pool()
+        try:
+            db.get_user_by_id(1)
+            db.get_user_by_id(2)
+        finally:
+            db.close_db_pool()
+
+    connect.assert_called_once()
+    mock_conn.close.assert_called_once()
+    assert db._pool is None
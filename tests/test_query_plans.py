@@ -0,0 +1,221 @@
+"""
+Query-plan regression suite for every statement core.db and core.rollups run.
+
+Against a scratch schema migrated to head and seeded by query_plans/seed.sql
+(100k postings, 5M views), each statement is run under
+EXPLAIN (ANALYZE, BUFFERS) and checked against query_plans/budgets.json:
+
+- no sequential scan of a large table, unless the budget allows it
+- the planner's row estimate for the result stays under max_rows
+- shared buffers touched (hit + read) stay under max_buffers
+
+Writes run inside a transaction that is rolled back. Seeding takes a few
+minutes, so the suite only runs when asked for:
+
+    TEST_DATABASE_URL=postgresql://postgres@localhost/postgres \\
+        pytest tests/test_query_plans.py
+
+After an intended change, QUERY_PLAN_UPDATE_BUDGETS=1 rewrites the budgets
+from the observed plans (with headroom); review the diff like any other.
+"""
+
+import json
+import math
+import os
+import re
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+
+from backend.core import queries
+from backend.core.migrations import apply_migrations
+from backend.core.partitions import create_partitions
+
+HERE = Path(__file__).parent / "query_plans"
+BUDGETS_PATH = HERE / "budgets.json"
+CORE = Path(__file__).parent.parent / "backend" / "core"
+DB_SOURCES = [CORE / "db.py", CORE / "rollups.py"]
+
+VOLUMES = {"users": 20_000, "postings": 100_000, "applications": 300_000, "views": 5_000_000}
+
+LARGE_TABLES = {
+    "users",
+    "postings",
+    "applications",
+    "posting_views",
+    "posting_metrics",
+    "posting_metrics_hourly",
+    "posting_metrics_monthly",
+}
+
+# A partition of a large table (one day of posting_views) may be scanned
+# whole when the statement needs most of it, as for today's views early in
+# the day, but not to pick out a few rows
+SELECT_PARTITIONS = """
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    JOIN pg_class parent ON parent.oid = i.inhparent
+    WHERE parent.relname = ANY(%s)
+"""
+
+UPDATE_BUDGETS = os.getenv("QUERY_PLAN_UPDATE_BUDGETS") == "1"
+HEADROOM = 2
+
+
+def db_statements() -> list[str]:
+    """Names of the SQL statements (not other constants) core.db and core.rollups execute"""
+    names = {
+        name
+        for source in DB_SOURCES
+        for name in re.findall(r"queries\.([A-Z_]+)", source.read_text())
+    }
+    return sorted(name for name in names if isinstance(getattr(queries, name), str))
+
+
+def load_budgets() -> dict:
+    return json.loads(BUDGETS_PATH.read_text())
+
+
+SAMPLES = {
+    # The busiest poster and the most viewed posting: worst cases for the
+    # per-user and per-posting statements
+    "user_id": "SELECT user_id FROM postings GROUP BY user_id ORDER BY count(*) DESC LIMIT 1",
+    "posting_id": "SELECT posting_id FROM posting_views GROUP BY posting_id ORDER BY count(*) DESC LIMIT 1",
+    "posting_hash": "SELECT hash FROM postings WHERE id = %(posting_id)s",
+    "owner_id": "SELECT user_id FROM postings WHERE id = %(posting_id)s",
+    "username": "SELECT username FROM users WHERE id = %(user_id)s",
+    "email": "SELECT email FROM users WHERE id = %(user_id)s",
+    "session_hash": "SELECT session_hash FROM posting_views WHERE posting_id = %(posting_id)s LIMIT 1",
+    "user_agent_id": "SELECT min(id) FROM user_agents",
+    "user_agent": "SELECT user_agent FROM user_agents WHERE id = %(user_agent_id)s",
+    "application_id": "SELECT id FROM applications WHERE posting_id = %(posting_id)s LIMIT 1",
+    "applicant_id": "SELECT user_id FROM applications WHERE id = %(application_id)s",
+    "idle_user_id": "SELECT max(id) FROM users",
+    "today": "SELECT CURRENT_DATE",
+    # A rollup pass: from the lookback before the watermark up to now
+    "watermark": "SELECT watermark FROM rollup_watermarks",
+    "rollup_start": "SELECT date_trunc('hour', watermark) - INTERVAL '2 hours' FROM rollup_watermarks",
+    "now": "SELECT LOCALTIMESTAMP",
+    "hourly_cutoff": "SELECT LOCALTIMESTAMP - INTERVAL '7 days'",
+    # Downsampling: the oldest month of daily metrics
+    "oldest_month": "SELECT date_trunc('month', min(date))::date FROM posting_metrics",
+    "month_after": "SELECT (%(oldest_month)s + INTERVAL '1 month')::date",
+}
+
+
+@pytest.fixture(scope="module")
+def seeded(scratch_schema):
+    with scratch_schema("query_plans") as conn:
+        apply_migrations(conn)
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT CURRENT_DATE as today")
+            today = cursor.fetchone()["today"]
+        conn.commit()
+        # Daily view partitions for the seeded 90 days, as maintenance keeps them
+        create_partitions(conn, today - timedelta(days=91), today)
+        with conn.cursor() as cursor:
+            cursor.execute((HERE / "seed.sql").read_text(), VOLUMES)
+        conn.commit()
+
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            # The application counter triggers rewrote every posting row while
+            # seeding; compact postings back to id order as a maintained
+            # production table would be
+            cursor.execute("CLUSTER postings USING postings_pkey")
+            cursor.execute("VACUUM ANALYZE")
+            samples: dict = {
+                "new_username": "plan_user",
+                "new_email": "plan_user@example.com",
+                "new_hash": "planhash0001",
+            }
+            for name, sql in SAMPLES.items():
+                cursor.execute(sql, samples)
+                samples[name] = next(iter(cursor.fetchone().values()))
+            cursor.execute(SELECT_PARTITIONS, (sorted(LARGE_TABLES),))
+            partitions = {row["relname"] for row in cursor.fetchall()}
+        conn.autocommit = False
+        yield conn, samples, partitions
+
+
+def _param(value, samples: dict):
+    if isinstance(value, list):  # an array parameter
+        return [_param(item, samples) for item in value]
+    if isinstance(value, str) and value.startswith("$"):
+        return samples[value[1:]]
+    return value
+
+
+def _params(spec: list, samples: dict) -> tuple:
+    return tuple(_param(value, samples) for value in spec)
+
+
+def _explain(conn, sql: str, params: tuple) -> dict:
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+            return cursor.fetchone()["QUERY PLAN"][0]["Plan"]
+    finally:
+        conn.rollback()
+
+
+def _nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+
+def _buffers(plan: dict) -> int:
+    return plan["Shared Hit Blocks"] + plan["Shared Read Blocks"]
+
+
+def _headroom(value: int, floor: int) -> int:
+    """HEADROOM x value, rounded up to two significant digits"""
+    value = max(value * HEADROOM, floor)
+    step = 10 ** max(int(math.log10(value)) - 1, 0)
+    return math.ceil(value / step) * step
+
+
+def test_every_db_statement_has_a_budget():
+    assert sorted(load_budgets()) == db_statements()
+
+
+@pytest.fixture(scope="module")
+def observed():
+    plans: dict = {}
+    yield plans
+    if UPDATE_BUDGETS and plans:
+        budgets = load_budgets()
+        for name, plan in plans.items():
+            budgets[name]["max_rows"] = _headroom(plan["Plan Rows"], 100)
+            budgets[name]["max_buffers"] = _headroom(_buffers(plan), 100)
+        BUDGETS_PATH.write_text(json.dumps(budgets, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.mark.parametrize("name", db_statements())
+def test_query_plan_within_budget(seeded, observed, name):
+    conn, samples, partitions = seeded
+    budget = load_budgets()[name]
+    plan = _explain(conn, getattr(queries, name), _params(budget["params"], samples))
+    observed[name] = plan
+
+    seq_scans = {
+        node["Relation Name"]
+        for node in _nodes(plan)
+        if node["Node Type"] == "Seq Scan"
+        and (
+            node["Relation Name"] in LARGE_TABLES
+            or (
+                node["Relation Name"] in partitions
+                and node.get("Rows Removed by Filter", 0) > node["Actual Rows"]
+            )
+        )
+    }
+    assert seq_scans <= set(budget.get("allow_seq_scan", [])), (
+        f"{name} sequentially scans {sorted(seq_scans)}"
+    )
+    if not UPDATE_BUDGETS:
+        assert plan["Plan Rows"] <= budget["max_rows"], f"{name} row estimate"
+        assert _buffers(plan) <= budget["max_buffers"], f"{name} buffers"
@@ -0,0 +1,80 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from backend.core import rate_limit
+from backend.core.rate_limit import RateLimitExceededError, parse_limit
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def limiter_script():
+    script = AsyncMock(return_value=0)
+    mock_redis = MagicMock()
+    mock_redis.register_script.return_value = script
+    with patch("backend.core.rate_limit.get_redis_client", return_value=mock_redis), \
+         patch("backend.core.rate_limit.record_rate_limit_decision") as record:
+        script.record = record
+        yield script
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("5/60", (5, 60000)),
+    ("20/0.5", (20, 500)),
+])
+def test_parse_limit(spec, expected):
+    assert parse_limit(spec) == expected
+
+
+@pytest.mark.parametrize("spec", ["5", "0/60", "5/0", "x/60"])
+def test_parse_limit_rejects_invalid(spec):
+    with pytest.raises(ValueError):
+        parse_limit(spec)
+
+
+def test_allowed_request_checks_every_identity_in_one_call(limiter_script):
+    run(rate_limit.check_rate_limit("login", ip="10.0.0.1", email="A@Example.com"))
+
+    limiter_script.assert_awaited_once()
+    keys = limiter_script.await_args.kwargs["keys"]
+    args = limiter_script.await_args.kwargs["args"]
+    assert [key.rsplit(":", 1)[0] for key in keys] == ["rl:login:ip", "rl:login:email"]
+    # Identities are hashed, case-insensitively
+    assert "Example" not in keys[1]
+    assert keys[1] == rate_limit._key("login", "email", "a@example.com")
+    assert args[2:] == [20, 60000, 5, 60000]
+    limiter_script.record.assert_called_once_with("login", "allowed")
+
+
+def test_throttled_request_raises_with_retry_after(limiter_script):
+    limiter_script.return_value = 1500
+
+    with pytest.raises(RateLimitExceededError) as excinfo:
+        run(rate_limit.check_rate_limit("apply", ip="10.0.0.1", user=7))
+
+    assert excinfo.value.status_code == 429
+    assert excinfo.value.headers == {"Retry-After": "2"}
+    assert excinfo.value.route == "apply"
+    limiter_script.record.assert_called_once_with("apply", "throttled")
+
+
+def test_unknown_or_missing_identities_are_skipped(limiter_script):
+    run(rate_limit.check_rate_limit("login", ip=None, device="abc"))
+    limiter_script.assert_not_awaited()
+
+
+def test_disabled_limiter_does_nothing(limiter_script):
+    with patch.dict(rate_limit.RATE_LIMIT_CONFIG, {"enabled": False}):
+        run(rate_limit.check_rate_limit("login", ip="10.0.0.1"))
+    limiter_script.assert_not_awaited()
+
+
+def test_redis_failure_allows_request(limiter_script):
+    limiter_script.side_effect = RedisConnectionError("redis down")
+    run(rate_limit.check_rate_limit("login", ip="10.0.0.1"))
+    limiter_script.record.assert_not_called()
@@ -0,0 +1,411 @@
+import logging
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.core import db, queries
+from backend.core.migrations import apply_migrations
+from backend.core.rollups import (
+    ROLLUP_NAME,
+    RollupResult,
+    downsample_daily_metrics,
+    roll_up,
+)
+
+# worker.py uses bare module names ('from core.* import ...'), so add backend/
+_BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend"))
+if _BACKEND not in sys.path:
+    sys.path.insert(0, _BACKEND)
+
+import worker  # noqa: E402
+
+HOUR = timedelta(hours=1)
+NOW = datetime(2026, 1, 2, 10, 30, 15)
+
+
+def _roll_up(conn, **kwargs):
+    return roll_up(
+        conn,
+        lookback=kwargs.get("lookback", 2 * HOUR),
+        max_window=kwargs.get("max_window", 6 * HOUR),
+        retention=kwargs.get("retention", timedelta(days=7)),
+    )
+
+
+def test_roll_up_recomputes_whole_hours_up_to_now():
+    conn = MagicMock()
+    cursor = conn.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = {"watermark": NOW - timedelta(minutes=1), "now": NOW}
+    cursor.fetchall.return_value = [
+        {"posting_id": 1, "date": date(2026, 1, 2)},
+        {"posting_id": 2, "date": date(2026, 1, 1)},
+    ]
+
+    result = _roll_up(conn)
+
+    start = datetime(2026, 1, 2, 8)
+    assert result == RollupResult(start, NOW, 2, True)
+    assert [call.args for call in cursor.execute.call_args_list] == [
+        (queries.SELECT_ROLLUP_WATERMARK, (ROLLUP_NAME,)),
+        (queries.ROLLUP_HOURLY_METRICS, (start, NOW)),
+        (
+            queries.ROLLUP_DAILY_METRICS,
+            ([1, 2], [date(2026, 1, 2), date(2026, 1, 1)]),
+        ),
+        (queries.DELETE_EXPIRED_HOURLY_METRICS, (NOW - timedelta(days=7),)),
+        (queries.UPDATE_ROLLUP_WATERMARK, (NOW, ROLLUP_NAME)),
+    ]
+    conn.commit.assert_called_once()
+
+
+def test_roll_up_catches_up_in_bounded_windows():
+    conn = MagicMock()
+    cursor = conn.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = {"watermark": NOW - 10 * HOUR, "now": NOW}
+    cursor.fetchall.return_value = []
+
+    result = _roll_up(conn)
+
+    assert result.watermark == NOW - 4 * HOUR
+    assert result.caught_up is False
+    # Nothing changed, so no daily refresh
+    executed = [call.args[0] for call in cursor.execute.call_args_list]
+    assert queries.ROLLUP_DAILY_METRICS not in executed
+    cursor.execute.assert_called_with(
+        queries.UPDATE_ROLLUP_WATERMARK, (NOW - 4 * HOUR, ROLLUP_NAME)
+    )
+
+
+def test_downsample_folds_whole_months_past_the_retention(mock_conn, mock_cursor):
+    mock_cursor.fetchone.side_effect = [
+        {"oldest": date(2025, 11, 20), "today": date(2026, 3, 15)},
+        {"days": 40, "months": 4},
+        {"days": 31, "months": 3},
+    ]
+
+    assert downsample_daily_metrics(mock_conn, 60) == (71, 7)
+
+    # Mid-January is 60 days back, so January stays daily
+    assert [call.args for call in mock_cursor.execute.call_args_list] == [
+        (queries.SELECT_OLDEST_DAILY_METRICS,),
+        (queries.DOWNSAMPLE_DAILY_METRICS, (date(2025, 11, 1), date(2025, 12, 1))),
+        (queries.DOWNSAMPLE_DAILY_METRICS, (date(2025, 12, 1), date(2026, 1, 1))),
+    ]
+    assert mock_conn.commit.call_count == 3
+
+
+def test_downsample_without_daily_metrics(mock_conn, mock_cursor):
+    mock_cursor.fetchone.return_value = {"oldest": None, "today": date(2026, 3, 15)}
+
+    assert downsample_daily_metrics(mock_conn, 60) == (0, 0)
+    mock_cursor.execute.assert_called_once_with(queries.SELECT_OLDEST_DAILY_METRICS)
+
+
+def test_downsample_keeps_the_daily_analytics_window(mock_conn):
+    with pytest.raises(ValueError, match="at least 31 days"):
+        downsample_daily_metrics(mock_conn, 30)
+
+
+@pytest.fixture
+def worker_conn():
+    conn = MagicMock()
+
+    @contextmanager
+    def get_db_connection():
+        yield conn
+
+    with patch("worker.db.get_db_connection", get_db_connection):
+        yield conn
+
+
+def test_catch_up_runs_until_caught_up(worker_conn, caplog):
+    results = [
+        RollupResult(NOW - 8 * HOUR, NOW - 4 * HOUR, 3, False),
+        RollupResult(NOW - 6 * HOUR, NOW, 1, True),
+    ]
+    with (
+        patch("worker.roll_up", side_effect=results) as rolled,
+        caplog.at_level(logging.INFO),
+    ):
+        assert worker.catch_up() == 2
+
+    assert rolled.call_args.args == (worker_conn,)
+    assert rolled.call_args.kwargs == {
+        "lookback": 2 * HOUR,
+        "max_window": 6 * HOUR,
+        "retention": timedelta(days=7),
+    }
+    assert "Rolled up 2026-01-02 04:30 to 2026-01-02 10:30:15" in caplog.text
+
+
+def test_worker_once():
+    with patch("worker.catch_up") as catch_up:
+        assert worker.main(["--once"]) == 0
+    catch_up.assert_called_once_with()
+
+
+def test_worker_once_raises():
+    with (
+        patch("worker.catch_up", side_effect=RuntimeError("down")),
+        pytest.raises(RuntimeError),
+    ):
+        worker.main(["--once"])
+
+
+def test_worker_loop_survives_failures_until_stopped(caplog):
+    stop = threading.Event()
+    passes = []
+
+    def catch_up():
+        passes.append(1)
+        if len(passes) == 1:
+            raise RuntimeError("connection refused")
+        stop.set()
+
+    with patch("worker.catch_up", catch_up):
+        assert worker.main(["--interval", "0"], stop=stop) == 0
+
+    assert len(passes) == 2
+    assert "Analytics rollup failed: connection refused" in caplog.text
+
+
+def test_worker_stops_on_sigterm():
+    with (
+        patch("worker.signal.signal") as handle,
+        patch("worker.threading.Event") as event,
+    ):
+        event.return_value.is_set.return_value = True
+        assert worker.main([]) == 0
+
+    signum, handler = handle.call_args.args
+    assert signum == worker.signal.SIGTERM
+    handler(signum, None)
+    event.return_value.set.assert_called_once_with()
+
+
+def _reads(cursor, posting_id: int, user_id: int) -> tuple:
+    cursor.execute(queries.SELECT_POSTING_WITH_PUBLIC_STATS, (posting_id,))
+    posting = cursor.fetchone()
+    cursor.execute(queries.SELECT_POSTING_ANALYTICS, (posting_id, user_id))
+    analytics = cursor.fetchone()
+    cursor.execute(queries.SELECT_POSTING_HOURLY_METRICS, (posting_id,) * 3)
+    hourly = cursor.fetchone()["metrics"]
+    cursor.execute(queries.SELECT_USER_POSTING_OVERVIEW, (user_id,))
+    overview = cursor.fetchone()
+    cursor.execute(queries.SELECT_USER_TOP_POSTINGS, (user_id,))
+    top = cursor.fetchone()
+    cursor.execute(queries.SELECT_USER_RECENT_ACTIVITY, (user_id,) * 3)
+    activity = [tuple(row.values()) for row in cursor.fetchall()]
+    cursor.execute(queries.SELECT_USER_HOURLY_ACTIVITY, (user_id,) * 3)
+    hourly_activity = [tuple(row.values()) for row in cursor.fetchall()]
+    return (
+        posting["views"] + posting["pending_views"],
+        analytics["views"],
+        analytics["total_views"],
+        analytics["unique_views"],
+        analytics["daily_metrics"],
+        hourly,
+        overview["total_views"],
+        top["views"],
+        activity,
+        hourly_activity,
+    )
+
+
+def _insert_view(cursor, posting_id: int, ago: str, unique: bool):
+    cursor.execute(
+        "INSERT INTO posting_views (posting_id, viewed_at, is_unique_view)"
+        " VALUES (%s, LOCALTIMESTAMP - %s::interval, %s)",
+        (posting_id, ago, unique),
+    )
+
+
+def test_rollup_is_idempotent_and_reads_agree(pg_conn):
+    apply_migrations(pg_conn)
+    with pg_conn.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO users (name, surname, username, email, user_type, hashed_password)
+            VALUES ('A', 'B', 'owner', 'owner@example.com', 'regular', 'x'),
+                   ('C', 'D', 'applicant', 'applicant@example.com', 'regular', 'x')
+            RETURNING id
+            """
+        )
+        user_id, applicant_id = [row["id"] for row in cursor.fetchall()]
+        cursor.execute(queries.INSERT_POSTING, ("T", "D", "IT", user_id, "rollup000001"))
+        cursor.execute("SELECT id FROM postings")
+        posting_id = cursor.fetchone()["id"]
+
+        # The worker last ran 3 hours ago; everything since is raw
+        cursor.execute("UPDATE rollup_watermarks SET watermark = LOCALTIMESTAMP - INTERVAL '3 hours'")
+        _insert_view(cursor, posting_id, "150 minutes", True)
+        _insert_view(cursor, posting_id, "149 minutes", False)
+        _insert_view(cursor, posting_id, "20 minutes", True)
+        cursor.execute(
+            "INSERT INTO applications (user_id, posting_id, applied_at)"
+            " VALUES (%s, %s, LOCALTIMESTAMP - INTERVAL '1 hour')",
+            (applicant_id, posting_id),
+        )
+        pg_conn.commit()
+
+        before = _reads(cursor, posting_id, user_id)
+        assert before[:4] == (3, 3, 3, 2)
+        assert sum(metric["views_count"] for metric in before[5]) == 3
+
+        result = _roll_up(pg_conn)
+        assert result.caught_up is True
+        assert result.posting_days >= 1
+
+        cursor.execute("SELECT views FROM postings")
+        assert cursor.fetchone()["views"] == 3
+        cursor.execute(
+            "SELECT SUM(views_count) as views, SUM(unique_views_count) as unique_views,"
+            " SUM(applications_count) as applications FROM posting_metrics"
+        )
+        assert tuple(cursor.fetchone().values()) == (3, 2, 1)
+        assert _reads(cursor, posting_id, user_id) == before
+
+        # Rerunning the same window changes nothing
+        cursor.execute("UPDATE rollup_watermarks SET watermark = %s", (result.start + 2 * HOUR,))
+        pg_conn.commit()
+        assert _roll_up(pg_conn).posting_days == 0
+        cursor.execute("SELECT views FROM postings")
+        assert cursor.fetchone()["views"] == 3
+        assert _reads(cursor, posting_id, user_id) == before
+
+        # A view committed after the watermark passed its viewed_at is counted
+        # on the next pass, within the lookback
+        _insert_view(cursor, posting_id, "30 minutes", False)
+        pg_conn.commit()
+        assert _roll_up(pg_conn).posting_days == 1
+        cursor.execute("SELECT views FROM postings")
+        assert cursor.fetchone()["views"] == 4
+        after = _reads(cursor, posting_id, user_id)
+        assert after[:4] == (4, 4, 4, 2)
+
+        # Stored counts are never lowered, and expired hourly buckets are
+        # dropped
+        cursor.execute("UPDATE posting_metrics SET unique_views_count = 10")
+        cursor.execute(
+            "INSERT INTO posting_metrics_hourly (posting_id, hour, views_count)"
+            " VALUES (%s, date_trunc('hour', LOCALTIMESTAMP) - INTERVAL '8 days', 1)",
+            (posting_id,),
+        )
+        _insert_view(cursor, posting_id, "1 minute", True)
+        pg_conn.commit()
+        _roll_up(pg_conn)
+        cursor.execute("SELECT unique_views_count FROM posting_metrics")
+        assert {row["unique_views_count"] for row in cursor.fetchall()} == {10}
+        cursor.execute(
+            "SELECT count(*) FROM posting_metrics_hourly"
+            " WHERE hour < LOCALTIMESTAMP - INTERVAL '7 days'"
+        )
+        assert cursor.fetchone()["count"] == 0
+
+
+def test_analytics_counts_todays_unique_views_once(pg_conn):
+    """Today's rolled-up and pending unique views, floored at the live count"""
+    apply_migrations(pg_conn)
+    with pg_conn.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO users (name, surname, username, email, user_type, hashed_password)"
+            " VALUES ('A', 'B', 'owner', 'owner@example.com', 'regular', 'x') RETURNING id"
+        )
+        user_id = cursor.fetchone()["id"]
+        cursor.execute(queries.INSERT_POSTING, ("T", "D", "IT", user_id, "uniqueviews1"))
+        cursor.execute("SELECT id FROM postings")
+        posting_id = cursor.fetchone()["id"]
+        cursor.execute("SELECT CURRENT_DATE as today")
+        today = cursor.fetchone()["today"]
+
+        # Two viewers today, rolled up into today's posting_metrics row
+        cursor.execute("UPDATE rollup_watermarks SET watermark = LOCALTIMESTAMP - INTERVAL '1 hour'")
+        _insert_view(cursor, posting_id, "2 seconds", True)
+        _insert_view(cursor, posting_id, "1 second", True)
+        pg_conn.commit()
+        assert _roll_up(pg_conn).caught_up is True
+        # A third viewer and a repeat view since the watermark
+        _insert_view(cursor, posting_id, "0 seconds", True)
+        _insert_view(cursor, posting_id, "0 seconds", False)
+        pg_conn.commit()
+
+    @contextmanager
+    def get_db_connection():
+        yield pg_conn
+
+    redis = MagicMock()
+    with (
+        patch("backend.core.db.get_db_connection", get_db_connection),
+        patch("backend.core.db.get_redis_client", return_value=redis),
+        patch("backend.core.db.datetime") as clock,
+    ):
+        clock.now.return_value.date.return_value = today
+
+        def unique_views(live_count: int) -> tuple:
+            redis.pfcount.return_value = live_count
+            analytics = db.get_posting_analytics(posting_id, user_id)
+            (metric,) = analytics["daily_metrics"]
+            assert metric["date"] == today.isoformat()
+            return analytics["stats"]["unique_views"], metric["unique_views_count"]
+
+        # The HyperLogLog saw the same three viewers: counted once
+        assert unique_views(3) == (3, 3)
+        # An empty HyperLogLog (e.g. after a Redis restart) lowers nothing
+        assert unique_views(0) == (3, 3)
+        # A higher live count raises today to it
+        assert unique_views(5) == (5, 5)
+
+
+def test_downsampled_metrics_keep_the_totals(pg_conn):
+    apply_migrations(pg_conn)
+    with pg_conn.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO users (name, surname, username, email, user_type, hashed_password)"
+            " VALUES ('A', 'B', 'owner', 'owner@example.com', 'regular', 'x') RETURNING id"
+        )
+        user_id = cursor.fetchone()["id"]
+        cursor.execute(queries.INSERT_POSTING, ("T", "D", "IT", user_id, "downsample01"))
+        cursor.execute("SELECT id FROM postings")
+        posting_id = cursor.fetchone()["id"]
+        # A daily row for every day of the last 100 days
+        cursor.execute(
+            "INSERT INTO posting_metrics"
+            " (posting_id, date, views_count, unique_views_count, applications_count)"
+            " SELECT %s, d, 3, 2, 1"
+            " FROM generate_series(CURRENT_DATE - 99, CURRENT_DATE, INTERVAL '1 day') d",
+            (posting_id,),
+        )
+        pg_conn.commit()
+        before = _reads(cursor, posting_id, user_id)
+        assert before[2:4] == (300, 200)
+
+        days, months = downsample_daily_metrics(pg_conn, 31)
+        assert 31 < days < 100
+        assert months in (2, 3)
+        cursor.execute(
+            "SELECT SUM(views_count) as views, SUM(applications_count) as applications,"
+            " MAX(month) < CURRENT_DATE - 31 as past FROM posting_metrics_monthly"
+        )
+        assert tuple(cursor.fetchone().values()) == (3 * days, days, True)
+        cursor.execute(
+            "SELECT MIN(date) >= date_trunc('month', CURRENT_DATE - 31) as kept"
+            " FROM posting_metrics"
+        )
+        assert cursor.fetchone()["kept"] is True
+        assert _reads(cursor, posting_id, user_id) == before
+
+        # Nothing left to fold, and a late daily row adds to its month
+        assert downsample_daily_metrics(pg_conn, 31) == (0, 0)
+        cursor.execute(
+            "INSERT INTO posting_metrics (posting_id, date, views_count)"
+            " VALUES (%s, CURRENT_DATE - 95, 4)",
+            (posting_id,),
+        )
+        pg_conn.commit()
+        assert downsample_daily_metrics(pg_conn, 31) == (1, 1)
+        assert _reads(cursor, posting_id, user_id)[2] == 304
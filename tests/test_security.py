@@ -6,6 +6,8 @@ import bcrypt
 import pytest
 
 from backend.core import security
+from backend.core.config import PASSWORD_HASH_CONFIG
+from backend.core.session_store import decode_session, encode_session, session_key
 
 
 def test_hash_and_verify_password():
@@ -32,69 +34,116 @@ def test_is_password_valid(password, expected):
     assert security.is_password_valid(password) is expected
 
 
+def test_hash_password_uses_configured_cost(monkeypatch):
+    monkeypatch.setitem(PASSWORD_HASH_CONFIG, "rounds", 5)
+    assert security.hash_password("Secret1!").startswith("$2b$05$")
+
+
+@pytest.mark.parametrize("hashed, expected", [
+    ("$2b$05$" + "a" * 53, False),
+    ("$2b$04$" + "a" * 53, True),
+    ("$2b$10$" + "a" * 53, True),
+    ("not-a-bcrypt-hash", False),
+    ("$2b$xx$", False),
+])
+def test_needs_rehash(monkeypatch, hashed, expected):
+    monkeypatch.setitem(PASSWORD_HASH_CONFIG, "rounds", 5)
+    assert security.needs_rehash(hashed) is expected
+
+
+def redis_with(store: dict) -> MagicMock:
+    mock_redis = MagicMock()
+    mock_redis.get.side_effect = store.get
+    return mock_redis
+
+
 def test_create_session():
     mock_redis = MagicMock()
-    
+
     with patch('backend.core.security.get_redis_client', return_value=mock_redis):
         session_token = security.create_session(42)
-        
+
         assert isinstance(session_token, str)
         assert len(session_token) > 0
-        mock_redis.setex.assert_called_once()
-        
-        # Check that the session data contains required fields
-        call_args = mock_redis.setex.call_args
-        assert call_args[0][0].startswith("session:")
-        assert call_args[0][1] == 604800  # 7 days in seconds
-        session_data = json.loads(call_args[0][2])
+        pipe = mock_redis.pipeline.return_value
+        pipe.setex.assert_called_once()
+        pipe.execute.assert_called_once()
+
+        # Compact format: hashed fixed-length key, 12-byte payload, expiry in the TTL
+        key, ttl, payload = pipe.setex.call_args[0]
+        assert key == session_key(session_token)
+        assert len(key) == 18
+        assert ttl == 604800  # 7 days in seconds
+        assert len(payload) == 12
+        session_data, _ = decode_session(payload)
         assert session_data["user_id"] == 42
         assert "created_at" in session_data
         assert "expires_at" in session_data
 
+        # Indexed under the user in the same transaction, scored by expiry
+        expires_at = int(datetime.fromisoformat(session_data["expires_at"]).timestamp())
+        pipe.zadd.assert_called_once_with("user_sessions:42", {key: expires_at})
+        pipe.expire.assert_called_once_with("user_sessions:42", 604800)
+
 
 def test_get_session_user_valid():
-    mock_redis = MagicMock()
+    now = datetime.now(UTC)
+    mock_redis = redis_with({session_key("valid_token"): encode_session(42, now)})
+
+    with patch('backend.core.security.get_redis_client', return_value=mock_redis):
+        result = security.get_session_user("valid_token")
+
+        assert result == {
+            "user_id": 42,
+            "created_at": datetime.fromtimestamp(int(now.timestamp()), UTC).isoformat(),
+            "expires_at": datetime.fromtimestamp(int(now.timestamp()) + 604800, UTC).isoformat(),
+        }
+        mock_redis.get.assert_called_once_with(session_key("valid_token"))
+
+
+def test_get_session_user_legacy_format():
     now = datetime.now(UTC)
     session_data = {
         "user_id": 42,
         "created_at": now.isoformat(),
         "expires_at": (now + timedelta(days=1)).isoformat()
     }
-    mock_redis.get.return_value = json.dumps(session_data)
-    
+    mock_redis = redis_with({"session:valid_token": json.dumps(session_data)})
+
     with patch('backend.core.security.get_redis_client', return_value=mock_redis):
         result = security.get_session_user("valid_token")
-        
+
         assert result == session_data
-        mock_redis.get.assert_called_once_with("session:valid_token")
+        assert mock_redis.get.call_args_list[-1].args == ("session:valid_token",)
 
 
 def test_get_session_user_expired():
-    mock_redis = MagicMock()
     now = datetime.now(UTC)
     session_data = {
         "user_id": 42,
         "created_at": now.isoformat(),
         "expires_at": (now - timedelta(days=1)).isoformat()  # Expired
     }
-    mock_redis.get.return_value = json.dumps(session_data)
-    
+    mock_redis = redis_with({"session:expired_token": json.dumps(session_data)})
+
     with patch('backend.core.security.get_redis_client', return_value=mock_redis):
         result = security.get_session_user("expired_token")
-        
+
         assert result is None
         mock_redis.delete.assert_called_once_with("session:expired_token")
 
 
 def test_get_session_user_invalid_token():
-    mock_redis = MagicMock()
-    mock_redis.get.return_value = None
-    
+    mock_redis = redis_with({})
+
     with patch('backend.core.security.get_redis_client', return_value=mock_redis):
         result = security.get_session_user("invalid_token")
-        
+
         assert result is None
-        mock_redis.get.assert_called_once_with("session:invalid_token")
+        assert [c.args for c in mock_redis.get.call_args_list] == [
+            (session_key("invalid_token"),),
+            ("session:invalid_token",),
+        ]
 
 
 def test_get_session_user_no_token():
@@ -105,13 +154,16 @@ def test_get_session_user_no_token():
     assert result is None
 
 
-def test_get_session_user_malformed_json():
-    mock_redis = MagicMock()
-    mock_redis.get.return_value = "invalid json"
-    
+@pytest.mark.parametrize("store", [
+    {"session:malformed_token": "invalid json"},
+    {session_key("malformed_token"): b"too short"},
+])
+def test_get_session_user_malformed(store):
+    mock_redis = redis_with(store)
+
     with patch('backend.core.security.get_redis_client', return_value=mock_redis):
         result = security.get_session_user("malformed_token")
-        
+
         assert result is None
 
 
@@ -124,6 +176,7 @@ def test_login_user_success(monkeypatch):
     mock_redis = MagicMock()
 
     monkeypatch.setattr(security, "get_user_by_email", lambda email: mock_user)
+    monkeypatch.setattr(security, "update_user_password", MagicMock())
     with patch('backend.core.security.get_redis_client', return_value=mock_redis):
         result = security.login_user("test@example.com", "Correct1!")
         
@@ -132,6 +185,26 @@ def test_login_user_success(monkeypatch):
         assert result["email"] == "test@example.com"
         assert "session_token" in result
         assert isinstance(result["session_token"], str)
+        security.update_user_password.assert_not_called()
+
+
+def test_login_user_rehashes_outdated_cost(monkeypatch):
+    mock_user = {
+        "id": 42,
+        "email": "test@example.com",
+        "hashed_password": bcrypt.hashpw(b"Correct1!", bcrypt.gensalt(rounds=4)).decode()
+    }
+    mock_update = MagicMock()
+    monkeypatch.setattr(security, "get_user_by_email", lambda email: mock_user)
+    monkeypatch.setattr(security, "update_user_password", mock_update)
+    monkeypatch.setitem(PASSWORD_HASH_CONFIG, "rounds", 5)
+
+    with patch('backend.core.security.get_redis_client', return_value=MagicMock()):
+        assert security.login_user("test@example.com", "Correct1!") is not None
+
+    user_id, rehashed = mock_update.call_args.args
+    assert user_id == 42
+    assert rehashed.startswith("$2b$05$")
 
 
 def test_login_user_fail(monkeypatch):
@@ -150,27 +223,32 @@ def test_login_user_fail(monkeypatch):
 
 
 def test_logout_user_success():
-    mock_redis = MagicMock()
-    mock_redis.exists.return_value = True
-    
+    mock_redis = redis_with({session_key("valid_token"): encode_session(42, datetime.now(UTC))})
+    pipe = mock_redis.pipeline.return_value
+    pipe.execute.return_value = [1, 1]
+
     with patch('backend.core.security.get_redis_client', return_value=mock_redis):
         result = security.logout_user("valid_token")
-        
+
         assert result is True
-        mock_redis.exists.assert_called_once_with("session:valid_token")
-        mock_redis.delete.assert_called_once_with("session:valid_token")
+        pipe.delete.assert_called_once_with(
+            session_key("valid_token"), "session:valid_token"
+        )
+        pipe.zrem.assert_called_once_with("user_sessions:42", session_key("valid_token"))
+        mock_redis.publish.assert_called_once_with(
+            "session:invalidate", session_key("valid_token")
+        )
 
 
 def test_logout_user_fail():
-    mock_redis = MagicMock()
-    mock_redis.exists.return_value = False
-    
+    mock_redis = redis_with({})
+    mock_redis.pipeline.return_value.execute.return_value = [0]
+
     with patch('backend.core.security.get_redis_client', return_value=mock_redis):
         result = security.logout_user("invalid_token")
-        
+
         assert result is False
-        mock_redis.exists.assert_called_once_with("session:invalid_token")
-        mock_redis.delete.assert_not_called()
+        mock_redis.publish.assert_not_called()
 
 
 def test_logout_user_no_token():
@@ -179,3 +257,38 @@ def test_logout_user_no_token():
     
     result = security.logout_user("")
     assert result is False
+
+
+def test_logout_all_sessions():
+    mock_redis = MagicMock()
+    logout_all = mock_redis.register_script.return_value
+    logout_all.return_value = 3
+
+    with patch('backend.core.security.get_redis_client', return_value=mock_redis):
+        assert security.logout_all_sessions(42) == 3
+
+    keys = logout_all.call_args.kwargs["keys"]
+    mode, _, ttl = logout_all.call_args.kwargs["args"]
+    assert keys == ["user_sessions:42", "session:revoked"]
+    assert (mode, ttl) == ("redis", 604800)
+    mock_redis.publish.assert_called_once_with("session:invalidate", "user:42")
+    mock_redis.scan.assert_not_called()
+    mock_redis.keys.assert_not_called()
+
+
+def test_list_sessions_marks_current():
+    expires_at = int(datetime.now(UTC).timestamp()) + 3600
+    mock_redis = MagicMock()
+    mock_redis.zrangebyscore.return_value = [
+        (session_key("mine"), expires_at),
+        (session_key("other"), expires_at),
+    ]
+
+    with patch('backend.core.security.get_redis_client', return_value=mock_redis):
+        sessions = security.list_sessions(42, "mine")
+
+    assert mock_redis.zrangebyscore.call_args.args[0] == "user_sessions:42"
+    assert [s["current"] for s in sessions] == [True, False]
+    assert sessions[0]["id"] == session_key("mine")[2:].hex()
+    assert "mine" not in sessions[0]["id"]
+    assert datetime.fromisoformat(sessions[0]["expires_at"]).timestamp() == expires_at
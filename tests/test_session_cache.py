@@ -0,0 +1,175 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from backend.core import async_security, security, session_cache
+from backend.core.session_cache import INVALIDATION_CHANNEL, SessionCache
+from backend.core.session_store import encode_session, session_key
+
+SESSION = {"user_id": 42}
+KEY = session_key("tok")
+
+
+def later(seconds: float = 3600) -> datetime:
+    return datetime.now(UTC) + timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def cache():
+    local_cache = SessionCache(max_size=2, ttl=5)
+    with patch.object(session_cache, "_cache", local_cache):
+        yield local_cache
+
+
+def session_payload() -> bytes:
+    return encode_session(42, datetime.now(UTC))
+
+
+def test_session_cache_invalid_settings():
+    with pytest.raises(ValueError):
+        SessionCache(max_size=0)
+
+
+def test_session_cache_entry_expires_after_ttl():
+    local_cache = SessionCache(ttl=5)
+    with patch("backend.core.session_cache.time.monotonic", return_value=100.0):
+        local_cache.put(KEY, SESSION, later())
+        assert local_cache.get(KEY) == SESSION
+    with patch("backend.core.session_cache.time.monotonic", return_value=105.0):
+        assert local_cache.get(KEY) is None
+    assert len(local_cache) == 0
+
+
+def test_session_cache_never_outlives_session():
+    local_cache = SessionCache(ttl=5)
+    local_cache.put("expired", SESSION, later(-1))
+
+    assert local_cache.get("expired") is None
+
+
+def test_session_cache_evicts_least_recently_used(cache):
+    cache.put("a", {"user_id": 1}, later())
+    cache.put("b", {"user_id": 2}, later())
+    cache.get("a")
+    cache.put("c", {"user_id": 3}, later())
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"user_id": 1}
+    assert len(cache) == 2
+
+
+def test_helpers_are_noops_when_disabled():
+    with patch.object(session_cache, "_cache", None):
+        session_cache.remember_session(KEY, SESSION, later())
+        session_cache.forget_session(KEY)
+        session_cache.forget_all_sessions()
+        assert session_cache.cached_session(KEY) is None
+        assert session_cache.is_enabled() is False
+
+
+def test_helpers_record_hits_and_misses(cache):
+    with patch("backend.core.session_cache.record_session_cache_lookup") as lookup:
+        assert session_cache.cached_session(KEY) is None
+        session_cache.remember_session(KEY, SESSION, later())
+        assert session_cache.cached_session(KEY) == SESSION
+
+    assert [c.args for c in lookup.call_args_list] == [("miss",), ("hit",)]
+
+    session_cache.forget_all_sessions()
+    assert len(cache) == 0
+
+
+def test_sync_session_lookup_uses_cache(cache):
+    mock_redis = MagicMock()
+    mock_redis.get.return_value = session_payload()
+    mock_redis.exists.return_value = True
+    with patch("backend.core.security.get_redis_client", return_value=mock_redis):
+        assert security.get_session_user("tok")["user_id"] == 42
+        assert security.get_session_user("tok")["user_id"] == 42
+        mock_redis.get.assert_called_once_with(KEY)
+        # Cached and invalidated by the session key, never the token
+        assert cache.get(KEY)["user_id"] == 42
+
+        assert security.logout_user("tok") is True
+
+    mock_redis.publish.assert_called_once_with(INVALIDATION_CHANNEL, KEY)
+    assert cache.get(KEY) is None
+
+
+def test_async_session_lookup_uses_cache(cache):
+    mock_redis = AsyncMock()
+    mock_redis.get.return_value = session_payload()
+    mock_redis.pipeline = MagicMock(return_value=MagicMock(execute=AsyncMock(return_value=[1])))
+    with patch("backend.core.async_security.get_redis_client", return_value=mock_redis):
+        asyncio.run(async_security.get_session_user("tok"))
+        assert asyncio.run(async_security.get_session_user("tok"))["user_id"] == 42
+        mock_redis.get.assert_awaited_once_with(KEY)
+
+        assert asyncio.run(async_security.logout_user("tok")) is True
+
+    mock_redis.publish.assert_awaited_once_with(INVALIDATION_CHANNEL, KEY)
+    assert cache.get(KEY) is None
+
+
+def test_session_cache_evicts_all_sessions_of_a_user(cache):
+    cache.put(KEY, SESSION, later())
+    cache.put("other", {"user_id": 7}, later())
+
+    session_cache.forget_user_sessions(42)
+
+    assert cache.get(KEY) is None
+    assert cache.get("other") == {"user_id": 7}
+
+
+def test_invalidation_listener_evicts_user_sessions(cache):
+    cache.put(KEY, SESSION, later())
+    cache.put("other", {"user_id": 7}, later())
+
+    pubsub = AsyncMock()
+    pubsub.__aenter__.return_value = pubsub
+    pubsub.get_message.side_effect = [{"type": "message", "data": b"user:42"}, asyncio.CancelledError]
+    mock_redis = MagicMock()
+    mock_redis.pubsub.return_value = pubsub
+
+    with patch("backend.core.async_security.get_redis_client", return_value=mock_redis), \
+         pytest.raises(asyncio.CancelledError):
+        asyncio.run(async_security.listen_for_session_invalidations())
+
+    assert cache.get(KEY) is None
+    assert cache.get("other") == {"user_id": 7}
+
+
+def test_invalidation_listener_evicts_and_recovers(cache):
+    cache.put(KEY, SESSION, later())
+    cache.put("other", SESSION, later())
+
+    pubsub = AsyncMock()
+    pubsub.__aenter__.return_value = pubsub
+    pubsub.get_message.side_effect = [
+        None,
+        {"type": "message", "data": KEY},
+        ConnectionError("connection lost"),
+    ]
+    mock_redis = MagicMock()
+    mock_redis.pubsub.return_value = pubsub
+
+    evicted = []
+    real_forget_all = session_cache.forget_all_sessions
+
+    def forget_all():
+        evicted.append(cache.get("other"))
+        real_forget_all()
+
+    with patch("backend.core.async_security.get_redis_client", return_value=mock_redis), \
+         patch("backend.core.async_security.forget_all_sessions", side_effect=forget_all), \
+         patch("backend.core.async_security.asyncio.sleep",
+               new=AsyncMock(side_effect=asyncio.CancelledError)), \
+         pytest.raises(asyncio.CancelledError):
+        asyncio.run(async_security.listen_for_session_invalidations())
+
+    pubsub.subscribe.assert_awaited_once_with(INVALIDATION_CHANNEL)
+    # "tok" was evicted by its key's message, "other" only by the reset after the error
+    assert evicted == [SESSION]
+    assert len(cache) == 0
@@ -0,0 +1,184 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from backend.core import async_security, security, signed_sessions
+from backend.core.session_cache import INVALIDATION_CHANNEL
+from backend.core.signed_sessions import REVOKED_KEY, RevocationList, revocations
+
+
+@pytest.fixture
+def signed_mode():
+    with patch.dict(signed_sessions.SESSION_CONFIG, {"mode": "signed", "secret": "test-secret"}):
+        revocations.replace([])
+        revocations.mark_stale()
+        yield
+    revocations.replace([])
+    revocations.mark_stale()
+
+
+def test_issue_and_decode_token(signed_mode):
+    token = signed_sessions.issue_token(42)
+    session, token_id, expires_at = signed_sessions.decode_token(token)
+
+    assert set(session) == {"user_id", "created_at", "expires_at"}
+    assert session["user_id"] == 42
+    assert token_id == token.split(".")[3]
+    assert expires_at - int(token.split(".")[1]) == signed_sessions.SESSION_TTL_SECONDS
+
+
+@pytest.mark.parametrize("mangle", [
+    lambda t: t.replace("42.", "43.", 1),      # user id changed
+    lambda t: t[:-2] + "xx",                    # signature changed
+    lambda t: t.rsplit(".", 1)[0],              # signature missing
+    lambda t: t + "é",                          # non-ascii garbage
+    lambda t: "redis-mode-token",
+])
+def test_decode_rejects_tampered_tokens(signed_mode, mangle):
+    assert signed_sessions.decode_token(mangle(signed_sessions.issue_token(42))) is None
+
+
+def test_decode_rejects_expired_and_non_numeric_tokens(signed_mode):
+    expired = "42.100.200.abc"
+    non_numeric = "x.100.200.abc"
+
+    assert signed_sessions.decode_token(f"{expired}.{signed_sessions._sign(expired)}") is None
+    assert signed_sessions.decode_token(f"{non_numeric}.{signed_sessions._sign(non_numeric)}") is None
+
+
+def test_signing_requires_secret():
+    with patch.dict(signed_sessions.SESSION_CONFIG, {"secret": None}), \
+         pytest.raises(RuntimeError):
+        signed_sessions.issue_token(42)
+
+
+def test_revocation_list_refresh_drops_expired_entries():
+    revoked = RevocationList(refresh_interval=60)
+    assert revoked.needs_refresh()
+
+    revoked.replace([(b"live", 4102444800.0), (b"gone", 100.0)])
+
+    assert revoked.is_revoked("live")
+    assert not revoked.is_revoked("gone")
+    assert len(revoked) == 1
+    assert not revoked.needs_refresh()
+    revoked.mark_stale()
+    assert revoked.needs_refresh()
+
+
+def test_sync_signed_session_roundtrip(signed_mode):
+    mock_redis = MagicMock()
+    mock_redis.zrangebyscore.return_value = []
+    mock_redis.pipeline.return_value.execute.return_value = [1, 0, True, 1]
+    with patch("backend.core.security.get_redis_client", return_value=mock_redis):
+        token = security.create_session(42)
+        assert security.get_session_user(token)["user_id"] == 42
+        assert security.get_session_user(token)["user_id"] == 42
+
+        assert security.logout_user(token) is True
+        assert security.get_session_user(token) is None
+        assert security.logout_user("forged.token") is False
+        assert security.get_session_user("forged.token") is None
+
+    # Sessions are never stored, and the revocation set is read once per refresh
+    mock_redis.setex.assert_not_called()
+    mock_redis.get.assert_not_called()
+    mock_redis.zrangebyscore.assert_called_once()
+    pipe = mock_redis.pipeline.return_value
+    _, _, expires_at, token_id, _ = token.split(".")
+    pipe.zadd.assert_any_call("user_sessions:42", {token_id: int(expires_at)})
+    pipe.zadd.assert_any_call(REVOKED_KEY, {token_id: int(expires_at)})
+    pipe.zrem.assert_called_once_with("user_sessions:42", token_id)
+    pipe.publish.assert_called_once_with(INVALIDATION_CHANNEL, f"{token_id}:{expires_at}")
+
+
+def test_signed_logout_all_sessions(signed_mode):
+    mock_redis = MagicMock()
+    mock_redis.zrangebyscore.return_value = []
+    mock_redis.register_script.return_value.return_value = 2
+    with patch("backend.core.security.get_redis_client", return_value=mock_redis):
+        token = security.create_session(42)
+        assert security.get_session_user(token)["user_id"] == 42
+        assert not revocations.needs_refresh()
+
+        assert security.logout_all_sessions(42) == 2
+
+        # The script revoked the token ids in Redis; the mirror reloads them
+        assert revocations.needs_refresh()
+        assert security.list_sessions(42, token) == []
+
+    mode = mock_redis.register_script.return_value.call_args.kwargs["args"][0]
+    assert mode == "signed"
+    mock_redis.publish.assert_called_once_with(INVALIDATION_CHANNEL, "user:42")
+
+
+def test_async_signed_session_roundtrip(signed_mode):
+    mock_redis = MagicMock()
+    mock_redis.zrangebyscore = AsyncMock(return_value=[])
+    mock_redis.pipeline.return_value.execute = AsyncMock(return_value=[0, 0, True, 1])
+    with patch("backend.core.async_security.get_redis_client", return_value=mock_redis):
+        token = asyncio.run(async_security.create_session(7))
+        assert asyncio.run(async_security.get_session_user(token))["user_id"] == 7
+
+        # Already revoked elsewhere: ZADD adds nothing
+        assert asyncio.run(async_security.logout_user(token)) is False
+        assert asyncio.run(async_security.get_session_user(token)) is None
+        assert asyncio.run(async_security.logout_user("forged.token")) is False
+        assert asyncio.run(async_security.get_session_user("forged.token")) is None
+
+    mock_redis.zrangebyscore.assert_awaited_once()
+
+
+def test_async_signed_logout_all_and_list(signed_mode):
+    token = signed_sessions.issue_token(7)
+    _, _, expires_at, token_id, _ = token.split(".")
+    mock_redis = MagicMock()
+    mock_redis.zrangebyscore = AsyncMock(return_value=[(token_id.encode(), float(expires_at))])
+    mock_redis.register_script.return_value = AsyncMock(return_value=1)
+    mock_redis.publish = AsyncMock()
+    with patch("backend.core.async_security.get_redis_client", return_value=mock_redis):
+        sessions = asyncio.run(async_security.list_sessions(7, token))
+        assert [(s["id"], s["current"]) for s in sessions] == [(token_id, True)]
+
+        revocations.replace([])
+        assert asyncio.run(async_security.logout_all_sessions(7)) == 1
+        assert revocations.needs_refresh()
+
+
+def test_listener_applies_remote_revocations(signed_mode):
+    _, token_id, expires_at = signed_sessions.issue_session(42)
+    message = signed_sessions.revocation_message(token_id, expires_at)
+    pubsub = AsyncMock()
+    pubsub.__aenter__.return_value = pubsub
+    pubsub.get_message.side_effect = [
+        {"type": "message", "data": b"not-a-revocation"},
+        {"type": "message", "data": message.encode()},
+        ConnectionError("connection lost"),
+    ]
+    mock_redis = MagicMock()
+    mock_redis.pubsub.return_value = pubsub
+
+    with patch("backend.core.async_security.get_redis_client", return_value=mock_redis), \
+         patch("backend.core.async_security.asyncio.sleep",
+               new=AsyncMock(side_effect=asyncio.CancelledError)), \
+         pytest.raises(asyncio.CancelledError):
+        asyncio.run(async_security.listen_for_session_invalidations())
+
+    assert revocations.is_revoked(token_id)
+    assert revocations.needs_refresh()
+
+
+def test_listener_reloads_revocations_after_logout_everywhere(signed_mode):
+    revocations.replace([])
+    pubsub = AsyncMock()
+    pubsub.__aenter__.return_value = pubsub
+    pubsub.get_message.side_effect = [{"type": "message", "data": b"user:42"}, asyncio.CancelledError]
+    mock_redis = MagicMock()
+    mock_redis.pubsub.return_value = pubsub
+
+    with patch("backend.core.async_security.get_redis_client", return_value=mock_redis), \
+         pytest.raises(asyncio.CancelledError):
+        asyncio.run(async_security.listen_for_session_invalidations())
+
+    assert revocations.needs_refresh()
@@ -0,0 +1,60 @@
+from datetime import date
+from unittest.mock import MagicMock
+
+from backend.core.unique_views import (
+    HLL_TTL,
+    merge_live_unique_views,
+    queue_unique_view,
+    viewer_id,
+)
+from backend.core.view_encoding import session_hash
+
+DAY = date(2026, 1, 2)
+
+
+def test_viewer_id_prefers_user_over_session():
+    assert viewer_id(42, "session123") == "user:42"
+    assert viewer_id(None, "session123") == f"session:{session_hash('session123')}"
+    assert viewer_id(None, None) is None
+
+
+def test_queue_unique_view_claims_marker_and_counts_viewer():
+    pipe = MagicMock()
+
+    queue_unique_view(pipe, 7, "user:42", DAY)
+
+    pipe.set.assert_called_once_with("unique_view:7:user:42", 1, nx=True, ex=86400)
+    pipe.pfadd.assert_called_once_with("unique_viewers:2026-01-02:7", "user:42")
+    pipe.expire.assert_any_call("unique_viewers:2026-01-02:7", HLL_TTL)
+    pipe.sadd.assert_not_called()
+
+
+def test_queue_unique_view_counts_every_anonymous_view():
+    pipe = MagicMock()
+
+    queue_unique_view(pipe, 7, None, DAY)
+    queue_unique_view(pipe, 7, None, DAY)
+
+    pipe.set.assert_not_called()
+    first, second = (c.args[1] for c in pipe.pfadd.call_args_list)
+    assert first != second
+
+
+def test_merge_live_unique_views_only_raises_the_day():
+    analytics = {
+        "stats": {"unique_views": 10},
+        "daily_metrics": [
+            {"date": "2026-01-02", "unique_views_count": 4},
+            {"date": "2026-01-01", "unique_views_count": 6},
+        ],
+    }
+
+    merge_live_unique_views(analytics, DAY, 3)
+    assert analytics["stats"]["unique_views"] == 10
+
+    merge_live_unique_views(analytics, DAY, 9)
+    assert analytics["stats"]["unique_views"] == 15
+    assert [m["unique_views_count"] for m in analytics["daily_metrics"]] == [9, 6]
+
+    merge_live_unique_views(analytics, date(2025, 1, 1), 100)
+    assert analytics["stats"]["unique_views"] == 15
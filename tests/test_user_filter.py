@@ -0,0 +1,128 @@
+import os
+import sys
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.core.user_filter import (
+    FILTER_KEY,
+    filter_items,
+    insert_command,
+    rebuild_user_filter,
+)
+
+# manage.py uses bare module names ('from core.* import ...'), so add backend/
+_BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend"))
+if _BACKEND not in sys.path:
+    sys.path.insert(0, _BACKEND)
+
+import manage  # noqa: E402
+
+
+def test_filter_items_are_normalised():
+    assert filter_items(" Alice ", "Alice@Example.com") == [
+        "username:alice",
+        "email:alice@example.com",
+    ]
+    assert filter_items(email="a@b.com") == ["email:a@b.com"]
+    assert filter_items() == []
+
+
+def test_insert_command_never_creates_the_filter():
+    assert insert_command(["username:alice"]) == (
+        "BF.INSERT",
+        FILTER_KEY,
+        "NOCREATE",
+        "ITEMS",
+        "username:alice",
+    )
+
+
+def test_rebuild_fills_temp_key_in_batches_and_renames():
+    redis = MagicMock()
+    rows = [("alice", "a@x.com"), ("bob", "b@x.com"), ("carol", "c@x.com")]
+
+    assert rebuild_user_filter(redis, rows, 100, 0.01, batch_size=4) == 3
+
+    reserve, first, second = redis.execute_command.call_args_list
+    temp_key = reserve.args[1]
+    assert temp_key.startswith(f"{FILTER_KEY}:rebuild:")
+    assert reserve.args == ("BF.RESERVE", temp_key, 0.01, 100)
+    assert first.args == (
+        "BF.MADD", temp_key, "username:alice", "email:a@x.com", "username:bob", "email:b@x.com"
+    )
+    assert second.args == ("BF.MADD", temp_key, "username:carol", "email:c@x.com")
+    redis.rename.assert_called_once_with(temp_key, FILTER_KEY)
+    redis.delete.assert_not_called()
+
+
+def test_rebuild_drops_temp_key_on_error():
+    redis = MagicMock()
+    redis.execute_command.side_effect = [True, RuntimeError("boom")]
+
+    with pytest.raises(RuntimeError):
+        rebuild_user_filter(redis, [("alice", "a@x.com")], 100, 0.01)
+
+    temp_key = redis.execute_command.call_args_list[0].args[1]
+    redis.delete.assert_called_once_with(temp_key)
+    redis.rename.assert_not_called()
+
+
+def _connection(recent_rows):
+    cutoff_cursor = MagicMock()
+    cutoff_cursor.fetchone.return_value = {"cutoff": "2024-01-01 00:00:00"}
+    stream_cursor = MagicMock()
+    stream_cursor.__iter__.return_value = iter([{"username": "alice", "email": "a@x.com"}])
+    recent_cursor = MagicMock()
+    recent_cursor.fetchall.return_value = recent_rows
+
+    cursors = iter([cutoff_cursor, stream_cursor, recent_cursor])
+    conn = MagicMock()
+    conn.cursor.side_effect = lambda **kwargs: MagicMock(
+        __enter__=MagicMock(return_value=next(cursors))
+    )
+
+    @contextmanager
+    def get_db_connection():
+        yield conn
+
+    return get_db_connection, conn, recent_cursor
+
+
+def test_manage_rebuild_user_filter_adds_recent_registrations(capsys):
+    get_db_connection, conn, recent_cursor = _connection(
+        [{"username": "bob", "email": "b@x.com"}]
+    )
+    redis = MagicMock()
+
+    with (
+        patch("manage.db.get_db_connection", get_db_connection),
+        patch("manage.get_redis_client", return_value=redis),
+    ):
+        assert manage.main(["rebuild-user-filter", "--capacity", "10", "--batch-size", "50"]) == 0
+
+    conn.cursor.assert_any_call(name="user_filter_rebuild")
+    recent_cursor.execute.assert_called_once_with(
+        manage.queries.SELECT_USER_NAMES_SINCE, ("2024-01-01 00:00:00",)
+    )
+    assert redis.execute_command.call_args_list[0].args[3] == 10
+    redis.rename.assert_called_once()
+    redis.execute_command.assert_called_with(
+        "BF.INSERT", FILTER_KEY, "NOCREATE", "ITEMS", "username:bob", "email:b@x.com"
+    )
+    assert "1 users" in capsys.readouterr().out
+
+
+def test_manage_rebuild_user_filter_without_recent_registrations():
+    get_db_connection, _, _ = _connection([])
+    redis = MagicMock()
+
+    with (
+        patch("manage.db.get_db_connection", get_db_connection),
+        patch("manage.get_redis_client", return_value=redis),
+    ):
+        assert manage.main(["rebuild-user-filter"]) == 0
+
+    commands = [c.args[0] for c in redis.execute_command.call_args_list]
+    assert commands == ["BF.RESERVE", "BF.MADD"]
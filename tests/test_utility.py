@@ -1,8 +1,14 @@
 from datetime import datetime
+from types import SimpleNamespace
 
 import pytest
 
-from backend.core.utility import json_serializer
+from backend.core.utility import (
+    POSTING_HASH_ALPHABET,
+    client_ip,
+    generate_posting_hash,
+    json_serializer,
+)
 
 
 def test_json_serializer_with_datetime():
@@ -14,3 +20,40 @@ def test_json_serializer_with_wrong_type():
     with pytest.raises(TypeError) as excinfo:
         json_serializer(123)
     assert "not serializable" in str(excinfo.value)
+
+
+def request(peer, headers=None):
+    client = SimpleNamespace(host=peer) if peer else None
+    return SimpleNamespace(client=client, headers=headers or {})
+
+
+def test_client_ip():
+    assert client_ip(request("203.0.113.5")) == "203.0.113.5"
+    assert client_ip(request(None)) is None
+
+
+@pytest.mark.parametrize("peer, headers, expected", [
+    # Not a proxy, so its headers are ignored
+    ("203.0.113.5", {"x-forwarded-for": "198.51.100.7"}, "203.0.113.5"),
+    # Through nginx: the client's own X-Forwarded-For entries are not believed
+    ("10.0.0.2", {"x-forwarded-for": "1.2.3.4, 198.51.100.7"}, "198.51.100.7"),
+    # Through the ingress and nginx
+    ("10.0.0.2", {"x-forwarded-for": "198.51.100.7, 10.0.0.9"}, "198.51.100.7"),
+    ("10.0.0.2", {"x-real-ip": "198.51.100.7"}, "198.51.100.7"),
+    ("10.0.0.2", {"x-forwarded-for": "::FFFF:198.51.100.7"}, "::ffff:c633:6407"),
+    # Only proxies, or no header: the furthest proxy is all there is
+    ("10.0.0.2", {"x-forwarded-for": "10.0.0.9"}, "10.0.0.9"),
+    ("10.0.0.2", {}, "10.0.0.2"),
+    # Garbage is not an address a proxy would write
+    ("10.0.0.2", {"x-forwarded-for": "unknown, 10.0.0.9"}, "10.0.0.9"),
+])
+def test_client_ip_behind_trusted_proxies(peer, headers, expected):
+    assert client_ip(request(peer, headers)) == expected
+
+
+def test_generate_posting_hash():
+    hashes = {generate_posting_hash() for _ in range(100)}
+
+    assert len(hashes) == 100
+    assert all(len(h) == 12 and set(h) <= set(POSTING_HASH_ALPHABET) for h in hashes)
+    assert len(generate_posting_hash(8)) == 8
@@ -0,0 +1,227 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from backend.core import queries, view_buffer
+from backend.core.migrations import apply_migrations
+from backend.core.view_buffer import PostingView, ViewBuffer
+from backend.core.view_encoding import session_hash
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def view(posting_id=1, user_id=None, session_id=None, viewed_at=None, is_unique=None):
+    return PostingView(
+        posting_id, user_id, "10.0.0.1", "pytest", session_hash(session_id),
+        viewed_at or datetime.now(UTC), is_unique,
+    )
+
+
+@pytest.fixture
+def record():
+    with patch("backend.core.view_buffer.async_db.record_posting_views",
+               new=AsyncMock()) as recorded:
+        yield recorded
+
+
+def test_view_buffer_invalid_sizes():
+    with pytest.raises(ValueError):
+        ViewBuffer(batch_size=0)
+
+
+def test_flush_writes_oldest_batch(record):
+    buffer = ViewBuffer(batch_size=2)
+    views = [view(posting_id=i) for i in range(3)]
+    for v in views:
+        assert buffer.offer(v)
+
+    with patch("backend.core.view_buffer.record_view_flush") as flushed:
+        assert run(buffer.flush()) == 2
+
+    record.assert_awaited_once_with(views[:2])
+    assert flushed.call_args.args[0] == 2
+    assert flushed.call_args.args[2] == "success"
+    assert len(buffer) == 1
+    assert run(buffer.flush()) == 1
+    assert run(buffer.flush()) == 0
+
+
+def test_failed_flush_keeps_views_in_order(record):
+    buffer = ViewBuffer(batch_size=2)
+    views = [view(posting_id=i) for i in range(3)]
+    for v in views:
+        buffer.offer(v)
+    record.side_effect = [RuntimeError("db down"), None, None]
+
+    with pytest.raises(RuntimeError):
+        run(buffer.flush())
+    run(buffer.flush_all())
+
+    assert [c.args[0] for c in record.await_args_list] == [views[:2], views[:2], views[2:]]
+    assert len(buffer) == 0
+
+
+def test_flush_all_stops_at_first_failure(record):
+    buffer = ViewBuffer(batch_size=1)
+    buffer.offer(view())
+    buffer.offer(view())
+    record.side_effect = RuntimeError("db down")
+
+    run(buffer.flush_all())
+
+    record.assert_awaited_once()
+    assert len(buffer) == 2
+
+
+def test_offer_refuses_when_full(record):
+    buffer = ViewBuffer(max_size=1)
+    assert buffer.offer(view())
+    with patch("backend.core.view_buffer.record_view_buffer_overflow") as overflow:
+        assert not buffer.offer(view())
+    overflow.assert_called_once()
+
+
+def test_full_batch_flushes_before_interval(record):
+    async def scenario():
+        buffer = ViewBuffer(batch_size=2, flush_interval=60)
+        buffer.start()
+        buffer.offer(view())
+        await asyncio.sleep(0.01)
+        record.assert_not_awaited()
+
+        buffer.offer(view())
+        await asyncio.sleep(0.01)
+        record.assert_awaited_once()
+        await buffer.close()
+
+    run(scenario())
+
+
+def test_close_drains_queue(record):
+    async def scenario():
+        buffer = ViewBuffer(batch_size=10, flush_interval=60)
+        buffer.start()
+        buffer.offer(view())
+        await buffer.close()
+        return buffer
+
+    assert len(run(scenario())) == 0
+    record.assert_awaited_once()
+
+
+@pytest.fixture
+def direct():
+    with patch("backend.core.view_buffer.async_db.track_posting_view",
+               new=AsyncMock(return_value=True)) as track, \
+         patch("backend.core.view_buffer.async_db.claim_unique_view",
+               new=AsyncMock(return_value=False)):
+        yield track
+
+
+def test_track_posting_view_buffers_when_enabled(record, direct):
+    async def scenario():
+        with patch.dict(view_buffer.VIEW_TRACKING_CONFIG, {"mode": "buffered"}):
+            buffer = view_buffer.init_view_buffer()
+            assert view_buffer.init_view_buffer() is buffer
+            assert await view_buffer.track_posting_view(
+                1, 42, "not-an-ip", "pytest", "session123"
+            ) is False
+            assert buffer._views[0].ip_address is None
+            assert buffer._views[0].is_unique is False
+            await view_buffer.close_view_buffer()
+
+    run(scenario())
+    direct.assert_not_awaited()
+    assert view_buffer._buffer is None
+    record.assert_awaited_once()
+
+
+def test_track_posting_view_writes_directly_in_sync_mode(direct):
+    async def scenario():
+        with patch.dict(view_buffer.VIEW_TRACKING_CONFIG, {"mode": "sync"}):
+            assert view_buffer.init_view_buffer() is None
+            assert await view_buffer.track_posting_view(1, ip_address="::1") is True
+            await view_buffer.close_view_buffer()
+
+    run(scenario())
+    direct.assert_awaited_once_with(1, None, "::1", None, None)
+
+
+def test_track_posting_view_writes_batch_of_one_when_full(record, direct):
+    buffer = ViewBuffer(max_size=1)
+    buffer.offer(view())
+    with patch.object(view_buffer, "_buffer", buffer):
+        assert run(view_buffer.track_posting_view(1, session_id="s")) is False
+
+    # The marker is already claimed, so the view is written as decided
+    direct.assert_not_awaited()
+    written = record.await_args.args[0]
+    assert [(v.session_hash, v.is_unique) for v in written] == [(session_hash("s"), False)]
+
+
+def test_batch_query_counts_and_dedupes(pg_conn):
+    apply_migrations(pg_conn)
+    now = datetime.now(UTC)
+    with pg_conn.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO users (name, surname, username, email, user_type, hashed_password)
+            VALUES ('A', 'B', 'viewer', 'viewer@example.com', 'regular', 'x')
+            RETURNING id
+            """
+        )
+        user_id = cursor.fetchone()["id"]
+        cursor.execute(
+            queries.INSERT_POSTING, ("T", "D", "IT", user_id, "viewbatch001")
+        )
+        cursor.execute("SELECT id FROM postings")
+        posting_id = cursor.fetchone()["id"]
+        cursor.execute(
+            queries.INSERT_POSTING_VIEW,
+            (posting_id, None, None, None, session_hash("seen"), True),
+        )
+        pg_conn.commit()
+
+        # Uniqueness left to the 24h check (Redis was down), then decided
+        views = [
+            view(posting_id, user_id=user_id),
+            view(posting_id, user_id=user_id),   # same user again
+            view(posting_id, session_id="seen"),  # viewed before the batch
+            view(posting_id, session_id="new"),
+            view(posting_id),                     # anonymous, always unique
+            view(posting_id, user_id=999999),     # deleted user
+            view(999999, session_id="gone"),      # deleted posting
+            view(posting_id, session_id="old", viewed_at=now - timedelta(days=2)),
+            view(posting_id, session_id="seen", is_unique=True),
+            view(posting_id, session_id="new", is_unique=False),
+        ]
+        columns = [list(column) for column in zip(*views, strict=True)]
+        columns[3] = [None] * len(views)  # user agents resolved by core.db
+        cursor.execute(queries.INSERT_POSTING_VIEWS_BATCH, columns)
+        pg_conn.commit()
+
+        cursor.execute(
+            "SELECT user_id, session_hash, is_unique_view FROM posting_views ORDER BY id"
+        )
+        seen, new, old = session_hash("seen"), session_hash("new"), session_hash("old")
+        assert [tuple(row.values()) for row in cursor.fetchall()] == [
+            (None, seen, True),
+            (user_id, None, True),
+            (user_id, None, False),
+            (None, seen, False),
+            (None, new, True),
+            (None, None, True),
+            (None, None, True),
+            (None, old, True),
+            (None, seen, True),
+            (None, new, False),
+        ]
+        # Only appended; the rollup worker does the counting
+        cursor.execute("SELECT views FROM postings")
+        assert cursor.fetchone()["views"] == 0
+        cursor.execute("SELECT count(*) FROM posting_metrics")
+        assert cursor.fetchone()["count"] == 0
@@ -0,0 +1,90 @@
+from unittest.mock import patch
+
+import pytest
+
+from backend.core import queries, view_encoding
+from backend.core.migrations import apply_migrations
+from backend.core.view_encoding import (
+    USER_AGENT_MAX_LENGTH,
+    UserAgentCache,
+    cached_user_agent_ids,
+    normalize_user_agent,
+    remember_user_agent_ids,
+    session_hash,
+)
+
+
+def test_user_agent_cache_invalid_size():
+    with pytest.raises(ValueError):
+        UserAgentCache(max_size=0)
+
+
+def test_user_agent_cache_evicts_least_recently_used():
+    cache = UserAgentCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the oldest
+
+    cache.put("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+
+def test_normalize_user_agent():
+    assert normalize_user_agent(None) is None
+    assert normalize_user_agent("") is None
+    assert normalize_user_agent("Firefox") == "Firefox"
+    assert normalize_user_agent("x" * 600) == "x" * USER_AGENT_MAX_LENGTH
+
+
+def test_cached_user_agent_ids_splits_known_from_missing():
+    with patch.object(view_encoding, "_cache", UserAgentCache(max_size=10)):
+        assert remember_user_agent_ids([{"id": 1, "user_agent": "A"}]) == {"A": 1}
+
+        known, missing = cached_user_agent_ids(["C", "A", None, "B", "C", "A"])
+
+    assert known == {"A": 1}
+    assert missing == ["B", "C"]
+
+
+def test_session_hash():
+    assert session_hash(None) is None
+    assert session_hash("") is None
+    assert session_hash("token") == session_hash("token")
+    assert session_hash("token") != session_hash("other")
+    assert -(2**63) <= session_hash("token") < 2**63
+
+
+# Against Postgres (pg_conn: a scratch schema, see conftest)
+
+
+def test_session_hash_matches_migration(pg_conn):
+    tokens = ["token", "Ünïcode", "x" * 300]
+    with pg_conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT ('x' || encode(substr(sha256(convert_to(t, 'UTF8')), 1, 8), 'hex'))"
+            "::bit(64)::bigint as hash FROM unnest(%s::text[]) WITH ORDINALITY u(t, n)"
+            " ORDER BY n",
+            (tokens,),
+        )
+        assert [row["hash"] for row in cursor.fetchall()] == [
+            session_hash(token) for token in tokens
+        ]
+
+
+def test_upsert_user_agents_returns_existing_and_added(pg_conn):
+    apply_migrations(pg_conn)
+    with pg_conn.cursor() as cursor:
+        cursor.execute(queries.UPSERT_USER_AGENTS, (["B", "A"],))
+        first = {row["user_agent"]: row["id"] for row in cursor.fetchall()}
+        cursor.execute(queries.UPSERT_USER_AGENTS, (["C", "A", "B", "C"],))
+        second = {row["user_agent"]: row["id"] for row in cursor.fetchall()}
+        cursor.execute("SELECT count(*) FROM user_agents")
+        count = cursor.fetchone()["count"]
+
+    # Added in order, so a batch locks its rows in the same order everywhere
+    assert first == {"A": 1, "B": 2}
+    assert second == {**first, "C": 3}
+    assert count == 3
@@ -0,0 +1,301 @@
+import os
+import sys
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.core import partitions, queries
+from backend.core.migrations import apply_migrations
+from backend.core.partitions import (
+    Partition,
+    create_partitions,
+    expire_partitions,
+    list_partitions,
+    maintain_view_partitions,
+    partition_name,
+)
+
+# manage.py uses bare module names ('from core.* import ...'), so add backend/
+_BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend"))
+if _BACKEND not in sys.path:
+    sys.path.insert(0, _BACKEND)
+
+import manage  # noqa: E402
+
+DAY = timedelta(days=1)
+
+CATALOG = [
+    {"name": "posting_views_default", "bound": "DEFAULT"},
+    {
+        "name": "posting_views_p20260103",
+        "bound": "FOR VALUES FROM ('2026-01-03 00:00:00') TO ('2026-01-04 00:00:00')",
+    },
+    {
+        "name": "posting_views_legacy",
+        "bound": "FOR VALUES FROM (MINVALUE) TO ('2026-01-02 00:00:00')",
+    },
+]
+
+
+def _statements(cursor) -> list:
+    return [call.args for call in cursor.execute.call_args_list]
+
+
+def test_partition_name():
+    assert partition_name(date(2026, 1, 2)) == "posting_views_p20260102"
+
+
+def test_list_partitions_parses_bounds_oldest_first():
+    cursor = MagicMock()
+    cursor.fetchall.return_value = CATALOG
+
+    assert list_partitions(cursor) == [
+        Partition("posting_views_legacy", None, datetime(2026, 1, 2)),
+        Partition(
+            "posting_views_p20260103", datetime(2026, 1, 3), datetime(2026, 1, 4)
+        ),
+    ]
+
+
+def test_create_partitions_skips_covered_days(mock_conn, mock_cursor):
+    mock_cursor.fetchall.return_value = CATALOG
+
+    created = create_partitions(mock_conn, date(2026, 1, 1), date(2026, 1, 4))
+
+    # Jan 1 is in the legacy partition and Jan 3 has its own
+    assert created == ["posting_views_p20260102", "posting_views_p20260104"]
+    start, end = datetime(2026, 1, 4), datetime(2026, 1, 5)
+    assert _statements(mock_cursor)[-5:] == [
+        (partitions.SET_LOCK_TIMEOUT,),
+        (partitions.STASH_STRAYS, (start, end)),
+        (partitions.DELETE_STRAYS, (start, end)),
+        (
+            "CREATE TABLE posting_views_p20260104 PARTITION OF posting_views"
+            " FOR VALUES FROM (%s) TO (%s)",
+            (start, end),
+        ),
+        (partitions.RESTORE_STRAYS,),
+    ]
+    # The catalog read, then one transaction per partition
+    assert mock_conn.commit.call_count == 3
+
+
+@pytest.mark.parametrize(
+    "detach, statement",
+    [
+        (False, "DROP TABLE posting_views_legacy"),
+        (True, "ALTER TABLE posting_views DETACH PARTITION posting_views_legacy"),
+    ],
+)
+def test_expire_partitions(mock_conn, mock_cursor, detach, statement):
+    mock_cursor.fetchall.return_value = CATALOG
+
+    expired = expire_partitions(mock_conn, date(2026, 1, 3), detach=detach)
+
+    assert expired == ["posting_views_legacy"]
+    assert _statements(mock_cursor)[1:] == [
+        (partitions.SET_LOCK_TIMEOUT,),
+        (statement,),
+        (partitions.DELETE_EXPIRED_STRAYS, (datetime(2026, 1, 3),)),
+    ]
+
+
+def test_maintain_view_partitions_from_database_date(mock_conn, mock_cursor):
+    mock_cursor.fetchone.return_value = {"today": date(2026, 1, 3)}
+    with (
+        patch("backend.core.partitions.create_partitions", return_value=["a"]) as create,
+        patch("backend.core.partitions.expire_partitions", return_value=["b"]) as expire,
+    ):
+        assert maintain_view_partitions(mock_conn, 3, 90, detach=True) == (["a"], ["b"])
+
+    create.assert_called_once_with(mock_conn, date(2026, 1, 3), date(2026, 1, 6))
+    expire.assert_called_once_with(mock_conn, date(2025, 10, 5), True)
+
+
+def test_maintain_view_partitions_rejects_short_retention(mock_conn):
+    with pytest.raises(ValueError, match="at least 2 days"):
+        maintain_view_partitions(mock_conn, 3, 1)
+    mock_conn.cursor.assert_not_called()
+
+
+@pytest.fixture
+def manage_conn():
+    conn = MagicMock()
+
+    @contextmanager
+    def get_db_connection():
+        yield conn
+
+    with patch("manage.db.get_db_connection", get_db_connection):
+        yield conn
+
+
+def test_manage_maintain_view_partitions(manage_conn, capsys):
+    with patch(
+        "manage.maintain_view_partitions",
+        return_value=(["posting_views_p20260106"], ["posting_views_p20251004"]),
+    ) as maintain:
+        assert manage.main(["maintain-view-partitions"]) == 0
+        assert (
+            manage.main(["maintain-view-partitions", "--retention-days", "30", "--detach"])
+            == 0
+        )
+
+    assert maintain.call_args_list[0].args == (manage_conn, 3, 90)
+    assert maintain.call_args_list[0].kwargs == {"detach": False}
+    assert maintain.call_args_list[1].args == (manage_conn, 3, 30)
+    assert maintain.call_args_list[1].kwargs == {"detach": True}
+    out = capsys.readouterr().out
+    assert "View partitions: 1 created, 1 dropped" in out
+    assert "Created posting_views_p20260106" in out
+    assert "Detached posting_views_p20251004" in out
+
+
+def test_manage_downsample_metrics(manage_conn, capsys):
+    with patch("manage.downsample_daily_metrics", return_value=(62, 2)) as downsample:
+        assert manage.main(["downsample-metrics", "--retention-days", "60"]) == 0
+
+    downsample.assert_called_once_with(manage_conn, 60)
+    assert "62 posting days into 2 months" in capsys.readouterr().out
+
+
+# Against Postgres
+
+
+def _executed_partitions(cursor, sql: str, params) -> set[str]:
+    """Partitions of posting_views the statement actually scanned"""
+    cursor.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + sql, params)
+    executed = set()
+    nodes = [cursor.fetchone()["QUERY PLAN"][0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get("Plans", []))
+        # Partitions pruned at run time stay in the plan, never executed
+        if node.get("Relation Name", "").startswith("posting_views_") and node.get(
+            "Actual Loops"
+        ):
+            executed.add(node["Relation Name"])
+    return executed
+
+
+def _partition_of_views(cursor) -> dict:
+    cursor.execute("SELECT id, tableoid::regclass::text as partition FROM posting_views")
+    return {row["id"]: row["partition"] for row in cursor.fetchall()}
+
+
+def test_reads_and_writes_prune_old_partitions(pg_conn):
+    apply_migrations(pg_conn)
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT CURRENT_DATE as today")
+        today = cursor.fetchone()["today"]
+    pg_conn.commit()
+    assert create_partitions(pg_conn, today - 10 * DAY, today + 3 * DAY) == [
+        partition_name(today - offset * DAY) for offset in range(10, 0, -1)
+    ]
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO users (name, surname, username, email, user_type, hashed_password)"
+            " VALUES ('A', 'B', 'owner', 'owner@example.com', 'regular', 'x') RETURNING id"
+        )
+        user_id = cursor.fetchone()["id"]
+        cursor.execute(queries.INSERT_POSTING, ("T", "D", "IT", user_id, "partition001"))
+        cursor.execute("SELECT id FROM postings")
+        posting_id = cursor.fetchone()["id"]
+        # A view on each of the last ten days and one now
+        cursor.execute(
+            "INSERT INTO posting_views (posting_id, user_id, session_hash, viewed_at)"
+            " SELECT %s, %s, 7, d + INTERVAL '12 hours'"
+            " FROM generate_series(CURRENT_DATE - 10, CURRENT_DATE - 1, INTERVAL '1 day') d",
+            (posting_id, user_id),
+        )
+        cursor.execute(queries.INSERT_POSTING_VIEW, (posting_id, user_id, None, None, 7, True))
+        cursor.execute("UPDATE rollup_watermarks SET watermark = LOCALTIMESTAMP - INTERVAL '1 hour'")
+        pg_conn.commit()
+
+        views = _partition_of_views(cursor)
+        assert sorted(views.values())[-1] == partition_name(today)
+        assert "posting_views_default" not in views.values()
+
+        now = datetime.combine(today, datetime.min.time()) + timedelta(hours=12)
+        statements = [
+            (queries.SELECT_RECENT_VIEW_BY_USER, (posting_id, user_id)),
+            (queries.SELECT_RECENT_VIEW_BY_SESSION, (posting_id, 7)),
+            (queries.SELECT_POSTING_WITH_PUBLIC_STATS, (posting_id,)),
+            (queries.SELECT_POSTING_ANALYTICS, (posting_id, user_id)),
+            (queries.SELECT_POSTING_HOURLY_METRICS, (posting_id,) * 3),
+            (queries.SELECT_USER_POSTING_OVERVIEW, (user_id,)),
+            (queries.SELECT_USER_TOP_POSTINGS, (user_id,)),
+            (queries.SELECT_USER_RECENT_ACTIVITY, (user_id,) * 3),
+            (queries.SELECT_USER_HOURLY_ACTIVITY, (user_id,) * 3),
+            (queries.ROLLUP_HOURLY_METRICS, (now - timedelta(hours=2), now)),
+            (
+                queries.INSERT_POSTING_VIEWS_BATCH,
+                ([posting_id], [user_id], [None], [None], [7], [now], [None]),
+            ),
+        ]
+        # Views within the last 24 hours can be on yesterday's partition
+        old = {partition_name(today - offset * DAY) for offset in range(2, 11)}
+        for sql, params in statements:
+            assert not _executed_partitions(cursor, sql, params) & old, sql
+        pg_conn.rollback()
+
+
+def test_create_partitions_moves_views_out_of_the_default_partition(pg_conn):
+    apply_migrations(pg_conn)
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT CURRENT_DATE as today")
+        today = cursor.fetchone()["today"]
+        cursor.execute(
+            "INSERT INTO posting_views (viewed_at) VALUES"
+            " (CURRENT_DATE + 10 + INTERVAL '1 hour'), (CURRENT_DATE + 11)"
+        )
+        pg_conn.commit()
+        assert set(_partition_of_views(cursor).values()) == {"posting_views_default"}
+
+        assert create_partitions(pg_conn, today + 10 * DAY, today + 10 * DAY) == [
+            partition_name(today + 10 * DAY)
+        ]
+        assert sorted(_partition_of_views(cursor).values()) == [
+            "posting_views_default",
+            partition_name(today + 10 * DAY),
+        ]
+
+
+def test_maintain_view_partitions_expires_old_days(pg_conn):
+    apply_migrations(pg_conn)
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT CURRENT_DATE as today")
+        today = cursor.fetchone()["today"]
+    pg_conn.commit()
+    create_partitions(pg_conn, today - 10 * DAY, today)
+    with pg_conn.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO posting_views (viewed_at) VALUES"
+            " (CURRENT_DATE - 30), (CURRENT_DATE - 6), (CURRENT_DATE - 5), (LOCALTIMESTAMP)"
+        )
+    pg_conn.commit()
+
+    created, expired = maintain_view_partitions(pg_conn, 5, 5)
+    assert created == [partition_name(today + offset * DAY) for offset in (4, 5)]
+    assert expired == [partition_name(today - offset * DAY) for offset in range(10, 5, -1)]
+    # Rerunning has nothing left to do
+    assert maintain_view_partitions(pg_conn, 5, 5) == ([], [])
+
+    created, expired = maintain_view_partitions(pg_conn, 5, 3, detach=True)
+    assert expired == [partition_name(today - offset * DAY) for offset in (5, 4)]
+
+    with pg_conn.cursor() as cursor:
+        # The view of 30 days ago was in the default partition
+        assert sorted(_partition_of_views(cursor).values()) == [partition_name(today)]
+        cursor.execute(
+            "SELECT to_regclass(%s) as dropped, to_regclass(%s) as detached",
+            (partition_name(today - 6 * DAY), partition_name(today - 5 * DAY)),
+        )
+        row = cursor.fetchone()
+        assert row["dropped"] is None
+        assert row["detached"] is not None
+        cursor.execute(f"SELECT count(*) FROM {partition_name(today - 5 * DAY)}")
+        assert cursor.fetchone()["count"] == 1